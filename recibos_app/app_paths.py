@@ -89,3 +89,12 @@ def get_pdf_dir(*subpaths: str) -> str:
         base = os.path.join(base, *subpaths)
     os.makedirs(base, exist_ok=True)
     return base
+
+
+def get_cache_dir(*subpaths: str) -> str:
+    """Pasta de cache local da máquina (fora da pasta de dados compartilhada)."""
+    base = os.path.join(_get_config_dir(), "cache")
+    if subpaths:
+        base = os.path.join(base, *subpaths)
+    os.makedirs(base, exist_ok=True)
+    return base
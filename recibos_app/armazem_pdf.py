@@ -0,0 +1,361 @@
+"""Armazenamento de PDFs endereçado por conteúdo.
+
+Cada PDF é guardado uma única vez, com o SHA-256 do conteúdo como nome, em
+<pasta-de-PDFs>/Objetos/ab/cd/<hash>.pdf (dois níveis de subpastas para
+manter as listagens curtas no compartilhamento). A tabela pdf_catalogo liga
+recibos, sessões e relatórios aos blobs; o que nenhuma entrada referencia
+é removido por coletar_lixo(). Meses fechados podem ser empacotados em
+Pacotes/AAAA-MM.zip, e os blobs continuam acessíveis por caminho_blob().
+
+Relatórios de sessão e de período são regerados a cada pedido: só a versão
+mais recente de cada referência fica no catálogo, e as anteriores viram
+lixo. Os geradores usam canvas invariant e não carimbam a hora, então os
+mesmos dados produzem os mesmos bytes e o mesmo blob.
+
+guardar() e coletar_lixo() mexem nos arquivos dentro da transação de
+escrita do catálogo: uma coleta nunca apaga um blob que um guardar()
+concorrente decidiu reaproveitar.
+"""
+
+import hashlib
+import logging
+import os
+import shutil
+import tempfile
+import time
+import zipfile
+from datetime import datetime
+from typing import Iterable, List
+
+from app_paths import get_cache_dir, get_pdf_dir
+from database import get_connection
+from escrita import executar_escrita
+
+logger = logging.getLogger(__name__)
+
+RECIBO = "RECIBO"
+SESSAO = "SESSAO"
+FECHAMENTO = "FECHAMENTO"
+RELATORIO = "RELATORIO"
+
+# Tipos em que uma nova versão substitui as anteriores da mesma referência
+_SUBSTITUIVEIS = (SESSAO, RELATORIO)
+
+# Arquivos soltos mais novos que isso podem ser de uma gravação em andamento
+# em outra máquina (o blob é gravado antes da linha no banco)
+IDADE_MINIMA_ORFAO_S = 3600
+
+_tabelas_ok = False
+
+
+def _agora() -> str:
+    return datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+
+def garantir_tabelas(conn=None) -> None:
+    global _tabelas_ok
+    if _tabelas_ok:
+        return
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pdf_blobs (
+              hash TEXT PRIMARY KEY,
+              tamanho INTEGER NOT NULL,
+              pacote TEXT,
+              created_at TEXT
+            );
+            """
+        )
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pdf_catalogo (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              tipo TEXT NOT NULL,
+              referencia TEXT NOT NULL,
+              hash TEXT NOT NULL REFERENCES pdf_blobs(hash),
+              created_at TEXT,
+              UNIQUE (tipo, referencia, hash)
+            );
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pdf_catalogo_hash ON pdf_catalogo(hash)"
+        )
+        conn.commit()
+        _tabelas_ok = True
+    finally:
+        if proprio:
+            conn.close()
+
+
+def _objetos_dir() -> str:
+    return get_pdf_dir("Objetos")
+
+
+def _pacotes_dir() -> str:
+    return get_pdf_dir("Pacotes")
+
+
+def _caminho_objeto(hash_pdf: str) -> str:
+    return os.path.join(_objetos_dir(), hash_pdf[:2], hash_pdf[2:4], f"{hash_pdf}.pdf")
+
+
+def hash_arquivo(caminho: str) -> str:
+    h = hashlib.sha256()
+    with open(caminho, "rb") as f:
+        for bloco in iter(lambda: f.read(1024 * 1024), b""):
+            h.update(bloco)
+    return h.hexdigest()
+
+
+def guardar(caminho_pdf: str, tipo: str, referencias: Iterable, mover: bool = False) -> str:
+    """Guarda o PDF no armazém e o vincula a cada referência. Retorna o hash.
+
+    Com mover=True o arquivo de origem é consumido (usado para temporários).
+    Conteúdo já existente não é gravado de novo, só ganha novas entradas.
+    Para SESSAO e RELATORIO, a entrada nova substitui as anteriores da
+    mesma referência.
+    """
+    garantir_tabelas()
+    hash_pdf = hash_arquivo(caminho_pdf)
+    tamanho = os.path.getsize(caminho_pdf)
+    destino = _caminho_objeto(hash_pdf)
+    referencias = [str(ref) for ref in referencias]
+    agora = _agora()
+
+    def _registrar(conn):
+        # Com o bloqueio de escrita: a coleta de lixo não roda no meio
+        if os.path.exists(destino):
+            if mover and os.path.exists(caminho_pdf):
+                os.remove(caminho_pdf)
+        else:
+            os.makedirs(os.path.dirname(destino), exist_ok=True)
+            # Cópia para um temporário na mesma pasta e os.replace: nunca fica
+            # um blob pela metade com o nome definitivo
+            fd, temporario = tempfile.mkstemp(suffix=".tmp", dir=os.path.dirname(destino))
+            os.close(fd)
+            if mover:
+                shutil.move(caminho_pdf, temporario)
+            else:
+                shutil.copyfile(caminho_pdf, temporario)
+            os.replace(temporario, destino)
+        conn.execute(
+            "INSERT OR IGNORE INTO pdf_blobs (hash, tamanho, created_at) VALUES (?, ?, ?)",
+            (hash_pdf, tamanho, agora),
+        )
+        if tipo in _SUBSTITUIVEIS:
+            conn.executemany(
+                "DELETE FROM pdf_catalogo WHERE tipo = ? AND referencia = ? AND hash <> ?",
+                [(tipo, ref, hash_pdf) for ref in referencias],
+            )
+        conn.executemany(
+            "INSERT OR IGNORE INTO pdf_catalogo (tipo, referencia, hash, created_at) "
+            "VALUES (?, ?, ?, ?)",
+            [(tipo, ref, hash_pdf, agora) for ref in referencias],
+        )
+
+    executar_escrita(_registrar, operacao="armazem_pdf.guardar")
+    return hash_pdf
+
+
+def desenhar(gerador, **kwargs) -> str:
+    """Chama um gerador de PDF (que recebe caminho_pdf=) em um temporário e
+    retorna o caminho dele, para guardar_desenho. Separado de gerar para quem
+    desenha dentro de leitura.instantaneo(), onde não se grava."""
+    fd, temporario = tempfile.mkstemp(suffix=".pdf", dir=get_cache_dir())
+    os.close(fd)
+    try:
+        gerador(caminho_pdf=temporario, **kwargs)
+    except BaseException:
+        os.remove(temporario)
+        raise
+    return temporario
+
+
+def guardar_desenho(temporario: str, tipo: str, referencias: Iterable) -> str:
+    """Guarda o temporário de desenhar (consumindo-o) e retorna o caminho do blob."""
+    try:
+        hash_pdf = guardar(temporario, tipo, referencias, mover=True)
+    finally:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+    return caminho_blob(hash_pdf)
+
+
+def gerar(gerador, tipo: str, referencias: Iterable, **kwargs) -> str:
+    """Chama um gerador de PDF (que recebe caminho_pdf=) em um temporário,
+    guarda o resultado e retorna o caminho do blob."""
+    return guardar_desenho(desenhar(gerador, **kwargs), tipo, referencias)
+
+
+def caminho_blob(hash_pdf: str) -> str:
+    """Caminho legível do blob; se estiver em um pacote, extrai para o cache local."""
+    destino = _caminho_objeto(hash_pdf)
+    if os.path.exists(destino):
+        return destino
+    garantir_tabelas()
+    conn = get_connection()
+    try:
+        row = conn.execute(
+            "SELECT pacote FROM pdf_blobs WHERE hash = ?", (hash_pdf,)
+        ).fetchone()
+    finally:
+        conn.close()
+    if row is None or not row["pacote"]:
+        raise FileNotFoundError(f"PDF {hash_pdf} não encontrado no armazém.")
+    extraido = os.path.join(get_cache_dir("pacotes"), f"{hash_pdf}.pdf")
+    if not os.path.exists(extraido):
+        with zipfile.ZipFile(os.path.join(_pacotes_dir(), row["pacote"])) as zf:
+            with zf.open(f"{hash_pdf}.pdf") as origem, open(extraido + ".tmp", "wb") as f:
+                shutil.copyfileobj(origem, f)
+        os.replace(extraido + ".tmp", extraido)
+    return extraido
+
+
+def listar(tipo: str, referencia) -> List[dict]:
+    """Blobs vinculados a uma referência, do mais recente para o mais antigo."""
+    garantir_tabelas()
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            """
+            SELECT c.hash, c.created_at, b.tamanho, b.pacote
+            FROM pdf_catalogo c JOIN pdf_blobs b ON b.hash = c.hash
+            WHERE c.tipo = ? AND c.referencia = ?
+            ORDER BY c.created_at DESC, c.id DESC
+            """,
+            (tipo, str(referencia)),
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def desvincular(tipo: str, referencias: Iterable) -> None:
+    """Remove as entradas do catálogo; os blobs ficam para a coleta de lixo."""
+    garantir_tabelas()
+
+    def _remover(conn):
+        conn.executemany(
+            "DELETE FROM pdf_catalogo WHERE tipo = ? AND referencia = ?",
+            [(tipo, str(ref)) for ref in referencias],
+        )
+
+    executar_escrita(_remover, operacao="armazem_pdf.desvincular")
+
+
+def coletar_lixo() -> dict:
+    """Apaga blobs sem nenhuma referência no catálogo e arquivos órfãos."""
+    garantir_tabelas()
+
+    def _remover(conn):
+        rows = conn.execute(
+            """
+            SELECT hash, tamanho, pacote FROM pdf_blobs b
+            WHERE NOT EXISTS (SELECT 1 FROM pdf_catalogo c WHERE c.hash = b.hash)
+            """
+        ).fetchall()
+        conn.executemany(
+            "DELETE FROM pdf_blobs WHERE hash = ?", [(r["hash"],) for r in rows]
+        )
+        # Apaga os arquivos ainda com o bloqueio: um guardar() do mesmo
+        # conteúdo espera e grava o blob de novo
+        liberados = 0
+        for r in rows:
+            caminho = _caminho_objeto(r["hash"])
+            if os.path.exists(caminho):
+                liberados += r["tamanho"]
+                os.remove(caminho)
+        return len(rows), liberados
+
+    removidos, liberados = executar_escrita(_remover, operacao="armazem_pdf.coletar_lixo")
+
+    # Arquivos sem linha em pdf_blobs (ex.: gravação interrompida)
+    conn = get_connection()
+    try:
+        conhecidos = {r[0] for r in conn.execute("SELECT hash FROM pdf_blobs")}
+    finally:
+        conn.close()
+    orfaos = 0
+    limite = time.time() - IDADE_MINIMA_ORFAO_S
+    for raiz, _, arquivos in os.walk(_objetos_dir()):
+        for nome in arquivos:
+            if nome.endswith(".pdf") and nome[:-4] in conhecidos:
+                continue
+            caminho = os.path.join(raiz, nome)
+            if os.path.getmtime(caminho) > limite:
+                continue
+            liberados += os.path.getsize(caminho)
+            os.remove(caminho)
+            orfaos += 1
+    return {"blobs": removidos, "orfaos": orfaos, "bytes": liberados}
+
+
+def meses_empacotaveis() -> List[str]:
+    """Meses (AAAA-MM) anteriores ao atual com blobs ainda soltos."""
+    garantir_tabelas()
+    atual = datetime.now().strftime("%Y-%m")
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            "SELECT DISTINCT substr(created_at, 1, 7) AS mes FROM pdf_blobs "
+            "WHERE pacote IS NULL AND substr(created_at, 1, 7) < ? ORDER BY mes",
+            (atual,),
+        ).fetchall()
+        return [r["mes"] for r in rows if r["mes"]]
+    finally:
+        conn.close()
+
+
+def empacotar_mes(mes: str) -> int:
+    """Move os blobs soltos do mês (AAAA-MM, já encerrado) para Pacotes/AAAA-MM.zip."""
+    if mes >= datetime.now().strftime("%Y-%m"):
+        raise ValueError("Só é possível empacotar meses já encerrados.")
+    garantir_tabelas()
+    conn = get_connection()
+    try:
+        hashes = [
+            r["hash"] for r in conn.execute(
+                "SELECT hash FROM pdf_blobs WHERE pacote IS NULL "
+                "AND substr(created_at, 1, 7) = ?",
+                (mes,),
+            )
+        ]
+    finally:
+        conn.close()
+    hashes = [h for h in hashes if os.path.exists(_caminho_objeto(h))]
+    if not hashes:
+        return 0
+
+    nome_pacote = f"{mes}.zip"
+    caminho_pacote = os.path.join(_pacotes_dir(), nome_pacote)
+    with zipfile.ZipFile(caminho_pacote, "a", compression=zipfile.ZIP_DEFLATED) as zf:
+        existentes = set(zf.namelist())
+        for h in hashes:
+            if f"{h}.pdf" not in existentes:
+                zf.write(_caminho_objeto(h), f"{h}.pdf")
+
+    def _marcar(conn):
+        conn.executemany(
+            "UPDATE pdf_blobs SET pacote = ? WHERE hash = ?",
+            [(nome_pacote, h) for h in hashes],
+        )
+
+    executar_escrita(_marcar, operacao="armazem_pdf.empacotar")
+    # Os soltos só saem depois que o pacote e o banco estão consistentes
+    for h in hashes:
+        try:
+            os.remove(_caminho_objeto(h))
+        except OSError:
+            logger.warning("Não foi possível remover o blob empacotado %s", h)
+    return len(hashes)
+
+
+def manutencao() -> dict:
+    """Coleta de lixo seguida do empacotamento de todos os meses encerrados."""
+    resultado = coletar_lixo()
+    resultado["empacotados"] = sum(empacotar_mes(m) for m in meses_empacotaveis())
+    return resultado
@@ -0,0 +1,559 @@
+"""Arquivamento de sessões, movimentações e recibos antigos.
+
+Sessões de gaveta fechadas mais antigas que a idade configurada saem do
+app.db com suas movimentações e os recibos delas, e vão para bancos anuais
+em <pasta-de-dados>/Arquivo/arquivo_AAAA.db (pelo ano de abertura da
+sessão). Recibos sem movimentação vão pelo ano da data de pagamento. Um
+recibo nunca fica em banco diferente da movimentação que o referencia.
+Esses bancos são anexados com ATTACH DATABASE apenas quando uma consulta
+precisa deles.
+"""
+
+import glob
+import logging
+import os
+import re
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+from app_paths import get_data_dir, load_config, save_config
+import resumo_diario
+from database import get_connection
+from domain.repositories.movimentacao_repository import (
+    TAMANHO_PAGINA,
+    MovimentacaoRepository,
+)
+from domain.repositories.sessao_repository import SessaoRepository
+
+logger = logging.getLogger(__name__)
+
+IDADE_PADRAO_DIAS = 365
+
+_TABELAS = ("gaveta_sessoes", "movimentacoes", "recibos")
+
+
+def _arquivo_dir() -> str:
+    path = os.path.join(get_data_dir(), "Arquivo")
+    os.makedirs(path, exist_ok=True)
+    return path
+
+
+def _arquivo_path(ano: int) -> str:
+    return os.path.join(_arquivo_dir(), f"arquivo_{ano}.db")
+
+
+def _alias(ano: int) -> str:
+    return f"arq{ano}"
+
+
+def anos_arquivados() -> List[int]:
+    """Anos que já possuem banco de arquivo."""
+    anos = []
+    for path in glob.glob(os.path.join(_arquivo_dir(), "arquivo_*.db")):
+        m = re.search(r"arquivo_(\d{4})\.db$", path)
+        if m:
+            anos.append(int(m.group(1)))
+    return sorted(anos)
+
+
+def anexar_arquivos(conn, data_inicio: Optional[str] = None,
+                    data_fim: Optional[str] = None) -> List[str]:
+    """Anexa ao `conn` os arquivos anuais que cruzam o período informado.
+
+    Datas no formato yyyy-MM-dd; sem período, anexa todos. Retorna os
+    aliases anexados (ex.: ['arq2024']).
+    """
+    ano_ini = int(data_inicio[:4]) if data_inicio else None
+    ano_fim = int(data_fim[:4]) if data_fim else None
+    anexados = []
+    ja_anexados = {row[1] for row in conn.execute("PRAGMA database_list")}
+    for ano in anos_arquivados():
+        if ano_ini is not None and ano < ano_ini:
+            continue
+        if ano_fim is not None and ano > ano_fim:
+            continue
+        alias = _alias(ano)
+        if alias not in ja_anexados:
+            if conn.in_transaction:
+                # Arquivo criado depois da foto de leitura.instantaneo(): na
+                # foto, esses dados ainda estão no banco principal
+                continue
+            conn.execute("ATTACH DATABASE ? AS " + alias, (_arquivo_path(ano),))
+        anexados.append(alias)
+    return anexados
+
+
+def periodo_requer_arquivo(data_inicio: Optional[str]) -> bool:
+    """True se o período começa antes do último corte de arquivamento."""
+    corte = ArquivoManager.get_ultimo_corte()
+    if not corte:
+        return False
+    return data_inicio is None or data_inicio < corte
+
+
+def _colunas(conn, schema: str, tabela: str) -> List[str]:
+    return [row[1] for row in conn.execute(f"PRAGMA {schema}.table_info({tabela})")]
+
+
+def _preparar_tabela(conn, alias: str, tabela: str) -> List[str]:
+    """Cria/atualiza a tabela no arquivo com as mesmas colunas do banco principal."""
+    row = conn.execute(
+        "SELECT sql FROM main.sqlite_master WHERE type = 'table' AND name = ?",
+        (tabela,),
+    ).fetchone()
+    if row is None:
+        return []
+    create_sql = re.sub(
+        r"^\s*CREATE\s+TABLE\s+(IF\s+NOT\s+EXISTS\s+)?",
+        f"CREATE TABLE IF NOT EXISTS {alias}.",
+        row[0],
+        count=1,
+        flags=re.IGNORECASE,
+    )
+    conn.execute(create_sql)
+    principais = _colunas(conn, "main", tabela)
+    existentes = set(_colunas(conn, alias, tabela))
+    for col in principais:
+        if col not in existentes:
+            conn.execute(f"ALTER TABLE {alias}.{tabela} ADD COLUMN {col}")
+    return principais
+
+
+class ArquivoManager:
+    """Move dados frios do app.db para os bancos de arquivo anuais."""
+
+    @staticmethod
+    def get_idade_dias() -> int:
+        cfg = load_config()
+        return int(cfg.get("archive_max_age_days", IDADE_PADRAO_DIAS))
+
+    @staticmethod
+    def set_idade_dias(dias: int) -> None:
+        cfg = load_config()
+        cfg["archive_max_age_days"] = int(dias)
+        save_config(cfg)
+
+    @staticmethod
+    def get_ultimo_corte() -> Optional[str]:
+        """Data (yyyy-MM-dd) até a qual os dados podem estar arquivados."""
+        return load_config().get("archive_cutoff")
+
+    @staticmethod
+    def arquivar(idade_dias: Optional[int] = None, compactar: bool = True) -> dict:
+        """Arquiva os dados mais antigos que `idade_dias`.
+
+        Retorna dict com keys: sucesso (bool), mensagem (str), sessoes,
+        movimentacoes e recibos (quantidades movidas).
+        """
+        if idade_dias is None:
+            idade_dias = ArquivoManager.get_idade_dias()
+        corte = (datetime.now() - timedelta(days=idade_dias)).strftime("%Y-%m-%d")
+        resumo_diario.garantir_tabela()
+
+        conn = get_connection()
+        totais = {"sessoes": 0, "movimentacoes": 0, "recibos": 0}
+        try:
+            anos = {
+                int(r[0]) for r in conn.execute(
+                    """
+                    SELECT DISTINCT substr(aberta_em, 1, 4) FROM gaveta_sessoes
+                    WHERE status = 'FECHADA' AND fechada_em < ?
+                    UNION
+                    SELECT DISTINCT substr(r.data_pagamento, 1, 4) FROM recibos r
+                    WHERE r.data_pagamento < ?
+                      AND NOT EXISTS (SELECT 1 FROM movimentacoes m WHERE m.recibo_id = r.id)
+                    """,
+                    (corte, corte),
+                )
+                if r[0]
+            }
+            for ano in sorted(anos):
+                movidos = ArquivoManager._arquivar_ano(conn, ano, corte)
+                for k, v in movidos.items():
+                    totais[k] += v
+        except Exception as e:
+            conn.rollback()
+            conn.close()
+            logger.exception("Falha no arquivamento")
+            return {"sucesso": False, "mensagem": f"Erro ao arquivar dados:\n{e}", **totais}
+
+        if compactar and any(totais.values()):
+            conn.execute("VACUUM")
+        conn.close()
+
+        cfg = load_config()
+        if corte > cfg.get("archive_cutoff", ""):
+            cfg["archive_cutoff"] = corte
+            save_config(cfg)
+
+        return {
+            "sucesso": True,
+            "mensagem": (
+                f"Arquivamento concluído (dados anteriores a {corte}).\n"
+                f"Sessões: {totais['sessoes']}  |  "
+                f"Movimentações: {totais['movimentacoes']}  |  "
+                f"Recibos: {totais['recibos']}"
+            ),
+            **totais,
+        }
+
+    @staticmethod
+    def _arquivar_ano(conn, ano: int, corte: str) -> dict:
+        alias = _alias(ano)
+        conn.execute("ATTACH DATABASE ? AS " + alias, (_arquivo_path(ano),))
+        try:
+            colunas = {t: _preparar_tabela(conn, alias, t) for t in _TABELAS}
+            conn.execute("BEGIN IMMEDIATE")
+            # Os dados só mudam de banco: o resumo diário continua valendo
+            resumo_diario.pausar(conn)
+            conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS _arq_sessoes (id INTEGER PRIMARY KEY)
+                """
+            )
+            conn.execute("DELETE FROM temp._arq_sessoes")
+            conn.execute(
+                """
+                INSERT INTO temp._arq_sessoes (id)
+                SELECT id FROM main.gaveta_sessoes
+                WHERE status = 'FECHADA' AND fechada_em < ?
+                  AND substr(aberta_em, 1, 4) = ?
+                """,
+                (corte, str(ano)),
+            )
+
+            # Recibos das movimentações dessas sessões (desde que nenhuma
+            # movimentação de sessão que fica os referencie) e recibos sem
+            # movimentação pagos naquele ano
+            conn.execute(
+                """
+                CREATE TEMP TABLE IF NOT EXISTS _arq_recibos (id INTEGER PRIMARY KEY)
+                """
+            )
+            conn.execute("DELETE FROM temp._arq_recibos")
+            conn.execute(
+                """
+                INSERT OR IGNORE INTO temp._arq_recibos (id)
+                SELECT m.recibo_id FROM main.movimentacoes m
+                WHERE m.sessao_id IN (SELECT id FROM temp._arq_sessoes)
+                  AND m.recibo_id IS NOT NULL
+                  AND NOT EXISTS (
+                      SELECT 1 FROM main.movimentacoes f
+                      WHERE f.recibo_id = m.recibo_id
+                        AND f.sessao_id NOT IN (SELECT id FROM temp._arq_sessoes))
+                UNION
+                SELECT r.id FROM main.recibos r
+                WHERE r.data_pagamento < ? AND substr(r.data_pagamento, 1, 4) = ?
+                  AND NOT EXISTS (SELECT 1 FROM main.movimentacoes m WHERE m.recibo_id = r.id)
+                """,
+                (corte, str(ano)),
+            )
+
+            def mover(tabela, where, params=()):
+                cols = ", ".join(colunas[tabela])
+                conn.execute(
+                    f"INSERT OR REPLACE INTO {alias}.{tabela} ({cols}) "
+                    f"SELECT {cols} FROM main.{tabela} WHERE {where}",
+                    params,
+                )
+                return conn.execute(f"DELETE FROM main.{tabela} WHERE {where}", params).rowcount
+
+            movs = mover("movimentacoes", "sessao_id IN (SELECT id FROM temp._arq_sessoes)")
+            sessoes = mover("gaveta_sessoes", "id IN (SELECT id FROM temp._arq_sessoes)")
+            recibos = mover("recibos", "id IN (SELECT id FROM temp._arq_recibos)")
+            resumo_diario.retomar(conn)
+            conn.commit()
+        except Exception:
+            conn.rollback()
+            raise
+        finally:
+            conn.execute("DETACH DATABASE " + alias)
+        return {"sessoes": sessoes, "movimentacoes": movs, "recibos": recibos}
+
+
+# --- Consultas que atravessam os arquivos ---
+
+_SQL_SESSOES_ARQ = """
+    SELECT s.*, 1 AS arquivada, g.nome AS gaveta_nome, ur.username AS responsavel_nome,
+           ua.username AS admin_abertura_nome, uf.username AS admin_fechamento_nome
+    FROM {alias}.gaveta_sessoes s
+    LEFT JOIN main.gavetas g ON g.id = s.gaveta_id
+    LEFT JOIN main.usuarios ur ON ur.id = s.responsavel_id
+    LEFT JOIN main.usuarios ua ON ua.id = s.admin_abertura_id
+    LEFT JOIN main.usuarios uf ON uf.id = s.admin_fechamento_id
+"""
+
+
+def _dicts(rows) -> List[dict]:
+    return [dict(r) for r in rows]
+
+
+def list_sessoes_arquivadas(gaveta_id: Optional[int] = None,
+                            data_inicio: Optional[str] = None,
+                            data_fim: Optional[str] = None) -> List[dict]:
+    conn = get_connection()
+    try:
+        resultado = []
+        for alias in anexar_arquivos(conn, data_inicio, data_fim):
+            where, params = [], []
+            if gaveta_id:
+                where.append("s.gaveta_id = ?")
+                params.append(gaveta_id)
+            if data_inicio:
+                where.append("s.aberta_em >= ?")
+                params.append(data_inicio)
+            if data_fim:
+                where.append("s.aberta_em <= ?")
+                params.append(data_fim + " 23:59:59")
+            sql = _SQL_SESSOES_ARQ.format(alias=alias)
+            if where:
+                sql += " WHERE " + " AND ".join(where)
+            resultado.extend(_dicts(conn.execute(sql, params).fetchall()))
+        resultado.sort(key=lambda s: s.get("aberta_em") or "", reverse=True)
+        return resultado
+    finally:
+        conn.close()
+
+
+def _localizar_sessao(conn, sessao_id: int) -> Optional[str]:
+    for alias in anexar_arquivos(conn):
+        row = conn.execute(
+            f"SELECT 1 FROM {alias}.gaveta_sessoes WHERE id = ?", (sessao_id,)
+        ).fetchone()
+        if row:
+            return alias
+    return None
+
+
+def get_sessao_arquivada(sessao_id: int) -> Optional[dict]:
+    conn = get_connection()
+    try:
+        alias = _localizar_sessao(conn, sessao_id)
+        if not alias:
+            return None
+        row = conn.execute(
+            _SQL_SESSOES_ARQ.format(alias=alias) + " WHERE s.id = ?", (sessao_id,)
+        ).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def _sessao_no_principal(sessao_id: int) -> bool:
+    conn = get_connection()
+    try:
+        return conn.execute(
+            "SELECT 1 FROM main.gaveta_sessoes WHERE id = ?", (sessao_id,)
+        ).fetchone() is not None
+    finally:
+        conn.close()
+
+
+def _buscar_no_arquivo(sessao_id: int) -> bool:
+    """Só sessões que saíram do app.db são procuradas no arquivo: uma sessão
+    aberta e ainda vazia não tem movimentações em lugar nenhum."""
+    return bool(ArquivoManager.get_ultimo_corte()) and not _sessao_no_principal(sessao_id)
+
+
+def list_movimentacoes_arquivadas(sessao_id: int, nao_cancelados: bool = False) -> List[dict]:
+    """Movimentações de uma sessão arquivada; com `nao_cancelados`, sem as de
+    recibos cancelados (o mesmo filtro do banco principal)."""
+    conn = get_connection()
+    try:
+        alias = _localizar_sessao(conn, sessao_id)
+        if not alias:
+            return []
+        # O recibo fica no arquivo da sua movimentação; o banco principal só
+        # entra para arquivos gravados antes disso (ver list_recibos_arquivados)
+        filtro = (
+            "AND (m.recibo_id IS NULL"
+            " OR COALESCE(ra.status, rm.status, '') <> 'CANCELADO')"
+            if nao_cancelados else ""
+        )
+        rows = conn.execute(
+            f"""
+            SELECT m.*, u.username
+            FROM {alias}.movimentacoes m
+            LEFT JOIN main.usuarios u ON u.id = m.usuario_id
+            LEFT JOIN {alias}.recibos ra ON ra.id = m.recibo_id
+            LEFT JOIN main.recibos rm ON rm.id = m.recibo_id
+            WHERE m.sessao_id = ? {filtro}
+            ORDER BY m.created_at ASC
+            """,
+            (sessao_id,),
+        ).fetchall()
+        return _dicts(rows)
+    finally:
+        conn.close()
+
+
+def list_recibos_arquivados(empresa_ids=None, usuario_ids=None, tipos=None,
+                            status_list=None, data_inicio=None, data_fim=None,
+                            gaveta_ids=None) -> List[dict]:
+    conn = get_connection()
+    try:
+        resultado = []
+        # Todos os arquivos: o recibo fica no ano da sessão da sua
+        # movimentação, que pode não ser o ano da data de pagamento
+        for alias in anexar_arquivos(conn):
+            where, params = [], []
+            for coluna, valores in (
+                ("r.empresa_id", empresa_ids),
+                ("r.usuario_id", usuario_ids),
+                ("r.tipo", tipos),
+                ("r.status", status_list),
+            ):
+                if valores:
+                    where.append(f"{coluna} IN ({','.join(['?'] * len(valores))})")
+                    params.extend(valores)
+            if data_inicio:
+                where.append("r.data_pagamento >= ?")
+                params.append(data_inicio)
+            if data_fim:
+                where.append("r.data_pagamento <= ?")
+                params.append(data_fim)
+            where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+            filtro_gaveta = ""
+            if gaveta_ids:
+                filtro_gaveta = f"WHERE x._gaveta_id IN ({','.join(['?'] * len(gaveta_ids))})"
+                params.extend(gaveta_ids)
+            # Subconsultas com LIMIT 1 em vez de JOIN: uma linha por recibo.
+            # O banco principal só entra para arquivos gravados antes de os
+            # recibos acompanharem suas movimentações.
+            rows = conn.execute(
+                f"""
+                SELECT x.*, g.nome AS gaveta_nome FROM (
+                    SELECT r.*, e.razao_social, u.username,
+                           COALESCE(
+                               (SELECT sa.gaveta_id FROM {alias}.movimentacoes ma
+                                JOIN {alias}.gaveta_sessoes sa ON sa.id = ma.sessao_id
+                                WHERE ma.recibo_id = r.id LIMIT 1),
+                               (SELECT sm.gaveta_id FROM main.movimentacoes mm
+                                JOIN main.gaveta_sessoes sm ON sm.id = mm.sessao_id
+                                WHERE mm.recibo_id = r.id LIMIT 1)
+                           ) AS _gaveta_id
+                    FROM {alias}.recibos r
+                    LEFT JOIN main.empresas e ON e.id = r.empresa_id
+                    LEFT JOIN main.usuarios u ON u.id = r.usuario_id
+                    {where_sql}
+                ) x
+                LEFT JOIN main.gavetas g ON g.id = x._gaveta_id
+                {filtro_gaveta}
+                """,
+                params,
+            ).fetchall()
+            for row in rows:
+                recibo = dict(row)
+                del recibo["_gaveta_id"]
+                resultado.append(recibo)
+        return resultado
+    finally:
+        conn.close()
+
+
+# --- Repositórios que combinam dados quentes e arquivados ---
+
+class SessaoRepoComArquivo(SessaoRepository):
+    """Decora um SessaoRepository incluindo sessões arquivadas nas leituras."""
+
+    def __init__(self, repo: SessaoRepository, incluir_arquivo: bool = True):
+        self.repo = repo
+        self.incluir_arquivo = incluir_arquivo
+
+    def create(self, gaveta_id, responsavel_id, admin_id, saldo_inicial):
+        return self.repo.create(gaveta_id, responsavel_id, admin_id, saldo_inicial)
+
+    def close(self, sessao_id, admin_id, valor_contado, justificativa, versao=None):
+        return self.repo.close(sessao_id, admin_id, valor_contado, justificativa, versao)
+
+    def get_open_by_gaveta(self, gaveta_id):
+        return self.repo.get_open_by_gaveta(gaveta_id)
+
+    def get_by_id(self, sessao_id):
+        sessao = self.repo.get_by_id(sessao_id)
+        if sessao is None and self.incluir_arquivo:
+            sessao = get_sessao_arquivada(sessao_id)
+        return sessao
+
+    def list_all(self, data_inicio=None, data_fim=None):
+        sessoes = list(self.repo.list_all())
+        if self.incluir_arquivo and periodo_requer_arquivo(data_inicio):
+            sessoes.extend(list_sessoes_arquivadas(None, data_inicio, data_fim))
+        return sessoes
+
+    def list_by_gaveta(self, gaveta_id, data_inicio=None, data_fim=None):
+        sessoes = list(self.repo.list_by_gaveta(gaveta_id))
+        if self.incluir_arquivo and periodo_requer_arquivo(data_inicio):
+            sessoes.extend(list_sessoes_arquivadas(gaveta_id, data_inicio, data_fim))
+        return sessoes
+
+    def __getattr__(self, name):
+        return getattr(self.repo, name)
+
+
+class MovimentacaoRepoComArquivo(MovimentacaoRepository):
+    """Decora um MovimentacaoRepository buscando sessões arquivadas no arquivo."""
+
+    def __init__(self, repo: MovimentacaoRepository):
+        self.repo = repo
+
+    def create(self, sessao_id, usuario_id, tipo, valor, descricao, recibo_id=None):
+        return self.repo.create(sessao_id, usuario_id, tipo, valor, descricao, recibo_id)
+
+    def list_by_sessao(self, sessao_id):
+        movs = self.repo.list_by_sessao(sessao_id)
+        if not movs and _buscar_no_arquivo(sessao_id):
+            movs = list_movimentacoes_arquivadas(sessao_id)
+        return movs
+
+    def list_by_sessao_nao_cancelados(self, sessao_id):
+        # Definido na interface: o __getattr__ não chegaria a ser chamado
+        movs = self.repo.list_by_sessao_nao_cancelados(sessao_id)
+        return movs or self._arquivadas(sessao_id, True)
+
+    def get_totals_by_sessao(self, sessao_id):
+        totais = self.repo.get_totals_by_sessao(sessao_id)
+        if any(totais.values()) or not _buscar_no_arquivo(sessao_id):
+            return totais
+        # Como no banco principal, recibos cancelados não entram nos totais
+        movs = list_movimentacoes_arquivadas(sessao_id, nao_cancelados=True)
+        if not movs:
+            return totais
+        saidas = [m for m in movs if m["tipo"] == "SAIDA"]
+        return {
+            "total_entradas": sum(m["valor"] for m in movs if m["tipo"] == "ENTRADA"),
+            "total_saidas": sum(m["valor"] for m in saidas),
+            "total_saidas_com_recibo": sum(m["valor"] for m in saidas if m["recibo_id"]),
+            "total_saidas_sem_recibo": sum(m["valor"] for m in saidas if not m["recibo_id"]),
+        }
+
+    def _arquivadas(self, sessao_id, nao_cancelados):
+        if not _buscar_no_arquivo(sessao_id):
+            return []
+        return list_movimentacoes_arquivadas(sessao_id, nao_cancelados)
+
+    def count_by_sessao(self, sessao_id, nao_cancelados=False):
+        total = self.repo.count_by_sessao(sessao_id, nao_cancelados)
+        return total or len(self._arquivadas(sessao_id, nao_cancelados))
+
+    def list_page_by_sessao(self, sessao_id, apos_id=None, limite=TAMANHO_PAGINA,
+                            nao_cancelados=False):
+        pagina = self.repo.list_page_by_sessao(sessao_id, apos_id, limite, nao_cancelados)
+        if pagina or apos_id:
+            return pagina
+        # Sessão arquivada: inteira na primeira página (já foi fechada)
+        return self._arquivadas(sessao_id, nao_cancelados)
+
+    def __getattr__(self, name):
+        return getattr(self.repo, name)
+
+
+def list_recibos_com_arquivo(consulta_principal, **filtros) -> List[dict]:
+    """Executa `consulta_principal(**filtros)` e acrescenta os recibos
+    arquivados quando o período pedido alcança dados arquivados."""
+    rows = list(consulta_principal(**filtros))
+    if not periodo_requer_arquivo(filtros.get("data_inicio")):
+        return rows
+    rows.extend(list_recibos_arquivados(**filtros))
+    rows.sort(key=lambda r: r["created_at"] or "")
+    return rows
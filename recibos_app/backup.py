@@ -3,10 +3,11 @@
 import glob
 import logging
 import os
-import shutil
+import sqlite3
 from datetime import datetime
 
 from app_paths import get_data_dir, load_config, save_config
+from database import get_read_connection
 
 logger = logging.getLogger(__name__)
 
@@ -30,12 +31,12 @@ class BackupManager:
         save_config(cfg)
 
     @staticmethod
-    def executar_backup() -> dict:
-        """Executa backup do app.db para a pasta configurada.
+    def executar_backup(backup_path: str | None = None) -> dict:
+        """Executa backup do app.db para a pasta configurada (ou `backup_path`).
 
         Retorna dict com keys: sucesso (bool), mensagem (str).
         """
-        backup_path = BackupManager.get_backup_path()
+        backup_path = backup_path or BackupManager.get_backup_path()
         if not backup_path:
             return {"sucesso": False, "mensagem": "Caminho de backup não configurado."}
 
@@ -55,8 +56,19 @@ class BackupManager:
         destino = os.path.join(backup_path, f"backup_{agora}.db")
 
         try:
-            shutil.copy2(db_path, destino)
+            # Pela API de backup, de uma conexão só de leitura: a cópia é uma
+            # foto consistente mesmo com outras estações gravando (e inclui o
+            # que ainda estiver no -wal)
+            origem = get_read_connection()
+            copia = sqlite3.connect(destino)
+            try:
+                origem.backup(copia)
+            finally:
+                copia.close()
+                origem.close()
         except Exception as e:
+            if os.path.exists(destino):
+                os.remove(destino)
             return {
                 "sucesso": False,
                 "mensagem": f"Erro ao copiar banco de dados:\n{e}",
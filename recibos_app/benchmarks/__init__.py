@@ -0,0 +1 @@
+"""Benchmarks de desempenho com dados sintéticos (python -m benchmarks)."""
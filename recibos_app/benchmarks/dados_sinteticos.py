@@ -0,0 +1,191 @@
+"""Gerador de dados sintéticos para os benchmarks.
+
+Produz anos de operação plausível: empresas, colaboradores, uma sessão
+por gaveta por dia com entradas e saídas, e recibos ligados às saídas.
+Com a mesma semente o resultado é sempre o mesmo.
+"""
+
+import random
+from dataclasses import asdict, dataclass
+from datetime import date, datetime, timedelta
+
+_NOMES = (
+    "Ana", "Bruno", "Carla", "Diego", "Elaine", "Fábio", "Gabriela", "Hugo",
+    "Isabela", "João", "Karina", "Lucas", "Mariana", "Nelson", "Olívia",
+    "Paulo", "Renata", "Sérgio", "Tatiane", "Vinícius",
+)
+_SOBRENOMES = (
+    "Silva", "Santos", "Oliveira", "Souza", "Rodrigues", "Ferreira", "Alves",
+    "Pereira", "Lima", "Gomes", "Costa", "Ribeiro", "Martins", "Carvalho",
+)
+_TIPOS = (
+    ("PASSAGEM", 0.45), ("DIARIA", 0.25), ("DOBRA", 0.08), ("FERIADO", 0.04),
+    ("PRESTADOR", 0.08), ("FORNECEDOR", 0.06), ("OUTROS", 0.04),
+)
+
+
+@dataclass(frozen=True)
+class Escala:
+    empresas: int
+    colaboradores: int
+    recibos: int
+    dias: int
+    gavetas: int = 3
+    saidas_avulsas_por_sessao: int = 4
+    usuarios: int = 8
+
+    def as_dict(self) -> dict:
+        return asdict(self)
+
+
+ESCALAS = {
+    "pequena": Escala(empresas=3, colaboradores=300, recibos=10_000, dias=120),
+    "media": Escala(empresas=5, colaboradores=2_000, recibos=100_000, dias=2 * 365),
+    "grande": Escala(empresas=8, colaboradores=5_000, recibos=300_000, dias=5 * 365),
+}
+
+
+def _colunas(conn, tabela):
+    return {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+
+
+def _cpf(rnd):
+    return "".join(str(rnd.randrange(10)) for _ in range(11))
+
+
+def gerar(conn, escala: Escala, semente: int = 42) -> dict:
+    """Popula o banco em `conn` (schema já criado). Retorna as contagens."""
+    rnd = random.Random(semente)
+    cur = conn.cursor()
+
+    cur.executemany(
+        "INSERT INTO empresas (razao_social, nome_fantasia, cnpj, texto_padrao) VALUES (?, ?, ?, ?)",
+        [
+            (f"EMPRESA SINTETICA {i:02d} LTDA", f"Sintética {i}",
+             "".join(str(rnd.randrange(10)) for _ in range(14)), "")
+            for i in range(1, escala.empresas + 1)
+        ],
+    )
+    cur.executemany(
+        "INSERT INTO colaboradores (nome, cpf, valor_passagem, valor_diaria, valor_dobra) "
+        "VALUES (?, ?, ?, ?, ?)",
+        [
+            (f"{rnd.choice(_NOMES)} {rnd.choice(_SOBRENOMES)} {rnd.choice(_SOBRENOMES)}",
+             _cpf(rnd), round(rnd.uniform(8, 25), 2), round(rnd.uniform(60, 150), 2),
+             round(rnd.uniform(80, 200), 2))
+            for _ in range(escala.colaboradores)
+        ],
+    )
+    cur.executemany(
+        "INSERT OR IGNORE INTO usuarios (username, password_hash, salt, is_admin) VALUES (?, ?, ?, ?)",
+        [(f"operador{i}", "x", "x", 0) for i in range(1, escala.usuarios + 1)],
+    )
+    usuario_ids = [r[0] for r in cur.execute("SELECT id FROM usuarios WHERE is_admin = 0")]
+    admin_ids = [r[0] for r in cur.execute("SELECT id FROM usuarios WHERE is_admin = 1")] or [1]
+    colaboradores = cur.execute("SELECT nome, cpf FROM colaboradores").fetchall()
+
+    if not cur.execute("SELECT COUNT(*) FROM gavetas").fetchone()[0]:
+        cur.executemany("INSERT INTO gavetas (nome) VALUES (?)",
+                        [(f"Gaveta {i}",) for i in range(1, escala.gavetas + 1)])
+    gaveta_ids = [r[0] for r in cur.execute("SELECT id FROM gavetas")][:escala.gavetas]
+
+    recibo_tem_mov = "movimentacao_id" in _colunas(conn, "recibos")
+    tipos, pesos = zip(*_TIPOS)
+    inicio = date.today() - timedelta(days=escala.dias)
+    recibos_por_dia = escala.recibos / max(escala.dias, 1)
+    acumulado = 0.0
+    total_sessoes = total_movs = total_recibos = 0
+
+    for d in range(escala.dias):
+        dia = inicio + timedelta(days=d)
+        aberta = datetime.combine(dia, datetime.min.time()).replace(hour=7)
+        fechada = aberta.replace(hour=19)
+        acumulado += recibos_por_dia
+        n_recibos_dia = int(acumulado) - int(acumulado - recibos_por_dia)
+        ultimo_dia = d == escala.dias - 1
+
+        for g_idx, gaveta_id in enumerate(gaveta_ids):
+            responsavel = usuario_ids[(d + g_idx) % len(usuario_ids)]
+            cur.execute(
+                """
+                INSERT INTO gaveta_sessoes (gaveta_id, responsavel_id, admin_abertura_id,
+                    admin_fechamento_id, saldo_inicial, valor_contado, justificativa,
+                    status, aberta_em, fechada_em)
+                VALUES (?, ?, ?, ?, ?, NULL, NULL, 'ABERTA', ?, NULL)
+                """,
+                (gaveta_id, responsavel, admin_ids[0], None, 500.0,
+                 aberta.strftime("%Y-%m-%d %H:%M:%S")),
+            )
+            sessao_id = cur.lastrowid
+            total_sessoes += 1
+            saldo = 500.0
+
+            movs = [("ENTRADA", round(rnd.uniform(100, 800), 2), "Reforço de caixa", None)]
+            for _ in range(escala.saidas_avulsas_por_sessao):
+                movs.append(("SAIDA", round(rnd.uniform(5, 120), 2), "Saída avulsa", None))
+
+            for i in range(n_recibos_dia // len(gaveta_ids)
+                           + (1 if g_idx < n_recibos_dia % len(gaveta_ids) else 0)):
+                tipo = rnd.choices(tipos, pesos)[0]
+                nome, cpf = rnd.choice(colaboradores)
+                valor = round(rnd.uniform(10, 400), 2)
+                momento = aberta + timedelta(minutes=rnd.randrange(12 * 60))
+                status = "CANCELADO" if rnd.random() < 0.03 else "PAGO"
+                cur.execute(
+                    "INSERT INTO movimentacoes (sessao_id, usuario_id, tipo, valor, descricao, "
+                    "recibo_id, created_at) VALUES (?, ?, 'SAIDA', ?, ?, NULL, ?)",
+                    (sessao_id, responsavel, valor, f"Recibo: {tipo} {nome}"[:80],
+                     momento.strftime("%Y-%m-%d %H:%M:%S")),
+                )
+                mov_id = cur.lastrowid
+                colunas = ["empresa_id", "usuario_id", "tipo", "pessoa_nome",
+                           "pessoa_documento", "descricao", "valor", "data_inicio",
+                           "data_fim", "data_pagamento", "caminho_pdf", "created_at", "status"]
+                valores = [rnd.randrange(1, escala.empresas + 1), responsavel, tipo, nome,
+                           cpf, f"{tipo.title()} referente ao período", valor,
+                           dia.isoformat(), dia.isoformat(), dia.isoformat(), "",
+                           momento.strftime("%Y-%m-%d %H:%M:%S"), status]
+                if recibo_tem_mov:
+                    colunas.append("movimentacao_id")
+                    valores.append(mov_id)
+                cur.execute(
+                    f"INSERT INTO recibos ({', '.join(colunas)}) "
+                    f"VALUES ({', '.join('?' * len(colunas))})",
+                    valores,
+                )
+                cur.execute("UPDATE movimentacoes SET recibo_id = ? WHERE id = ?",
+                            (cur.lastrowid, mov_id))
+                total_recibos += 1
+                total_movs += 1
+                saldo -= valor
+
+            for tipo, valor, desc, recibo_id in movs:
+                momento = aberta + timedelta(minutes=rnd.randrange(12 * 60))
+                cur.execute(
+                    "INSERT INTO movimentacoes (sessao_id, usuario_id, tipo, valor, descricao, "
+                    "recibo_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sessao_id, responsavel, tipo, valor, desc, recibo_id,
+                     momento.strftime("%Y-%m-%d %H:%M:%S")),
+                )
+                saldo += valor if tipo == "ENTRADA" else -valor
+                total_movs += 1
+
+            if not ultimo_dia:
+                contado = round(saldo + rnd.choice((0, 0, 0, 0, -5, 2)), 2)
+                cur.execute(
+                    "UPDATE gaveta_sessoes SET status = 'FECHADA', fechada_em = ?, "
+                    "admin_fechamento_id = ?, valor_contado = ?, justificativa = ? "
+                    "WHERE id = ?",
+                    (fechada.strftime("%Y-%m-%d %H:%M:%S"), admin_ids[0], contado,
+                     None if contado == round(saldo, 2) else "Diferença sintética",
+                     sessao_id),
+                )
+
+    conn.commit()
+    return {
+        "empresas": escala.empresas,
+        "colaboradores": escala.colaboradores,
+        "sessoes": total_sessoes,
+        "movimentacoes": total_movs,
+        "recibos": total_recibos,
+    }
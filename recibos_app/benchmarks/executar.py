@@ -0,0 +1,212 @@
+"""Executa os benchmarks sobre um banco sintético e grava os tempos em JSON.
+
+Uso (a partir de recibos_app/):
+
+    python -m benchmarks --escala media --saida bench.json
+    python -m benchmarks --escala media --comparar bench_anterior.json
+
+O banco é criado em uma pasta temporária; a pasta de dados configurada
+do usuário não é tocada.
+"""
+
+import argparse
+import json
+import os
+import platform
+import random
+import shutil
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import date, datetime, timedelta
+
+import app_paths
+from benchmarks.dados_sinteticos import ESCALAS, gerar
+
+TOLERANCIA_PADRAO = 0.20
+_USUARIO_ADMIN = {"id": 1, "username": "admin", "is_admin": 1}
+
+
+def medir(func, repeticoes: int = 5, aquecimento: int = 1) -> dict:
+    for _ in range(aquecimento):
+        func()
+    tempos = []
+    for _ in range(repeticoes):
+        inicio = time.perf_counter()
+        func()
+        tempos.append(time.perf_counter() - inicio)
+    return {
+        "min": min(tempos),
+        "mediana": statistics.median(tempos),
+        "max": max(tempos),
+        "repeticoes": repeticoes,
+    }
+
+
+def _commit_atual():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except Exception:
+        return None
+
+
+def _casos(pasta, repeticoes):
+    """Define os casos; os imports ficam aqui porque dependem da pasta de dados."""
+    from PySide6.QtWidgets import QApplication
+
+    from backup import BackupManager
+    from data.repositories.sqlite_recibo_repo import list_recibos_filtrados
+    from database import get_connection
+    from movimentacoes_sessao import SqliteMovimentacaoPaginada
+    from pdf.gerador_pdf import gerar_pdf_multiplos_recibos, gerar_pdf_recibo
+    from pdf.relatorio_gaveta_pdf import gerar_pdf_relatorio_gaveta
+    from pdf.relatorio_recibos_pdf import gerar_pdf_relatorio_recibos
+    from presentation.auditoria_widget import AuditoriaWidget
+    from ui.historico import HistoricoWidget
+    from ui.relatorios import _TIPO_LABELS
+
+    app = QApplication.instance() or QApplication(sys.argv)  # noqa: F841
+
+    hoje = date.today()
+    ultimo_mes = ((hoje - timedelta(days=30)).isoformat(), hoje.isoformat())
+    rnd = random.Random(7)
+    conn = get_connection()
+    sessao_ids = [r[0] for r in conn.execute("SELECT id FROM gaveta_sessoes")]
+    conn.close()
+    amostra = rnd.sample(sessao_ids, min(200, len(sessao_ids)))
+    mov_repo = SqliteMovimentacaoPaginada()
+
+    recibo = dict(
+        empresa_razao="EMPRESA SINTETICA 01 LTDA", empresa_cnpj="00.000.000/0001-00",
+        nome="Ana Silva Santos", documento="000.000.000-00", valor=123.45,
+        descricao="Passagem referente ao período", data_inicio="01/01/2026",
+        data_fim="07/01/2026", data_pagamento="08/01/2026", template="PASSAGEM",
+    )
+    pdf_dir = os.path.join(pasta, "pdfs")
+    os.makedirs(pdf_dir, exist_ok=True)
+
+    def recibos_ultimo_mes():
+        return list_recibos_filtrados(data_inicio=ultimo_mes[0], data_fim=ultimo_mes[1])
+
+    def recibos_periodo_total():
+        return list_recibos_filtrados(data_inicio="2000-01-01", data_fim=ultimo_mes[1])
+
+    historico = HistoricoWidget(_USUARIO_ADMIN)
+    auditoria = AuditoriaWidget(_USUARIO_ADMIN)
+    linhas_mes = recibos_ultimo_mes()
+    sessao_rel = amostra[0]
+    movs_rel = mov_repo.list_by_sessao(sessao_rel)
+
+    casos = {
+        "list_recibos_filtrados_30_dias": recibos_ultimo_mes,
+        "list_recibos_filtrados_tudo": recibos_periodo_total,
+        "historico_load_data": historico._load_data,
+        "get_totals_by_sessao_x200": lambda: [mov_repo.get_totals_by_sessao(s) for s in amostra],
+        "auditoria_load_data": auditoria._load_data,
+        "pdf_recibo": lambda: gerar_pdf_recibo(os.path.join(pdf_dir, "recibo.pdf"), **recibo),
+        "pdf_multiplos_recibos_x3": lambda: gerar_pdf_multiplos_recibos(
+            os.path.join(pdf_dir, "multiplos.pdf"), [recibo] * 3
+        ),
+        "pdf_lote_300_recibos_4_por_pagina": lambda: gerar_pdf_multiplos_recibos(
+            os.path.join(pdf_dir, "lote.pdf"), [recibo] * 300, 4, True
+        ),
+        "pdf_relatorio_recibos_30_dias": lambda: gerar_pdf_relatorio_recibos(
+            os.path.join(pdf_dir, "relatorio.pdf"), linhas_mes,
+            ultimo_mes[0], ultimo_mes[1], _TIPO_LABELS,
+        ),
+        "pdf_relatorio_gaveta": lambda: gerar_pdf_relatorio_gaveta(
+            os.path.join(pdf_dir, "gaveta.pdf"), "Gaveta 1", "operador1",
+            "01/01/2026 07:00", movs_rel, 0.0, 0.0, 500.0, 500.0, sessao_rel,
+        ),
+        "backup": lambda: BackupManager.executar_backup(os.path.join(pasta, "backup")),
+    }
+    return {nome: medir(func, repeticoes) for nome, func in casos.items()}
+
+
+def comparar(atual: dict, anterior: dict, tolerancia: float) -> list:
+    """Retorna as linhas do comparativo e marca regressões acima da tolerância."""
+    linhas = []
+    for nome, r in atual["resultados"].items():
+        antes = anterior.get("resultados", {}).get(nome)
+        if not antes:
+            linhas.append((nome, None, r["mediana"], None, False))
+            continue
+        razao = r["mediana"] / antes["mediana"] if antes["mediana"] else None
+        regressao = razao is not None and razao > 1 + tolerancia
+        linhas.append((nome, antes["mediana"], r["mediana"], razao, regressao))
+    return linhas
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmarks do Gerador de Recibos")
+    parser.add_argument("--escala", choices=sorted(ESCALAS), default="media")
+    parser.add_argument("--semente", type=int, default=42)
+    parser.add_argument("--repeticoes", type=int, default=5)
+    parser.add_argument("--saida", default=None, help="arquivo JSON de resultados")
+    parser.add_argument("--comparar", default=None, help="JSON de uma execução anterior")
+    parser.add_argument("--tolerancia", type=float, default=TOLERANCIA_PADRAO)
+    parser.add_argument("--manter-banco", action="store_true",
+                        help="não apaga a pasta temporária ao final")
+    args = parser.parse_args(argv)
+
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    pasta = tempfile.mkdtemp(prefix="recibos_bench_")
+    # Sobrescreve só em memória; set_data_dir gravaria no config do usuário
+    app_paths._DATA_DIR_OVERRIDE = pasta
+
+    try:
+        from data.database import init_db
+        from database import get_connection
+
+        init_db()
+        escala = ESCALAS[args.escala]
+        conn = get_connection()
+        inicio = time.perf_counter()
+        contagens = gerar(conn, escala, args.semente)
+        conn.close()
+        tempo_geracao = time.perf_counter() - inicio
+        print(f"Dados gerados em {tempo_geracao:.1f} s: {contagens}")
+
+        resultado = {
+            "commit": _commit_atual(),
+            "executado_em": datetime.now().isoformat(timespec="seconds"),
+            "python": platform.python_version(),
+            "plataforma": platform.platform(),
+            "escala": {"nome": args.escala, **escala.as_dict()},
+            "contagens": contagens,
+            "geracao_s": tempo_geracao,
+            "resultados": _casos(pasta, args.repeticoes),
+        }
+    finally:
+        if args.manter_banco:
+            print(f"Banco mantido em {pasta}")
+        else:
+            shutil.rmtree(pasta, ignore_errors=True)
+
+    for nome, r in resultado["resultados"].items():
+        print(f"{nome:36s} {r['mediana'] * 1000:10.1f} ms  (min {r['min'] * 1000:.1f})")
+
+    if args.saida:
+        with open(args.saida, "w", encoding="utf-8") as f:
+            json.dump(resultado, f, ensure_ascii=False, indent=2)
+
+    if args.comparar:
+        with open(args.comparar, "r", encoding="utf-8") as f:
+            anterior = json.load(f)
+        print(f"\nComparação com {anterior.get('commit') or args.comparar}:")
+        regressoes = 0
+        for nome, antes, agora, razao, regressao in comparar(resultado, anterior, args.tolerancia):
+            if antes is None:
+                print(f"{nome:36s} {'(novo)':>10s}")
+                continue
+            marca = "  << REGRESSÃO" if regressao else ""
+            print(f"{nome:36s} {antes * 1000:9.1f} -> {agora * 1000:9.1f} ms  x{razao:.2f}{marca}")
+            regressoes += regressao
+        return 1 if regressoes else 0
+    return 0
@@ -28,6 +28,7 @@ python -m PyInstaller `
     --icon "assets\icon.ico" `
     --add-data "assets\LOGO - MERCADO.png;assets" `
     --add-data "assets\icon.ico;assets" `
+    --add-data "assets\modelos;assets\modelos" `
     "main.py"
 
 if ($LASTEXITCODE -ne 0) {
@@ -0,0 +1,303 @@
+"""Calendário de dias trabalhados: feriados, jornadas e contagem por bitmap.
+
+Cada ano vira um inteiro com um bit por dia (bit 0 = 1º de janeiro). Os
+bitmaps de cada dia da semana e o de feriados são calculados uma vez por
+ano; os dias trabalhados de uma jornada são um OR dos dias da semana dela
+menos os feriados. Contar um período é deslocar, mascarar e contar bits,
+sem percorrer os dias.
+
+Jornada é uma máscara de dias da semana (bit 0 = segunda ... bit 6 =
+domingo), gravada por colaborador em colaboradores.dias_trabalho; NULL
+usa a jornada padrão da configuração.
+
+Feriados locais ficam na configuração, um por linha:
+  "20/01 São Sebastião"     todo ano
+  "09/07/2026 Ponto extra"  só naquela data
+  "carnaval", "corpus_christi", "quarta_cinzas"  datas móveis
+"""
+
+import re
+from datetime import date, timedelta
+from functools import lru_cache
+from typing import Dict, Iterable, Iterator, List, Optional, Tuple
+
+from app_paths import load_config, save_config
+
+DIAS_SEMANA = ("Seg", "Ter", "Qua", "Qui", "Sex", "Sáb", "Dom")
+SEG_A_SEX = 0b0011111
+SEG_A_SAB = 0b0111111
+TODOS_OS_DIAS = 0b1111111
+
+# Deslocamento em dias a partir do domingo de Páscoa
+MOVEIS = {
+    "carnaval": ((-48, "Carnaval"), (-47, "Carnaval")),
+    "quarta_cinzas": ((-46, "Quarta-feira de Cinzas"),),
+    "corpus_christi": ((60, "Corpus Christi"),),
+}
+
+_FIXOS = (
+    (1, 1, "Confraternização Universal"),
+    (4, 21, "Tiradentes"),
+    (5, 1, "Dia do Trabalho"),
+    (9, 7, "Independência"),
+    (10, 12, "Nossa Senhora Aparecida"),
+    (11, 2, "Finados"),
+    (11, 15, "Proclamação da República"),
+    (12, 25, "Natal"),
+)
+
+_LOCAL = re.compile(r"^(\d{1,2})/(\d{1,2})(?:/(\d{4}))?\s*(.*)$")
+
+
+def pascoa(ano: int) -> date:
+    """Domingo de Páscoa (algoritmo de Meeus/Jones/Butcher)."""
+    a = ano % 19
+    b, c = divmod(ano, 100)
+    d, e = divmod(b, 4)
+    f = (b + 8) // 25
+    g = (b - f + 1) // 3
+    h = (19 * a + b - d - g + 15) % 30
+    i, k = divmod(c, 4)
+    l = (32 + 2 * e + 2 * i - h - k) % 7
+    m = (a + 11 * h + 22 * l) // 451
+    mes, dia = divmod(h + l - 7 * m + 114, 31)
+    return date(ano, mes, dia + 1)
+
+
+def feriados_nacionais(ano: int) -> Dict[date, str]:
+    feriados = {date(ano, mes, dia): nome for mes, dia, nome in _FIXOS}
+    if ano >= 2024:
+        feriados[date(ano, 11, 20)] = "Consciência Negra"
+    feriados[pascoa(ano) - timedelta(days=2)] = "Sexta-feira Santa"
+    return feriados
+
+
+# --- Configuração ---
+
+def get_feriados_locais() -> List[str]:
+    return list(load_config().get("feriados_locais", []))
+
+
+def set_feriados_locais(linhas: Iterable[str]) -> None:
+    linhas = [linha.strip() for linha in linhas if linha and linha.strip()]
+    for linha in linhas:
+        _interpretar_local(linha)  # valida antes de gravar
+    cfg = load_config()
+    cfg["feriados_locais"] = linhas
+    save_config(cfg)
+    recarregar()
+
+
+def get_jornada_padrao() -> int:
+    return int(load_config().get("jornada_padrao", SEG_A_SEX)) & TODOS_OS_DIAS
+
+
+def set_jornada_padrao(jornada: int) -> None:
+    cfg = load_config()
+    cfg["jornada_padrao"] = int(jornada) & TODOS_OS_DIAS
+    save_config(cfg)
+    recarregar()
+
+
+def _interpretar_local(linha: str) -> Tuple[Optional[int], Optional[int], Optional[int], str]:
+    """(dia, mês, ano ou None, nome), ou (None, None, None, chave) para móveis."""
+    chave = linha.strip().lower()
+    if chave in MOVEIS:
+        return None, None, None, chave
+    m = _LOCAL.match(linha.strip())
+    if not m:
+        raise ValueError(f"Feriado local inválido: {linha!r}")
+    dia, mes = int(m.group(1)), int(m.group(2))
+    ano = int(m.group(3)) if m.group(3) else None
+    date(ano or 2000, mes, dia)  # 2000 é bissexto: aceita 29/02
+    return dia, mes, ano, m.group(4) or "Feriado local"
+
+
+@lru_cache(maxsize=None)
+def _locais() -> tuple:
+    return tuple(_interpretar_local(linha) for linha in get_feriados_locais())
+
+
+@lru_cache(maxsize=64)
+def feriados(ano: int) -> Dict[date, str]:
+    """Feriados nacionais e locais do ano (não alterar o dicionário)."""
+    dias = feriados_nacionais(ano)
+    domingo = pascoa(ano)
+    for dia, mes, ano_local, nome in _locais():
+        if dia is None:
+            for desloc, rotulo in MOVEIS[nome]:
+                dias.setdefault(domingo + timedelta(days=desloc), rotulo)
+        elif ano_local in (None, ano):
+            try:
+                dias.setdefault(date(ano, mes, dia), nome)
+            except ValueError:
+                continue  # 29/02 em ano comum
+    return dias
+
+
+def recarregar() -> None:
+    """Descarta os calendários calculados (após mudar feriados ou jornada)."""
+    _locais.cache_clear()
+    feriados.cache_clear()
+    _mapa_feriados.cache_clear()
+    mapa_trabalho.cache_clear()
+
+
+# --- Bitmaps ---
+
+def _dias_no_ano(ano: int) -> int:
+    return (date(ano + 1, 1, 1) - date(ano, 1, 1)).days
+
+
+@lru_cache(maxsize=64)
+def _semana(ano: int) -> Tuple[int, ...]:
+    """Bitmap de cada dia da semana no ano (índice 0 = segunda)."""
+    n = _dias_no_ano(ano)
+    # Um bit a cada 7 dias, montado de uma vez e deslocado para cada dia
+    base = int("0000001" * (n // 7 + 1), 2)
+    mascara = (1 << n) - 1
+    primeiro = date(ano, 1, 1).weekday()
+    return tuple(
+        (base << ((dia - primeiro) % 7)) & mascara for dia in range(7)
+    )
+
+
+@lru_cache(maxsize=64)
+def _mapa_feriados(ano: int) -> int:
+    inicio = date(ano, 1, 1)
+    mapa = 0
+    for dia in feriados(ano):
+        mapa |= 1 << (dia - inicio).days
+    return mapa
+
+
+@lru_cache(maxsize=256)
+def mapa_trabalho(ano: int, jornada: int) -> int:
+    """Bitmap dos dias trabalhados no ano para a jornada."""
+    semana = _semana(ano)
+    mapa = 0
+    for dia in range(7):
+        if jornada >> dia & 1:
+            mapa |= semana[dia]
+    return mapa & ~_mapa_feriados(ano)
+
+
+def _faixas(inicio: date, fim: date) -> Iterator[Tuple[int, int, int]]:
+    """(ano, primeiro bit, quantidade de bits) de cada ano do período."""
+    for ano in range(inicio.year, fim.year + 1):
+        primeiro = date(ano, 1, 1)
+        de = inicio if ano == inicio.year else primeiro
+        ate = fim if ano == fim.year else date(ano, 12, 31)
+        yield ano, (de - primeiro).days, (ate - de).days + 1
+
+
+def _jornada(jornada: Optional[int]) -> int:
+    return get_jornada_padrao() if jornada is None else int(jornada) & TODOS_OS_DIAS
+
+
+def contar_dias(inicio: date, fim: date, jornada: Optional[int] = None) -> int:
+    """Dias trabalhados no período (inclusive), descontando folgas e feriados."""
+    if fim < inicio:
+        return 0
+    jornada = _jornada(jornada)
+    return sum(
+        (mapa_trabalho(ano, jornada) >> bit & ((1 << n) - 1)).bit_count()
+        for ano, bit, n in _faixas(inicio, fim)
+    )
+
+
+def dias_trabalhados(inicio: date, fim: date, jornada: Optional[int] = None) -> List[date]:
+    """As datas trabalhadas do período, em ordem."""
+    if fim < inicio:
+        return []
+    jornada = _jornada(jornada)
+    datas = []
+    for ano, bit, n in _faixas(inicio, fim):
+        trecho = mapa_trabalho(ano, jornada) >> bit & ((1 << n) - 1)
+        base = date(ano, 1, 1) + timedelta(days=bit)
+        while trecho:
+            menor = trecho & -trecho
+            datas.append(base + timedelta(days=menor.bit_length() - 1))
+            trecho ^= menor
+    return datas
+
+
+def feriados_no_periodo(inicio: date, fim: date) -> Dict[date, str]:
+    return {
+        dia: nome
+        for ano in range(inicio.year, fim.year + 1)
+        for dia, nome in feriados(ano).items()
+        if inicio <= dia <= fim
+    }
+
+
+# --- Colaboradores ---
+
+_coluna_ok = False
+
+
+def garantir_coluna(conn=None) -> None:
+    """Cria colaboradores.dias_trabalho se faltar (bancos criados pelo
+    init_db de data.database não a têm)."""
+    global _coluna_ok
+    if _coluna_ok:
+        return
+    from database import get_connection
+
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        colunas = {r[1] for r in conn.execute("PRAGMA table_info(colaboradores)")}
+        if colunas and "dias_trabalho" not in colunas:
+            conn.execute("ALTER TABLE colaboradores ADD COLUMN dias_trabalho INTEGER")
+            conn.commit()
+        _coluna_ok = bool(colunas)
+    finally:
+        if proprio:
+            conn.close()
+
+
+def jornada_de(colaborador, padrao: Optional[int] = None) -> int:
+    """Jornada gravada no colaborador, ou a padrão."""
+    try:
+        valor = colaborador["dias_trabalho"]
+    except (KeyError, IndexError):
+        valor = None
+    if valor is None:
+        return get_jornada_padrao() if padrao is None else padrao
+    return int(valor) & TODOS_OS_DIAS
+
+
+def contar_lote(colaboradores: Iterable, inicio: date, fim: date) -> Dict[int, int]:
+    """Dias trabalhados de cada colaborador no período, por id.
+
+    Colaboradores com a mesma jornada compartilham uma única contagem.
+    """
+    padrao = get_jornada_padrao()
+    por_jornada: Dict[int, int] = {}
+    resultado = {}
+    for colab in colaboradores:
+        jornada = jornada_de(colab, padrao)
+        if jornada not in por_jornada:
+            por_jornada[jornada] = contar_dias(inicio, fim, jornada)
+        resultado[colab["id"]] = por_jornada[jornada]
+    return resultado
+
+
+def definir_jornada(colaborador_id: int, jornada: Optional[int]) -> None:
+    """Grava a jornada do colaborador (None volta para a padrão)."""
+    from escrita import executar_escrita
+
+    garantir_coluna()
+    valor = None if jornada is None else int(jornada) & TODOS_OS_DIAS
+    executar_escrita(
+        lambda conn: conn.execute(
+            "UPDATE colaboradores SET dias_trabalho = ? WHERE id = ?",
+            (valor, colaborador_id),
+        ),
+        operacao="definir_jornada",
+    )
+
+
+def descrever_jornada(jornada: int) -> str:
+    return ", ".join(n for i, n in enumerate(DIAS_SEMANA) if jornada >> i & 1) or "—"
@@ -1,18 +1,154 @@
+import logging
 import os
 import sqlite3
+import threading
+from urllib.parse import quote
 
-from app_paths import get_data_dir
+from app_paths import get_data_dir, load_config
+from diagnostico import ConexaoInstrumentada, ativo as diagnostico_ativo
 
 DATA_DIR = get_data_dir()
 DB_PATH = os.path.join(DATA_DIR, "app.db")
 
+# Tempo que uma conexão espera por um bloqueio de outra estação antes de
+# devolver "database is locked" (as escritas ainda repetem, ver escrita.py).
+BUSY_TIMEOUT_MS = 5000
+
+# Comandos preparados guardados por conexão (o padrão do sqlite3 é 128).
+# As consultas com listas usam json_each em vez de "IN (?, ?, ...)" para que
+# o texto do SQL não mude com o tamanho da lista e o comando seja reaproveitado.
+CACHE_COMANDOS = 256
+
+logger = logging.getLogger(__name__)
+
+
+def get_db_path() -> str:
+    # Resolvido a cada chamada: a pasta de dados pode ser escolhida depois
+    # que este módulo já foi importado (primeira execução).
+    return os.path.join(get_data_dir(), "app.db")
+
+
+class _Emprestavel:
+    """Conexão que pode ser emprestada a uma unidade de trabalho.
+
+    Enquanto emprestada, quem a recebe de get_connection não a fecha nem
+    encerra a transação: commit, rollback e close ficam com a unidade.
+    """
+
+    emprestada = False
+
+    def close(self):
+        if not self.emprestada:
+            super().close()
+
+    def commit(self):
+        if not self.emprestada:
+            super().commit()
+
+    def rollback(self):
+        if not self.emprestada:
+            super().rollback()
+
+
+class _Conexao(_Emprestavel, sqlite3.Connection):
+    pass
+
+
+class _ConexaoInstrumentada(_Emprestavel, ConexaoInstrumentada):
+    pass
+
+
+_unidade = threading.local()
+
 
 def get_connection():
-    conn = sqlite3.connect(DB_PATH)
+    # Dentro de uma unidade de trabalho (escrita.UnidadeSqlite), toda
+    # chamada desta thread recebe a mesma conexão, já em transação
+    compartilhada = getattr(_unidade, "conexao", None)
+    if compartilhada is not None:
+        return compartilhada
+    conn = sqlite3.connect(
+        get_db_path(),
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        factory=_ConexaoInstrumentada if diagnostico_ativo() else _Conexao,
+        cached_statements=CACHE_COMANDOS,
+    )
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
+    conn.row_factory = sqlite3.Row
+    return conn
+
+
+def _uri_somente_leitura(caminho: str) -> str:
+    # file:///C:/..., file:////servidor/pasta/... ou file:///home/...
+    caminho = os.path.abspath(caminho).replace("\\", "/")
+    if not caminho.startswith("/"):
+        caminho = "/" + caminho
+    return "file://" + quote(caminho, safe="/:") + "?mode=ro"
+
+
+def get_read_connection():
+    """Conexão só de leitura (mode=ro), para as leituras longas de leitura.py.
+
+    Não participa da unidade de trabalho e pode mudar de thread (o pool de
+    leitura a empresta a uma thread por vez).
+    """
+    conn = sqlite3.connect(
+        _uri_somente_leitura(get_db_path()),
+        uri=True,
+        timeout=BUSY_TIMEOUT_MS / 1000,
+        factory=_ConexaoInstrumentada if diagnostico_ativo() else _Conexao,
+        cached_statements=CACHE_COMANDOS,
+        check_same_thread=False,
+    )
+    conn.execute(f"PRAGMA busy_timeout = {BUSY_TIMEOUT_MS}")
     conn.row_factory = sqlite3.Row
     return conn
 
 
+def configurar_diario() -> None:
+    """Aplica o "wal" do config.json: true liga o WAL, false volta ao diário
+    padrão (DELETE); sem a chave, o banco fica como está.
+
+    Com WAL, leitores e escritores não se bloqueiam: a foto de um relatório
+    continua valendo enquanto outras estações gravam. Mas o índice do -wal é
+    memória compartilhada da máquina, então o WAL só é seguro se todas as
+    conexões ao app.db partem do mesmo computador; com o app.db em pasta de
+    rede, deixe desligado.
+    """
+    wal = load_config().get("wal")
+    if wal is None:
+        return
+    modo = "wal" if wal else "delete"
+    conn = get_connection()
+    try:
+        atual = conn.execute("PRAGMA journal_mode").fetchone()[0]
+        if atual.lower() != modo:
+            novo = conn.execute(f"PRAGMA journal_mode = {modo}").fetchone()[0]
+            logger.info("Modo do diário: %s -> %s", atual, novo)
+    except sqlite3.OperationalError as e:
+        # Sair do WAL exige o banco sem outras conexões; fica para a próxima
+        logger.warning("Não foi possível mudar o diário para %s: %s", modo, e)
+    finally:
+        conn.close()
+
+
+def conexao_compartilhada():
+    """Conexão da unidade de trabalho aberta nesta thread, ou None."""
+    return getattr(_unidade, "conexao", None)
+
+
+def compartilhar(conn) -> None:
+    """Passa a entregar `conn` em get_connection nesta thread (None encerra)."""
+    if conn is None:
+        atual = getattr(_unidade, "conexao", None)
+        if atual is not None:
+            atual.emprestada = False
+        _unidade.conexao = None
+    else:
+        conn.emprestada = True
+        _unidade.conexao = conn
+
+
 def init_db():
     conn = get_connection()
     cur = conn.cursor()
@@ -93,6 +229,8 @@ def init_db():
 
     _ensure_column(cur, "recibos", "usuario_id", "INTEGER")
     _ensure_column(cur, "recibos", "created_at", "TEXT")
+    _ensure_column(cur, "recibos", "dados_pdf", "TEXT")
+    _ensure_column(cur, "colaboradores", "dias_trabalho", "INTEGER")
 
     conn.commit()
     conn.close()
@@ -0,0 +1,361 @@
+"""Instrumentação de desempenho: contagens, histogramas de latência e SQL lento.
+
+Desligada por padrão. Enquanto desligada, cada ponto instrumentado custa
+apenas a leitura de um atributo; as conexões SQLite nem passam pela
+camada de medição. Liga/desliga pelo menu Admin → Diagnóstico.
+"""
+
+import json
+import logging
+import sqlite3
+import threading
+import time
+from bisect import bisect_left
+from collections import deque
+from contextlib import contextmanager
+from datetime import datetime
+from functools import wraps
+
+from app_paths import load_config, save_config
+
+logger = logging.getLogger(__name__)
+
+# Limites superiores dos baldes, em milissegundos
+LIMITES_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000, 10000)
+SQL_LENTO_PADRAO_MS = 100
+MAX_SQL_LENTOS = 200
+
+
+class _Estado:
+    __slots__ = ("ativo", "sql_lento_ms")
+
+    def __init__(self):
+        cfg = load_config()
+        self.ativo = bool(cfg.get("diagnostico_ativo", False))
+        self.sql_lento_ms = float(cfg.get("diagnostico_sql_lento_ms", SQL_LENTO_PADRAO_MS))
+
+
+estado = _Estado()
+
+
+class Histograma:
+    __slots__ = ("baldes", "contagem", "total", "maximo")
+
+    def __init__(self):
+        self.baldes = [0] * (len(LIMITES_MS) + 1)
+        self.contagem = 0
+        self.total = 0.0
+        self.maximo = 0.0
+
+    def registrar(self, ms: float):
+        self.baldes[bisect_left(LIMITES_MS, ms)] += 1
+        self.contagem += 1
+        self.total += ms
+        if ms > self.maximo:
+            self.maximo = ms
+
+    def percentil(self, p: float) -> float:
+        """Aproximação pelo limite superior do balde que contém o percentil."""
+        if not self.contagem:
+            return 0.0
+        alvo = p * self.contagem
+        acumulado = 0
+        for i, n in enumerate(self.baldes):
+            acumulado += n
+            if acumulado >= alvo:
+                return LIMITES_MS[i] if i < len(LIMITES_MS) else self.maximo
+        return self.maximo
+
+    def as_dict(self) -> dict:
+        return {
+            "chamadas": self.contagem,
+            "total_ms": round(self.total, 3),
+            "media_ms": round(self.total / self.contagem, 3) if self.contagem else 0.0,
+            "p50_ms": self.percentil(0.50),
+            "p95_ms": self.percentil(0.95),
+            "max_ms": round(self.maximo, 3),
+            "baldes": dict(zip([str(x) for x in LIMITES_MS] + ["inf"], self.baldes)),
+        }
+
+
+class Coletor:
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.histogramas = {}
+        self.sql_lentos = deque(maxlen=MAX_SQL_LENTOS)
+        self.desde = datetime.now()
+
+    def registrar(self, nome: str, ms: float):
+        with self._lock:
+            h = self.histogramas.get(nome)
+            if h is None:
+                h = self.histogramas[nome] = Histograma()
+            h.registrar(ms)
+
+    def registrar_sql_lento(self, sql: str, ms: float, plano: list):
+        with self._lock:
+            self.sql_lentos.append({
+                "quando": datetime.now().isoformat(timespec="seconds"),
+                "ms": round(ms, 3),
+                "sql": sql,
+                "plano": plano,
+            })
+        logger.warning("SQL lento (%.1f ms): %s\nPlano: %s", ms, sql.strip(), " | ".join(plano))
+
+    def zerar(self):
+        with self._lock:
+            self.histogramas.clear()
+            self.sql_lentos.clear()
+            self.desde = datetime.now()
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "desde": self.desde.isoformat(timespec="seconds"),
+                "gerado_em": datetime.now().isoformat(timespec="seconds"),
+                "metricas": {n: h.as_dict() for n, h in sorted(self.histogramas.items())},
+                "sql_lentos": list(self.sql_lentos),
+            }
+
+
+coletor = Coletor()
+
+
+def ativo() -> bool:
+    return estado.ativo
+
+
+def ativar(ligado: bool) -> None:
+    estado.ativo = bool(ligado)
+    cfg = load_config()
+    cfg["diagnostico_ativo"] = estado.ativo
+    save_config(cfg)
+
+
+def set_sql_lento_ms(ms: float) -> None:
+    estado.sql_lento_ms = float(ms)
+    cfg = load_config()
+    cfg["diagnostico_sql_lento_ms"] = estado.sql_lento_ms
+    save_config(cfg)
+
+
+def exportar_json(caminho: str) -> str:
+    with open(caminho, "w", encoding="utf-8") as f:
+        json.dump(coletor.snapshot(), f, ensure_ascii=False, indent=2)
+    return caminho
+
+
+# --- Pontos de medição ---
+
+def medido(nome: str | None = None):
+    """Decorador que registra a latência da função quando a coleta está ativa."""
+    def decorador(func):
+        rotulo = nome or f"{func.__module__}.{func.__qualname__}"
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            if not estado.ativo:
+                return func(*args, **kwargs)
+            inicio = time.perf_counter()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                coletor.registrar(rotulo, (time.perf_counter() - inicio) * 1000)
+        wrapper.__medido__ = True
+        return wrapper
+    return decorador
+
+
+@contextmanager
+def trecho(nome: str):
+    """Context manager equivalente a @medido para um bloco de código."""
+    if not estado.ativo:
+        yield
+        return
+    inicio = time.perf_counter()
+    try:
+        yield
+    finally:
+        coletor.registrar(nome, (time.perf_counter() - inicio) * 1000)
+
+
+def instrumentar_classe(cls, metodos=None, prefixo: str | None = None):
+    """Aplica @medido aos métodos públicos de `cls` (ou aos listados)."""
+    prefixo = prefixo or cls.__name__
+    if metodos is None:
+        metodos = [
+            n for n, v in vars(cls).items()
+            if callable(v) and not n.startswith("__")
+            and (not n.startswith("_") or n == "_load_data")
+        ]
+    for nome in metodos:
+        original = vars(cls).get(nome)
+        if original is None or getattr(original, "__medido__", False):
+            continue
+        setattr(cls, nome, medido(f"{prefixo}.{nome}")(original))
+    return cls
+
+
+# --- SQL ---
+
+def _plano(conn, sql, params):
+    try:
+        cur = sqlite3.Connection.execute(conn, "EXPLAIN QUERY PLAN " + sql, params)
+        return [row[-1] for row in cur.fetchall()]
+    except sqlite3.Error:
+        return []
+
+
+def _medir_sql(conn, executar, sql, params):
+    if not estado.ativo:
+        return executar()
+    inicio = time.perf_counter()
+    try:
+        return executar()
+    finally:
+        ms = (time.perf_counter() - inicio) * 1000
+        verbo = sql.lstrip().split(None, 1)[0].upper() if sql.strip() else "?"
+        coletor.registrar(f"sql.{verbo}", ms)
+        if ms >= estado.sql_lento_ms and verbo in ("SELECT", "WITH", "UPDATE", "DELETE", "INSERT"):
+            coletor.registrar_sql_lento(sql, ms, _plano(conn, sql, params))
+
+
+class CursorInstrumentado(sqlite3.Cursor):
+    def execute(self, sql, params=()):
+        return _medir_sql(self.connection, lambda: super(CursorInstrumentado, self).execute(sql, params),
+                          sql, params)
+
+    def executemany(self, sql, seq):
+        return _medir_sql(self.connection,
+                          lambda: super(CursorInstrumentado, self).executemany(sql, seq), sql, ())
+
+
+class ConexaoInstrumentada(sqlite3.Connection):
+    """Conexão usada por database.get_connection enquanto a coleta está ativa
+    (as de data.database passam pela ConexaoMedida)."""
+
+    def cursor(self, factory=CursorInstrumentado):
+        return super().cursor(factory)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+
+class _CursorMedido:
+    """Cursor de uma conexão de data.database, medido como o CursorInstrumentado."""
+
+    def __init__(self, cursor, conn):
+        self._cursor = cursor
+        self._conn = conn
+
+    def execute(self, sql, params=()):
+        self._cursor = _medir_sql(self._conn, lambda: self._cursor.execute(sql, params),
+                                  sql, params)
+        return self
+
+    def executemany(self, sql, seq):
+        self._cursor = _medir_sql(self._conn, lambda: self._cursor.executemany(sql, seq),
+                                  sql, ())
+        return self
+
+    def __iter__(self):
+        return iter(self._cursor)
+
+    def __getattr__(self, nome):
+        return getattr(self._cursor, nome)
+
+
+class ConexaoMedida:
+    """Envolve uma conexão já aberta por outra fábrica (data.database), que
+    não aceita a ConexaoInstrumentada, e mede os comandos dela."""
+
+    def __init__(self, conn):
+        self._conn = conn
+
+    def cursor(self, *args):
+        return _CursorMedido(self._conn.cursor(*args), self._conn)
+
+    def execute(self, sql, params=()):
+        return self.cursor().execute(sql, params)
+
+    def executemany(self, sql, seq):
+        return self.cursor().executemany(sql, seq)
+
+    def __enter__(self):
+        self._conn.__enter__()
+        return self
+
+    def __exit__(self, *exc):
+        return self._conn.__exit__(*exc)
+
+    def __getattr__(self, nome):
+        return getattr(self._conn, nome)
+
+    def __setattr__(self, nome, valor):
+        if nome == "_conn":
+            object.__setattr__(self, nome, valor)
+        else:
+            setattr(self._conn, nome, valor)
+
+
+def _instrumentar_data_database():
+    """Faz data.database.get_connection devolver conexões medidas enquanto
+    a coleta estiver ativa, inclusive nos módulos que já importaram a
+    função por nome (data.repositories.*)."""
+    import sys
+
+    import data.database as data_database
+
+    original = data_database.get_connection
+    if getattr(original, "__medido__", False):
+        return
+
+    @wraps(original)
+    def get_connection(*args, **kwargs):
+        conn = original(*args, **kwargs)
+        return ConexaoMedida(conn) if estado.ativo else conn
+    get_connection.__medido__ = True
+
+    for nome, modulo in list(sys.modules.items()):
+        if nome == "data" or nome.startswith("data."):
+            if getattr(modulo, "get_connection", None) is original:
+                modulo.get_connection = get_connection
+
+
+def instrumentar_app():
+    """Instrumenta casos de uso, repositórios e telas principais.
+
+    Feito em um único lugar (na inicialização) para não espalhar
+    dependências de infraestrutura pela camada de domínio.
+    """
+    from domain.use_cases.abrir_gaveta import AbrirGaveta
+    from domain.use_cases.consultar_saldo import ConsultarSaldo
+    from domain.use_cases.emitir_recibo import EmitirRecibo
+    from domain.use_cases.fechar_gaveta import FecharGaveta
+    from domain.use_cases.registrar_entrada import RegistrarEntrada
+    from domain.use_cases.registrar_saida import RegistrarSaida
+    from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
+    from data.repositories.sqlite_usuario_repo import SqliteUsuarioRepo
+    from fechamento_gaveta import SqliteFechamentoRepo, SqliteSessaoVersionada
+    from movimentacoes_sessao import SqliteMovimentacaoPaginada
+    from presentation.auditoria_widget import AuditoriaWidget
+    from presentation.gavetas_panel import GavetaCard, GavetasPanelWidget
+    from ui.gerar_recibo import GerarReciboWidget
+    from ui.historico import HistoricoWidget
+    from ui.relatorios import RelatoriosWidget
+
+    for uc in (AbrirGaveta, ConsultarSaldo, EmitirRecibo, RegistrarEntrada, RegistrarSaida):
+        instrumentar_classe(uc, ["execute", "get_resumo"], prefixo=f"uc.{uc.__name__}")
+    instrumentar_classe(FecharGaveta, ["execute", "get_resumo", "conferir", "fechar"],
+                        prefixo="uc.FecharGaveta")
+    for repo in (SqliteFechamentoRepo, SqliteGavetaRepo, SqliteMovimentacaoPaginada,
+                 SqliteSessaoVersionada, SqliteUsuarioRepo):
+        instrumentar_classe(repo, prefixo=f"repo.{repo.__name__}")
+    for widget in (AuditoriaWidget, GavetasPanelWidget, GerarReciboWidget,
+                   HistoricoWidget, RelatoriosWidget):
+        instrumentar_classe(widget, ["_load_data"], prefixo=f"ui.{widget.__name__}")
+    instrumentar_classe(GavetaCard, ["refresh"], prefixo="ui.GavetaCard")
+    _instrumentar_data_database()
@@ -0,0 +1,73 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+
+
+@dataclass(frozen=True)
+class ResumoFechamento:
+    """Foto da sessão e dos totais, lida em uma única transação."""
+    sessao_id: int
+    versao: Optional[int]
+    status: str
+    responsavel_id: int
+    gaveta_nome: str
+    responsavel_nome: str
+    admin_abertura_nome: str
+    aberta_em: str
+    saldo_inicial: float
+    total_entradas: float
+    total_saidas: float
+    total_saidas_com_recibo: float
+    total_saidas_sem_recibo: float
+    totais_por_tipo: Tuple[Tuple[str, float], ...] = ()
+
+    @property
+    def saldo_esperado(self) -> float:
+        return self.saldo_inicial + self.total_entradas - self.total_saidas
+
+    @classmethod
+    def de_dict(cls, dados: dict) -> "ResumoFechamento":
+        """Monta a partir do dict do repositório (local ou vindo do servidor)."""
+        campos = {nome: dados.get(nome) for nome in cls.__dataclass_fields__}
+        campos["totais_por_tipo"] = tuple(
+            (item["tipo"], item["total"]) for item in dados.get("totais_por_tipo") or ()
+        )
+        for nome in ("gaveta_nome", "responsavel_nome", "admin_abertura_nome", "aberta_em"):
+            campos[nome] = campos[nome] or ""
+        return cls(**campos)
+
+
+@dataclass(frozen=True)
+class FechamentoConcluido:
+    """Resultado do fechamento: tudo que o relatório precisa, sem nova consulta."""
+    resumo: ResumoFechamento
+    valor_contado: float
+    justificativa: Optional[str]
+    admin_fechamento_nome: str
+    fechada_em: str
+
+    @property
+    def diferenca(self) -> float:
+        return self.valor_contado - self.resumo.saldo_esperado
+
+    def dados_relatorio(self) -> dict:
+        """Argumentos de pdf.relatorio_fechamento_pdf.gerar_pdf_fechamento."""
+        r = self.resumo
+        return dict(
+            gaveta_nome=r.gaveta_nome,
+            responsavel_nome=r.responsavel_nome,
+            admin_abertura_nome=r.admin_abertura_nome,
+            admin_fechamento_nome=self.admin_fechamento_nome,
+            aberta_em=r.aberta_em,
+            fechada_em=self.fechada_em,
+            saldo_inicial=r.saldo_inicial,
+            total_entradas=r.total_entradas,
+            total_saidas=r.total_saidas,
+            total_saidas_com_recibo=r.total_saidas_com_recibo,
+            total_saidas_sem_recibo=r.total_saidas_sem_recibo,
+            saldo_esperado=r.saldo_esperado,
+            valor_contado=self.valor_contado,
+            diferenca=self.diferenca,
+            justificativa=self.justificativa,
+            sessao_id=r.sessao_id,
+            totais_por_tipo=[{"tipo": t, "total": v} for t, v in r.totais_por_tipo],
+        )
@@ -0,0 +1,10 @@
+class ConcorrenciaError(Exception):
+    """Falha causada por outra estação usando o mesmo banco ao mesmo tempo."""
+
+
+class ConflitoDeVersao(ConcorrenciaError):
+    """O registro foi alterado por outra estação desde que foi lido."""
+
+
+class BancoOcupado(ConcorrenciaError):
+    """O banco continuou bloqueado mesmo após as novas tentativas."""
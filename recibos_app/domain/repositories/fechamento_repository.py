@@ -0,0 +1,20 @@
+from abc import ABC, abstractmethod
+from typing import Optional
+
+
+class FechamentoRepository(ABC):
+    @abstractmethod
+    def get_resumo(self, sessao_id: int) -> Optional[dict]:
+        """Sessão (com nomes), totais e totais por tipo lidos na mesma
+        transação, no formato de domain.entities.fechamento.ResumoFechamento."""
+        ...
+
+    @abstractmethod
+    def fechar(self, sessao_id: int, admin_id: int, valor_contado: float,
+               justificativa: Optional[str], versao: Optional[int],
+               totais_conferidos: dict) -> dict:
+        """Fecha a sessão em uma única transação de escrita, desde que ela
+        continue ABERTA, na mesma versão e com os mesmos totais conferidos;
+        senão levanta ConflitoDeVersao. Retorna {'fechada_em',
+        'admin_fechamento_nome'}."""
+        ...
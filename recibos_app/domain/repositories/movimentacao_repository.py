@@ -1,5 +1,7 @@
 from abc import ABC, abstractmethod
-from typing import List, Optional
+from typing import Iterator, List, Optional
+
+TAMANHO_PAGINA = 500
 
 
 class MovimentacaoRepository(ABC):
@@ -17,3 +19,39 @@ class MovimentacaoRepository(ABC):
         """Returns {'total_entradas': float, 'total_saidas': float,
                     'total_saidas_com_recibo': float, 'total_saidas_sem_recibo': float}"""
         ...
+
+    def list_by_sessao_nao_cancelados(self, sessao_id: int) -> List[dict]:
+        """Movimentações da sessão, sem as de recibos cancelados."""
+        raise NotImplementedError
+
+    # count_by_sessao e list_page_by_sessao têm implementação padrão em cima
+    # das listas inteiras, para os repositórios que ainda não paginam no
+    # banco; os do app (SQLite, remoto, arquivo) sobrescrevem as duas.
+
+    def _lista(self, sessao_id: int, nao_cancelados: bool) -> List[dict]:
+        if nao_cancelados:
+            return self.list_by_sessao_nao_cancelados(sessao_id)
+        return self.list_by_sessao(sessao_id)
+
+    def count_by_sessao(self, sessao_id: int, nao_cancelados: bool = False) -> int:
+        return len(self._lista(sessao_id, nao_cancelados))
+
+    def list_page_by_sessao(self, sessao_id: int, apos_id: Optional[int] = None,
+                            limite: int = TAMANHO_PAGINA,
+                            nao_cancelados: bool = False) -> List[dict]:
+        """Até `limite` movimentações com id maior que `apos_id`, em ordem de id.
+        O id da última é o cursor da próxima página."""
+        movs = sorted(self._lista(sessao_id, nao_cancelados), key=lambda m: m["id"])
+        return [m for m in movs if m["id"] > (apos_id or 0)][:limite]
+
+    def iter_by_sessao(self, sessao_id: int, nao_cancelados: bool = False,
+                       tamanho_pagina: int = TAMANHO_PAGINA) -> Iterator[dict]:
+        """Percorre a sessão página a página, sem montar a lista inteira."""
+        apos_id = None
+        while True:
+            pagina = self.list_page_by_sessao(sessao_id, apos_id, tamanho_pagina,
+                                              nao_cancelados)
+            yield from pagina
+            if len(pagina) < tamanho_pagina:
+                return
+            apos_id = pagina[-1]["id"]
@@ -6,7 +6,10 @@ class ReciboRepository(ABC):
     @abstractmethod
     def create(self, empresa_id, usuario_id, tipo, pessoa_nome, pessoa_documento,
                descricao, valor, data_inicio, data_fim, data_pagamento,
-               caminho_pdf, status="PAGO", movimentacao_id=None) -> int:
+               caminho_pdf, status="PAGO", movimentacao_id=None,
+               dados_pdf=None) -> int:
+        """`dados_pdf`: JSON canônico do PDF (pdf.cache_pdf.serializar),
+        gravado com o recibo para a reimpressão."""
         ...
 
     @abstractmethod
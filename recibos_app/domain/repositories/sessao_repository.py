@@ -10,7 +10,10 @@ class SessaoRepository(ABC):
 
     @abstractmethod
     def close(self, sessao_id: int, admin_id: int, valor_contado: float,
-              justificativa: Optional[str]) -> None:
+              justificativa: Optional[str], versao: Optional[int] = None) -> None:
+        """Fecha a sessão se ela ainda estiver ABERTA e, quando `versao` for
+        informada, se ainda estiver nessa versão; caso contrário levanta
+        domain.exceptions.ConflitoDeVersao."""
         ...
 
     @abstractmethod
@@ -0,0 +1,19 @@
+from abc import ABC, abstractmethod
+
+
+class UnidadeDeTrabalho(ABC):
+    """Agrupa as escritas de vários repositórios em uma única transação.
+
+    Usada com `with`: grava tudo ao sair sem erro e desfaz tudo se houver
+    exceção. Uma unidade aberta dentro de outra (na mesma thread) se junta
+    à mais externa, então caminhos em lote podem manter uma unidade aberta
+    em volta de muitas chamadas que abrem a sua própria.
+    """
+
+    @abstractmethod
+    def __enter__(self) -> "UnidadeDeTrabalho":
+        ...
+
+    @abstractmethod
+    def __exit__(self, tipo, valor, tb) -> bool:
+        ...
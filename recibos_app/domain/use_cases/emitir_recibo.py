@@ -0,0 +1,30 @@
+from domain.use_cases.registrar_saida import RegistrarSaida
+
+
+class EmitirRecibo:
+    """Grava o recibo e, se o usuário tiver uma gaveta aberta, a saída
+    correspondente, em uma única unidade de trabalho."""
+
+    def __init__(self, recibo_repo, movimentacao_repo, sessao_repo, unidade):
+        self.recibo_repo = recibo_repo
+        self.movimentacao_repo = movimentacao_repo
+        self.sessao_repo = sessao_repo
+        self.unidade = unidade
+
+    def execute(self, user, empresa_id: int, tipo: str, pessoa_nome: str,
+                pessoa_documento: str, descricao: str, valor: float,
+                data_inicio: str, data_fim: str, data_pagamento: str,
+                caminho_pdf: str = "", dados_pdf: str | None = None) -> dict:
+        with self.unidade:
+            sessao = self.sessao_repo.get_open_by_user(user["id"])
+            mov_id = None
+            if sessao:
+                mov_id = RegistrarSaida(self.movimentacao_repo, self.sessao_repo).execute(
+                    user, sessao["id"], valor, f"Recibo: {descricao[:80]}"
+                )
+            recibo_id = self.recibo_repo.create(
+                empresa_id, user["id"], tipo, pessoa_nome, pessoa_documento,
+                descricao, valor, data_inicio, data_fim, data_pagamento,
+                caminho_pdf, movimentacao_id=mov_id, dados_pdf=dados_pdf,
+            )
+        return {"recibo_id": recibo_id, "movimentacao_id": mov_id}
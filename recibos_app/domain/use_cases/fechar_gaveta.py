@@ -1,9 +1,13 @@
+from domain.entities.fechamento import FechamentoConcluido, ResumoFechamento
+
+
 class FecharGaveta:
     """Fecha uma gaveta com conferência de valores. Somente admin (diferente do responsável)."""
 
-    def __init__(self, sessao_repo, movimentacao_repo):
+    def __init__(self, sessao_repo, movimentacao_repo, fechamento_repo=None):
         self.sessao_repo = sessao_repo
         self.movimentacao_repo = movimentacao_repo
+        self.fechamento_repo = fechamento_repo
 
     def get_resumo(self, sessao_id: int) -> dict:
         """Retorna o resumo financeiro da sessão para exibição antes do fechamento."""
@@ -28,34 +32,81 @@ class FecharGaveta:
             "saldo_esperado": saldo_esperado,
         }
 
-    def execute(self, admin_user, sessao_id: int, valor_contado: float,
-                justificativa: str | None = None) -> None:
+    @staticmethod
+    def _validar(admin_user, status: str, responsavel_id: int, diferenca: float,
+                 justificativa: str | None) -> None:
         if not admin_user["is_admin"]:
             raise PermissionError("Somente administradores podem fechar gavetas.")
 
-        sessao = self.sessao_repo.get_by_id(sessao_id)
-        if not sessao:
-            raise ValueError("Sessão não encontrada.")
-
-        if sessao["status"] != "ABERTA":
+        if status != "ABERTA":
             raise ValueError("Esta gaveta já está fechada.")
 
-        if sessao["responsavel_id"] == admin_user["id"]:
+        if responsavel_id == admin_user["id"]:
             raise PermissionError(
                 "O responsável pela gaveta não pode fechar a própria gaveta."
             )
 
-        resumo = self.get_resumo(sessao_id)
-        diferenca = valor_contado - resumo["saldo_esperado"]
-
         if abs(diferenca) > 0.01 and not justificativa:
             raise ValueError(
                 "Existe divergência de valores. Justificativa é obrigatória."
             )
 
+    def execute(self, admin_user, sessao_id: int, valor_contado: float,
+                justificativa: str | None = None) -> None:
+        if not admin_user["is_admin"]:
+            raise PermissionError("Somente administradores podem fechar gavetas.")
+
+        sessao = self.sessao_repo.get_by_id(sessao_id)
+        if not sessao:
+            raise ValueError("Sessão não encontrada.")
+
+        resumo = self.get_resumo(sessao_id)
+        self._validar(admin_user, sessao["status"], sessao["responsavel_id"],
+                      valor_contado - resumo["saldo_esperado"], justificativa)
+
         self.sessao_repo.close(
             sessao_id=sessao_id,
             admin_id=admin_user["id"],
             valor_contado=valor_contado,
             justificativa=justificativa,
+            versao=sessao.get("versao"),
+        )
+
+    # --- Fechamento atômico (uma leitura para conferir, uma escrita para fechar) ---
+
+    def conferir(self, sessao_id: int) -> ResumoFechamento:
+        """Foto da sessão e dos totais para exibir antes do fechamento."""
+        dados = self.fechamento_repo.get_resumo(sessao_id)
+        if not dados:
+            raise ValueError("Sessão não encontrada.")
+        return ResumoFechamento.de_dict(dados)
+
+    def fechar(self, admin_user, resumo: ResumoFechamento, valor_contado: float,
+               justificativa: str | None = None) -> FechamentoConcluido:
+        """Fecha a sessão conferida em `resumo`, sem reler o que já foi lido.
+
+        Se a sessão mudou desde a conferência (outra estação fechou, houve
+        movimentação), o repositório levanta ConflitoDeVersao.
+        """
+        self._validar(admin_user, resumo.status, resumo.responsavel_id,
+                      valor_contado - resumo.saldo_esperado, justificativa)
+        gravado = self.fechamento_repo.fechar(
+            sessao_id=resumo.sessao_id,
+            admin_id=admin_user["id"],
+            valor_contado=valor_contado,
+            justificativa=justificativa,
+            versao=resumo.versao,
+            totais_conferidos={
+                "total_entradas": resumo.total_entradas,
+                "total_saidas": resumo.total_saidas,
+                "total_saidas_com_recibo": resumo.total_saidas_com_recibo,
+                "total_saidas_sem_recibo": resumo.total_saidas_sem_recibo,
+            },
+        )
+        return FechamentoConcluido(
+            resumo=resumo,
+            valor_contado=valor_contado,
+            justificativa=justificativa,
+            admin_fechamento_nome=gravado["admin_fechamento_nome"] or "",
+            fechada_em=gravado["fechada_em"] or "",
         )
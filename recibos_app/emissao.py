@@ -0,0 +1,33 @@
+"""Emissão de recibos sobre o app.db local.
+
+O recibo e a saída na gaveta são gravados por database.get_connection
+dentro de uma UnidadeSqlite: ou entram os dois, ou nenhum. A fabrica usa
+estas funções no modo local, e o servidor de repositórios as expõe às
+estações, para que uma emissão remota seja uma única chamada (e uma única
+transação) no servidor.
+"""
+
+from data.repositories.sqlite_usuario_repo import SqliteUsuarioRepo
+from domain.use_cases.emitir_recibo import EmitirRecibo
+from escrita import UnidadeSqlite
+from fechamento_gaveta import SqliteSessaoVersionada
+from models.recibo import SqliteReciboRepo
+from movimentacoes_sessao import SqliteMovimentacaoPaginada
+
+
+def usuario_por_id(usuario_id: int) -> dict:
+    usuario = SqliteUsuarioRepo().get_by_id(usuario_id)
+    if not usuario:
+        raise ValueError("Usuário não encontrado.")
+    return usuario
+
+
+def emitir_recibo(usuario_id: int, empresa_id, tipo, pessoa_nome, pessoa_documento,
+                  descricao, valor, data_inicio, data_fim, data_pagamento,
+                  caminho_pdf="", dados_pdf=None) -> dict:
+    """Ver EmitirRecibo. Retorna {'recibo_id', 'movimentacao_id'}."""
+    uc = EmitirRecibo(SqliteReciboRepo(), SqliteMovimentacaoPaginada(),
+                      SqliteSessaoVersionada(), UnidadeSqlite("emitir_recibo"))
+    return uc.execute(usuario_por_id(usuario_id), empresa_id, tipo, pessoa_nome,
+                      pessoa_documento, descricao, valor, data_inicio, data_fim,
+                      data_pagamento, caminho_pdf, dados_pdf)
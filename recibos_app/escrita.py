@@ -0,0 +1,257 @@
+"""Camada de escrita para vários computadores usando o mesmo app.db.
+
+Toda escrita roda em uma transação BEGIN IMMEDIATE (o bloqueio de escrita
+é obtido logo no início, e não no meio da transação) e é repetida com
+espera exponencial quando o SQLite responde "database is locked". As
+colisões são contadas e registradas no log para acompanhar os horários
+de pico.
+"""
+
+import logging
+import random
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from functools import wraps
+from typing import Optional
+
+from database import compartilhar, conexao_compartilhada, get_connection
+from domain.exceptions import BancoOcupado, ConflitoDeVersao
+from domain.repositories.unidade_trabalho import UnidadeDeTrabalho
+
+logger = logging.getLogger(__name__)
+
+TENTATIVAS = 6
+ESPERA_INICIAL = 0.05  # segundos
+ESPERA_MAXIMA = 2.0
+
+
+class EstatisticasContencao:
+    """Contadores de colisões de escrita, por operação."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._por_operacao = {}
+
+    def _entrada(self, operacao):
+        return self._por_operacao.setdefault(
+            operacao,
+            {"execucoes": 0, "colisoes": 0, "falhas": 0, "espera_total": 0.0,
+             "max_tentativas": 0},
+        )
+
+    def registrar_colisao(self, operacao: str, tentativa: int, espera: float):
+        with self._lock:
+            e = self._entrada(operacao)
+            e["colisoes"] += 1
+            e["espera_total"] += espera
+        logger.warning(
+            "Banco ocupado em %s (tentativa %d); nova tentativa em %.0f ms",
+            operacao, tentativa, espera * 1000,
+        )
+
+    def registrar_execucao(self, operacao: str, tentativas: int):
+        with self._lock:
+            e = self._entrada(operacao)
+            e["execucoes"] += 1
+            e["max_tentativas"] = max(e["max_tentativas"], tentativas)
+        if tentativas > 1:
+            logger.info("%s concluída após %d tentativas", operacao, tentativas)
+
+    def registrar_falha(self, operacao: str, tentativas: int):
+        with self._lock:
+            self._entrada(operacao)["falhas"] += 1
+        logger.error("%s desistiu após %d tentativas com o banco ocupado",
+                     operacao, tentativas)
+
+    def resumo(self) -> dict:
+        with self._lock:
+            return {op: dict(v) for op, v in self._por_operacao.items()}
+
+    def registrar_resumo(self):
+        for op, v in sorted(self.resumo().items()):
+            if v["colisoes"] or v["falhas"]:
+                logger.info(
+                    "Contenção %s: %d execuções, %d colisões, %d falhas, "
+                    "%.2f s de espera, até %d tentativas",
+                    op, v["execucoes"], v["colisoes"], v["falhas"],
+                    v["espera_total"], v["max_tentativas"],
+                )
+
+
+contencao = EstatisticasContencao()
+
+
+def _banco_ocupado(erro: sqlite3.OperationalError) -> bool:
+    msg = str(erro).lower()
+    return "locked" in msg or "busy" in msg
+
+
+def com_retry(operacao: Optional[str] = None, tentativas: int = TENTATIVAS):
+    """Decorador que repete a função quando o banco está bloqueado.
+
+    A função decorada deve ser idempotente até o commit (normalmente ela
+    abre a própria transação com transacao_escrita). Esgotadas as
+    tentativas, levanta BancoOcupado.
+    """
+    def decorador(func):
+        nome = operacao or func.__qualname__
+
+        @wraps(func)
+        def wrapper(*args, **kwargs):
+            espera = ESPERA_INICIAL
+            for tentativa in range(1, tentativas + 1):
+                try:
+                    resultado = func(*args, **kwargs)
+                except sqlite3.OperationalError as e:
+                    if not _banco_ocupado(e):
+                        raise
+                    if tentativa == tentativas:
+                        contencao.registrar_falha(nome, tentativa)
+                        raise BancoOcupado(
+                            "O banco de dados está sendo usado por outra estação. "
+                            "Aguarde alguns segundos e tente novamente."
+                        ) from e
+                    atraso = random.uniform(espera / 2, espera)
+                    contencao.registrar_colisao(nome, tentativa, atraso)
+                    time.sleep(atraso)
+                    espera = min(espera * 2, ESPERA_MAXIMA)
+                else:
+                    contencao.registrar_execucao(nome, tentativa)
+                    return resultado
+        return wrapper
+    return decorador
+
+
+@contextmanager
+def transacao_escrita(conn):
+    """BEGIN IMMEDIATE ... COMMIT, com ROLLBACK em caso de erro.
+
+    Na conexão de uma unidade de trabalho vira um SAVEPOINT: a escrita
+    entra na transação da unidade e só é gravada quando ela terminar.
+    """
+    if getattr(conn, "emprestada", False):
+        conn.execute("SAVEPOINT escrita")
+        try:
+            yield conn
+        except BaseException:
+            conn.execute("ROLLBACK TO escrita")
+            conn.execute("RELEASE escrita")
+            raise
+        conn.execute("RELEASE escrita")
+        return
+    if conn.in_transaction:
+        conn.commit()
+    conn.execute("BEGIN IMMEDIATE")
+    try:
+        yield conn
+        conn.commit()
+    except BaseException:
+        conn.rollback()
+        raise
+
+
+def executar_escrita(funcao, *args, operacao: Optional[str] = None, **kwargs):
+    """Executa funcao(conn, *args, **kwargs) em uma transação de escrita com retry."""
+    @com_retry(operacao or getattr(funcao, "__qualname__", "escrita"))
+    def _executar():
+        conn = get_connection()
+        try:
+            with transacao_escrita(conn):
+                return funcao(conn, *args, **kwargs)
+        finally:
+            conn.close()
+    return _executar()
+
+
+class UnidadeSqlite(UnidadeDeTrabalho):
+    """Unidade de trabalho sobre o app.db local.
+
+    Abre uma conexão, obtém o bloqueio de escrita (BEGIN IMMEDIATE, com as
+    mesmas novas tentativas das outras escritas) e a empresta a
+    get_connection nesta thread: os repositórios continuam abrindo e
+    fechando "suas" conexões, mas todos escrevem na mesma transação, com
+    um único commit no fim.
+
+    Só entra na unidade quem abre conexões por database.get_connection. Os
+    repositórios de data.repositories usam data.database: dentro de uma
+    unidade, as leituras deles funcionam (e, feitas depois do BEGIN
+    IMMEDIATE, já não podem ficar desatualizadas por outra escrita), mas
+    uma escrita esperaria pelo bloqueio da própria unidade até o
+    busy_timeout e falharia com "database is locked". Por isso as escritas
+    usadas em unidades (SqliteMovimentacaoPaginada.create, models.recibo)
+    são deste repositório.
+    """
+
+    def __init__(self, operacao: str = "unidade_de_trabalho"):
+        self.operacao = operacao
+        self._conn = None
+
+    def __enter__(self):
+        if conexao_compartilhada() is not None:
+            return self  # junta-se à unidade externa
+        conn = get_connection()
+        try:
+            com_retry(self.operacao)(conn.execute)("BEGIN IMMEDIATE")
+        except BaseException:
+            conn.close()
+            raise
+        compartilhar(conn)
+        self._conn = conn
+        return self
+
+    def __exit__(self, tipo, valor, tb):
+        conn, self._conn = self._conn, None
+        if conn is None:
+            return False
+        compartilhar(None)
+        try:
+            if tipo is None:
+                conn.commit()
+            else:
+                conn.rollback()
+        finally:
+            conn.close()
+        return False
+
+
+_TABELAS_VERSIONADAS = set()
+
+
+def garantir_versao(conn, tabela: str):
+    """Adiciona a coluna `versao` à tabela, se ainda não existir."""
+    if tabela in _TABELAS_VERSIONADAS:
+        return
+    cols = {row[1] for row in conn.execute(f"PRAGMA table_info({tabela})")}
+    if "versao" not in cols:
+        # Sem cache aqui: se a transação for desfeita, o ALTER também é
+        conn.execute(f"ALTER TABLE {tabela} ADD COLUMN versao INTEGER NOT NULL DEFAULT 0")
+        return
+    _TABELAS_VERSIONADAS.add(tabela)
+
+
+def atualizar_versionado(conn, tabela: str, registro_id: int, versao: Optional[int],
+                         campos: dict, condicao: str = "", params=()) -> int:
+    """UPDATE com checagem otimista da coluna `versao`.
+
+    Se `versao` for None a checagem é ignorada (apenas `condicao` vale).
+    Levanta ConflitoDeVersao se nenhuma linha for atualizada. Retorna a
+    nova versão.
+    """
+    sets = ", ".join(f"{c} = ?" for c in campos)
+    sql = f"UPDATE {tabela} SET {sets}, versao = versao + 1 WHERE id = ?"
+    valores = list(campos.values()) + [registro_id]
+    if versao is not None:
+        sql += " AND versao = ?"
+        valores.append(versao)
+    if condicao:
+        sql += f" AND ({condicao})"
+        valores.extend(params)
+    if conn.execute(sql, valores).rowcount == 0:
+        raise ConflitoDeVersao(
+            "Este registro foi alterado em outra estação. "
+            "Atualize a tela e tente novamente."
+        )
+    row = conn.execute(f"SELECT versao FROM {tabela} WHERE id = ?", (registro_id,)).fetchone()
+    return row[0]
@@ -0,0 +1,175 @@
+"""Fechamento de gaveta em duas transações: uma leitura e uma escrita.
+
+get_resumo lê a sessão, os totais e os totais por tipo na mesma transação
+de leitura (todos da mesma foto do banco). fechar confere, dentro da
+transação de escrita, que a sessão continua aberta, na mesma versão e com
+os mesmos totais que o administrador conferiu, e só então grava.
+
+Movimentações ligadas a recibos cancelados não entram nos totais.
+
+SqliteSessaoVersionada é o repositório de sessões usado pelas telas: o de
+data.repositories com close() versionado, novas tentativas nas escritas e
+leituras por database.get_connection (que entram em leitura.instantaneo()).
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from data.repositories.sqlite_sessao_repo import SqliteSessaoRepo
+from database import get_connection
+from domain.exceptions import ConflitoDeVersao
+from domain.repositories.fechamento_repository import FechamentoRepository
+from escrita import atualizar_versionado, com_retry, executar_escrita, garantir_versao
+
+FILTRO_NAO_CANCELADA = "(m.recibo_id IS NULL OR COALESCE(r.status, '') <> 'CANCELADO')"
+
+CAMPOS_TOTAIS = ("total_entradas", "total_saidas", "total_saidas_com_recibo",
+                 "total_saidas_sem_recibo")
+
+
+def totais_da_sessao(conn, sessao_id: int) -> dict:
+    row = conn.execute(
+        f"""
+        SELECT COALESCE(SUM(CASE WHEN m.tipo = 'ENTRADA' THEN m.valor END), 0) AS total_entradas,
+               COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' THEN m.valor END), 0) AS total_saidas,
+               COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' AND m.recibo_id IS NOT NULL
+                                 THEN m.valor END), 0) AS total_saidas_com_recibo,
+               COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' AND m.recibo_id IS NULL
+                                 THEN m.valor END), 0) AS total_saidas_sem_recibo
+        FROM movimentacoes m LEFT JOIN recibos r ON r.id = m.recibo_id
+        WHERE m.sessao_id = ? AND {FILTRO_NAO_CANCELADA}
+        """,
+        (sessao_id,),
+    ).fetchone()
+    return dict(row)
+
+
+def _fechar_sessao(conn, sessao_id, admin_id, valor_contado, justificativa,
+                   versao, fechada_em) -> None:
+    garantir_versao(conn, "gaveta_sessoes")
+    atualizar_versionado(
+        conn, "gaveta_sessoes", sessao_id, versao,
+        {"status": "FECHADA", "fechada_em": fechada_em,
+         "admin_fechamento_id": admin_id, "valor_contado": valor_contado,
+         "justificativa": justificativa},
+        condicao="status = 'ABERTA'",
+    )
+
+
+_SQL_SESSOES = """
+    SELECT s.*, g.nome AS gaveta_nome, ur.username AS responsavel_nome,
+           ua.username AS admin_abertura_nome, uf.username AS admin_fechamento_nome
+    FROM gaveta_sessoes s
+    LEFT JOIN gavetas g ON g.id = s.gaveta_id
+    LEFT JOIN usuarios ur ON ur.id = s.responsavel_id
+    LEFT JOIN usuarios ua ON ua.id = s.admin_abertura_id
+    LEFT JOIN usuarios uf ON uf.id = s.admin_fechamento_id
+"""
+
+
+def _sessoes(where: str = "", params=()) -> List[dict]:
+    conn = get_connection()
+    try:
+        return [dict(r) for r in conn.execute(
+            f"{_SQL_SESSOES} {where} ORDER BY s.aberta_em DESC", params
+        )]
+    finally:
+        conn.close()
+
+
+def _mesmos_totais(a: dict, b: dict) -> bool:
+    return all(round(a[c] or 0, 2) == round(b[c] or 0, 2) for c in CAMPOS_TOTAIS)
+
+
+class SqliteFechamentoRepo(FechamentoRepository):
+    def get_resumo(self, sessao_id: int) -> Optional[dict]:
+        conn = get_connection()
+        try:
+            # Dentro de leitura.instantaneo() a foto já está aberta
+            if not conn.in_transaction:
+                conn.execute("BEGIN")
+            # s.* e não s.versao: a coluna só existe depois da primeira escrita versionada
+            sessao = conn.execute(
+                """
+                SELECT s.*, s.id AS sessao_id, g.nome AS gaveta_nome,
+                       ur.username AS responsavel_nome,
+                       ua.username AS admin_abertura_nome
+                FROM gaveta_sessoes s
+                JOIN gavetas g ON g.id = s.gaveta_id
+                LEFT JOIN usuarios ur ON ur.id = s.responsavel_id
+                LEFT JOIN usuarios ua ON ua.id = s.admin_abertura_id
+                WHERE s.id = ?
+                """,
+                (sessao_id,),
+            ).fetchone()
+            if sessao is None:
+                return None
+            resumo = dict(sessao)
+            resumo.update(totais_da_sessao(conn, sessao_id))
+            # Limite para quem percorre as movimentações depois da foto
+            resumo["ultimo_mov_id"] = conn.execute(
+                "SELECT MAX(id) FROM movimentacoes WHERE sessao_id = ?", (sessao_id,)
+            ).fetchone()[0]
+            resumo["totais_por_tipo"] = [
+                dict(r) for r in conn.execute(
+                    f"""
+                    SELECT COALESCE(r.tipo, 'SAIDA_AVULSA') AS tipo, SUM(m.valor) AS total
+                    FROM movimentacoes m LEFT JOIN recibos r ON r.id = m.recibo_id
+                    WHERE m.sessao_id = ? AND m.tipo = 'SAIDA' AND {FILTRO_NAO_CANCELADA}
+                    GROUP BY COALESCE(r.tipo, 'SAIDA_AVULSA')
+                    ORDER BY tipo
+                    """,
+                    (sessao_id,),
+                )
+            ]
+            return resumo
+        finally:
+            # Só leitura: encerrar a transação libera a foto do banco
+            conn.rollback()
+            conn.close()
+
+    def fechar(self, sessao_id, admin_id, valor_contado, justificativa, versao,
+               totais_conferidos):
+        fechada_em = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+
+        def _fechar(conn):
+            if not _mesmos_totais(totais_da_sessao(conn, sessao_id), totais_conferidos):
+                raise ConflitoDeVersao(
+                    "Houve movimentações na gaveta depois da conferência. "
+                    "Reabra o fechamento para ver os valores atualizados."
+                )
+            _fechar_sessao(conn, sessao_id, admin_id, valor_contado, justificativa,
+                           versao, fechada_em)
+            admin = conn.execute(
+                "SELECT username FROM usuarios WHERE id = ?", (admin_id,)
+            ).fetchone()
+            return {"fechada_em": fechada_em,
+                    "admin_fechamento_nome": admin["username"] if admin else ""}
+
+        return executar_escrita(_fechar, operacao="fechar_gaveta")
+
+
+class SqliteSessaoVersionada(SqliteSessaoRepo):
+    """SqliteSessaoRepo com close() versionado e retry nas escritas."""
+
+    @com_retry("sessao.create")
+    def create(self, gaveta_id, responsavel_id, admin_id, saldo_inicial):
+        return super().create(gaveta_id, responsavel_id, admin_id, saldo_inicial)
+
+    # Leituras pelo database.get_connection, e não pelo data.database: assim
+    # a auditoria e os relatórios as leem dentro da foto de instantaneo()
+
+    def get_by_id(self, sessao_id):
+        sessoes = _sessoes("WHERE s.id = ?", (sessao_id,))
+        return sessoes[0] if sessoes else None
+
+    def list_all(self):
+        return _sessoes()
+
+    def list_by_gaveta(self, gaveta_id):
+        return _sessoes("WHERE s.gaveta_id = ?", (gaveta_id,))
+
+    def close(self, sessao_id, admin_id, valor_contado, justificativa, versao=None):
+        fechada_em = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+        executar_escrita(_fechar_sessao, sessao_id, admin_id, valor_contado,
+                         justificativa, versao, fechada_em, operacao="sessao.close")
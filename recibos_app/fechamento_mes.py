@@ -0,0 +1,435 @@
+"""Fechamento do mês: todos os relatórios de empresas e gavetas de uma vez.
+
+Os agregados saem de poucas consultas em uma única foto do banco
+(leitura.instantaneo: a mesma para todos os relatórios); a renderização dos
+PDFs é distribuída entre processos, já que o ReportLab é Python puro e não
+escala com threads. O resultado fica em
+<pasta-de-PDFs>/Fechamento Mensal/AAAA-MM/, com um índice em PDF e um
+manifest.json (arquivo, SHA-256, tamanho e totais de cada relatório).
+
+Recibos entram no mês pela data de pagamento, como na tela de Relatórios.
+Movimentações ligadas a recibos cancelados ficam fora dos relatórios de
+gaveta, com o mesmo filtro do fechamento de cada sessão (fechamento_gaveta).
+"""
+
+import calendar
+import json
+import logging
+import os
+import re
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Callable, Dict, List, Optional
+
+from reportlab.lib.pagesizes import A4
+from reportlab.lib.units import mm
+
+from app_paths import get_pdf_dir
+from armazem_pdf import hash_arquivo
+from arquivamento import periodo_requer_arquivo
+from fechamento_gaveta import CAMPOS_TOTAIS, FILTRO_NAO_CANCELADA
+from leitura import instantaneo
+from pdf.gerador_pdf import formatar_moeda
+from pdf.relatorio_fechamento_pdf import gerar_pdf_fechamento
+from pdf.relatorio_gaveta_pdf import gerar_pdf_relatorio_gaveta
+from pdf.relatorio_recibos_pdf import gerar_pdf_relatorio_recibos
+from pdf.relatorio_tabular import Coluna, RelatorioTabular
+
+logger = logging.getLogger(__name__)
+
+PASTA = "Fechamento Mensal"
+INDICE = "00_Indice.pdf"
+MANIFESTO = "manifest.json"
+
+EMPRESA = "EMPRESA"
+GAVETA = "GAVETA"
+FECHAMENTO = "FECHAMENTO"
+
+ROTULOS_TIPO = {
+    "PASSAGEM": "Passagem",
+    "DIARIA": "Diária",
+    "DOBRA": "Dobra",
+    "FERIADO": "Feriado",
+    "PRESTACAO": "Prestação de Serviço",
+    "FORNECEDOR": "Fornecedor (Mercadorias)",
+    "OUTROS": "Outros",
+    "SAIDA_AVULSA": "Saída Avulsa (Gaveta)",
+}
+
+
+@dataclass
+class Tarefa:
+    """Um relatório a renderizar: o gerador e seus argumentos (tudo serializável)."""
+    tipo: str
+    referencia: str
+    arquivo: str
+    gerador: Callable
+    kwargs: dict
+    registros: int
+    total: float
+
+
+@dataclass
+class ResultadoFechamento:
+    mes: str
+    pasta: str
+    indice: str
+    manifesto: str
+    relatorios: List[dict] = field(default_factory=list)
+    segundos: float = 0.0
+
+
+def _validar_mes(mes: str) -> None:
+    if not re.fullmatch(r"\d{4}-(0[1-9]|1[0-2])", mes or ""):
+        raise ValueError("Mês inválido; use o formato AAAA-MM.")
+
+
+def _limites(mes: str) -> tuple:
+    """Início (inclusivo) e fim (exclusivo) do mês, no formato das colunas de data."""
+    ano, m = int(mes[:4]), int(mes[5:])
+    proximo = f"{ano + 1}-01" if m == 12 else f"{ano}-{m + 1:02d}"
+    return f"{mes}-01", f"{proximo}-01"
+
+
+def _nome_arquivo(texto: str) -> str:
+    return re.sub(r"[^\w\-]+", "_", texto, flags=re.UNICODE).strip("_")[:60] or "sem_nome"
+
+
+# --- Agregação ---
+
+def coletar(mes: str) -> dict:
+    """Lê todos os dados do mês em uma única foto do banco (leitura.instantaneo).
+
+    Retorna {"recibos": [...], "sessoes": [...], "movimentacoes": {sessao_id: [...]},
+    "totais": {sessao_id: {...}}, "por_tipo": {sessao_id: [...]}}.
+    """
+    _validar_mes(mes)
+    inicio, fim = _limites(mes)
+    with instantaneo() as conn:
+        recibos = [dict(r) for r in conn.execute(
+            """
+            SELECT r.id, r.empresa_id, r.tipo, r.pessoa_nome, r.pessoa_documento,
+                   r.descricao, r.valor, r.data_pagamento, r.created_at,
+                   e.razao_social, u.username,
+                   (SELECT g.nome FROM movimentacoes m
+                      JOIN gaveta_sessoes s ON s.id = m.sessao_id
+                      JOIN gavetas g ON g.id = s.gaveta_id
+                    WHERE m.recibo_id = r.id LIMIT 1) AS gaveta_nome
+            FROM recibos r
+            LEFT JOIN empresas e ON e.id = r.empresa_id
+            LEFT JOIN usuarios u ON u.id = r.usuario_id
+            WHERE r.data_pagamento >= ? AND r.data_pagamento < ?
+              AND COALESCE(r.status, '') <> 'CANCELADO'
+            ORDER BY e.razao_social, r.empresa_id, r.data_pagamento, r.created_at, r.id
+            """,
+            (inicio, fim),
+        )]
+        sessoes = [dict(r) for r in conn.execute(
+            """
+            SELECT s.*, g.nome AS gaveta_nome, ur.username AS responsavel_nome,
+                   ua.username AS admin_abertura_nome, uf.username AS admin_fechamento_nome
+            FROM gaveta_sessoes s
+            JOIN gavetas g ON g.id = s.gaveta_id
+            LEFT JOIN usuarios ur ON ur.id = s.responsavel_id
+            LEFT JOIN usuarios ua ON ua.id = s.admin_abertura_id
+            LEFT JOIN usuarios uf ON uf.id = s.admin_fechamento_id
+            WHERE s.aberta_em >= ? AND s.aberta_em < ?
+            ORDER BY g.nome, s.aberta_em, s.id
+            """,
+            (inicio, fim),
+        )]
+        # Os filtros das três consultas abaixo repetem o das sessões, para
+        # o SQLite resolver tudo por sessao_id sem listas enormes de IN (...)
+        filtro_sessao = (
+            "m.sessao_id IN (SELECT id FROM gaveta_sessoes "
+            "WHERE aberta_em >= ? AND aberta_em < ?)"
+        )
+        totais = {}
+        for r in conn.execute(
+            f"""
+            SELECT m.sessao_id,
+                   COALESCE(SUM(CASE WHEN m.tipo = 'ENTRADA' THEN m.valor END), 0) AS total_entradas,
+                   COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' THEN m.valor END), 0) AS total_saidas,
+                   COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' AND m.recibo_id IS NOT NULL
+                                     THEN m.valor END), 0) AS total_saidas_com_recibo,
+                   COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' AND m.recibo_id IS NULL
+                                     THEN m.valor END), 0) AS total_saidas_sem_recibo
+            FROM movimentacoes m LEFT JOIN recibos r ON r.id = m.recibo_id
+            WHERE {filtro_sessao} AND {FILTRO_NAO_CANCELADA}
+            GROUP BY m.sessao_id
+            """,
+            (inicio, fim),
+        ):
+            totais[r["sessao_id"]] = dict(r)
+        por_tipo: Dict[int, list] = {}
+        for r in conn.execute(
+            f"""
+            SELECT m.sessao_id, COALESCE(r.tipo, 'SAIDA_AVULSA') AS tipo, SUM(m.valor) AS total
+            FROM movimentacoes m LEFT JOIN recibos r ON r.id = m.recibo_id
+            WHERE {filtro_sessao} AND m.tipo = 'SAIDA' AND {FILTRO_NAO_CANCELADA}
+            GROUP BY m.sessao_id, COALESCE(r.tipo, 'SAIDA_AVULSA')
+            ORDER BY m.sessao_id, tipo
+            """,
+            (inicio, fim),
+        ):
+            por_tipo.setdefault(r["sessao_id"], []).append(
+                {"tipo": r["tipo"], "total": r["total"]}
+            )
+        movimentacoes: Dict[int, list] = {}
+        for r in conn.execute(
+            f"""
+            SELECT m.sessao_id, m.tipo, m.valor, m.descricao, m.created_at, u.username
+            FROM movimentacoes m
+            LEFT JOIN recibos r ON r.id = m.recibo_id
+            LEFT JOIN usuarios u ON u.id = m.usuario_id
+            WHERE {filtro_sessao} AND {FILTRO_NAO_CANCELADA}
+            ORDER BY m.sessao_id, m.created_at, m.id
+            """,
+            (inicio, fim),
+        ):
+            movimentacoes.setdefault(r["sessao_id"], []).append(dict(r))
+    return {
+        "recibos": recibos,
+        "sessoes": sessoes,
+        "movimentacoes": movimentacoes,
+        "totais": totais,
+        "por_tipo": por_tipo,
+    }
+
+
+def montar_tarefas(mes: str, dados: dict, pasta: str) -> List[Tarefa]:
+    """Converte os dados coletados na lista de relatórios a renderizar."""
+    ultimo_dia = calendar.monthrange(int(mes[:4]), int(mes[5:]))[1]
+    periodo_inicio = f"01/{mes[5:]}/{mes[:4]}"
+    periodo_fim = f"{ultimo_dia:02d}/{mes[5:]}/{mes[:4]}"
+    tarefas = []
+
+    por_empresa: Dict[object, list] = {}
+    for row in dados["recibos"]:
+        por_empresa.setdefault(row["empresa_id"], []).append(row)
+    for empresa_id, rows in por_empresa.items():
+        razao = rows[0]["razao_social"] or f"Empresa {empresa_id}"
+        tarefas.append(Tarefa(
+            tipo=EMPRESA,
+            referencia=razao,
+            arquivo=os.path.join(pasta, f"Empresa_{_nome_arquivo(razao)}_{empresa_id}.pdf"),
+            gerador=gerar_pdf_relatorio_recibos,
+            kwargs=dict(rows=rows, periodo_inicio=periodo_inicio, periodo_fim=periodo_fim,
+                        rotulos_tipo=ROTULOS_TIPO, mostrar_gaveta=True),
+            registros=len(rows),
+            total=round(sum(r["valor"] or 0 for r in rows), 2),
+        ))
+
+    for sessao in dados["sessoes"]:
+        sid = sessao["id"]
+        linha_totais = dados["totais"].get(sid, {})
+        totais = {campo: linha_totais.get(campo, 0.0) for campo in CAMPOS_TOTAIS}
+        movs = dados["movimentacoes"].get(sid, [])
+        saldo_inicial = sessao["saldo_inicial"] or 0
+        saldo = saldo_inicial + totais["total_entradas"] - totais["total_saidas"]
+        gaveta = sessao["gaveta_nome"] or ""
+        base = f"{_nome_arquivo(gaveta)}_{sid:06d}"
+        tarefas.append(Tarefa(
+            tipo=GAVETA,
+            referencia=f"{gaveta} — Sessão {sid:06d}",
+            arquivo=os.path.join(pasta, f"Gaveta_{base}.pdf"),
+            gerador=gerar_pdf_relatorio_gaveta,
+            kwargs=dict(
+                gaveta_nome=gaveta,
+                responsavel_nome=sessao["responsavel_nome"] or "",
+                aberta_em=sessao["aberta_em"] or "",
+                movimentacoes=movs,
+                total_entradas=totais["total_entradas"],
+                total_saidas=totais["total_saidas"],
+                saldo_inicial=saldo_inicial,
+                saldo_atual=saldo,
+                sessao_id=sid,
+            ),
+            registros=len(movs),
+            total=round(totais["total_saidas"], 2),
+        ))
+        if sessao["status"] != "FECHADA":
+            continue
+        contado = sessao["valor_contado"] or 0
+        tarefas.append(Tarefa(
+            tipo=FECHAMENTO,
+            referencia=f"{gaveta} — Sessão {sid:06d}",
+            arquivo=os.path.join(pasta, f"Fechamento_{base}.pdf"),
+            gerador=gerar_pdf_fechamento,
+            kwargs=dict(
+                gaveta_nome=gaveta,
+                responsavel_nome=sessao["responsavel_nome"] or "",
+                admin_abertura_nome=sessao["admin_abertura_nome"] or "",
+                admin_fechamento_nome=sessao["admin_fechamento_nome"] or "",
+                aberta_em=sessao["aberta_em"] or "",
+                fechada_em=sessao["fechada_em"] or "",
+                saldo_inicial=saldo_inicial,
+                saldo_esperado=saldo,
+                valor_contado=contado,
+                diferenca=contado - saldo,
+                justificativa=sessao["justificativa"],
+                sessao_id=sid,
+                totais_por_tipo=dados["por_tipo"].get(sid, []),
+                **totais,
+            ),
+            registros=len(movs),
+            total=round(contado - saldo, 2),
+        ))
+    return tarefas
+
+
+# --- Renderização ---
+
+def _renderizar(tarefa: Tarefa) -> dict:
+    """Executado nos processos de trabalho: gera o PDF e devolve o resumo."""
+    tarefa.gerador(caminho_pdf=tarefa.arquivo, **tarefa.kwargs)
+    return {
+        "arquivo": os.path.basename(tarefa.arquivo),
+        "tipo": tarefa.tipo,
+        "referencia": tarefa.referencia,
+        "registros": tarefa.registros,
+        "total": tarefa.total,
+        "bytes": os.path.getsize(tarefa.arquivo),
+        "sha256": hash_arquivo(tarefa.arquivo),
+    }
+
+
+def renderizar(tarefas: List[Tarefa], processos: Optional[int] = None,
+               progresso: Optional[Callable[[int, int], None]] = None) -> List[dict]:
+    """Renderiza as tarefas em paralelo; a ordem do resultado é a das tarefas.
+
+    processos=1 renderiza no próprio processo (útil para depuração).
+    progresso(feitas, total) é chamado a cada relatório pronto.
+    """
+    if not tarefas:
+        return []
+    avisar = progresso or (lambda feitas, total: None)
+    processos = min(processos or os.cpu_count() or 1, len(tarefas))
+    if processos <= 1:
+        resultados = []
+        for tarefa in tarefas:
+            resultados.append(_renderizar(tarefa))
+            avisar(len(resultados), len(tarefas))
+        return resultados
+    # Tarefas grandes primeiro, para nenhum processo ficar com a cauda sozinho
+    ordem = sorted(range(len(tarefas)), key=lambda i: -tarefas[i].registros)
+    resultados = [None] * len(tarefas)
+    with ProcessPoolExecutor(max_workers=processos) as executor:
+        futuros = {executor.submit(_renderizar, tarefas[i]): i for i in ordem}
+        for feitas, futuro in enumerate(as_completed(futuros), 1):
+            resultados[futuros[futuro]] = futuro.result()
+            avisar(feitas, len(tarefas))
+    return resultados
+
+
+_TITULOS = {EMPRESA: "Recibos da empresa", GAVETA: "Movimentações", FECHAMENTO: "Fechamento"}
+
+_COLUNAS_INDICE = [
+    Coluna("Relatório", 30),
+    Coluna("Referência", 62),
+    Coluna("Registros", 18, alinhamento="right"),
+    Coluna("Total", 28, alinhamento="right"),
+    Coluna("Arquivo", 42),
+]
+
+
+def gerar_indice(caminho_pdf: str, mes: str, relatorios: List[dict]) -> None:
+    """Índice com todos os relatórios do mês e os totais consolidados."""
+    gerado_em = datetime.now().strftime("%d/%m/%Y %H:%M")
+
+    def _cabecalho(fluxo, _numero_pagina):
+        c = fluxo.c
+        c.setFont("Helvetica-Bold", 13)
+        c.drawString(fluxo.margem_x, fluxo.y, f"FECHAMENTO DO MÊS {mes[5:]}/{mes[:4]}")
+        fluxo.y -= 5 * mm
+        c.setFont("Helvetica", 8)
+        c.drawString(fluxo.margem_x, fluxo.y,
+                     f"{len(relatorios)} relatório(s)  —  Gerado em: {gerado_em}")
+        fluxo.y -= 7 * mm
+
+    rel = RelatorioTabular(caminho_pdf, A4, _COLUNAS_INDICE, cabecalho_pagina=_cabecalho)
+    rel.cabecalho_colunas()
+    rel.linhas(
+        (_TITULOS.get(r["tipo"], r["tipo"]), r["referencia"], str(r["registros"]),
+         f"R$ {formatar_moeda(r['total'])}", r["arquivo"])
+        for r in relatorios
+    )
+
+    empresas = [r for r in relatorios if r["tipo"] == EMPRESA]
+    gavetas: Dict[str, float] = {}
+    for r in relatorios:
+        if r["tipo"] == GAVETA:
+            nome = r["referencia"].split(" — ")[0]
+            gavetas[nome] = gavetas.get(nome, 0) + r["total"]
+    linhas = [(f"• {r['referencia']}: R$ {formatar_moeda(r['total'])} "
+               f"({r['registros']} recibo(s))",) for r in empresas]
+    linhas.append((f"Total em recibos: R$ {formatar_moeda(sum(r['total'] for r in empresas))}",
+                   True))
+    rel.avancar(4 * mm)
+    rel.bloco_totais(linhas, titulo="RECIBOS POR EMPRESA:", tamanho=9, recuo=4 * mm)
+    if gavetas:
+        rel.avancar(3 * mm)
+        rel.bloco_totais(
+            [(f"• {nome}: R$ {formatar_moeda(total)}",) for nome, total in sorted(gavetas.items())],
+            titulo="SAÍDAS POR GAVETA:", tamanho=9, recuo=4 * mm,
+        )
+    rel.finalizar()
+
+
+def fechar_mes(mes: str, processos: Optional[int] = None,
+               progresso: Optional[Callable[[int, int, str], None]] = None
+               ) -> ResultadoFechamento:
+    """Gera todos os relatórios do mês, o índice e o manifesto.
+
+    progresso(feitos, total, etapa) acompanha a execução (total 0 enquanto
+    não se sabe quantos relatórios serão gerados). Não toca no Qt: a tela
+    chama fechar_mes fora da thread principal.
+    """
+    avisar = progresso or (lambda feitos, total, etapa: None)
+    _validar_mes(mes)
+    if periodo_requer_arquivo(_limites(mes)[0]):
+        raise ValueError(
+            f"O mês {mes} já foi arquivado; use a tela de Relatórios para consultá-lo."
+        )
+    inicio = datetime.now()
+    pasta = get_pdf_dir(PASTA, mes)
+    avisar(0, 0, "Lendo os dados do mês")
+    dados = coletar(mes)
+    tarefas = montar_tarefas(mes, dados, pasta)
+    avisar(0, len(tarefas), "Gerando os relatórios")
+    relatorios = renderizar(
+        tarefas, processos,
+        lambda feitas, total: avisar(feitas, total, "Gerando os relatórios"),
+    )
+    avisar(len(tarefas), len(tarefas), "Gerando o índice")
+
+    # Relatórios de uma execução anterior que não existem mais (ex.: sessão
+    # excluída) não podem continuar na pasta ao lado do índice novo
+    atuais = {r["arquivo"] for r in relatorios} | {INDICE}
+    for nome in os.listdir(pasta):
+        if nome.endswith(".pdf") and nome not in atuais:
+            os.remove(os.path.join(pasta, nome))
+
+    indice = os.path.join(pasta, INDICE)
+    gerar_indice(indice, mes, relatorios)
+    segundos = (datetime.now() - inicio).total_seconds()
+    resultado = ResultadoFechamento(
+        mes=mes, pasta=pasta, indice=indice,
+        manifesto=os.path.join(pasta, MANIFESTO), relatorios=relatorios,
+        segundos=round(segundos, 2),
+    )
+    manifesto = asdict(resultado)
+    manifesto.update(
+        gerado_em=datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
+        pasta=os.path.basename(pasta),
+        indice={"arquivo": INDICE, "sha256": hash_arquivo(indice),
+                "bytes": os.path.getsize(indice)},
+        manifesto=MANIFESTO,
+    )
+    temporario = resultado.manifesto + ".tmp"
+    with open(temporario, "w", encoding="utf-8") as f:
+        json.dump(manifesto, f, ensure_ascii=False, indent=2)
+    os.replace(temporario, resultado.manifesto)
+    logger.info("Fechamento de %s: %d relatório(s) em %.1fs", mes, len(relatorios), segundos)
+    return resultado
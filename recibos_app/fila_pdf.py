@@ -0,0 +1,209 @@
+"""Fila persistente de renderização de PDFs de recibo.
+
+Os recibos são gravados no banco na hora, junto com seus dados canônicos
+(recibos.dados_pdf); o PDF vira um job na tabela pdf_jobs e é renderizado
+em segundo plano no cache de pdf.cache_pdf e registrado no armazem_pdf. Jobs que ficaram pendentes
+(ou em processamento) porque o aplicativo fechou/travou são retomados
+na próxima abertura.
+
+Várias estações podem retomar a mesma fila: antes de renderizar, cada uma
+reivindica o job com um UPDATE condicional (só um vence) e fica com ele
+por LEASE_MINUTOS. Um job em processamento cuja concessão venceu é de uma
+estação que caiu, e volta a poder ser reivindicado.
+"""
+
+import json
+import logging
+import os
+import socket
+from datetime import datetime, timedelta
+from typing import List, Optional
+
+import armazem_pdf
+from database import get_connection
+from escrita import executar_escrita
+from models.recibo import garantir_dados_pdf
+from pdf.cache_pdf import obter_pdf
+from pdf.gerador_pdf import POR_PAGINA_PADRAO
+
+logger = logging.getLogger(__name__)
+
+PENDENTE = "PENDENTE"
+PROCESSANDO = "PROCESSANDO"
+CONCLUIDO = "CONCLUIDO"
+ERRO = "ERRO"
+
+MAX_TENTATIVAS = 3
+LEASE_MINUTOS = 10
+
+# Quem está renderizando um job (gravado em pdf_jobs.estacao)
+ESTACAO = f"{socket.gethostname()}:{os.getpid()}"
+
+# Jobs que esta estação pode pegar agora (parâmetros: agora)
+_DISPONIVEL = (
+    f"(status = '{PENDENTE}' "
+    f"OR (status = '{ERRO}' AND tentativas < {MAX_TENTATIVAS}) "
+    f"OR (status = '{PROCESSANDO}' AND tentativas < {MAX_TENTATIVAS} "
+    f"AND (lease_ate IS NULL OR lease_ate < ?)))"
+)
+
+_tabela_ok = False
+
+
+def _agora(minutos: int = 0) -> str:
+    return (datetime.now() + timedelta(minutes=minutos)).strftime("%Y-%m-%d %H:%M:%S")
+
+
+def garantir_tabela(conn=None) -> None:
+    global _tabela_ok
+    if _tabela_ok:
+        return
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS pdf_jobs (
+              id INTEGER PRIMARY KEY AUTOINCREMENT,
+              caminho_pdf TEXT,
+              recibos TEXT NOT NULL,
+              recibo_ids TEXT,
+              status TEXT NOT NULL DEFAULT 'PENDENTE',
+              tentativas INTEGER NOT NULL DEFAULT 0,
+              erro TEXT,
+              created_at TEXT,
+              concluido_em TEXT
+            );
+            """
+        )
+        conn.execute(
+            "CREATE INDEX IF NOT EXISTS idx_pdf_jobs_status ON pdf_jobs(status)"
+        )
+        garantir_dados_pdf(conn)
+        colunas = {r[1] for r in conn.execute("PRAGMA table_info(pdf_jobs)")}
+        if "layout" not in colunas:
+            conn.execute("ALTER TABLE pdf_jobs ADD COLUMN layout TEXT")
+        if "estacao" not in colunas:
+            conn.execute("ALTER TABLE pdf_jobs ADD COLUMN estacao TEXT")
+        if "lease_ate" not in colunas:
+            conn.execute("ALTER TABLE pdf_jobs ADD COLUMN lease_ate TEXT")
+        conn.commit()
+        _tabela_ok = True
+    finally:
+        if proprio:
+            conn.close()
+
+
+def enfileirar(recibos: List[dict], por_pagina: int = POR_PAGINA_PADRAO,
+               marcas_corte: bool = False) -> int:
+    """Registra o job e retorna seu id. `recibos` são os dados de cada recibo
+    (mesmas chaves de gerar_pdf_multiplos_recibos, mais recibo_id opcional).
+
+    Os dados canônicos de cada recibo (recibos.dados_pdf, que a reimpressão
+    usa) já foram gravados com o recibo: o job só fica nesta estação, e no
+    modo servidor os ids são os do banco do servidor.
+    """
+    garantir_tabela()
+    return executar_escrita(
+        lambda conn: inserir_job(conn, recibos, por_pagina, marcas_corte),
+        operacao="fila_pdf.enfileirar",
+    )
+
+
+def inserir_job(conn, recibos: List[dict], por_pagina: int = POR_PAGINA_PADRAO,
+                marcas_corte: bool = False) -> int:
+    """Parte de enfileirar que roda dentro de uma transação já aberta, para
+    quem grava os recibos e o job juntos (garantir_tabela antes)."""
+    recibo_ids = [r["recibo_id"] for r in recibos if r.get("recibo_id")]
+    cur = conn.execute(
+        "INSERT INTO pdf_jobs (recibos, recibo_ids, layout, status, created_at) "
+        "VALUES (?, ?, ?, ?, ?)",
+        (json.dumps(recibos, ensure_ascii=False), json.dumps(recibo_ids),
+         json.dumps({"por_pagina": por_pagina, "marcas_corte": bool(marcas_corte)}),
+         PENDENTE, _agora()),
+    )
+    return cur.lastrowid
+
+
+def get_job(job_id: int) -> Optional[dict]:
+    garantir_tabela()
+    conn = get_connection()
+    try:
+        row = conn.execute("SELECT * FROM pdf_jobs WHERE id = ?", (job_id,)).fetchone()
+        return dict(row) if row else None
+    finally:
+        conn.close()
+
+
+def listar_pendentes() -> List[dict]:
+    """Jobs ainda não concluídos que ninguém está renderizando, incluindo
+    os interrompidos no meio (concessão vencida)."""
+    garantir_tabela()
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            f"SELECT * FROM pdf_jobs WHERE {_DISPONIVEL} ORDER BY id", (_agora(),)
+        ).fetchall()
+        return [dict(r) for r in rows]
+    finally:
+        conn.close()
+
+
+def reivindicar(job_id: int) -> bool:
+    """Marca o job como PROCESSANDO por esta estação, se ainda estiver
+    disponível. Retorna False se outra estação o pegou antes."""
+    def _reivindicar(conn):
+        agora = _agora()
+        # Concessão vencida em todas as tentativas: o job derruba quem o
+        # renderiza, então para de circular entre as estações
+        conn.execute(
+            f"UPDATE pdf_jobs SET status = ?, erro = ?, lease_ate = NULL "
+            f"WHERE id = ? AND status = ? AND tentativas >= {MAX_TENTATIVAS} "
+            f"AND (lease_ate IS NULL OR lease_ate < ?)",
+            (ERRO, "Renderização interrompida em todas as tentativas.",
+             job_id, PROCESSANDO, agora),
+        )
+        return conn.execute(
+            f"UPDATE pdf_jobs SET status = ?, estacao = ?, lease_ate = ?, "
+            f"tentativas = tentativas + 1 WHERE id = ? AND {_DISPONIVEL}",
+            (PROCESSANDO, ESTACAO, _agora(LEASE_MINUTOS), job_id, agora),
+        ).rowcount == 1
+
+    return executar_escrita(_reivindicar, operacao="fila_pdf.reivindicar")
+
+
+def _marcar(job_id: int, status: str, erro: Optional[str] = None,
+            caminho_pdf: Optional[str] = None) -> None:
+    def _atualizar(conn):
+        conn.execute(
+            "UPDATE pdf_jobs SET status = ?, erro = ?, caminho_pdf = ?, concluido_em = ?, "
+            "lease_ate = NULL WHERE id = ?",
+            (status, erro, caminho_pdf, _agora() if status == CONCLUIDO else None, job_id),
+        )
+
+    executar_escrita(_atualizar, operacao="fila_pdf.marcar")
+
+
+def renderizar(job: dict) -> Optional[str]:
+    """Reivindica o job, renderiza o PDF no cache e atualiza o status.
+    Retorna o caminho, ou None se outra estação ficou com o job.
+
+    Pode ser chamada fora da thread principal; não toca em nada do Qt.
+    """
+    job_id = job["id"]
+    recibos = json.loads(job["recibos"])
+    layout = json.loads(job.get("layout") or "{}")
+    if not reivindicar(job_id):
+        logger.info("Job %s já reivindicado por outra estação", job_id)
+        return None
+    try:
+        caminho_pdf = obter_pdf(recibos, **layout)
+        recibo_ids = json.loads(job["recibo_ids"] or "[]")
+        if recibo_ids:
+            armazem_pdf.guardar(caminho_pdf, armazem_pdf.RECIBO, recibo_ids)
+    except Exception as e:
+        logger.exception("Falha ao renderizar job %s", job_id)
+        _marcar(job_id, ERRO, str(e))
+        raise
+    _marcar(job_id, CONCLUIDO, caminho_pdf=caminho_pdf)
+    return caminho_pdf
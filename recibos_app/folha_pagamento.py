@@ -0,0 +1,183 @@
+"""Folha de passagens/diárias: todos os colaboradores ativos de uma vez.
+
+calcular lê os colaboradores ativos em uma única consulta e conta os dias
+trabalhados de cada um pelo calendário (uma contagem por jornada
+distinta). gravar lança as saídas na gaveta aberta do usuário (se houver)
+pelo caso de uso RegistrarSaida e grava os recibos, com os dados do PDF,
+em uma única UnidadeSqlite; registrar acrescenta o job de PDF do lote à
+mesma transação: ou entra tudo, ou nada.
+
+No modo servidor a fabrica chama calcular e gravar no servidor (uma
+chamada cada) e põe o job na fila de PDFs desta estação.
+"""
+
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import List, Optional
+
+import calendario
+import fila_pdf
+from database import get_connection
+from domain.use_cases.registrar_saida import RegistrarSaida
+from emissao import usuario_por_id
+from escrita import UnidadeSqlite
+from fechamento_gaveta import SqliteSessaoVersionada
+from movimentacoes_sessao import SqliteMovimentacaoPaginada
+from pdf.cache_pdf import dados_de_linha, serializar
+from pdf.gerador_pdf import POR_PAGINA_PADRAO
+
+# tipo do recibo -> (coluna do valor em colaboradores, rótulo)
+TIPOS = {
+    "PASSAGEM": ("valor_passagem", "Passagem"),
+    "DIARIA": ("valor_diaria", "Diária"),
+    "DOBRA": ("valor_dobra", "Dobra"),
+}
+
+
+def _data(valor) -> date:
+    # Pelo servidor as datas chegam como texto ISO
+    return date.fromisoformat(valor) if isinstance(valor, str) else valor
+
+
+@dataclass
+class Lancamento:
+    colaborador_id: int
+    nome: str
+    cpf: str
+    dias: int
+    valor_unitario: float
+    incluir: bool = True
+
+    @property
+    def total(self) -> float:
+        return round(self.dias * self.valor_unitario, 2)
+
+
+def calcular(tipo: str, inicio: date, fim: date, conn=None) -> List[Lancamento]:
+    """Lançamentos de todos os colaboradores ativos com valor para o tipo."""
+    coluna, _ = TIPOS[tipo]
+    inicio, fim = _data(inicio), _data(fim)
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        colunas = {r[1] for r in conn.execute("PRAGMA table_info(colaboradores)")}
+        jornada = "dias_trabalho" if "dias_trabalho" in colunas else "NULL AS dias_trabalho"
+        rows = conn.execute(
+            f"""
+            SELECT id, nome, cpf, {coluna} AS valor, {jornada}
+            FROM colaboradores
+            WHERE COALESCE(ativo, 1) = 1 AND COALESCE({coluna}, 0) > 0
+            ORDER BY nome COLLATE NOCASE
+            """
+        ).fetchall()
+    finally:
+        if proprio:
+            conn.close()
+    dias = calendario.contar_lote(rows, inicio, fim)
+    return [
+        Lancamento(r["id"], r["nome"], r["cpf"], dias[r["id"]], float(r["valor"]),
+                   incluir=dias[r["id"]] > 0)
+        for r in rows
+    ]
+
+
+def descricao(tipo: str, inicio: date, fim: date) -> str:
+    rotulo = TIPOS[tipo][1].upper()
+    if inicio == fim:
+        return f"{rotulo} DO DIA {inicio:%d/%m/%Y}"
+    return f"{rotulo} DO PERIODO DE {inicio:%d/%m/%Y} A {fim:%d/%m/%Y}"
+
+
+class _SessaoLida:
+    """A sessão já lida dentro da unidade: com o bloqueio de escrita da
+    unidade ela não muda até o commit, então RegistrarSaida não precisa
+    reler a sessão a cada colaborador."""
+
+    def __init__(self, sessao: dict):
+        self.sessao = sessao
+
+    def get_by_id(self, sessao_id):
+        return self.sessao if sessao_id == self.sessao["id"] else None
+
+
+def _registrar_saidas(usuario: dict, desc: str,
+                      lancamentos: List[Lancamento]) -> List[Optional[int]]:
+    """Uma saída por lançamento na gaveta aberta do usuário; sem gaveta
+    aberta, nenhuma (e os recibos ficam sem movimentação)."""
+    sessao = SqliteSessaoVersionada().get_open_by_user(usuario["id"])
+    if not sessao:
+        return [None] * len(lancamentos)
+    uc = RegistrarSaida(SqliteMovimentacaoPaginada(), _SessaoLida(sessao))
+    return [uc.execute(usuario, sessao["id"], lanc.total, f"Recibo: {desc[:80]}")
+            for lanc in lancamentos]
+
+
+def gravar(empresa_id: int, usuario_id: int, tipo: str, inicio, fim,
+           lancamentos, data_pagamento=None) -> dict:
+    """Saídas e recibos dos lançamentos incluídos, em uma unidade de
+    trabalho (ou na unidade já aberta). Retorna {'recibo_ids', 'recibos',
+    'movimentacoes', 'total'}; 'recibos' são os dados de PDF de cada um."""
+    inicio, fim = _data(inicio), _data(fim)
+    data_pagamento = _data(data_pagamento) or date.today()
+    lancamentos = [Lancamento(**lanc) if isinstance(lanc, dict) else lanc
+                   for lanc in lancamentos]
+    lancamentos = [lanc for lanc in lancamentos if lanc.incluir and lanc.total > 0]
+    if not lancamentos:
+        raise ValueError("Nenhum colaborador com valor a pagar.")
+    desc = descricao(tipo, inicio, fim)
+    agora = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    usuario = usuario_por_id(usuario_id)
+
+    with UnidadeSqlite("folha_pagamento"):
+        conn = get_connection()
+        empresa = conn.execute(
+            "SELECT razao_social, cnpj FROM empresas WHERE id = ?", (empresa_id,)
+        ).fetchone()
+        if empresa is None:
+            raise ValueError("Empresa não encontrada.")
+        colunas = {r[1] for r in conn.execute("PRAGMA table_info(recibos)")}
+        mov_ids = _registrar_saidas(usuario, desc, lancamentos)
+        recibos = []
+        for lanc, mov_id in zip(lancamentos, mov_ids):
+            linha = {
+                "empresa_id": empresa_id, "usuario_id": usuario_id, "tipo": tipo,
+                "pessoa_nome": lanc.nome, "pessoa_documento": lanc.cpf, "descricao": desc,
+                "valor": lanc.total, "data_inicio": inicio.isoformat(),
+                "data_fim": fim.isoformat(), "data_pagamento": data_pagamento.isoformat(),
+                "caminho_pdf": "", "created_at": agora, "status": "PAGO",
+            }
+            dados = dados_de_linha({**linha, "empresa_razao": empresa["razao_social"],
+                                    "empresa_cnpj": empresa["cnpj"]})
+            if "movimentacao_id" in colunas:
+                linha["movimentacao_id"] = mov_id
+            if "dados_pdf" in colunas:
+                linha["dados_pdf"] = serializar(dados)
+            recibo_id = conn.execute(
+                f"INSERT INTO recibos ({', '.join(linha)}) "
+                f"VALUES ({', '.join('?' * len(linha))})",
+                list(linha.values()),
+            ).lastrowid
+            if mov_id is not None:
+                # Mesmo vínculo de volta que models.recibo.create_recibo faz
+                conn.execute("UPDATE movimentacoes SET recibo_id = ? WHERE id = ?",
+                             (recibo_id, mov_id))
+            recibos.append({**dados, "recibo_id": recibo_id})
+    return {"recibo_ids": [r["recibo_id"] for r in recibos], "recibos": recibos,
+            "movimentacoes": sum(m is not None for m in mov_ids),
+            "total": round(sum(lanc.total for lanc in lancamentos), 2)}
+
+
+def registrar(empresa_id: int, usuario_id: int, tipo: str, inicio: date, fim: date,
+              lancamentos: List[Lancamento], data_pagamento: Optional[date] = None,
+              por_pagina: int = POR_PAGINA_PADRAO, marcas_corte: bool = False) -> dict:
+    """gravar mais o job de PDF do lote, tudo na mesma transação. Retorna
+    {'recibo_ids', 'movimentacoes', 'job_id', 'total'}; o job já fica na
+    fila (agendar com a FilaPdfQt)."""
+    fila_pdf.garantir_tabela()
+    with UnidadeSqlite("folha_pagamento"):
+        resultado = gravar(empresa_id, usuario_id, tipo, inicio, fim, lancamentos,
+                           data_pagamento)
+        recibos = resultado.pop("recibos")
+        resultado["job_id"] = fila_pdf.inserir_job(get_connection(), recibos,
+                                                   por_pagina, marcas_corte)
+    return resultado
@@ -0,0 +1,113 @@
+"""Leituras longas (relatórios, auditoria, exportações) em uma foto do banco.
+
+instantaneo() pega do pool uma conexão só de leitura (mode=ro), anexa os
+arquivos anuais, abre a transação e já faz a primeira leitura: a partir
+daí todas as consultas enxergam o banco como estava nesse instante, mesmo
+que o relatório leve minutos e outras estações continuem gravando.
+Enquanto o bloco roda, get_connection nesta thread devolve essa conexão
+(como a unidade de trabalho faz com a de escrita), então os módulos que
+usam database.get_connection (fechamento_gaveta, fechamento_mes,
+movimentacoes_sessao, arquivamento, resumo_diario) continuam abrindo e
+fechando "suas" conexões sem saber da foto. Os repositórios de
+data.repositories conectam por data.database e ficam fora dela: não os
+misture com a foto esperando leituras consistentes entre si.
+
+Com o app.db em WAL (ver database.configurar_diario) a foto não bloqueia
+ninguém: as escritas vão para o -wal. No diário padrão, exigido quando o
+app.db está em pasta de rede, a foto segura um bloqueio de leitura e as
+escritas das outras estações esperam por ela (com as novas tentativas de
+escrita.py); nesse caso, mantenha o bloco só em volta das consultas.
+
+Dentro do bloco não se grava nada: a conexão é só de leitura.
+"""
+
+import threading
+from contextlib import contextmanager
+
+from arquivamento import anexar_arquivos
+from database import (
+    compartilhar,
+    conexao_compartilhada,
+    get_connection,
+    get_db_path,
+    get_read_connection,
+)
+
+# Conexões ociosas guardadas; além disso, as devolvidas são fechadas
+TAMANHO_POOL = 4
+
+
+class PoolLeitura:
+    """Conexões só de leitura reaproveitadas entre relatórios (e threads)."""
+
+    def __init__(self, tamanho: int = TAMANHO_POOL):
+        self.tamanho = tamanho
+        self._lock = threading.Lock()
+        self._livres = []
+
+    def pegar(self):
+        caminho = get_db_path()
+        with self._lock:
+            while self._livres:
+                conn, origem = self._livres.pop()
+                if origem == caminho:
+                    return conn
+                conn.close()  # a pasta de dados mudou
+        return get_read_connection()
+
+    def devolver(self, conn) -> None:
+        conn.rollback()
+        with self._lock:
+            if len(self._livres) < self.tamanho:
+                self._livres.append((conn, get_db_path()))
+                return
+        conn.close()
+
+    def fechar(self) -> None:
+        with self._lock:
+            livres, self._livres = self._livres, []
+        for conn, _ in livres:
+            conn.close()
+
+
+pool = PoolLeitura()
+
+
+@contextmanager
+def instantaneo():
+    """Bloco de leitura com uma única foto do banco (ver o topo do módulo).
+
+    Dentro de uma unidade de trabalho ou de outro instantaneo(), usa a
+    conexão que já está em uso na thread.
+    """
+    externa = conexao_compartilhada()
+    if externa is not None:
+        yield externa
+        return
+    conn = pool.pegar()
+    try:
+        # ATTACH não pode ficar dentro da transação
+        aliases = anexar_arquivos(conn)
+        conn.execute("BEGIN")
+        # A foto de cada banco começa na primeira leitura dele
+        for schema in ["main", *aliases]:
+            conn.execute(f"SELECT COUNT(*) FROM {schema}.sqlite_master").fetchone()
+        compartilhar(conn)
+    except BaseException:
+        conn.close()
+        raise
+    try:
+        yield conn
+    finally:
+        compartilhar(None)
+        pool.devolver(conn)
+
+
+def foto_bloqueia_escritas() -> bool:
+    """True com o app.db fora do WAL: a foto segura as escritas das outras
+    estações, então só as consultas ficam dentro dela (ver o topo)."""
+    conn = get_connection()
+    try:
+        return conn.execute("PRAGMA journal_mode").fetchone()[0].lower() != "wal"
+    finally:
+        conn.close()
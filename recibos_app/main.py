@@ -1,3 +1,5 @@
+import logging
+import multiprocessing
 import os
 import sys
 import traceback
@@ -7,11 +9,18 @@ from PySide6.QtWidgets import QApplication, QMessageBox, QFileDialog
 from PySide6.QtGui import QIcon
 
 from data.database import init_db
+from database import configurar_diario
 from ui.main_window import MainWindow
 from ui.login import LoginDialog
+from ui.fila_pdf import get_fila
 from data.repositories.sqlite_usuario_repo import ensure_admin
 from app_paths import load_config, set_data_dir, get_data_dir, get_app_base_dir, get_resource_path
 from backup import BackupManager
+from escrita import contencao
+from diagnostico import instrumentar_app
+import calendario
+import movimentacoes_sessao
+import resumo_diario
 
 
 def _configure_data_dir_first_run(app):
@@ -78,6 +87,16 @@ def _setup_crash_handler():
     sys.excepthook = handler
 
 
+def _setup_logging():
+    """Registra avisos (ex.: contenção no banco compartilhado) em app.log."""
+    logging.basicConfig(
+        filename=os.path.join(get_data_dir(), "app.log"),
+        level=logging.INFO,
+        format="%(asctime)s %(levelname)s %(name)s: %(message)s",
+        encoding="utf-8",
+    )
+
+
 def main():
     app = QApplication(sys.argv)
     app.setStyle("Fusion")
@@ -89,7 +108,13 @@ def main():
 
     _configure_data_dir_first_run(app)
     _setup_crash_handler()
+    _setup_logging()
+    instrumentar_app()
     init_db()
+    configurar_diario()
+    resumo_diario.garantir_tabela()
+    calendario.garantir_coluna()
+    movimentacoes_sessao.garantir_indice()
     ensure_admin()
 
     # Backup automático silencioso no startup
@@ -101,8 +126,13 @@ def main():
         return
     window = MainWindow(login.user)
     window.show()
+    app.aboutToQuit.connect(contencao.registrar_resumo)
+    app.aboutToQuit.connect(get_fila().encerrar)
     sys.exit(app.exec())
 
 
 if __name__ == "__main__":
+    # Fechamento do mês renderiza em processos; no executável congelado os
+    # filhos precisam desviar para o multiprocessing antes de abrir a janela
+    multiprocessing.freeze_support()
     main()
@@ -1,8 +1,28 @@
+import json
 from datetime import datetime
+from functools import lru_cache
 
 from database import get_connection
+from domain.repositories.recibo_repository import ReciboRepository
+from escrita import com_retry, transacao_escrita
 
+_COLUNAS = (
+    "empresa_id", "usuario_id", "tipo", "pessoa_nome", "pessoa_documento", "descricao",
+    "valor", "data_inicio", "data_fim", "data_pagamento", "caminho_pdf", "created_at",
+    "status",
+)
+_INSERT = (
+    f"INSERT INTO recibos ({', '.join(_COLUNAS)}) "
+    f"VALUES ({', '.join('?' * len(_COLUNAS))})"
+)
+# Listas de ids viajam como um único parâmetro JSON: o texto do comando é
+# sempre o mesmo e o cache de comandos do sqlite3 o reaproveita
+_EM_LISTA = "IN (SELECT value FROM json_each(?))"
+_CANCELAR = f"UPDATE recibos SET status = 'CANCELADO' WHERE id {_EM_LISTA}"
+_EXCLUIR = f"DELETE FROM recibos WHERE id {_EM_LISTA}"
 
+
+@com_retry("create_recibo")
 def create_recibo(
     empresa_id,
     usuario_id,
@@ -16,36 +36,83 @@ def create_recibo(
     data_pagamento,
     caminho_pdf,
     status="PAGO",
+    movimentacao_id=None,
+    dados_pdf=None,
 ):
+    """Grava o recibo e retorna o id. Com `movimentacao_id`, liga o recibo à
+    saída da gaveta nos dois sentidos, na mesma transação; `dados_pdf` vai
+    junto (ver garantir_dados_pdf)."""
     created_at = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute(
-        """
-        INSERT INTO recibos (
-            empresa_id, usuario_id, tipo, pessoa_nome, pessoa_documento, descricao,
-            valor, data_inicio, data_fim, data_pagamento, caminho_pdf, created_at, status
-        )
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)
-        """,
-        (
-            empresa_id,
-            usuario_id,
-            tipo,
-            pessoa_nome,
-            pessoa_documento,
-            descricao,
-            valor,
-            data_inicio,
-            data_fim,
-            data_pagamento,
-            caminho_pdf,
-            created_at,
-            status,
-        ),
-    )
-    conn.commit()
-    conn.close()
+    try:
+        with transacao_escrita(conn):
+            recibo_id = conn.execute(
+                _INSERT,
+                (
+                    empresa_id,
+                    usuario_id,
+                    tipo,
+                    pessoa_nome,
+                    pessoa_documento,
+                    descricao,
+                    valor,
+                    data_inicio,
+                    data_fim,
+                    data_pagamento,
+                    caminho_pdf,
+                    created_at,
+                    status,
+                ),
+            ).lastrowid
+            if movimentacao_id is not None:
+                _ligar_movimentacao(conn, recibo_id, movimentacao_id)
+            if dados_pdf:
+                conn.execute("UPDATE recibos SET dados_pdf = ? WHERE id = ?",
+                             (dados_pdf, recibo_id))
+    finally:
+        conn.close()
+    return recibo_id
+
+
+def garantir_dados_pdf(conn=None) -> None:
+    """Cria a coluna recibos.dados_pdf, se faltar. Chamada na inicialização
+    (fila_pdf.garantir_tabela e o servidor de repositórios)."""
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        colunas = {r[1] for r in conn.execute("PRAGMA table_info(recibos)")}
+        if "dados_pdf" not in colunas:
+            conn.execute("ALTER TABLE recibos ADD COLUMN dados_pdf TEXT")
+            conn.commit()
+    finally:
+        if proprio:
+            conn.close()
+
+
+def _ligar_movimentacao(conn, recibo_id, movimentacao_id):
+    colunas = {r[1] for r in conn.execute("PRAGMA table_info(recibos)")}
+    if "movimentacao_id" in colunas:
+        conn.execute("UPDATE recibos SET movimentacao_id = ? WHERE id = ?",
+                     (movimentacao_id, recibo_id))
+    conn.execute("UPDATE movimentacoes SET recibo_id = ? WHERE id = ?",
+                 (recibo_id, movimentacao_id))
+
+
+@com_retry("create_many")
+def create_many(recibos):
+    """Grava vários recibos em uma transação. `recibos` são dicts com as
+    colunas de create_recibo (created_at e status são opcionais)."""
+    padrao = {"created_at": datetime.now().strftime("%Y-%m-%d %H:%M:%S"), "status": "PAGO"}
+    linhas = [tuple({**padrao, **r}.get(c) for c in _COLUNAS) for r in recibos]
+    if not linhas:
+        return 0
+    conn = get_connection()
+    try:
+        with transacao_escrita(conn):
+            conn.executemany(_INSERT, linhas)
+    finally:
+        conn.close()
+    return len(linhas)
 
 
 def list_recibos(usuario_id=None):
@@ -76,6 +143,38 @@ def list_recibos(usuario_id=None):
     return rows
 
 
+_FILTROS = (
+    ("empresa_ids", f"r.empresa_id {_EM_LISTA}"),
+    ("usuario_ids", f"r.usuario_id {_EM_LISTA}"),
+    ("tipos", f"r.tipo {_EM_LISTA}"),
+    ("status_list", f"r.status {_EM_LISTA}"),
+    ("data_inicio", "r.data_pagamento >= ?"),
+    ("data_fim", "r.data_pagamento <= ?"),
+    ("gaveta_ids", f"g.id {_EM_LISTA}"),
+)
+
+
+@lru_cache(maxsize=None)
+def _sql_filtrado(presentes: tuple) -> str:
+    """Um texto de SQL por combinação de filtros presentes (no máximo 128),
+    independente do tamanho das listas."""
+    where = [sql for (nome, sql) in _FILTROS if nome in presentes]
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    # Gaveta da movimentação do recibo, em subconsulta: uma linha por recibo
+    return f"""
+        SELECT r.*, e.razao_social, u.username, g.nome AS gaveta_nome
+        FROM recibos r
+        LEFT JOIN empresas e ON e.id = r.empresa_id
+        LEFT JOIN usuarios u ON u.id = r.usuario_id
+        LEFT JOIN gavetas g ON g.id = (
+            SELECT s.gaveta_id FROM movimentacoes m
+            JOIN gaveta_sessoes s ON s.id = m.sessao_id
+            WHERE m.recibo_id = r.id LIMIT 1)
+        {where_sql}
+        ORDER BY r.created_at ASC
+        """
+
+
 def list_recibos_filtrados(
     empresa_ids=None,
     usuario_ids=None,
@@ -83,62 +182,92 @@ def list_recibos_filtrados(
     status_list=None,
     data_inicio=None,
     data_fim=None,
+    gaveta_ids=None,
 ):
+    valores = {
+        "empresa_ids": empresa_ids,
+        "usuario_ids": usuario_ids,
+        "tipos": tipos,
+        "status_list": status_list,
+        "data_inicio": data_inicio,
+        "data_fim": data_fim,
+        "gaveta_ids": gaveta_ids,
+    }
+    presentes = tuple(nome for nome, _ in _FILTROS if valores[nome])
+    params = [
+        valores[nome] if nome.startswith("data_") else json.dumps(list(valores[nome]))
+        for nome in presentes
+    ]
     conn = get_connection()
-    cur = conn.cursor()
-    where = []
-    params = []
-
-    if empresa_ids:
-        where.append(f"r.empresa_id IN ({','.join(['?']*len(empresa_ids))})")
-        params.extend(empresa_ids)
-    if usuario_ids:
-        where.append(f"r.usuario_id IN ({','.join(['?']*len(usuario_ids))})")
-        params.extend(usuario_ids)
-    if tipos:
-        where.append(f"r.tipo IN ({','.join(['?']*len(tipos))})")
-        params.extend(tipos)
-    if status_list:
-        where.append(f"r.status IN ({','.join(['?']*len(status_list))})")
-        params.extend(status_list)
-    if data_inicio:
-        where.append("r.data_pagamento >= ?")
-        params.append(data_inicio)
-    if data_fim:
-        where.append("r.data_pagamento <= ?")
-        params.append(data_fim)
-
-    where_sql = " AND ".join(where)
-    if where_sql:
-        where_sql = "WHERE " + where_sql
-
-    cur.execute(
-        f"""
-        SELECT r.*, e.razao_social, u.username
-        FROM recibos r
-        LEFT JOIN empresas e ON e.id = r.empresa_id
-        LEFT JOIN usuarios u ON u.id = r.usuario_id
-        {where_sql}
-        ORDER BY r.created_at ASC
-        """,
-        params,
-    )
-    rows = cur.fetchall()
-    conn.close()
-    return rows
+    try:
+        return [dict(r) for r in conn.execute(_sql_filtrado(presentes), params)]
+    finally:
+        conn.close()
 
 
+@com_retry("cancel_recibo")
 def cancel_recibo(recibo_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("UPDATE recibos SET status = 'CANCELADO' WHERE id = ?", (recibo_id,))
-    conn.commit()
-    conn.close()
+    try:
+        with transacao_escrita(conn):
+            conn.execute("UPDATE recibos SET status = 'CANCELADO' WHERE id = ?", (recibo_id,))
+    finally:
+        conn.close()
 
 
+@com_retry("delete_recibo")
 def delete_recibo(recibo_id):
     conn = get_connection()
-    cur = conn.cursor()
-    cur.execute("DELETE FROM recibos WHERE id = ?", (recibo_id,))
-    conn.commit()
-    conn.close()
+    try:
+        with transacao_escrita(conn):
+            conn.execute("DELETE FROM recibos WHERE id = ?", (recibo_id,))
+    finally:
+        conn.close()
+
+
+@com_retry("cancel_many")
+def cancel_many(recibo_ids):
+    """Cancela vários recibos com um único comando e um único commit."""
+    conn = get_connection()
+    try:
+        with transacao_escrita(conn):
+            return conn.execute(_CANCELAR, (json.dumps(list(recibo_ids)),)).rowcount
+    finally:
+        conn.close()
+
+
+@com_retry("delete_many")
+def delete_many(recibo_ids):
+    """Exclui vários recibos com um único comando e um único commit."""
+    conn = get_connection()
+    try:
+        with transacao_escrita(conn):
+            return conn.execute(_EXCLUIR, (json.dumps(list(recibo_ids)),)).rowcount
+    finally:
+        conn.close()
+
+
+class SqliteReciboRepo(ReciboRepository):
+    """ReciboRepository sobre as funções deste módulo: conecta por
+    database.get_connection, então entra nas unidades de trabalho."""
+
+    def create(self, empresa_id, usuario_id, tipo, pessoa_nome, pessoa_documento,
+               descricao, valor, data_inicio, data_fim, data_pagamento,
+               caminho_pdf, status="PAGO", movimentacao_id=None, dados_pdf=None):
+        return create_recibo(empresa_id, usuario_id, tipo, pessoa_nome, pessoa_documento,
+                             descricao, valor, data_inicio, data_fim, data_pagamento,
+                             caminho_pdf, status, movimentacao_id, dados_pdf)
+
+    def list_all(self, usuario_id=None):
+        return list_recibos(usuario_id)
+
+    def list_filtered(self, empresa_ids=None, usuario_ids=None, tipos=None,
+                      status_list=None, data_inicio=None, data_fim=None):
+        return list_recibos_filtrados(empresa_ids, usuario_ids, tipos, status_list,
+                                      data_inicio, data_fim)
+
+    def cancel(self, recibo_id):
+        cancel_recibo(recibo_id)
+
+    def delete(self, recibo_id):
+        delete_recibo(recibo_id)
@@ -0,0 +1,138 @@
+"""Movimentações de uma sessão em páginas, para sessões longas.
+
+A paginação é por cursor (o id da última movimentação lida), e não por
+OFFSET: cada página é uma busca no índice a partir do cursor, com o mesmo
+custo na primeira e na centésima página, e movimentações novas no fim da
+sessão não deslocam as páginas já lidas.
+"""
+
+from datetime import datetime
+from typing import List, Optional
+
+from data.repositories.sqlite_movimentacao_repo import SqliteMovimentacaoRepo
+from database import get_connection
+from domain.repositories.movimentacao_repository import TAMANHO_PAGINA
+from escrita import com_retry, transacao_escrita
+from fechamento_gaveta import FILTRO_NAO_CANCELADA, totais_da_sessao
+
+
+_indice_ok = False
+
+
+def garantir_indice(conn=None) -> None:
+    """Cria o índice (sessao_id, id) das páginas, se faltar. Chamada na
+    inicialização, junto com resumo_diario.garantir_tabela."""
+    global _indice_ok
+    if _indice_ok:
+        return
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        existe = conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = 'movimentacoes'"
+        ).fetchone()
+        if existe:
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_movimentacoes_sessao_id "
+                "ON movimentacoes(sessao_id, id)"
+            )
+            conn.commit()
+        _indice_ok = bool(existe)
+    finally:
+        if proprio:
+            conn.close()
+
+
+def _filtro(nao_cancelados: bool) -> str:
+    return f"AND {FILTRO_NAO_CANCELADA}" if nao_cancelados else ""
+
+
+class SqliteMovimentacaoPaginada(SqliteMovimentacaoRepo):
+    """SqliteMovimentacaoRepo com contagem e páginas por sessão, e gravação
+    e leituras pelo database.get_connection (com retry nas escritas), que
+    entram nas unidades de trabalho e em leitura.instantaneo()."""
+
+    @com_retry("movimentacao.create")
+    def create(self, sessao_id, usuario_id, tipo, valor, descricao, recibo_id=None):
+        # Por database.get_connection (e não pelo repositório de
+        # data.repositories): assim a saída entra na unidade de trabalho
+        # junto com o recibo
+        conn = get_connection()
+        try:
+            with transacao_escrita(conn):
+                return conn.execute(
+                    "INSERT INTO movimentacoes (sessao_id, usuario_id, tipo, valor, "
+                    "descricao, recibo_id, created_at) VALUES (?, ?, ?, ?, ?, ?, ?)",
+                    (sessao_id, usuario_id, tipo, valor, descricao, recibo_id,
+                     datetime.now().strftime("%Y-%m-%d %H:%M:%S")),
+                ).lastrowid
+        finally:
+            conn.close()
+
+    def list_by_sessao(self, sessao_id: int) -> List[dict]:
+        conn = get_connection()
+        try:
+            rows = conn.execute(
+                """
+                SELECT m.*, u.username
+                FROM movimentacoes m
+                LEFT JOIN usuarios u ON u.id = m.usuario_id
+                WHERE m.sessao_id = ?
+                ORDER BY m.created_at ASC
+                """,
+                (sessao_id,),
+            ).fetchall()
+            return [dict(r) for r in rows]
+        finally:
+            conn.close()
+
+    def get_totals_by_sessao(self, sessao_id: int) -> dict:
+        conn = get_connection()
+        try:
+            return totais_da_sessao(conn, sessao_id)
+        finally:
+            conn.close()
+
+    def get_totals_by_sessoes(self, sessao_ids) -> dict:
+        """Totais de várias sessões na mesma conexão (como o remoto, que os
+        pede em uma única requisição)."""
+        conn = get_connection()
+        try:
+            return {sid: totais_da_sessao(conn, sid) for sid in sessao_ids}
+        finally:
+            conn.close()
+
+    def count_by_sessao(self, sessao_id: int, nao_cancelados: bool = False) -> int:
+        conn = get_connection()
+        try:
+            return conn.execute(
+                f"""
+                SELECT COUNT(*) FROM movimentacoes m
+                LEFT JOIN recibos r ON r.id = m.recibo_id
+                WHERE m.sessao_id = ? {_filtro(nao_cancelados)}
+                """,
+                (sessao_id,),
+            ).fetchone()[0]
+        finally:
+            conn.close()
+
+    def list_page_by_sessao(self, sessao_id: int, apos_id: Optional[int] = None,
+                            limite: int = TAMANHO_PAGINA,
+                            nao_cancelados: bool = False) -> List[dict]:
+        conn = get_connection()
+        try:
+            rows = conn.execute(
+                f"""
+                SELECT m.*, u.username
+                FROM movimentacoes m
+                LEFT JOIN usuarios u ON u.id = m.usuario_id
+                LEFT JOIN recibos r ON r.id = m.recibo_id
+                WHERE m.sessao_id = ? AND m.id > ? {_filtro(nao_cancelados)}
+                ORDER BY m.id
+                LIMIT ?
+                """,
+                (sessao_id, apos_id or 0, limite),
+            ).fetchall()
+            return [dict(r) for r in rows]
+        finally:
+            conn.close()
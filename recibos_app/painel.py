@@ -0,0 +1,245 @@
+"""Dados do painel: saldos das gavetas, saídas do dia e do mês, divergências.
+
+FontePainel guarda uma conexão própria, só de leitura (mode=ro), e é
+consultada por um timer. A cada verificação, PRAGMA data_version diz se
+outra conexão gravou algo desde a última leitura; sem gravação, nenhuma
+consulta roda.
+Quando há gravação:
+
+- saídas por tipo e por empresa, de hoje e do mês, vêm do resumo diário
+  (daily_summary): algumas dezenas de linhas;
+- saldos: um agregado por sessão aberta (uma sessão por gaveta);
+- divergências: as movimentações de uma sessão fechada não mudam mais, então
+  só as fechadas desde a última leitura são calculadas e entram no cache.
+  Cancelar (ou excluir um cancelado) muda a divergência da sessão do
+  recibo: os cancelados por gaveta no resumo diário dizem quais gavetas
+  mudaram, e as sessões delas saem do cache e são recalculadas.
+
+Tudo é lido na mesma transação (mesma foto do banco). atualizar() devolve
+None quando nada mudou, para a tela não redesenhar à toa.
+"""
+
+import json
+from dataclasses import dataclass, field
+from datetime import date, datetime, timedelta
+from typing import Dict, List, Optional, Tuple
+
+import resumo_diario
+from database import get_read_connection
+from fechamento_gaveta import FILTRO_NAO_CANCELADA
+
+DIAS_TENDENCIA = 30
+
+# (quantidade, total) por chave
+Totais = Dict[str, Tuple[int, float]]
+
+
+@dataclass(frozen=True)
+class SaldoGaveta:
+    gaveta_id: int
+    gaveta_nome: str
+    sessao_id: Optional[int]
+    responsavel_nome: str
+    aberta_em: str
+    saldo_inicial: float
+    total_entradas: float
+    total_saidas: float
+
+    @property
+    def saldo_atual(self) -> float:
+        return round(self.saldo_inicial + self.total_entradas - self.total_saidas, 2)
+
+
+@dataclass(frozen=True)
+class Divergencia:
+    """Fechamentos de um dia (ou de uma gaveta) na janela da tendência."""
+    chave: str
+    fechamentos: int
+    com_diferenca: int
+    soma: float
+    maior: float
+
+
+@dataclass
+class Painel:
+    gavetas: List[SaldoGaveta] = field(default_factory=list)
+    hoje_por_tipo: Totais = field(default_factory=dict)
+    hoje_por_empresa: Totais = field(default_factory=dict)
+    mes_por_tipo: Totais = field(default_factory=dict)
+    mes_por_empresa: Totais = field(default_factory=dict)
+    divergencias_por_dia: List[Divergencia] = field(default_factory=list)
+    divergencias_por_gaveta: List[Divergencia] = field(default_factory=list)
+    lido_em: str = field(default="", compare=False)
+
+
+def _somar(destino: Totais, chave: str, quantidade: int, total: float) -> None:
+    q, t = destino.get(chave, (0, 0.0))
+    destino[chave] = (q + quantidade, round(t + total, 2))
+
+
+def _agrupar(diferencas, chave_fn) -> List[Divergencia]:
+    grupos: Dict[str, list] = {}
+    for item in diferencas:
+        grupos.setdefault(chave_fn(item), []).append(item[2])
+    return [
+        Divergencia(chave, len(difs), sum(1 for d in difs if abs(d) >= 0.005),
+                    round(sum(difs), 2), max(difs, key=abs))
+        for chave, difs in sorted(grupos.items())
+    ]
+
+
+class FontePainel:
+    """Leituras incrementais para o painel (uma instância por tela)."""
+
+    def __init__(self):
+        self._conn = None
+        self._versao = None
+        self._ultimo: Optional[Painel] = None
+        # sessao_id -> (dia do fechamento, gaveta, diferença, gaveta_id)
+        self._fechadas: Dict[int, Tuple[str, str, float, int]] = {}
+        # gaveta_id -> (quantidade, total em centavos) de recibos cancelados
+        self._cancelados: Dict[int, Tuple[int, int]] = {}
+
+    def _conexao(self):
+        if self._conn is None:
+            resumo_diario.garantir_tabela()
+            self._conn = get_read_connection()
+        return self._conn
+
+    def fechar(self) -> None:
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+    def mudou(self) -> bool:
+        """True se houve gravação desde a última leitura (ou se nunca leu)."""
+        versao = self._conexao().execute("PRAGMA data_version").fetchone()[0]
+        return versao != self._versao
+
+    def atualizar(self, forcar: bool = False) -> Optional[Painel]:
+        """Painel novo, ou None se nada mudou desde a última leitura."""
+        if not forcar and not self.mudou():
+            return None
+        conn = self._conexao()
+        hoje = date.today()
+        try:
+            conn.execute("BEGIN")
+            self._versao = conn.execute("PRAGMA data_version").fetchone()[0]
+            painel = Painel(lido_em=datetime.now().strftime("%H:%M:%S"))
+            self._ler_saidas(conn, painel, hoje)
+            self._ler_saldos(conn, painel)
+            self._ler_divergencias(conn, painel, hoje)
+        finally:
+            # Só leitura: encerrar a transação libera a foto do banco
+            conn.rollback()
+        if not forcar and painel == self._ultimo:
+            return None
+        self._ultimo = painel
+        return painel
+
+    def _ler_saidas(self, conn, painel: Painel, hoje: date) -> None:
+        dia = hoje.isoformat()
+        for r in conn.execute(
+            """
+            SELECT d.data = ? AS hoje, d.tipo,
+                   COALESCE(e.razao_social, CASE WHEN d.empresa_id = 0
+                            THEN 'Sem empresa (avulsas)' ELSE '#' || d.empresa_id END) AS empresa,
+                   SUM(d.quantidade) AS quantidade, SUM(d.total_centavos) AS total_centavos
+            FROM daily_summary d
+            LEFT JOIN empresas e ON e.id = d.empresa_id
+            WHERE d.data >= ? AND d.data <= ? AND d.status <> 'CANCELADO'
+            GROUP BY 1, 2, 3
+            """,
+            (dia, hoje.replace(day=1).isoformat(), dia),
+        ):
+            total = r["total_centavos"] / 100
+            _somar(painel.mes_por_tipo, r["tipo"], r["quantidade"], total)
+            _somar(painel.mes_por_empresa, r["empresa"], r["quantidade"], total)
+            if r["hoje"]:
+                _somar(painel.hoje_por_tipo, r["tipo"], r["quantidade"], total)
+                _somar(painel.hoje_por_empresa, r["empresa"], r["quantidade"], total)
+
+    def _ler_saldos(self, conn, painel: Painel) -> None:
+        # O filtro de cancelados fica dentro das somas: uma sessão só com
+        # movimentações canceladas continua aparecendo, com total zero
+        painel.gavetas = [
+            SaldoGaveta(
+                r["gaveta_id"], r["gaveta_nome"] or "", r["sessao_id"],
+                r["responsavel_nome"] or "", r["aberta_em"] or "",
+                r["saldo_inicial"] or 0.0, round(r["total_entradas"], 2),
+                round(r["total_saidas"], 2),
+            )
+            for r in conn.execute(
+                f"""
+                SELECT g.id AS gaveta_id, g.nome AS gaveta_nome, s.id AS sessao_id,
+                       u.username AS responsavel_nome, s.aberta_em, s.saldo_inicial,
+                       COALESCE(SUM(CASE WHEN m.tipo = 'ENTRADA' AND {FILTRO_NAO_CANCELADA}
+                                         THEN m.valor END), 0) AS total_entradas,
+                       COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' AND {FILTRO_NAO_CANCELADA}
+                                         THEN m.valor END), 0) AS total_saidas
+                FROM gavetas g
+                LEFT JOIN gaveta_sessoes s ON s.gaveta_id = g.id AND s.status = 'ABERTA'
+                LEFT JOIN usuarios u ON u.id = s.responsavel_id
+                LEFT JOIN movimentacoes m ON m.sessao_id = s.id
+                LEFT JOIN recibos r ON r.id = m.recibo_id
+                GROUP BY g.id, s.id
+                ORDER BY g.nome COLLATE NOCASE, s.id
+                """
+            )
+        ]
+
+    def _invalidar_canceladas(self, conn) -> None:
+        """Tira do cache as sessões das gavetas com cancelamentos novos."""
+        cancelados = {
+            r["gaveta_id"]: (r["quantidade"], r["total_centavos"])
+            for r in conn.execute(
+                """
+                SELECT gaveta_id, SUM(quantidade) AS quantidade,
+                       SUM(total_centavos) AS total_centavos
+                FROM daily_summary WHERE status = 'CANCELADO'
+                GROUP BY gaveta_id
+                """
+            )
+        }
+        mudaram = {
+            g for g in cancelados.keys() | self._cancelados.keys()
+            if cancelados.get(g) != self._cancelados.get(g)
+        }
+        self._cancelados = cancelados
+        if mudaram:
+            for sessao_id in [k for k, v in self._fechadas.items() if v[3] in mudaram]:
+                del self._fechadas[sessao_id]
+
+    def _ler_divergencias(self, conn, painel: Painel, hoje: date) -> None:
+        janela = (hoje - timedelta(days=DIAS_TENDENCIA - 1)).isoformat()
+        self._invalidar_canceladas(conn)
+        # Pelo id, e não pela hora do fechamento: o relógio das estações
+        # pode não bater
+        for r in conn.execute(
+            f"""
+            SELECT s.id, s.fechada_em, s.gaveta_id, g.nome AS gaveta_nome,
+                   s.valor_contado - (COALESCE(s.saldo_inicial, 0)
+                     + COALESCE(SUM(CASE WHEN m.tipo = 'ENTRADA' AND {FILTRO_NAO_CANCELADA}
+                                         THEN m.valor END), 0)
+                     - COALESCE(SUM(CASE WHEN m.tipo = 'SAIDA' AND {FILTRO_NAO_CANCELADA}
+                                         THEN m.valor END), 0)) AS diferenca
+            FROM gaveta_sessoes s
+            LEFT JOIN gavetas g ON g.id = s.gaveta_id
+            LEFT JOIN movimentacoes m ON m.sessao_id = s.id
+            LEFT JOIN recibos r ON r.id = m.recibo_id
+            WHERE s.status = 'FECHADA' AND s.fechada_em >= ?
+              AND s.id NOT IN (SELECT value FROM json_each(?))
+            GROUP BY s.id
+            """,
+            (janela, json.dumps(list(self._fechadas))),
+        ):
+            self._fechadas[r["id"]] = (
+                r["fechada_em"][:10], r["gaveta_nome"] or "", round(r["diferenca"] or 0, 2),
+                r["gaveta_id"],
+            )
+        # Fechamentos que saíram da janela deixam o cache
+        for sessao_id in [k for k, v in self._fechadas.items() if v[0] < janela]:
+            del self._fechadas[sessao_id]
+        diferencas = list(self._fechadas.values())
+        painel.divergencias_por_dia = _agrupar(diferencas, lambda d: d[0])
+        painel.divergencias_por_gaveta = _agrupar(diferencas, lambda d: d[1])
@@ -0,0 +1,222 @@
+"""Renderização sob demanda de recibos com cache LRU em disco.
+
+O banco guarda os dados canônicos de cada recibo (coluna recibos.dados_pdf);
+o PDF é só uma visão deles. Cada conjunto de recibos vira uma chave SHA-256
+do JSON canônico + versão do layout, e o arquivo fica em uma pasta de cache
+local com tamanho máximo. Como a renderização é determinística, apagar o
+cache (ou perder um arquivo) nunca impede a reimpressão.
+"""
+
+import hashlib
+import json
+import os
+import re
+import tempfile
+import threading
+from typing import List, Optional
+
+from app_paths import get_cache_dir, load_config, save_config
+from pdf import modelos
+from pdf.gerador_pdf import POR_PAGINA_PADRAO, gerar_pdf_multiplos_recibos, gerar_pdf_recibo
+
+# Incrementar sempre que o desenho dos recibos mudar: invalida o cache antigo
+# (mudanças nos arquivos de modelo já entram na chave por modelos.assinatura)
+VERSAO_LAYOUT = 3
+LIMITE_PADRAO_MB = 200
+
+CAMPOS = (
+    "empresa_razao", "empresa_cnpj", "nome", "documento", "valor", "descricao",
+    "data_inicio", "data_fim", "data_pagamento", "template",
+)
+
+_lock = threading.Lock()
+
+
+def canonico(recibo: dict) -> dict:
+    """Somente os campos que aparecem no PDF, normalizados."""
+    dados = {campo: recibo.get(campo) or "" for campo in CAMPOS}
+    dados["valor"] = round(float(recibo.get("valor") or 0), 2)
+    dados["template"] = recibo.get("template") or "PADRAO"
+    return dados
+
+
+def serializar(recibo: dict) -> str:
+    return json.dumps(canonico(recibo), ensure_ascii=False, sort_keys=True,
+                      separators=(",", ":"))
+
+
+def chave(recibos: List[dict], por_pagina: int = POR_PAGINA_PADRAO,
+          marcas_corte: bool = False) -> str:
+    conteudo = json.dumps(
+        {"versao": VERSAO_LAYOUT, "modelos": modelos.assinatura(),
+         "recibos": [canonico(r) for r in recibos],
+         "por_pagina": por_pagina, "marcas_corte": bool(marcas_corte)},
+        ensure_ascii=False, sort_keys=True, separators=(",", ":"),
+    )
+    return hashlib.sha256(conteudo.encode("utf-8")).hexdigest()
+
+
+def get_limite_mb() -> int:
+    return int(load_config().get("pdf_cache_max_mb", LIMITE_PADRAO_MB))
+
+
+def set_limite_mb(mb: int) -> None:
+    cfg = load_config()
+    cfg["pdf_cache_max_mb"] = int(mb)
+    save_config(cfg)
+
+
+def _pasta() -> str:
+    return get_cache_dir("pdf")
+
+
+def _renderizar(caminho_pdf: str, recibos: List[dict], por_pagina: int,
+                marcas_corte: bool) -> None:
+    if len(recibos) == 1:
+        rec = recibos[0]
+        gerar_pdf_recibo(
+            caminho_pdf,
+            rec["empresa_razao"],
+            rec["empresa_cnpj"],
+            rec["nome"],
+            rec["documento"],
+            rec["valor"],
+            rec["descricao"],
+            rec["data_inicio"],
+            rec["data_fim"],
+            rec["data_pagamento"],
+            template=rec["template"],
+        )
+    else:
+        gerar_pdf_multiplos_recibos(caminho_pdf, recibos, por_pagina, marcas_corte)
+
+
+def obter_pdf(recibos: List[dict], por_pagina: int = POR_PAGINA_PADRAO,
+              marcas_corte: bool = False) -> str:
+    """Caminho de um PDF com os recibos, renderizando só se não estiver em cache."""
+    recibos = [canonico(r) for r in recibos]
+    nome = chave(recibos, por_pagina, marcas_corte)
+    pasta = _pasta()
+    caminho = os.path.join(pasta, f"{nome}.pdf")
+    with _lock:
+        if os.path.exists(caminho):
+            # mtime marca o último uso (ordem do LRU)
+            os.utime(caminho, None)
+            return caminho
+        fd, temporario = tempfile.mkstemp(suffix=".pdf", dir=pasta)
+        os.close(fd)
+        try:
+            _renderizar(temporario, recibos, por_pagina, marcas_corte)
+            os.replace(temporario, caminho)
+        except Exception:
+            if os.path.exists(temporario):
+                os.remove(temporario)
+            raise
+        _podar(pasta, get_limite_mb() * 1024 * 1024, manter=caminho)
+    return caminho
+
+
+def _podar(pasta: str, limite_bytes: int, manter: Optional[str] = None) -> int:
+    """Remove os PDFs usados há mais tempo até o cache caber no limite."""
+    arquivos = []
+    total = 0
+    for entrada in os.scandir(pasta):
+        if not entrada.is_file() or not entrada.name.endswith(".pdf"):
+            continue
+        st = entrada.stat()
+        arquivos.append((st.st_mtime, st.st_size, entrada.path))
+        total += st.st_size
+    removidos = 0
+    for _, tamanho, caminho in sorted(arquivos):
+        if total <= limite_bytes:
+            break
+        if caminho == manter:
+            continue
+        try:
+            os.remove(caminho)
+        except OSError:
+            continue
+        total -= tamanho
+        removidos += 1
+    return removidos
+
+
+def limpar_cache() -> int:
+    with _lock:
+        return _podar(_pasta(), 0)
+
+
+# --- Dados de recibos já gravados ---
+
+def _formatar_documento(doc: str) -> str:
+    digitos = re.sub(r"\D", "", doc or "")
+    if len(digitos) == 11 and digitos == doc:
+        return f"{doc[:3]}.{doc[3:6]}.{doc[6:9]}-{doc[9:]}"
+    if len(digitos) == 14 and digitos == doc:
+        return f"{doc[:2]}.{doc[2:5]}.{doc[5:8]}/{doc[8:12]}-{doc[12:]}"
+    return doc or ""
+
+
+def _formatar_data(data_iso: str) -> str:
+    if data_iso and re.fullmatch(r"\d{4}-\d{2}-\d{2}", data_iso):
+        ano, mes, dia = data_iso.split("-")
+        return f"{dia}/{mes}/{ano}"
+    return data_iso or ""
+
+
+def dados_de_linha(row: dict) -> dict:
+    """Dados do PDF de um recibo. Usa dados_pdf quando existe; para recibos
+    antigos, reconstrói a partir das colunas (mesmo layout da emissão)."""
+    if row.get("dados_pdf"):
+        return canonico(json.loads(row["dados_pdf"]))
+    return canonico({
+        "empresa_razao": row.get("empresa_razao") or "",
+        "empresa_cnpj": _formatar_documento(row.get("empresa_cnpj")),
+        "nome": row.get("pessoa_nome"),
+        "documento": _formatar_documento(row.get("pessoa_documento")),
+        "valor": row.get("valor"),
+        "descricao": row.get("descricao"),
+        "data_inicio": _formatar_data(row.get("data_inicio")),
+        "data_fim": _formatar_data(row.get("data_fim")),
+        "data_pagamento": _formatar_data(row.get("data_pagamento")),
+        "template": "PASSAGEM" if row.get("tipo") == "PASSAGEM" else "COMPACTO",
+    })
+
+
+def dados_dos_recibos(recibo_ids: List[int]) -> List[dict]:
+    """Dados de PDF dos recibos gravados, na ordem dada. No modo servidor a
+    estação pede isto ao servidor (ver fabrica.pdf_dos_recibos)."""
+    from database import get_connection
+
+    conn = get_connection()
+    try:
+        colunas = {r[1] for r in conn.execute("PRAGMA table_info(recibos)")}
+        extra = "" if "dados_pdf" in colunas else "NULL AS dados_pdf,"
+        marcadores = ",".join("?" * len(recibo_ids))
+        rows = conn.execute(
+            f"""
+            SELECT r.*, {extra}
+                   e.razao_social AS empresa_razao, e.cnpj AS empresa_cnpj
+            FROM recibos r LEFT JOIN empresas e ON e.id = r.empresa_id
+            WHERE r.id IN ({marcadores})
+            """,
+            list(recibo_ids),
+        ).fetchall()
+    finally:
+        conn.close()
+    por_id = {row["id"]: dict(row) for row in rows}
+    faltando = [rid for rid in recibo_ids if rid not in por_id]
+    if faltando:
+        raise KeyError(f"Recibo(s) não encontrado(s): {faltando}")
+    return [dados_de_linha(por_id[rid]) for rid in recibo_ids]
+
+
+def pdf_dos_recibos(recibo_ids: List[int], por_pagina: int = POR_PAGINA_PADRAO,
+                    marcas_corte: bool = False) -> str:
+    """Um único PDF com os recibos gravados, na ordem dada (N por página)."""
+    return obter_pdf(dados_dos_recibos(recibo_ids), por_pagina, marcas_corte)
+
+
+def pdf_do_recibo(recibo_id: int) -> str:
+    """PDF de um recibo gravado, sempre disponível enquanto o registro existir."""
+    return pdf_dos_recibos([recibo_id])
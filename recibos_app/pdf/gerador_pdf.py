@@ -1,11 +1,20 @@
 import os
 from datetime import datetime
+from functools import lru_cache
 
+from reportlab import rl_config
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
+from reportlab.lib.utils import ImageReader
 from reportlab.pdfgen import canvas
 
 from app_paths import get_resource_path
+from diagnostico import medido
+from pdf import modelos
+
+# Streams binários em vez de ASCII85: sem o acelerador C do reportlab, a
+# codificação ASCII85 da marca d'água custava a maior parte de cada recibo.
+rl_config.useA85 = 0
 
 UNIDADES = [
     "zero",
@@ -123,6 +132,13 @@ def formatar_moeda(valor):
     return f"{inteiro_str},{frac:02d}"
 
 
+def _novo_canvas(caminho_pdf):
+    # invariant=1 fixa data de criação e ID do documento: os mesmos dados
+    # geram sempre os mesmos bytes (necessário para o cache de PDFs).
+    return canvas.Canvas(caminho_pdf, pagesize=A4, invariant=1)
+
+
+@medido("pdf.gerar_pdf_recibo")
 def gerar_pdf_recibo(
     caminho_pdf,
     empresa_razao,
@@ -138,125 +154,45 @@ def gerar_pdf_recibo(
 ):
     os.makedirs(os.path.dirname(caminho_pdf), exist_ok=True)
 
-    c = canvas.Canvas(caminho_pdf, pagesize=A4)
+    c = _novo_canvas(caminho_pdf)
     largura, altura = A4
-    _draw_watermark(c, largura, altura)
-
-    if template in ("PASSAGEM", "COMPACTO"):
-        y = altura - 24 * mm
-        c.setFont("Helvetica-Bold", 14)
-        c.drawCentredString(largura / 2, y, "RECIBO DE PAGAMENTO")
-
-        y -= 10 * mm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(20 * mm, y, empresa_razao.upper())
-        c.setFont("Helvetica-Bold", 11)
-        c.drawRightString(largura - 20 * mm, y, f"CNPJ: {empresa_cnpj}")
-
-        y -= 10 * mm
-        c.setFont("Helvetica", 11)
-        c.drawString(20 * mm, y, "EU:")
-        c.drawString(28 * mm, y, nome)
-        c.line(28 * mm, y - 1 * mm, 185 * mm, y - 1 * mm)
-
-        y -= 8 * mm
-        c.drawString(20 * mm, y, "CPF:")
-        c.drawString(34 * mm, y, documento)
-        c.line(34 * mm, y - 1 * mm, 90 * mm, y - 1 * mm)
-
-        y -= 8 * mm
-        descricao_upper = descricao.upper()
-        if (
-            "DO DIA" in descricao_upper
-            or "NO DIA" in descricao_upper
-            or "DO PERIODO" in descricao_upper
-            or "DO PERÍODO" in descricao_upper
-            or "NO PERIODO" in descricao_upper
-            or "NO PERÍODO" in descricao_upper
-            or "PERIODO" in descricao_upper
-            or "PERÍODO" in descricao_upper
-        ):
-            sufixo = ""
-        else:
-            if data_inicio == data_fim:
-                sufixo = f"DO DIA {data_inicio}"
-            else:
-                sufixo = f"DO PERÍODO DE {data_inicio} A {data_fim}"
-        texto = (
-            f"DECLARO TER RECEBIDO O VALOR DE R$ {formatar_moeda(valor)} "
-            f"REFERENTE A {descricao_upper} {sufixo}."
-        )
-        text_obj = c.beginText(20 * mm, y)
-        text_obj.setLeading(12)
-        max_width = largura - 40 * mm
-        for linha in _wrap_text_width(texto, max_width, c, "Helvetica", 11):
-            text_obj.textLine(linha)
-        c.drawText(text_obj)
-
-        y = text_obj.getY() - 6 * mm
-        c.drawString(20 * mm, y, f"DATA DA EFETUAÇÃO DO PAGAMENTO: {data_pagamento}")
-
-        y -= 10 * mm
-        c.drawString(20 * mm, y, "ASSINATURA:")
-        c.line(50 * mm, y - 1 * mm, 185 * mm, y - 1 * mm)
-    else:
-        y = altura - 30 * mm
-        c.setFont("Helvetica-Bold", 14)
-        c.drawCentredString(largura / 2, y, "RECIBO DE PAGAMENTO")
-
-        y -= 12 * mm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(20 * mm, y, f"{empresa_razao}")
-        y -= 6 * mm
-        c.setFont("Helvetica-Bold", 11)
-        c.drawString(20 * mm, y, f"CNPJ: {empresa_cnpj}")
-
-        y -= 14 * mm
-        descricao_upper = descricao.upper()
-        if "DO DIA" in descricao_upper or "DO PERIODO" in descricao_upper or "DO PERÍODO" in descricao_upper:
-            texto = (
-                f"Eu, {nome}, CPF/CNPJ {documento}, declaro ter recebido o valor de "
-                f"R$ {formatar_moeda(valor)} ({valor_por_extenso(valor)}), referente a {descricao}."
-            )
-        else:
-            if data_inicio == data_fim:
-                periodo_texto = f"do dia {data_inicio}"
-            else:
-                periodo_texto = f"no período de {data_inicio} a {data_fim}"
-            texto = (
-                f"Eu, {nome}, CPF/CNPJ {documento}, declaro ter recebido o valor de "
-                f"R$ {formatar_moeda(valor)} ({valor_por_extenso(valor)}), referente a {descricao}, "
-                f"{periodo_texto}."
-            )
-
-        c.setFont("Helvetica", 11)
-        text_obj = c.beginText(20 * mm, y)
-        text_obj.setLeading(12)
-        for linha in _wrap_text(texto, 90):
-            text_obj.textLine(linha)
-        c.drawText(text_obj)
-
-        y = text_obj.getY() - 16 * mm
-        c.drawString(20 * mm, y, f"Data do pagamento: {data_pagamento}")
-
-        y -= 18 * mm
-        c.line(40 * mm, y, 170 * mm, y)
-        y -= 5 * mm
-        c.drawCentredString(105 * mm, y, nome)
+    modelo = modelos.obter(template)
+    if modelo.marca_dagua:
+        _draw_watermark(c, largura, altura)
+
+    rec = {
+        "empresa_razao": empresa_razao, "empresa_cnpj": empresa_cnpj, "nome": nome,
+        "documento": documento, "valor": valor, "descricao": descricao,
+        "data_inicio": data_inicio, "data_fim": data_fim, "data_pagamento": data_pagamento,
+    }
+    modelo.pagina.desenhar(c, largura, altura, modelo.valores(rec, modelo.pagina))
 
     c.showPage()
     c.save()
 
 
-def gerar_pdf_multiplos_recibos(caminho_pdf, lista_recibos):
-    """Gera PDF com até 3 recibos na mesma página A4.
+RECIBOS_POR_PAGINA = (2, 3, 4)
+POR_PAGINA_PADRAO = 3
+
+
+@medido("pdf.gerar_pdf_multiplos_recibos")
+def gerar_pdf_multiplos_recibos(caminho_pdf, lista_recibos, por_pagina=POR_PAGINA_PADRAO,
+                                marcas_corte=False):
+    """Gera um único PDF com todos os recibos, `por_pagina` (2, 3 ou 4) por A4.
 
     Cada item de lista_recibos é um dict com as chaves:
         empresa_razao, empresa_cnpj, nome, documento, valor,
         descricao, data_inicio, data_fim, data_pagamento, template
+
+    Quantos recibos forem passados, tantas páginas quantas forem necessárias.
+    Um lote que cabe numa página só divide a folha entre os recibos, como
+    sempre foi. Com marcas_corte=True, desenha marcas nas bordas na altura
+    de cada divisão, para guilhotina.
     """
+    if por_pagina not in RECIBOS_POR_PAGINA:
+        raise ValueError(f"Recibos por página deve ser um de {RECIBOS_POR_PAGINA}.")
     os.makedirs(os.path.dirname(caminho_pdf), exist_ok=True)
-    c = canvas.Canvas(caminho_pdf, pagesize=A4)
+    c = _novo_canvas(caminho_pdf)
     largura, altura = A4
 
     n = len(lista_recibos)
@@ -265,109 +201,83 @@ def gerar_pdf_multiplos_recibos(caminho_pdf, lista_recibos):
         c.save()
         return
 
+    slots = min(n, por_pagina)
     margem_top = 12 * mm
     margem_bottom = 10 * mm
     area_util = altura - margem_top - margem_bottom
-    slot_height = area_util / n
+    slot_height = area_util / slots
     separator_gap = 4 * mm
+    # Mesma marca d'água em todos os slots: desenhada uma vez como form XObject
+    marca = _form_marca_slot(c, largura, slot_height - separator_gap)
+
+    for inicio in range(0, n, slots):
+        pagina = lista_recibos[inicio:inicio + slots]
+        for i, rec in enumerate(pagina):
+            y_top = altura - margem_top - (i * slot_height)
+            y_bottom = y_top - slot_height + separator_gap
+
+            # Draw watermark behind each receipt slot
+            if marca:
+                c.saveState()
+                # A transparência vale para o form; definida dentro dele é ignorada
+                if hasattr(c, "setFillAlpha"):
+                    c.setFillAlpha(0.12)
+                c.translate(0, y_bottom)
+                c.doForm(marca)
+                c.restoreState()
+
+            modelo, layout = modelos.layout_slot(rec.get("template", "COMPACTO"))
+            layout.desenhar(c, largura, y_top, modelo.valores(rec, layout))
+
+            # Draw separator line between receipts
+            if i < len(pagina) - 1:
+                sep_y = y_bottom - 1 * mm
+                c.setStrokeColorRGB(0.6, 0.6, 0.6)
+                c.setDash(3, 3)
+                c.line(15 * mm, sep_y, largura - 15 * mm, sep_y)
+                c.setDash()
+                if marcas_corte:
+                    _draw_marcas_corte(c, largura, sep_y)
 
-    for i, rec in enumerate(lista_recibos):
-        y_top = altura - margem_top - (i * slot_height)
-        y_bottom = y_top - slot_height + separator_gap
-
-        # Draw watermark behind each receipt slot
-        _draw_watermark_in_slot(c, largura, y_top, y_bottom)
-
-        _draw_receipt_slot(
-            c, largura, y_top, y_bottom,
-            rec["empresa_razao"],
-            rec["empresa_cnpj"],
-            rec["nome"],
-            rec["documento"],
-            rec["valor"],
-            rec["descricao"],
-            rec["data_inicio"],
-            rec["data_fim"],
-            rec["data_pagamento"],
-            rec.get("template", "COMPACTO"),
-        )
-
-        # Draw separator line between receipts
-        if i < n - 1:
-            sep_y = y_bottom - 1 * mm
-            c.setStrokeColorRGB(0.6, 0.6, 0.6)
-            c.setDash(3, 3)
-            c.line(15 * mm, sep_y, largura - 15 * mm, sep_y)
-            c.setDash()
-
-    c.showPage()
+        c.showPage()
     c.save()
 
 
-def _draw_receipt_slot(c, largura, y_top, y_bottom, empresa_razao, empresa_cnpj,
-                       nome, documento, valor, descricao, data_inicio, data_fim,
-                       data_pagamento, template):
-    """Draws a single receipt within a vertical slot [y_top, y_bottom]."""
-    m_left = 20 * mm
-    m_right = largura - 20 * mm
-    y = y_top - 2 * mm
-
-    c.setFont("Helvetica-Bold", 12)
-    c.drawCentredString(largura / 2, y, "RECIBO DE PAGAMENTO")
-
-    y -= 8 * mm
-    c.setFont("Helvetica-Bold", 10)
-    c.drawString(m_left, y, empresa_razao.upper())
-    c.drawRightString(m_right, y, f"CNPJ: {empresa_cnpj}")
-
-    y -= 7 * mm
-    c.setFont("Helvetica", 10)
-    c.drawString(m_left, y, "EU:")
-    c.drawString(28 * mm, y, nome)
-    c.line(28 * mm, y - 1 * mm, m_right, y - 1 * mm)
-
-    y -= 6 * mm
-    c.drawString(m_left, y, "CPF:")
-    c.drawString(34 * mm, y, documento)
-    c.line(34 * mm, y - 1 * mm, 90 * mm, y - 1 * mm)
-
-    y -= 7 * mm
-    descricao_upper = descricao.upper()
-    if any(k in descricao_upper for k in [
-        "DO DIA", "NO DIA", "DO PERIODO", "DO PERÍODO", "PERIODO", "PERÍODO"
-    ]):
-        sufixo = ""
-    else:
-        if data_inicio == data_fim:
-            sufixo = f"DO DIA {data_inicio}"
-        else:
-            sufixo = f"DO PERÍODO DE {data_inicio} A {data_fim}"
+def _draw_marcas_corte(c, largura, y):
+    c.saveState()
+    c.setStrokeColorRGB(0, 0, 0)
+    c.setLineWidth(0.3)
+    c.line(0, y, 8 * mm, y)
+    c.line(largura - 8 * mm, y, largura, y)
+    c.restoreState()
 
-    texto = (
-        f"DECLARO TER RECEBIDO O VALOR DE R$ {formatar_moeda(valor)} "
-        f"REFERENTE A {descricao_upper} {sufixo}."
-    )
 
-    max_width = largura - 40 * mm
-    text_obj = c.beginText(m_left, y)
-    text_obj.setLeading(11)
-    for linha in _wrap_text_width(texto, max_width, c, "Helvetica", 10):
-        text_obj.textLine(linha)
-    c.drawText(text_obj)
+@lru_cache(maxsize=1)
+def _logo():
+    """Logo da marca d'água, lida do disco uma única vez por processo."""
+    logo_path = get_resource_path("assets", "LOGO - MERCADO.png")
+    if not os.path.exists(logo_path):
+        return None
+    return ImageReader(logo_path)
 
-    y = text_obj.getY() - 5 * mm
-    c.setFont("Helvetica", 10)
-    c.drawString(m_left, y, f"DATA DA EFETUAÇÃO DO PAGAMENTO: {data_pagamento}")
 
-    y -= 8 * mm
-    c.drawString(m_left, y, "ASSINATURA:")
-    c.line(50 * mm, y - 1 * mm, m_right, y - 1 * mm)
+def _form_marca_slot(c, largura, slot_h):
+    """Registra no canvas a marca d'água de um slot de altura `slot_h`
+    (origem no rodapé do slot) e retorna o nome do form, ou None."""
+    if _logo() is None:
+        return None
+    nome = f"marca_slot_{int(round(slot_h * 100))}"
+    if not c.hasForm(nome):
+        c.beginForm(nome)
+        _draw_watermark_in_slot(c, largura, slot_h, 0)
+        c.endForm()
+    return nome
 
 
 def _draw_watermark_in_slot(c, largura, y_top, y_bottom):
     """Draw a watermark logo centered within a receipt slot."""
-    logo_path = get_resource_path("assets", "LOGO - MERCADO.png")
-    if not os.path.exists(logo_path):
+    logo = _logo()
+    if logo is None:
         return
     try:
         c.saveState()
@@ -386,7 +296,7 @@ def _draw_watermark_in_slot(c, largura, y_top, y_bottom):
         center_y = y_bottom + (slot_h - logo_h) / 2
         offset = slot_h * 0.27
         y = center_y + offset
-        c.drawImage(logo_path, x, y, width=logo_w, height=logo_h, mask="auto")
+        c.drawImage(logo, x, y, width=logo_w, height=logo_h, mask="auto")
         c.restoreState()
     except Exception:
         try:
@@ -396,8 +306,8 @@ def _draw_watermark_in_slot(c, largura, y_top, y_bottom):
 
 
 def _draw_watermark(c, largura, altura):
-    logo_path = get_resource_path("assets", "LOGO - MERCADO.png")
-    if not os.path.exists(logo_path):
+    logo = _logo()
+    if logo is None:
         return
     try:
         if hasattr(c, "setFillAlpha"):
@@ -409,7 +319,7 @@ def _draw_watermark(c, largura, altura):
         logo_h = 55 * mm
         x = (largura - logo_w) / 2
         y = (altura - logo_h) / 2 + 80 * mm
-        c.drawImage(logo_path, x, y, width=logo_w, height=logo_h, mask="auto")
+        c.drawImage(logo, x, y, width=logo_w, height=logo_h, mask="auto")
         c.restoreState()
     except Exception:
         try:
@@ -0,0 +1,251 @@
+"""Modelos de recibo declarativos, compilados em listas de operações de desenho.
+
+Cada modelo é um JSON com os nomes que atende, a regra de redação do
+período e as operações da página inteira ("pagina") e, opcionalmente, do
+recibo em N por página ("slot"). Os modelos embutidos ficam em
+assets/modelos; arquivos em <pasta-de-dados>/Modelos com o mesmo nome os
+substituem, e nomes novos viram modelos novos, sem mudar código.
+
+Coordenadas em milímetros: x negativo conta a partir da borda direita,
+"centro" é o meio da página; "avanco" desce o cursor antes da operação.
+Fonte e tamanho não informados são herdados da operação anterior.
+"""
+
+import glob
+import hashlib
+import json
+import logging
+import os
+import re
+from string import Formatter
+from typing import Dict, List, Optional
+
+from reportlab.lib.units import mm
+
+from app_paths import get_data_dir, get_resource_path
+from pdf import gerador_pdf
+
+logger = logging.getLogger(__name__)
+
+MODELO_PADRAO = "PADRAO"
+# Modelos sem layout próprio de slot usam o deste
+SLOT_PADRAO = "COMPACTO"
+
+_ALINHAMENTOS = {"esquerda": "drawString", "centro": "drawCentredString",
+                 "direita": "drawRightString"}
+
+
+class ModeloInvalido(ValueError):
+    pass
+
+
+class _Periodo:
+    """Regra de redação do período, resolvida uma vez por modelo."""
+
+    __slots__ = ("_omitir", "_dia", "_intervalo")
+
+    def __init__(self, regra: dict):
+        marcadores = regra.get("omitir_se_descricao_contem") or []
+        self._omitir = (
+            re.compile("|".join(re.escape(m.upper()) for m in marcadores))
+            if marcadores else None
+        )
+        self._dia = regra.get("dia", "")
+        self._intervalo = regra.get("intervalo", "")
+
+    def texto(self, descricao_maiusculo: str, data_inicio: str, data_fim: str) -> str:
+        if self._omitir is not None and self._omitir.search(descricao_maiusculo):
+            return ""
+        molde = self._dia if data_inicio == data_fim else self._intervalo
+        return molde.format(data_inicio=data_inicio, data_fim=data_fim)
+
+
+def _campos_usados(texto: str) -> set:
+    return {nome for _, nome, _, _ in Formatter().parse(texto) if nome}
+
+
+class _Layout:
+    """Operações de um layout já convertidas para pontos e métodos do canvas."""
+
+    def __init__(self, definicao: dict, origem: str):
+        self.inicio = float(definicao.get("inicio", 0)) * mm
+        self.operacoes = []
+        self.campos = set()
+        fonte, tamanho = "Helvetica", 11
+        for op in definicao.get("operacoes", []):
+            tipo = op.get("tipo")
+            fonte = op.get("fonte", fonte)
+            tamanho = op.get("tamanho", tamanho)
+            avanco = float(op.get("avanco", 0)) * mm
+            if tipo == "texto":
+                metodo = _ALINHAMENTOS.get(op.get("alinhar", "esquerda"))
+                if metodo is None:
+                    raise ModeloInvalido(f"{origem}: alinhamento inválido {op.get('alinhar')!r}")
+                self.operacoes.append(
+                    ("texto", avanco, _x(op.get("x", 0)), metodo, fonte, tamanho, op["texto"])
+                )
+                self.campos |= _campos_usados(op["texto"])
+            elif tipo == "paragrafo":
+                largura = op.get("largura")
+                self.operacoes.append((
+                    "paragrafo", avanco, _x(op.get("x", 0)), fonte, tamanho,
+                    float(op.get("entrelinha", tamanho + 1)),
+                    float(largura) * mm if largura is not None else None,
+                    op.get("quebra_caracteres"), op["texto"],
+                ))
+                self.campos |= _campos_usados(op["texto"])
+            elif tipo == "linha":
+                self.operacoes.append(
+                    ("linha", avanco, _x(op["x1"]), _x(op["x2"]), float(op.get("dy", 0)) * mm)
+                )
+            else:
+                raise ModeloInvalido(f"{origem}: operação desconhecida {tipo!r}")
+
+    def desenhar(self, c, largura: float, y_topo: float, valores: dict) -> float:
+        """Executa as operações a partir de y_topo. Retorna o y final."""
+        y = y_topo - self.inicio
+        for op in self.operacoes:
+            y -= op[1]
+            if op[0] == "texto":
+                _, _, x, metodo, fonte, tamanho, texto = op
+                c.setFont(fonte, tamanho)
+                getattr(c, metodo)(_resolver_x(x, largura), y, texto.format_map(valores))
+            elif op[0] == "paragrafo":
+                _, _, x, fonte, tamanho, entrelinha, larg, quebra, texto = op
+                x = _resolver_x(x, largura)
+                conteudo = texto.format_map(valores)
+                c.setFont(fonte, tamanho)
+                if quebra:
+                    linhas = gerador_pdf._wrap_text(conteudo, quebra)
+                else:
+                    larg = larg if larg is not None else largura - 2 * x
+                    linhas = gerador_pdf._wrap_text_width(conteudo, larg, c, fonte, tamanho)
+                text_obj = c.beginText(x, y)
+                text_obj.setLeading(entrelinha)
+                for linha in linhas:
+                    text_obj.textLine(linha)
+                c.drawText(text_obj)
+                y = text_obj.getY()
+            else:
+                _, _, x1, x2, dy = op
+                c.line(_resolver_x(x1, largura), y + dy, _resolver_x(x2, largura), y + dy)
+        return y
+
+
+def _x(valor):
+    if valor == "centro":
+        return "centro"
+    return float(valor) * mm
+
+
+def _resolver_x(x, largura):
+    if x == "centro":
+        return largura / 2
+    return largura + x if x < 0 else x
+
+
+class Modelo:
+    def __init__(self, definicao: dict, origem: str):
+        self.nomes = [n.upper() for n in definicao.get("nomes", [])]
+        if not self.nomes or "pagina" not in definicao:
+            raise ModeloInvalido(f"{origem}: 'nomes' e 'pagina' são obrigatórios")
+        self.origem = origem
+        self.marca_dagua = bool(definicao.get("marca_dagua", True))
+        self.periodo = _Periodo(definicao.get("periodo", {}))
+        self.pagina = _Layout(definicao["pagina"], origem)
+        self.slot = _Layout(definicao["slot"], origem) if "slot" in definicao else None
+
+    def valores(self, rec: dict, layout: _Layout) -> dict:
+        """Campos para substituição; os caros só quando o layout os usa."""
+        descricao = rec["descricao"]
+        descricao_maiusculo = descricao.upper()
+        valores = {
+            "empresa_razao": rec["empresa_razao"],
+            "empresa_razao_maiusculo": rec["empresa_razao"].upper(),
+            "empresa_cnpj": rec["empresa_cnpj"],
+            "nome": rec["nome"],
+            "documento": rec["documento"],
+            "valor": gerador_pdf.formatar_moeda(rec["valor"]),
+            "descricao": descricao,
+            "descricao_maiusculo": descricao_maiusculo,
+            "data_inicio": rec["data_inicio"],
+            "data_fim": rec["data_fim"],
+            "data_pagamento": rec["data_pagamento"],
+        }
+        if "periodo" in layout.campos:
+            valores["periodo"] = self.periodo.texto(
+                descricao_maiusculo, rec["data_inicio"], rec["data_fim"]
+            )
+        if "valor_extenso" in layout.campos:
+            valores["valor_extenso"] = gerador_pdf.valor_por_extenso(rec["valor"])
+        return valores
+
+
+_modelos: Optional[Dict[str, Modelo]] = None
+_assinatura: str = ""
+
+
+def _pastas() -> List[str]:
+    pastas = [get_resource_path("assets", "modelos")]
+    try:
+        pastas.append(os.path.join(get_data_dir(), "Modelos"))
+    except OSError:
+        pass
+    return pastas
+
+
+def _carregar() -> None:
+    global _modelos, _assinatura
+    modelos = {}
+    h = hashlib.sha256()
+    for pasta in _pastas():
+        for caminho in sorted(glob.glob(os.path.join(pasta, "*.json"))):
+            try:
+                with open(caminho, "rb") as f:
+                    bruto = f.read()
+                modelo = Modelo(json.loads(bruto.decode("utf-8")), os.path.basename(caminho))
+            except (OSError, ValueError) as e:
+                logger.error("Modelo de recibo ignorado (%s): %s", caminho, e)
+                continue
+            h.update(bruto)
+            for nome in modelo.nomes:
+                modelos[nome] = modelo
+    if MODELO_PADRAO not in modelos:
+        raise ModeloInvalido(f"Modelo {MODELO_PADRAO} não encontrado em {_pastas()[0]}")
+    _modelos = modelos
+    _assinatura = h.hexdigest()
+
+
+def recarregar() -> None:
+    """Descarta os modelos compilados; o próximo uso relê os arquivos."""
+    global _modelos
+    _modelos = None
+
+
+def obter(nome: Optional[str]) -> Modelo:
+    """Modelo pelo nome; nomes desconhecidos caem no PADRAO, como sempre."""
+    if _modelos is None:
+        _carregar()
+    return _modelos.get((nome or MODELO_PADRAO).upper(), _modelos[MODELO_PADRAO])
+
+
+def layout_slot(nome: Optional[str]) -> tuple:
+    modelo = obter(nome)
+    if modelo.slot is None:
+        modelo = obter(SLOT_PADRAO)
+    if modelo.slot is None:
+        raise ModeloInvalido(f"{modelo.origem}: modelo {SLOT_PADRAO} precisa de 'slot'")
+    return modelo, modelo.slot
+
+
+def nomes() -> List[str]:
+    if _modelos is None:
+        _carregar()
+    return sorted(_modelos)
+
+
+def assinatura() -> str:
+    """Hash do conteúdo dos modelos carregados (entra na chave do cache de PDF)."""
+    if _modelos is None:
+        _carregar()
+    return _assinatura
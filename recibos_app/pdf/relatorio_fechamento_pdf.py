@@ -3,10 +3,11 @@ from datetime import datetime
 
 from reportlab.lib.pagesizes import A4
 from reportlab.lib.units import mm
-from reportlab.pdfgen import canvas
 
 from app_paths import get_resource_path
+from diagnostico import medido
 from pdf.gerador_pdf import formatar_moeda
+from pdf.relatorio_tabular import FluxoPagina
 
 
 _TIPO_LABELS = {
@@ -21,6 +22,7 @@ _TIPO_LABELS = {
 }
 
 
+@medido("pdf.gerar_pdf_fechamento")
 def gerar_pdf_fechamento(
     caminho_pdf: str,
     gaveta_nome: str,
@@ -43,30 +45,29 @@ def gerar_pdf_fechamento(
 ):
     os.makedirs(os.path.dirname(caminho_pdf), exist_ok=True)
 
-    c = canvas.Canvas(caminho_pdf, pagesize=A4)
-    largura, altura = A4
     m = 20 * mm
-    y = altura - 25 * mm
+    fluxo = FluxoPagina(caminho_pdf, A4, margem_x=m, margem_topo=25 * mm,
+                        margem_base=22 * mm)
+    c = fluxo.c
+    largura = fluxo.largura
 
     # Title
     c.setFont("Helvetica-Bold", 16)
-    c.drawCentredString(largura / 2, y, "RELATÓRIO DE FECHAMENTO DE GAVETA")
-    y -= 6 * mm
+    c.drawCentredString(largura / 2, fluxo.y, "RELATÓRIO DE FECHAMENTO DE GAVETA")
+    fluxo.avancar(6 * mm)
     c.setFont("Helvetica", 9)
-    c.drawCentredString(largura / 2, y, f"Documento Nº {sessao_id:06d}")
+    c.drawCentredString(largura / 2, fluxo.y, f"Documento Nº {sessao_id:06d}")
 
     # Separator
-    y -= 8 * mm
-    c.setStrokeColorRGB(0.7, 0.7, 0.7)
-    c.line(m, y, largura - m, y)
-    y -= 8 * mm
+    fluxo.avancar(8 * mm)
+    fluxo.linha_horizontal("#b3b3b3")
+    fluxo.avancar(8 * mm)
 
     # Section: Identification
     c.setFont("Helvetica-Bold", 12)
-    c.drawString(m, y, "IDENTIFICAÇÃO")
-    y -= 7 * mm
+    c.drawString(m, fluxo.y, "IDENTIFICAÇÃO")
+    fluxo.avancar(7 * mm)
 
-    c.setFont("Helvetica", 10)
     items = [
         ("Gaveta:", gaveta_nome),
         ("Responsável:", responsavel_nome),
@@ -77,59 +78,60 @@ def gerar_pdf_fechamento(
     ]
     for label, value in items:
         c.setFont("Helvetica-Bold", 10)
-        c.drawString(m, y, label)
+        c.drawString(m, fluxo.y, label)
         c.setFont("Helvetica", 10)
-        c.drawString(m + 45 * mm, y, str(value))
-        y -= 5.5 * mm
+        c.drawString(m + 45 * mm, fluxo.y, str(value))
+        fluxo.avancar(5.5 * mm)
 
     # Separator
-    y -= 3 * mm
-    c.line(m, y, largura - m, y)
-    y -= 8 * mm
+    fluxo.avancar(3 * mm)
+    fluxo.linha_horizontal("#b3b3b3")
+    fluxo.avancar(8 * mm)
 
     # Section: Totals
     c.setFont("Helvetica-Bold", 12)
-    c.drawString(m, y, "VALORES TOTALIZADOS")
-    y -= 7 * mm
-
-    def _draw_value_line(label, valor, bold=False):
-        nonlocal y
-        c.setFont("Helvetica-Bold" if bold else "Helvetica", 10)
-        c.drawString(m, y, label)
-        c.drawRightString(largura - m, y, f"R$ {formatar_moeda(valor)}")
-        y -= 5.5 * mm
-
-    _draw_value_line("Saldo Inicial:", saldo_inicial)
-    _draw_value_line("(+) Total de Entradas:", total_entradas)
-    _draw_value_line("(-) Total de Saídas:", total_saidas)
-    y -= 2 * mm
-    c.setFont("Helvetica", 9)
-    c.drawString(m + 10 * mm, y, f"• Com recibo: R$ {formatar_moeda(total_saidas_com_recibo)}")
-    y -= 4.5 * mm
-    c.drawString(m + 10 * mm, y, f"• Sem recibo: R$ {formatar_moeda(total_saidas_sem_recibo)}")
-    y -= 6 * mm
+    c.drawString(m, fluxo.y, "VALORES TOTALIZADOS")
+    fluxo.avancar(7 * mm)
+
+    fluxo.linha_valor("Saldo Inicial:", f"R$ {formatar_moeda(saldo_inicial)}")
+    fluxo.linha_valor("(+) Total de Entradas:", f"R$ {formatar_moeda(total_entradas)}")
+    fluxo.linha_valor("(-) Total de Saídas:", f"R$ {formatar_moeda(total_saidas)}")
+    fluxo.avancar(2 * mm)
+    fluxo.bloco_totais(
+        [
+            (f"• Com recibo: R$ {formatar_moeda(total_saidas_com_recibo)}",),
+            (f"• Sem recibo: R$ {formatar_moeda(total_saidas_sem_recibo)}",),
+        ],
+        tamanho=9,
+        recuo=10 * mm,
+        altura_linha=4.5 * mm,
+    )
+    fluxo.avancar(1.5 * mm)
 
     # Section: Totals by type
     if totais_por_tipo:
-        y -= 2 * mm
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(m, y, "RESUMO POR TIPO:")
-        y -= 5.5 * mm
-        c.setFont("Helvetica", 9)
-        for item in totais_por_tipo:
-            label = _TIPO_LABELS.get(item["tipo"], item["tipo"])
-            c.drawString(m + 10 * mm, y, f"• {label}: R$ {formatar_moeda(item['total'])}")
-            y -= 4.5 * mm
-        y -= 2 * mm
+        fluxo.avancar(2 * mm)
+        fluxo.bloco_totais(
+            [
+                (f"• {_TIPO_LABELS.get(item['tipo'], item['tipo'])}: "
+                 f"R$ {formatar_moeda(item['total'])}",)
+                for item in totais_por_tipo
+            ],
+            titulo="RESUMO POR TIPO:",
+            tamanho=9,
+            recuo=10 * mm,
+            altura_linha=4.5 * mm,
+        )
+        fluxo.avancar(2 * mm)
 
     # Separator line for results
-    c.setStrokeColorRGB(0, 0, 0)
-    c.line(m, y, largura - m, y)
-    y -= 6 * mm
+    fluxo.garantir_espaco(25 * mm)
+    fluxo.linha_horizontal()
+    fluxo.avancar(6 * mm)
 
-    _draw_value_line("Saldo Esperado:", saldo_esperado, bold=True)
-    _draw_value_line("Valor Contado:", valor_contado, bold=True)
-    y -= 2 * mm
+    fluxo.linha_valor("Saldo Esperado:", f"R$ {formatar_moeda(saldo_esperado)}", negrito=True)
+    fluxo.linha_valor("Valor Contado:", f"R$ {formatar_moeda(valor_contado)}", negrito=True)
+    fluxo.avancar(2 * mm)
 
     # Difference with color
     c.setFont("Helvetica-Bold", 11)
@@ -142,27 +144,26 @@ def gerar_pdf_fechamento(
     else:
         label = f"FALTA: R$ {formatar_moeda(abs(diferenca))}"
         c.setFillColorRGB(0.8, 0.0, 0.0)
-    c.drawString(m, y, label)
+    c.drawString(m, fluxo.y, label)
     c.setFillColorRGB(0, 0, 0)
-    y -= 8 * mm
+    fluxo.avancar(8 * mm)
 
     # Justification (if any)
     if justificativa:
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(m, y, "Justificativa da Divergência:")
-        y -= 5 * mm
-        c.setFont("Helvetica", 10)
-        for line in _wrap_text(justificativa, 85):
-            c.drawString(m, y, line)
-            y -= 5 * mm
-        y -= 3 * mm
+        fluxo.bloco_totais(
+            [(line,) for line in _wrap_text(justificativa, 85)],
+            titulo="Justificativa da Divergência:",
+        )
+        fluxo.avancar(3 * mm)
 
     # Separator
-    y -= 5 * mm
-    c.line(m, y, largura - m, y)
-    y -= 15 * mm
+    fluxo.avancar(5 * mm)
+    fluxo.garantir_espaco(30 * mm)
+    fluxo.linha_horizontal()
+    fluxo.avancar(15 * mm)
 
     # Signatures
+    y = fluxo.y
     half = largura / 2
     c.line(m, y, half - 10 * mm, y)
     c.line(half + 10 * mm, y, largura - m, y)
@@ -178,8 +179,7 @@ def gerar_pdf_fechamento(
     # Footer logo
     _draw_footer_logo(c, largura)
 
-    c.showPage()
-    c.save()
+    fluxo.finalizar()
     return caminho_pdf
 
 
@@ -0,0 +1,127 @@
+"""Gera PDF do relatório de recibos e saídas (tela de Relatórios)."""
+
+import os
+from typing import Iterable
+
+from reportlab.lib.pagesizes import A4, landscape
+from reportlab.lib.units import mm
+
+from diagnostico import medido
+from pdf.gerador_pdf import formatar_moeda
+from pdf.relatorio_tabular import Coluna, RelatorioTabular
+
+
+_COLUNAS_COM_GAVETA = [
+    Coluna("Data/Hora", 32),
+    Coluna("Empresa", 28),
+    Coluna("Usuário", 26),
+    Coluna("Tipo", 30),
+    Coluna("Pessoa", 54),
+    Coluna("Valor", 22),
+    Coluna("Gaveta", 20),
+    Coluna("Descrição", 50),
+]
+
+_COLUNAS_SEM_GAVETA = [
+    Coluna("Data/Hora", 34),
+    Coluna("Empresa", 30),
+    Coluna("Usuário", 36),
+    Coluna("Tipo", 28),
+    Coluna("Pessoa", 60),
+    Coluna("Valor", 22),
+    Coluna("Descrição", 52),
+]
+
+
+@medido("pdf.gerar_pdf_relatorio_recibos")
+def gerar_pdf_relatorio_recibos(
+    caminho_pdf: str,
+    rows: Iterable[dict],
+    periodo_inicio: str,
+    periodo_fim: str,
+    rotulos_tipo: dict,
+    mostrar_gaveta: bool = False,
+):
+    """Gera o relatório em paisagem a partir de `rows` (consumido uma única vez).
+
+    Os totais são acumulados durante a renderização, então `rows` pode ser
+    um gerador sobre o cursor do banco.
+    """
+    os.makedirs(os.path.dirname(caminho_pdf), exist_ok=True)
+
+    def _cabecalho(fluxo, _numero_pagina):
+        c = fluxo.c
+        c.setFont("Helvetica-Bold", 12)
+        c.drawString(fluxo.margem_x, fluxo.y, "RELATÓRIO DE RECIBOS E SAÍDAS")
+        fluxo.y -= 5 * mm
+        c.setFont("Helvetica", 8)
+        c.drawString(
+            fluxo.margem_x, fluxo.y,
+            f"Período: {periodo_inicio} a {periodo_fim}",
+        )
+        fluxo.y -= 6 * mm
+
+    rel = RelatorioTabular(
+        caminho_pdf,
+        landscape(A4),
+        _COLUNAS_COM_GAVETA if mostrar_gaveta else _COLUNAS_SEM_GAVETA,
+        cabecalho_pagina=_cabecalho,
+    )
+
+    acumulado = {"total": 0.0, "n": 0, "por_tipo": {}}
+
+    def _linhas():
+        por_tipo = acumulado["por_tipo"]
+        for row in rows:
+            tipo_key = row["tipo"] or ""
+            tipo_display = rotulos_tipo.get(tipo_key, tipo_key)
+            razao = row["razao_social"] or ""
+            valor = row["valor"] or 0
+            acumulado["total"] += valor
+            acumulado["n"] += 1
+            por_tipo[tipo_display] = por_tipo.get(tipo_display, 0) + valor
+            if mostrar_gaveta:
+                yield (
+                    row["created_at"] or "",
+                    razao[:6],
+                    row["username"] or "",
+                    tipo_display,
+                    row["pessoa_nome"] or "",
+                    f"R$ {formatar_moeda(row['valor'])}",
+                    row.get("gaveta_nome", "") or "",
+                    row["descricao"] or "",
+                )
+            else:
+                yield (
+                    row["created_at"] or "",
+                    razao[:3],
+                    row["username"] or "",
+                    tipo_display,
+                    row["pessoa_nome"] or "",
+                    f"R$ {formatar_moeda(row['valor'])}",
+                    row["descricao"] or "",
+                )
+
+    rel.cabecalho_colunas()
+    rel.linhas(_linhas())
+
+    por_tipo = acumulado["por_tipo"]
+    # Total + separador + título + tipos precisam ficar juntos
+    rel.garantir_espaco((len(por_tipo) + 3) * 5 * mm + 10 * mm)
+    rel.avancar(3 * mm)
+    rel.c.setStrokeColorRGB(0, 0, 0)
+    rel.linha_horizontal()
+    rel.avancar(6 * mm)
+    rel.bloco_totais(
+        [(f"Total: R$ {formatar_moeda(acumulado['total'])}  —  "
+          f"{acumulado['n']} registro(s)", True)],
+        altura_linha=8 * mm,
+    )
+    rel.bloco_totais(
+        [(f"{tipo}: R$ {formatar_moeda(por_tipo[tipo])}",) for tipo in sorted(por_tipo)],
+        titulo="Resumo por Tipo:",
+        tamanho=9,
+        recuo=5 * mm,
+    )
+    rel.finalizar()
+    return caminho_pdf
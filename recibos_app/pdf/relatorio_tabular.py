@@ -0,0 +1,224 @@
+"""Motor compartilhado para relatórios tabulares em PDF.
+
+Centraliza o controle de posição vertical, as quebras de página, o
+cabeçalho repetido das colunas e o bloco de totais, para que os geradores
+de relatório só descrevam colunas e forneçam as linhas (de preferência
+como um iterável, sem montar listas completas em memória).
+"""
+
+from dataclasses import dataclass
+from typing import Callable, Iterable, Optional, Sequence
+
+from reportlab.lib.colors import HexColor
+from reportlab.lib.units import mm
+from reportlab.pdfgen import canvas
+
+from pdf.texto import largura_texto, truncar_para_largura
+
+
+@dataclass(frozen=True)
+class Coluna:
+    """Especificação de uma coluna do relatório.
+
+    largura é em milímetros. cor, se informada, recebe o texto da célula e
+    devolve a cor de preenchimento (ou None para a cor padrão).
+    """
+    titulo: str
+    largura: float
+    alinhamento: str = "left"  # 'left' ou 'right'
+    cor: Optional[Callable[[str], object]] = None
+
+
+class LarguraCache:
+    """Acesso às larguras e truncamentos em cache para uma fonte/tamanho."""
+
+    def __init__(self, font_name: str, font_size: float):
+        self.font_name = font_name
+        self.font_size = font_size
+
+    def largura(self, texto: str) -> float:
+        return largura_texto(texto, self.font_name, self.font_size)
+
+    def truncar(self, texto: str, max_width: float) -> str:
+        return truncar_para_largura(texto, max_width, self.font_name, self.font_size)
+
+
+class FluxoPagina:
+    """Controla a posição vertical em um canvas com quebra automática.
+
+    cabecalho_pagina(fluxo, numero_pagina) é chamado no início de cada
+    página (inclusive a primeira) e rodape_pagina(fluxo) antes de cada
+    quebra e no final do documento.
+    """
+
+    def __init__(
+        self,
+        caminho_pdf: str,
+        pagesize,
+        margem_x: float = 15 * mm,
+        margem_topo: float = 20 * mm,
+        margem_base: float = 20 * mm,
+        cabecalho_pagina: Optional[Callable[["FluxoPagina", int], None]] = None,
+        rodape_pagina: Optional[Callable[["FluxoPagina"], None]] = None,
+    ):
+        # invariant: mesmo conteúdo, mesmos bytes (deduplicação no armazem_pdf)
+        self.c = canvas.Canvas(caminho_pdf, pagesize=pagesize, invariant=1)
+        self.largura, self.altura = pagesize
+        self.margem_x = margem_x
+        self.margem_topo = margem_topo
+        self.margem_base = margem_base
+        self.cabecalho_pagina = cabecalho_pagina
+        self.rodape_pagina = rodape_pagina
+        self.numero_pagina = 0
+        self.y = 0.0
+        self._iniciar_pagina()
+
+    @property
+    def x_direita(self) -> float:
+        return self.largura - self.margem_x
+
+    def _iniciar_pagina(self):
+        self.numero_pagina += 1
+        self.y = self.altura - self.margem_topo
+        if self.cabecalho_pagina:
+            self.cabecalho_pagina(self, self.numero_pagina)
+
+    def nova_pagina(self):
+        if self.rodape_pagina:
+            self.rodape_pagina(self)
+        self.c.showPage()
+        self._iniciar_pagina()
+
+    def garantir_espaco(self, altura: float) -> bool:
+        """Quebra a página se não houver `altura` livre. Retorna True se quebrou."""
+        if self.y - altura < self.margem_base:
+            self.nova_pagina()
+            return True
+        return False
+
+    def avancar(self, altura: float):
+        self.y -= altura
+
+    def linha_horizontal(self, cor="#000000"):
+        self.c.setStrokeColor(HexColor(cor))
+        self.c.line(self.margem_x, self.y, self.x_direita, self.y)
+
+    def linha_valor(self, rotulo: str, valor: str, negrito: bool = False,
+                    tamanho: float = 10, cor=None, altura: float = 5.5 * mm,
+                    rotulo_negrito: Optional[bool] = None):
+        """Desenha 'rótulo ........ valor' alinhado à direita."""
+        self.garantir_espaco(altura)
+        if rotulo_negrito is None:
+            rotulo_negrito = negrito
+        self.c.setFont("Helvetica-Bold" if rotulo_negrito else "Helvetica", tamanho)
+        self.c.drawString(self.margem_x, self.y, rotulo)
+        self.c.setFont("Helvetica-Bold" if negrito else "Helvetica", tamanho)
+        if cor is not None:
+            self.c.setFillColor(cor)
+        self.c.drawRightString(self.x_direita, self.y, valor)
+        self.c.setFillColor(HexColor("#000000"))
+        self.y -= altura
+
+    def bloco_totais(self, linhas: Sequence[tuple], titulo: Optional[str] = None,
+                     tamanho: float = 10, recuo: float = 0.0,
+                     altura_linha: float = 5 * mm):
+        """Desenha um bloco de totais sem quebrá-lo entre páginas.
+
+        Cada linha é (texto,) ou (texto, negrito).
+        """
+        altura_total = len(linhas) * altura_linha + (altura_linha if titulo else 0)
+        self.garantir_espaco(altura_total)
+        if titulo:
+            self.c.setFont("Helvetica-Bold", tamanho)
+            self.c.drawString(self.margem_x, self.y, titulo)
+            self.y -= altura_linha
+        for linha in linhas:
+            negrito = len(linha) > 1 and linha[1]
+            self.c.setFont("Helvetica-Bold" if negrito else "Helvetica", tamanho)
+            self.c.drawString(self.margem_x + recuo, self.y, linha[0])
+            self.y -= altura_linha
+
+    def finalizar(self):
+        if self.rodape_pagina:
+            self.rodape_pagina(self)
+        self.c.showPage()
+        self.c.save()
+
+
+class RelatorioTabular(FluxoPagina):
+    """Relatório com tabela paginada e cabeçalho de colunas repetido."""
+
+    def __init__(
+        self,
+        caminho_pdf: str,
+        pagesize,
+        colunas: Sequence[Coluna],
+        font_name: str = "Helvetica",
+        font_size: float = 8,
+        altura_linha: float = 5 * mm,
+        font_cabecalho: str = "Helvetica-Bold",
+        tamanho_cabecalho: float = 8,
+        cor_cabecalho: str = "#000000",
+        **kwargs,
+    ):
+        self.colunas = list(colunas)
+        self.font_name = font_name
+        self.font_size = font_size
+        self.altura_linha = altura_linha
+        self.font_cabecalho = font_cabecalho
+        self.tamanho_cabecalho = tamanho_cabecalho
+        self.cor_cabecalho = cor_cabecalho
+        self.larguras = LarguraCache(font_name, font_size)
+        self._tabela_ativa = False
+        super().__init__(caminho_pdf, pagesize, **kwargs)
+        self._posicoes = []
+        x = self.margem_x
+        for col in self.colunas:
+            self._posicoes.append(x)
+            x += col.largura * mm
+
+    def _iniciar_pagina(self):
+        super()._iniciar_pagina()
+        if self._tabela_ativa:
+            self.cabecalho_colunas()
+
+    def cabecalho_colunas(self):
+        """Desenha os títulos das colunas e ativa a repetição em novas páginas."""
+        self._tabela_ativa = True
+        c = self.c
+        c.setFont(self.font_cabecalho, self.tamanho_cabecalho)
+        c.setFillColor(HexColor(self.cor_cabecalho))
+        for col, x in zip(self.colunas, self._posicoes):
+            c.drawString(x, self.y, col.titulo)
+        c.setFillColor(HexColor("#000000"))
+        self.y -= 4 * mm
+        self.linha_horizontal()
+        self.y -= 4 * mm
+        c.setFont(self.font_name, self.font_size)
+
+    def linhas(self, fonte: Iterable[Sequence[str]]) -> int:
+        """Desenha as linhas vindas de `fonte` e retorna quantas foram desenhadas."""
+        c = self.c
+        colunas = list(zip(self.colunas, self._posicoes))
+        truncar = self.larguras.truncar
+        c.setFont(self.font_name, self.font_size)
+        total = 0
+        for valores in fonte:
+            if self.y < self.margem_base:
+                self.nova_pagina()
+            for (col, x), val in zip(colunas, valores):
+                max_width = (col.largura - 1) * mm
+                texto = truncar(val, max_width)
+                cor = col.cor(val) if col.cor else None
+                if cor is not None:
+                    c.setFillColor(cor)
+                if col.alinhamento == "right":
+                    c.drawRightString(x + max_width, self.y, texto)
+                else:
+                    c.drawString(x, self.y, texto)
+                if cor is not None:
+                    c.setFillColor(HexColor("#000000"))
+            self.y -= self.altura_linha
+            total += 1
+        self._tabela_ativa = False
+        return total
@@ -0,0 +1,39 @@
+"""Utilitários de medição e truncamento de texto para os PDFs."""
+
+from bisect import bisect_right
+from functools import lru_cache
+from itertools import accumulate
+
+from reportlab.pdfbase.pdfmetrics import stringWidth
+
+
+ELLIPSIS = "..."
+
+
+@lru_cache(maxsize=4096)
+def _largura_caractere(ch: str, font_name: str, font_size: float) -> float:
+    return stringWidth(ch, font_name, font_size)
+
+
+@lru_cache(maxsize=16384)
+def largura_texto(texto: str, font_name: str, font_size: float) -> float:
+    return stringWidth(texto, font_name, font_size)
+
+
+@lru_cache(maxsize=65536)
+def truncar_para_largura(texto: str, max_width: float, font_name: str,
+                         font_size: float) -> str:
+    """Trunca `texto` com reticências para caber em `max_width`.
+
+    Usa as larguras acumuladas dos glifos e busca binária para achar o
+    ponto de corte. O resultado fica em cache, já que nomes de pessoas e
+    empresas se repetem muito nos relatórios.
+    """
+    if largura_texto(texto, font_name, font_size) <= max_width:
+        return texto
+    limite = max_width - largura_texto(ELLIPSIS, font_name, font_size)
+    acumuladas = list(accumulate(
+        _largura_caractere(ch, font_name, font_size) for ch in texto
+    ))
+    corte = bisect_right(acumuladas, limite)
+    return texto[:corte] + ELLIPSIS
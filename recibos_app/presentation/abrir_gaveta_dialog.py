@@ -3,10 +3,9 @@ from PySide6.QtWidgets import (
     QDoubleSpinBox, QPushButton, QMessageBox, QFormLayout, QGroupBox,
 )
 
-from data.repositories.sqlite_usuario_repo import SqliteUsuarioRepo
-from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
-from data.repositories.sqlite_sessao_repo import SqliteSessaoRepo
 from domain.use_cases.abrir_gaveta import AbrirGaveta
+from domain.exceptions import ConcorrenciaError
+from remoto import fabrica
 
 
 class AbrirGavetaDialog(QDialog):
@@ -16,9 +15,9 @@ class AbrirGavetaDialog(QDialog):
         self.setMinimumWidth(420)
         self.admin_user = admin_user
         self.fixed_gaveta_id = gaveta_id
-        self.gaveta_repo = SqliteGavetaRepo()
-        self.usuario_repo = SqliteUsuarioRepo()
-        self.sessao_repo = SqliteSessaoRepo()
+        self.gaveta_repo = fabrica.gaveta_repo()
+        self.usuario_repo = fabrica.usuario_repo()
+        self.sessao_repo = fabrica.sessao_repo()
         self._build_ui()
         self._load_data()
 
@@ -88,7 +87,7 @@ class AbrirGavetaDialog(QDialog):
         uc = AbrirGaveta(self.sessao_repo, self.gaveta_repo, self.usuario_repo)
         try:
             uc.execute(self.admin_user, gaveta_id, responsavel_id, saldo)
-        except (PermissionError, ValueError) as e:
+        except (PermissionError, ValueError, ConcorrenciaError) as e:
             QMessageBox.warning(self, "Erro", str(e))
             return
 
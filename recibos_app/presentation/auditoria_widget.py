@@ -1,13 +1,41 @@
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
-    QTableWidget, QTableWidgetItem, QHeaderView, QGroupBox, QComboBox,
+    QTableView, QHeaderView, QGroupBox, QComboBox, QAbstractItemView, QCheckBox,
 )
 
-from data.repositories.sqlite_sessao_repo import SqliteSessaoRepo
-from data.repositories.sqlite_movimentacao_repo import SqliteMovimentacaoRepo
-from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
+from arquivamento import MovimentacaoRepoComArquivo, SessaoRepoComArquivo
+from remoto import fabrica
 from pdf.gerador_pdf import formatar_moeda
+from ui.table_model import ColumnarTableModel, Coluna
+
+
+def _cor_status(status):
+    return QColor(Qt.darkGreen) if status == "ABERTA" else None
+
+
+def _cor_tipo_mov(tipo):
+    return QColor(Qt.darkGreen) if tipo == "ENTRADA" else QColor(Qt.red)
+
+
+def _texto_divergencia(dif):
+    if dif is None:
+        return ""
+    if abs(dif) < 0.01:
+        return "OK"
+    if dif > 0:
+        return f"Sobra R$ {formatar_moeda(dif)}"
+    return f"Falta R$ {formatar_moeda(abs(dif))}"
+
+
+_EXTRATORES_MOVS = [
+    lambda m: m["created_at"],
+    lambda m: m["tipo"],
+    lambda m: m["valor"],
+    lambda m: m["descricao"],
+    lambda m: m.get("username", ""),
+]
 
 
 class AuditoriaWidget(QWidget):
@@ -27,12 +55,15 @@ class AuditoriaWidget(QWidget):
         filtros_layout = QHBoxLayout(filtros)
         self.combo_gaveta = QComboBox()
         self.combo_gaveta.addItem("Todas as Gavetas", None)
-        gaveta_repo = SqliteGavetaRepo()
+        gaveta_repo = fabrica.gaveta_repo()
         for g in gaveta_repo.get_all():
             self.combo_gaveta.addItem(g["nome"], g["id"])
         filtros_layout.addWidget(QLabel("Gaveta:"))
         filtros_layout.addWidget(self.combo_gaveta)
 
+        self.chk_arquivadas = QCheckBox("Incluir sessões arquivadas")
+        filtros_layout.addWidget(self.chk_arquivadas)
+
         self.btn_buscar = QPushButton("Buscar")
         filtros_layout.addWidget(self.btn_buscar)
         filtros_layout.addStretch(1)
@@ -41,14 +72,13 @@ class AuditoriaWidget(QWidget):
         # Sessions table
         sessoes_group = QGroupBox("Histórico de Sessões (Aberturas / Fechamentos)")
         sessoes_layout = QVBoxLayout(sessoes_group)
-        self.table_sessoes = QTableWidget(0, 8)
-        self.table_sessoes.setHorizontalHeaderLabels([
-            "Gaveta", "Responsável", "Admin Abertura", "Admin Fechamento",
-            "Aberta em", "Fechada em", "Status", "Divergência"
-        ])
-        self.table_sessoes.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table_sessoes.setAlternatingRowColors(True)
-        self.table_sessoes.setSelectionBehavior(QTableWidget.SelectRows)
+        self.model_sessoes = ColumnarTableModel([
+            Coluna("Gaveta"), Coluna("Responsável"), Coluna("Admin Abertura"),
+            Coluna("Admin Fechamento"), Coluna("Aberta em"), Coluna("Fechada em"),
+            Coluna("Status", cor=_cor_status),
+            Coluna("Divergência", formatar=_texto_divergencia),
+        ], self)
+        self.table_sessoes = _criar_tabela(self.model_sessoes)
         sessoes_layout.addWidget(self.table_sessoes)
         layout.addWidget(sessoes_group)
 
@@ -58,77 +88,89 @@ class AuditoriaWidget(QWidget):
         self.lbl_resumo = QLabel("")
         self.lbl_resumo.setStyleSheet("font-size: 10pt;")
         detail_layout.addWidget(self.lbl_resumo)
-        self.table_movs = QTableWidget(0, 5)
-        self.table_movs.setHorizontalHeaderLabels([
-            "Data/Hora", "Tipo", "Valor", "Descrição", "Usuário"
-        ])
-        self.table_movs.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        self.table_movs.setAlternatingRowColors(True)
+        self.model_movs = ColumnarTableModel([
+            Coluna("Data/Hora"),
+            Coluna("Tipo", cor=_cor_tipo_mov),
+            Coluna("Valor", formatar=lambda v: f"R$ {formatar_moeda(v)}"),
+            Coluna("Descrição"),
+            Coluna("Usuário"),
+        ], self)
+        self.table_movs = _criar_tabela(self.model_movs)
         detail_layout.addWidget(self.table_movs)
         layout.addWidget(detail_group)
 
         self.btn_buscar.clicked.connect(self._load_data)
-        self.table_sessoes.currentCellChanged.connect(self._on_sessao_selected)
+        self.table_sessoes.selectionModel().currentRowChanged.connect(
+            self._on_sessao_selected
+        )
 
     def _load_data(self):
-        self.table_sessoes.setRowCount(0)
-        self.table_movs.setRowCount(0)
+        self.model_movs.clear()
         self.lbl_resumo.setText("")
 
-        sessao_repo = SqliteSessaoRepo()
+        sessao_repo = SessaoRepoComArquivo(
+            fabrica.sessao_repo(), incluir_arquivo=self.chk_arquivadas.isChecked()
+        )
+        mov_repo = MovimentacaoRepoComArquivo(fabrica.movimentacao_repo())
         gaveta_id = self.combo_gaveta.currentData()
-        if gaveta_id:
-            sessoes = sessao_repo.list_by_gaveta(gaveta_id)
-        else:
-            sessoes = sessao_repo.list_all()
-
-        mov_repo = SqliteMovimentacaoRepo()
-        for s in sessoes:
-            r = self.table_sessoes.rowCount()
-            self.table_sessoes.insertRow(r)
-            self.table_sessoes.setItem(r, 0, QTableWidgetItem(s.get("gaveta_nome", "")))
-            self.table_sessoes.setItem(r, 1, QTableWidgetItem(s.get("responsavel_nome", "")))
-            self.table_sessoes.setItem(r, 2, QTableWidgetItem(s.get("admin_abertura_nome", "")))
-            self.table_sessoes.setItem(r, 3, QTableWidgetItem(s.get("admin_fechamento_nome", "")))
-            self.table_sessoes.setItem(r, 4, QTableWidgetItem(s.get("aberta_em", "")))
-            self.table_sessoes.setItem(r, 5, QTableWidgetItem(s.get("fechada_em", "")))
-
-            status_item = QTableWidgetItem(s["status"])
-            if s["status"] == "ABERTA":
-                status_item.setForeground(Qt.darkGreen)
-            self.table_sessoes.setItem(r, 6, status_item)
-
-            div_text = ""
-            if s["status"] == "FECHADA" and s.get("valor_contado") is not None:
-                totais = mov_repo.get_totals_by_sessao(s["id"])
-                esperado = s["saldo_inicial"] + totais["total_entradas"] - totais["total_saidas"]
-                dif = s["valor_contado"] - esperado
-                if abs(dif) < 0.01:
-                    div_text = "OK"
-                elif dif > 0:
-                    div_text = f"Sobra R$ {formatar_moeda(dif)}"
-                else:
-                    div_text = f"Falta R$ {formatar_moeda(abs(dif))}"
-            self.table_sessoes.setItem(r, 7, QTableWidgetItem(div_text))
-            self.table_sessoes.item(r, 0).setData(Qt.UserRole, s["id"])
-
-    def _on_sessao_selected(self, row, col, prev_row, prev_col):
-        self.table_movs.setRowCount(0)
+        # Sessões e totais da mesma foto: uma sessão fechada no meio da
+        # leitura não aparece com os totais de antes. Os repositórios locais
+        # leem por database.get_connection, que a foto cobre
+        with fabrica.instantaneo():
+            if gaveta_id:
+                sessoes = sessao_repo.list_by_gaveta(gaveta_id)
+            else:
+                sessoes = sessao_repo.list_all()
+
+            fechadas = [
+                s["id"] for s in sessoes
+                if s["status"] == "FECHADA" and s.get("valor_contado") is not None
+            ]
+            # Os do banco principal em uma leitura (no servidor, uma
+            # requisição); os arquivados pelo decorador
+            totais_por_sessao = mov_repo.repo.get_totals_by_sessoes(fechadas)
+            for sid in fechadas:
+                if not any(totais_por_sessao[sid].values()):
+                    totais_por_sessao[sid] = mov_repo.get_totals_by_sessao(sid)
+
+        def divergencia(s):
+            if s["status"] != "FECHADA" or s.get("valor_contado") is None:
+                return None
+            totais = totais_por_sessao[s["id"]]
+            esperado = s["saldo_inicial"] + totais["total_entradas"] - totais["total_saidas"]
+            return s["valor_contado"] - esperado
+
+        self.table_sessoes.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.model_sessoes.set_rows(
+            sessoes,
+            [
+                lambda s: s.get("gaveta_nome", ""),
+                lambda s: s.get("responsavel_nome", ""),
+                lambda s: s.get("admin_abertura_nome", ""),
+                lambda s: s.get("admin_fechamento_nome", ""),
+                lambda s: s.get("aberta_em", ""),
+                lambda s: s.get("fechada_em", ""),
+                lambda s: s["status"],
+                divergencia,
+            ],
+            id_fn=lambda s: s["id"],
+        )
+
+    def _on_sessao_selected(self, current, previous):
+        self.model_movs.clear()
         self.lbl_resumo.setText("")
-        if row < 0:
+        if not current.isValid():
             return
-        item = self.table_sessoes.item(row, 0)
-        if not item:
-            return
-        sessao_id = item.data(Qt.UserRole)
+        sessao_id = self.model_sessoes.row_id(current.row())
         if not sessao_id:
             return
 
-        mov_repo = SqliteMovimentacaoRepo()
-        sesao_repo = SqliteSessaoRepo()
-        sessao = sesao_repo.get_by_id(sessao_id)
-        movs = mov_repo.list_by_sessao(sessao_id)
-        totais = mov_repo.get_totals_by_sessao(sessao_id)
+        mov_repo = MovimentacaoRepoComArquivo(fabrica.movimentacao_repo())
+        sesao_repo = SessaoRepoComArquivo(fabrica.sessao_repo())
+        with fabrica.instantaneo():
+            sessao = sesao_repo.get_by_id(sessao_id)
+            movs = mov_repo.list_by_sessao(sessao_id)
+            totais = mov_repo.get_totals_by_sessao(sessao_id)
 
         saldo_inicial = sessao["saldo_inicial"] if sessao else 0
         esperado = saldo_inicial + totais["total_entradas"] - totais["total_saidas"]
@@ -139,16 +181,16 @@ class AuditoriaWidget(QWidget):
             f"Saldo Esperado: R$ {formatar_moeda(esperado)}"
         )
 
-        for mov in movs:
-            r = self.table_movs.rowCount()
-            self.table_movs.insertRow(r)
-            self.table_movs.setItem(r, 0, QTableWidgetItem(mov["created_at"]))
-            tipo_item = QTableWidgetItem(mov["tipo"])
-            if mov["tipo"] == "ENTRADA":
-                tipo_item.setForeground(Qt.darkGreen)
-            else:
-                tipo_item.setForeground(Qt.red)
-            self.table_movs.setItem(r, 1, tipo_item)
-            self.table_movs.setItem(r, 2, QTableWidgetItem(f"R$ {formatar_moeda(mov['valor'])}"))
-            self.table_movs.setItem(r, 3, QTableWidgetItem(mov["descricao"]))
-            self.table_movs.setItem(r, 4, QTableWidgetItem(mov.get("username", "")))
+        self.table_movs.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.model_movs.set_rows(movs, _EXTRATORES_MOVS)
+
+
+def _criar_tabela(model):
+    table = QTableView()
+    table.setModel(model)
+    table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+    table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+    table.setSortingEnabled(True)
+    table.setAlternatingRowColors(True)
+    table.setSelectionBehavior(QAbstractItemView.SelectRows)
+    return table
@@ -1,17 +1,15 @@
-import os
-from datetime import datetime
-
 from PySide6.QtWidgets import (
     QDialog, QVBoxLayout, QHBoxLayout, QLabel, QDoubleSpinBox,
     QTextEdit, QPushButton, QMessageBox, QGroupBox, QFormLayout,
 )
 
-from data.repositories.sqlite_sessao_repo import SqliteSessaoRepo
-from data.repositories.sqlite_movimentacao_repo import SqliteMovimentacaoRepo
 from domain.use_cases.fechar_gaveta import FecharGaveta
+from domain.exceptions import ConcorrenciaError
+from remoto import fabrica
 from pdf.relatorio_fechamento_pdf import gerar_pdf_fechamento
 from pdf.gerador_pdf import formatar_moeda
-from app_paths import get_data_dir, get_pdf_dir
+import armazem_pdf
+from ui.fila_pdf import get_fila
 
 
 class FecharGavetaDialog(QDialog):
@@ -21,9 +19,9 @@ class FecharGavetaDialog(QDialog):
         self.setMinimumWidth(520)
         self.admin_user = admin_user
         self.sessao_id = sessao_id
-        self.sessao_repo = SqliteSessaoRepo()
-        self.mov_repo = SqliteMovimentacaoRepo()
-        self.uc = FecharGaveta(self.sessao_repo, self.mov_repo)
+        self.sessao_repo = fabrica.sessao_repo()
+        self.mov_repo = fabrica.movimentacao_repo()
+        self.uc = FecharGaveta(self.sessao_repo, self.mov_repo, fabrica.fechamento_repo())
         self._build_ui()
         self._load_resumo()
 
@@ -92,28 +90,28 @@ class FecharGavetaDialog(QDialog):
 
     def _load_resumo(self):
         try:
-            self.resumo = self.uc.get_resumo(self.sessao_id)
+            self.resumo = self.uc.conferir(self.sessao_id)
         except ValueError as e:
             QMessageBox.warning(self, "Erro", str(e))
             self.reject()
             return
 
-        sessao = self.resumo["sessao"]
-        self.lbl_gaveta.setText(sessao.get("gaveta_nome", ""))
-        self.lbl_responsavel.setText(sessao.get("responsavel_nome", ""))
-        self.lbl_saldo_inicial.setText(f"R$ {formatar_moeda(self.resumo['saldo_inicial'])}")
-        self.lbl_entradas.setText(f"R$ {formatar_moeda(self.resumo['total_entradas'])}")
-        self.lbl_saidas.setText(f"R$ {formatar_moeda(self.resumo['total_saidas'])}")
-        self.lbl_saidas_recibo.setText(f"R$ {formatar_moeda(self.resumo['total_saidas_com_recibo'])}")
-        self.lbl_saidas_sem_recibo.setText(f"R$ {formatar_moeda(self.resumo['total_saidas_sem_recibo'])}")
-        self.lbl_saldo_esperado.setText(f"R$ {formatar_moeda(self.resumo['saldo_esperado'])}")
+        resumo = self.resumo
+        self.lbl_gaveta.setText(resumo.gaveta_nome)
+        self.lbl_responsavel.setText(resumo.responsavel_nome)
+        self.lbl_saldo_inicial.setText(f"R$ {formatar_moeda(resumo.saldo_inicial)}")
+        self.lbl_entradas.setText(f"R$ {formatar_moeda(resumo.total_entradas)}")
+        self.lbl_saidas.setText(f"R$ {formatar_moeda(resumo.total_saidas)}")
+        self.lbl_saidas_recibo.setText(f"R$ {formatar_moeda(resumo.total_saidas_com_recibo)}")
+        self.lbl_saidas_sem_recibo.setText(f"R$ {formatar_moeda(resumo.total_saidas_sem_recibo)}")
+        self.lbl_saldo_esperado.setText(f"R$ {formatar_moeda(resumo.saldo_esperado)}")
 
-        self.spin_valor_contado.setValue(self.resumo["saldo_esperado"])
+        self.spin_valor_contado.setValue(resumo.saldo_esperado)
 
     def _on_valor_changed(self):
         if not hasattr(self, "resumo"):
             return
-        diferenca = self.spin_valor_contado.value() - self.resumo["saldo_esperado"]
+        diferenca = self.spin_valor_contado.value() - self.resumo.saldo_esperado
         if abs(diferenca) < 0.01:
             self.lbl_diferenca.setText("SEM DIVERGÊNCIA")
             self.lbl_diferenca.setStyleSheet("font-weight: bold; font-size: 12pt; color: green;")
@@ -129,50 +127,33 @@ class FecharGavetaDialog(QDialog):
         justificativa = self.txt_justificativa.toPlainText().strip() or None
 
         try:
-            self.uc.execute(self.admin_user, self.sessao_id, valor_contado, justificativa)
+            fechamento = self.uc.fechar(self.admin_user, self.resumo, valor_contado,
+                                        justificativa)
         except (PermissionError, ValueError) as e:
             QMessageBox.warning(self, "Erro", str(e))
             return
+        except ConcorrenciaError as e:
+            QMessageBox.warning(self, "Erro", str(e))
+            # A sessão mudou desde a conferência: mostra os valores atuais
+            self._load_resumo()
+            return
 
-        # Re-fetch closed session for PDF
-        sessao = self.sessao_repo.get_by_id(self.sessao_id)
-        diferenca = valor_contado - self.resumo["saldo_esperado"]
-
-        base_dir = get_pdf_dir("Relatorios Fechamento")
-        os.makedirs(base_dir, exist_ok=True)
-        agora = datetime.now().strftime("%Y%m%d_%H%M%S")
-        caminho_pdf = os.path.join(base_dir, f"fechamento_{self.sessao_id:06d}_{agora}.pdf")
-
-        totais_por_tipo = self.mov_repo.get_totals_by_tipo(self.sessao_id)
-
-        gerar_pdf_fechamento(
-            caminho_pdf=caminho_pdf,
-            gaveta_nome=sessao.get("gaveta_nome", ""),
-            responsavel_nome=sessao.get("responsavel_nome", ""),
-            admin_abertura_nome=sessao.get("admin_abertura_nome", ""),
-            admin_fechamento_nome=sessao.get("admin_fechamento_nome", ""),
-            aberta_em=sessao.get("aberta_em", ""),
-            fechada_em=sessao.get("fechada_em", ""),
-            saldo_inicial=self.resumo["saldo_inicial"],
-            total_entradas=self.resumo["total_entradas"],
-            total_saidas=self.resumo["total_saidas"],
-            total_saidas_com_recibo=self.resumo["total_saidas_com_recibo"],
-            total_saidas_sem_recibo=self.resumo["total_saidas_sem_recibo"],
-            saldo_esperado=self.resumo["saldo_esperado"],
-            valor_contado=valor_contado,
-            diferenca=diferenca,
-            justificativa=justificativa,
-            sessao_id=self.sessao_id,
-            totais_por_tipo=totais_por_tipo,
+        # O relatório sai do resultado do fechamento, sem novas consultas,
+        # e é gerado na thread de PDFs para não travar a tela
+        sessao_id = self.sessao_id
+        get_fila().enviar_relatorio(
+            lambda: armazem_pdf.gerar(
+                gerar_pdf_fechamento,
+                armazem_pdf.FECHAMENTO,
+                [sessao_id],
+                **fechamento.dados_relatorio(),
+            ),
+            "Relatório de fechamento",
         )
 
-        try:
-            os.startfile(caminho_pdf)
-        except Exception:
-            pass
-
         QMessageBox.information(
             self, "Sucesso",
-            f"Gaveta fechada com sucesso.\nRelatório gerado: {caminho_pdf}"
+            "Gaveta fechada com sucesso.\n"
+            "O relatório está sendo gerado; um aviso aparece no canto da janela quando ficar pronto."
         )
         self.accept()
@@ -1,26 +1,37 @@
-import os
-from datetime import datetime
-
 from PySide6.QtCore import Qt
+from PySide6.QtGui import QColor
 from PySide6.QtWidgets import (
     QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton,
     QGroupBox, QFrame, QMessageBox, QDoubleSpinBox, QTextEdit,
-    QDialog, QFormLayout, QTableWidget, QTableWidgetItem, QHeaderView,
+    QDialog, QFormLayout, QTableView, QHeaderView,
 )
 
-from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
-from data.repositories.sqlite_sessao_repo import SqliteSessaoRepo
-from data.repositories.sqlite_movimentacao_repo import SqliteMovimentacaoRepo
-from data.repositories.sqlite_usuario_repo import SqliteUsuarioRepo
 from domain.use_cases.consultar_saldo import ConsultarSaldo
 from domain.use_cases.registrar_entrada import RegistrarEntrada
 from domain.use_cases.registrar_saida import RegistrarSaida
+from domain.exceptions import ConcorrenciaError
+from remoto import fabrica
 from presentation.abrir_gaveta_dialog import AbrirGavetaDialog
 from presentation.fechar_gaveta_dialog import FecharGavetaDialog
 from pdf.gerador_pdf import formatar_moeda
-from app_paths import get_pdf_dir
+import armazem_pdf
+from ui.impressao import abrir_pdf
 from pdf.relatorio_gaveta_pdf import gerar_pdf_relatorio_gaveta
 from app_paths import get_data_dir
+from ui.table_model import Coluna, LazyTableModel
+
+
+def _cor_tipo(tipo):
+    return QColor(Qt.darkGreen) if tipo == "ENTRADA" else QColor(Qt.red)
+
+
+_COLUNAS_MOVS = [
+    Coluna("Data/Hora"),
+    Coluna("Tipo", cor=_cor_tipo),
+    Coluna("Valor", formatar=lambda v: f"R$ {formatar_moeda(v)}"),
+    Coluna("Descrição"),
+    Coluna("Usuário"),
+]
 
 
 class EntradaDinheiroDialog(QDialog):
@@ -143,8 +154,8 @@ class GavetaCard(QFrame):
 
     def refresh(self):
         gaveta_id = self.gaveta["id"]
-        sessao_repo = SqliteSessaoRepo()
-        mov_repo = SqliteMovimentacaoRepo()
+        sessao_repo = fabrica.sessao_repo()
+        mov_repo = fabrica.movimentacao_repo()
         uc = ConsultarSaldo(sessao_repo, mov_repo)
         info = uc.execute(gaveta_id)
 
@@ -207,12 +218,12 @@ class GavetaCard(QFrame):
             return
         valor = dlg.spin_valor.value()
         descricao = dlg.txt_descricao.toPlainText().strip()
-        sessao_repo = SqliteSessaoRepo()
-        mov_repo = SqliteMovimentacaoRepo()
+        sessao_repo = fabrica.sessao_repo()
+        mov_repo = fabrica.movimentacao_repo()
         uc = RegistrarEntrada(mov_repo, sessao_repo)
         try:
             uc.execute(self.current_user, self._sessao_id, valor, descricao)
-        except (PermissionError, ValueError) as e:
+        except (PermissionError, ValueError, ConcorrenciaError) as e:
             QMessageBox.warning(self, "Erro", str(e))
             return
         QMessageBox.information(self, "Sucesso", "Entrada registrada.")
@@ -226,12 +237,12 @@ class GavetaCard(QFrame):
             return
         valor = dlg.spin_valor.value()
         descricao = dlg.txt_descricao.toPlainText().strip()
-        sessao_repo = SqliteSessaoRepo()
-        mov_repo = SqliteMovimentacaoRepo()
+        sessao_repo = fabrica.sessao_repo()
+        mov_repo = fabrica.movimentacao_repo()
         uc = RegistrarSaida(mov_repo, sessao_repo)
         try:
             uc.execute(self.current_user, self._sessao_id, valor, descricao)
-        except (PermissionError, ValueError) as e:
+        except (PermissionError, ValueError, ConcorrenciaError) as e:
             QMessageBox.warning(self, "Erro", str(e))
             return
         QMessageBox.information(self, "Sucesso", "Saída registrada.")
@@ -240,29 +251,32 @@ class GavetaCard(QFrame):
     def _handle_movs(self):
         if not self._sessao_id:
             return
-        mov_repo = SqliteMovimentacaoRepo()
-        movs = mov_repo.list_by_sessao(self._sessao_id)
+        mov_repo = fabrica.movimentacao_repo()
+        sessao_id = self._sessao_id
+        total = mov_repo.count_by_sessao(sessao_id)
         dlg = QDialog(self)
-        dlg.setWindowTitle(f"Movimentações — {self.gaveta['nome']}")
+        dlg.setWindowTitle(f"Movimentações — {self.gaveta['nome']} ({total})")
         dlg.setMinimumSize(700, 400)
         layout = QVBoxLayout(dlg)
-        table = QTableWidget(0, 5)
-        table.setHorizontalHeaderLabels(["Data/Hora", "Tipo", "Valor", "Descrição", "Usuário"])
+        # As páginas são buscadas conforme a rolagem chega ao fim da tabela
+        model = LazyTableModel(_COLUNAS_MOVS, [
+            lambda m: m["created_at"],
+            lambda m: m["tipo"],
+            lambda m: m["valor"],
+            lambda m: m["descricao"],
+            lambda m: m.get("username", ""),
+        ], dlg)
+        model.set_fonte(
+            lambda ultima: mov_repo.list_page_by_sessao(
+                sessao_id, ultima["id"] if ultima else None
+            ),
+            total,
+        )
+        table = QTableView()
+        table.setModel(model)
         table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         table.setAlternatingRowColors(True)
-        for mov in movs:
-            r = table.rowCount()
-            table.insertRow(r)
-            table.setItem(r, 0, QTableWidgetItem(mov["created_at"]))
-            tipo_item = QTableWidgetItem(mov["tipo"])
-            if mov["tipo"] == "ENTRADA":
-                tipo_item.setForeground(Qt.darkGreen)
-            else:
-                tipo_item.setForeground(Qt.red)
-            table.setItem(r, 1, tipo_item)
-            table.setItem(r, 2, QTableWidgetItem(f"R$ {formatar_moeda(mov['valor'])}"))
-            table.setItem(r, 3, QTableWidgetItem(mov["descricao"]))
-            table.setItem(r, 4, QTableWidgetItem(mov.get("username", "")))
+        table.verticalHeader().setVisible(False)
         layout.addWidget(table)
         btn_close = QPushButton("Fechar")
         btn_close.clicked.connect(dlg.accept)
@@ -272,43 +286,57 @@ class GavetaCard(QFrame):
     def _handle_relatorio(self):
         if not self._sessao_id:
             return
-        sessao_repo = SqliteSessaoRepo()
-        mov_repo = SqliteMovimentacaoRepo()
-        sessao = sessao_repo.get_by_id(self._sessao_id)
-        if not sessao:
+        sessao_id = self._sessao_id
+        mov_repo = fabrica.movimentacao_repo()
+
+        def _gerar(caminho_pdf, resumo, movimentacoes):
+            gerar_pdf_relatorio_gaveta(
+                caminho_pdf=caminho_pdf,
+                gaveta_nome=resumo.get("gaveta_nome") or self.gaveta["nome"],
+                responsavel_nome=resumo.get("responsavel_nome") or "",
+                aberta_em=resumo.get("aberta_em") or "",
+                movimentacoes=movimentacoes,
+                total_entradas=resumo["total_entradas"],
+                total_saidas=resumo["total_saidas"],
+                saldo_inicial=resumo["saldo_inicial"],
+                saldo_atual=(
+                    resumo["saldo_inicial"]
+                    + resumo["total_entradas"]
+                    - resumo["total_saidas"]
+                ),
+                sessao_id=sessao_id,
+            )
+
+        # As linhas vão do cursor direto para o PDF, sem montar a lista. Com
+        # WAL, o desenho roda dentro da foto (sessão, totais e linhas do
+        # mesmo instante). Sem WAL a foto seguraria as escritas das outras
+        # estações: só o resumo fica nela, e as páginas são lidas depois,
+        # até a última movimentação que a foto via.
+        bloqueia = fabrica.foto_bloqueia_escritas()
+        temporario = None
+        with fabrica.instantaneo():
+            resumo = fabrica.fechamento_repo().get_resumo(sessao_id)
+            if resumo and not bloqueia:
+                temporario = armazem_pdf.desenhar(
+                    _gerar, resumo=resumo,
+                    movimentacoes=mov_repo.iter_by_sessao(sessao_id, nao_cancelados=True),
+                )
+        if not resumo:
             QMessageBox.warning(self, "Erro", "Sessão não encontrada.")
             return
+        if temporario is None:
+            limite = resumo.get("ultimo_mov_id")
+            temporario = armazem_pdf.desenhar(
+                _gerar, resumo=resumo,
+                movimentacoes=(
+                    m for m in mov_repo.iter_by_sessao(sessao_id, nao_cancelados=True)
+                    if limite is None or m["id"] <= limite
+                ),
+            )
 
-        movs = mov_repo.list_by_sessao_nao_cancelados(self._sessao_id)
-        totais = mov_repo.get_totals_by_sessao(self._sessao_id)
-        saldo_atual = (
-            sessao["saldo_inicial"]
-            + totais["total_entradas"]
-            - totais["total_saidas"]
-        )
+        caminho_pdf = armazem_pdf.guardar_desenho(temporario, armazem_pdf.SESSAO, [sessao_id])
 
-        base_dir = get_pdf_dir("Relatorios Gaveta")
-        os.makedirs(base_dir, exist_ok=True)
-        agora = datetime.now().strftime("%Y%m%d_%H%M%S")
-        caminho_pdf = os.path.join(base_dir, f"relatorio_{self._sessao_id:06d}_{agora}.pdf")
-
-        gerar_pdf_relatorio_gaveta(
-            caminho_pdf=caminho_pdf,
-            gaveta_nome=sessao.get("gaveta_nome", self.gaveta["nome"]),
-            responsavel_nome=sessao.get("responsavel_nome", ""),
-            aberta_em=sessao.get("aberta_em", ""),
-            movimentacoes=movs,
-            total_entradas=totais["total_entradas"],
-            total_saidas=totais["total_saidas"],
-            saldo_inicial=sessao["saldo_inicial"],
-            saldo_atual=saldo_atual,
-            sessao_id=self._sessao_id,
-        )
-
-        try:
-            os.startfile(caminho_pdf)
-        except Exception:
-            pass
+        abrir_pdf(caminho_pdf)
 
         QMessageBox.information(
             self, "Relatório",
@@ -337,7 +365,7 @@ class GavetasPanelWidget(QWidget):
         cards_layout = QHBoxLayout()
         cards_layout.setSpacing(16)
 
-        gaveta_repo = SqliteGavetaRepo()
+        gaveta_repo = fabrica.gaveta_repo()
         gavetas = gaveta_repo.get_all()
 
         for gaveta in gavetas:
@@ -0,0 +1,184 @@
+"""Cliente RPC usado pelas estações para falar com o servidor de repositórios."""
+
+import socket
+import threading
+from abc import ABC, abstractmethod
+from contextlib import contextmanager
+
+from remoto.protocolo import (
+    PORTA_PADRAO,
+    assinar_desafio,
+    codificar,
+    decodificar,
+    enviar_quadro,
+    erro_de_dict,
+    receber_quadro,
+)
+
+
+class Transporte(ABC):
+    """Leva uma requisição ao servidor e devolve a resposta."""
+
+    @abstractmethod
+    def trocar(self, requisicao: dict) -> dict:
+        ...
+
+    def fechar(self) -> None:
+        pass
+
+
+class TransporteTCP(Transporte):
+    """Conexão TCP mantida aberta entre as requisições (keep-alive).
+
+    Cada conexão nova responde ao desafio do servidor com a senha
+    compartilhada (ver remoto/protocolo.py) antes da primeira requisição.
+    """
+
+    def __init__(self, host: str, porta: int = PORTA_PADRAO, timeout: float = 30.0,
+                 segredo: str = ""):
+        self.host = host
+        self.porta = porta
+        self.timeout = timeout
+        self.segredo = segredo or ""
+        self._sock = None
+        self._lock = threading.Lock()
+
+    def _autenticar(self, sock) -> None:
+        desafio = receber_quadro(sock)
+        if not isinstance(desafio, dict) or "desafio" not in desafio:
+            raise ConnectionError("Resposta inesperada do servidor de dados.")
+        enviar_quadro(sock, {"resposta": assinar_desafio(self.segredo, desafio["desafio"])})
+        resultado = receber_quadro(sock)
+        if not resultado or not resultado.get("autenticado"):
+            raise PermissionError("O servidor de dados recusou a senha desta estação.")
+
+    def _conectar(self):
+        sock = socket.create_connection((self.host, self.porta), timeout=self.timeout)
+        try:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_KEEPALIVE, 1)
+            self._autenticar(sock)
+        except BaseException:
+            sock.close()
+            raise
+        self._sock = sock
+
+    def _descartar(self):
+        if self._sock is not None:
+            try:
+                self._sock.close()
+            except OSError:
+                pass
+            self._sock = None
+
+    def trocar(self, requisicao: dict) -> dict:
+        with self._lock:
+            # Uma conexão reaproveitada pode ter sido fechada pelo servidor
+            # (reinício). Só reenvia, uma vez e em conexão nova, quando a
+            # requisição com certeza não foi processada: o envio falhou, ou
+            # o servidor fechou sem mandar nenhum byte de resposta (ele só
+            # fecha entre quadros). Timeout, ou erro no meio da resposta,
+            # sobe: o servidor pode ter gravado, e reenviar duplicaria.
+            for tentativa in (1, 2):
+                reaproveitada = self._sock is not None
+                if not reaproveitada:
+                    self._conectar()
+                pode_reenviar = reaproveitada and tentativa == 1
+                try:
+                    enviar_quadro(self._sock, requisicao)
+                except socket.timeout:
+                    self._descartar()
+                    raise
+                except OSError:
+                    self._descartar()
+                    if pode_reenviar:
+                        continue
+                    raise
+                try:
+                    resposta = receber_quadro(self._sock)
+                except OSError:
+                    self._descartar()
+                    raise
+                if resposta is None:
+                    self._descartar()
+                    if pode_reenviar:
+                        continue
+                    raise ConnectionError("O servidor encerrou a conexão.")
+                return resposta
+
+    def fechar(self) -> None:
+        with self._lock:
+            self._descartar()
+
+
+class TransporteLoopback(Transporte):
+    """Entrega a requisição a um Despachante no mesmo processo.
+
+    Passa pela mesma serialização do TCP, então serve como substituto do
+    servidor real em testes e no modo de uma estação só.
+    """
+
+    def __init__(self, despachante):
+        self.despachante = despachante
+
+    def trocar(self, requisicao: dict) -> dict:
+        requisicao = decodificar(codificar(requisicao)[4:])
+        return decodificar(codificar(self.despachante.responder(requisicao))[4:])
+
+
+class Futuro:
+    """Resultado de uma chamada feita dentro de um lote."""
+
+    __slots__ = ("_resultado",)
+
+    def __init__(self):
+        self._resultado = None
+
+    @property
+    def valor(self):
+        if self._resultado is None:
+            raise RuntimeError("O lote ainda não foi enviado.")
+        if "erro" in self._resultado:
+            raise erro_de_dict(self._resultado["erro"])
+        return self._resultado["ok"]
+
+
+class Lote:
+    def __init__(self):
+        self.chamadas = []
+        self.futuros = []
+
+    def chamar(self, repo: str, metodo: str, *args, **kwargs) -> Futuro:
+        self.chamadas.append({"repo": repo, "metodo": metodo,
+                              "args": list(args), "kwargs": kwargs})
+        futuro = Futuro()
+        self.futuros.append(futuro)
+        return futuro
+
+
+class ClienteRPC:
+    def __init__(self, transporte: Transporte):
+        self.transporte = transporte
+
+    def _enviar(self, lote: Lote):
+        if not lote.chamadas:
+            return
+        resposta = self.transporte.trocar({"chamadas": lote.chamadas})
+        for futuro, resultado in zip(lote.futuros, resposta["resultados"]):
+            futuro._resultado = resultado
+
+    @contextmanager
+    def lote(self):
+        """Agrupa chamadas em uma única ida e volta ao sair do bloco."""
+        lote = Lote()
+        yield lote
+        self._enviar(lote)
+
+    def chamar(self, repo: str, metodo: str, *args, **kwargs):
+        lote = Lote()
+        futuro = lote.chamar(repo, metodo, *args, **kwargs)
+        self._enviar(lote)
+        return futuro.valor
+
+    def fechar(self):
+        self.transporte.fechar()
@@ -0,0 +1,204 @@
+"""Escolhe entre os repositórios SQLite locais e os remotos.
+
+Se o config.json tiver "servidor" ("host" ou "host:porta"), as telas usam
+o servidor de repositórios, autenticando com "servidor_segredo"; caso
+contrário abrem o app.db diretamente.
+"""
+
+from contextlib import nullcontext
+from typing import Optional
+
+import emissao
+import fila_pdf
+import folha_pagamento
+import leitura
+from app_paths import load_config, save_config
+from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
+from data.repositories.sqlite_usuario_repo import SqliteUsuarioRepo
+from fechamento_gaveta import SqliteFechamentoRepo, SqliteSessaoVersionada
+from models import recibo as recibo_local
+from movimentacoes_sessao import SqliteMovimentacaoPaginada
+from pdf import cache_pdf
+from pdf.gerador_pdf import POR_PAGINA_PADRAO
+from remoto.cliente import ClienteRPC, TransporteTCP
+from remoto.protocolo import PORTA_PADRAO
+from remoto.repositorios import (
+    RemoteFechamentoRepo,
+    RemoteGavetaRepo,
+    RemoteMovimentacaoRepo,
+    RemoteSessaoRepo,
+    RemoteUsuarioRepo,
+)
+
+_cliente: Optional[ClienteRPC] = None
+
+
+def get_servidor() -> Optional[str]:
+    return load_config().get("servidor") or None
+
+
+def set_servidor(endereco: Optional[str], segredo: Optional[str] = None) -> None:
+    """Grava o endereço do servidor; `segredo` None mantém a senha atual."""
+    global _cliente
+    cfg = load_config()
+    if endereco:
+        cfg["servidor"] = endereco
+    else:
+        cfg.pop("servidor", None)
+    if segredo is not None:
+        if segredo:
+            cfg["servidor_segredo"] = segredo
+        else:
+            cfg.pop("servidor_segredo", None)
+    save_config(cfg)
+    if _cliente is not None:
+        _cliente.fechar()
+        _cliente = None
+
+
+def get_cliente() -> Optional[ClienteRPC]:
+    """Cliente compartilhado (uma conexão por estação), ou None no modo local."""
+    global _cliente
+    if _cliente is None:
+        cfg = load_config()
+        endereco = cfg.get("servidor")
+        if not endereco:
+            return None
+        host, _, porta = endereco.partition(":")
+        _cliente = ClienteRPC(TransporteTCP(
+            host, int(porta or PORTA_PADRAO), segredo=cfg.get("servidor_segredo", ""),
+        ))
+    return _cliente
+
+
+def set_cliente(cliente: Optional[ClienteRPC]) -> None:
+    """Substitui o cliente (ex.: por um com TransporteLoopback)."""
+    global _cliente
+    _cliente = cliente
+
+
+def sessao_repo():
+    cliente = get_cliente()
+    return RemoteSessaoRepo(cliente) if cliente else SqliteSessaoVersionada()
+
+
+def movimentacao_repo():
+    cliente = get_cliente()
+    return RemoteMovimentacaoRepo(cliente) if cliente else SqliteMovimentacaoPaginada()
+
+
+def gaveta_repo():
+    cliente = get_cliente()
+    return RemoteGavetaRepo(cliente) if cliente else SqliteGavetaRepo()
+
+
+def usuario_repo():
+    cliente = get_cliente()
+    return RemoteUsuarioRepo(cliente) if cliente else SqliteUsuarioRepo()
+
+
+def fechamento_repo():
+    cliente = get_cliente()
+    return RemoteFechamentoRepo(cliente) if cliente else SqliteFechamentoRepo()
+
+
+# --- Recibos ---
+# Listagens e cancelamento/exclusão em lote vão pelo models.recibo (SQL deste
+# repositório, com as listas de ids em json_each); a emissão vai pelo
+# emissao.py, que grava o recibo e a saída da gaveta em uma transação. No
+# modo servidor, as mesmas operações rodam no servidor.
+
+def emitir_recibo(usuario_id: int, *args, **kwargs) -> dict:
+    """Recibo e saída na gaveta aberta do usuário, juntos (ver emissao.py).
+    Retorna {'recibo_id', 'movimentacao_id'}."""
+    cliente = get_cliente()
+    if cliente:
+        return cliente.chamar("emissao", "emitir_recibo", usuario_id, *args, **kwargs)
+    return emissao.emitir_recibo(usuario_id, *args, **kwargs)
+
+
+def list_recibos(usuario_id=None) -> list:
+    cliente = get_cliente()
+    if cliente:
+        return cliente.chamar("recibo", "list_recibos", usuario_id)
+    return recibo_local.list_recibos(usuario_id)
+
+
+def list_recibos_filtrados(**filtros) -> list:
+    cliente = get_cliente()
+    if cliente:
+        return cliente.chamar("recibo", "list_recibos_filtrados", **filtros)
+    return recibo_local.list_recibos_filtrados(**filtros)
+
+
+def _em_lote(metodo: str, recibo_ids) -> None:
+    """Uma ida e volta ao servidor para todos os ids."""
+    with get_cliente().lote() as lote:
+        futuros = [lote.chamar("recibo", metodo, rid) for rid in recibo_ids]
+    for futuro in futuros:
+        futuro.valor  # levanta o erro do servidor, se houver
+
+
+def cancel_recibos(recibo_ids) -> None:
+    if get_cliente():
+        _em_lote("cancel_recibo", recibo_ids)
+    else:
+        recibo_local.cancel_many(recibo_ids)
+
+
+def delete_recibos(recibo_ids) -> None:
+    if get_cliente():
+        _em_lote("delete_recibo", recibo_ids)
+    else:
+        recibo_local.delete_many(recibo_ids)
+
+
+def pdf_dos_recibos(recibo_ids, por_pagina: int = POR_PAGINA_PADRAO,
+                    marcas_corte: bool = False) -> str:
+    """PDF dos recibos gravados (ver cache_pdf). No modo servidor só os
+    dados vêm do servidor; a renderização e o cache ficam nesta estação."""
+    cliente = get_cliente()
+    if cliente:
+        dados = cliente.chamar("pdf", "dados_dos_recibos", list(recibo_ids))
+        return cache_pdf.obter_pdf(dados, por_pagina, marcas_corte)
+    return cache_pdf.pdf_dos_recibos(recibo_ids, por_pagina, marcas_corte)
+
+
+# --- Folha ---
+# No modo servidor o cálculo e a gravação (saídas + recibos) são uma chamada
+# cada; o job de PDF fica na fila desta estação, que é quem imprime.
+
+def calcular_folha(tipo: str, inicio, fim) -> list:
+    cliente = get_cliente()
+    if cliente:
+        return [folha_pagamento.Lancamento(**d)
+                for d in cliente.chamar("folha", "calcular", tipo, inicio, fim)]
+    return folha_pagamento.calcular(tipo, inicio, fim)
+
+
+def registrar_folha(empresa_id: int, usuario_id: int, tipo: str, inicio, fim,
+                    lancamentos, data_pagamento=None,
+                    por_pagina: int = POR_PAGINA_PADRAO, marcas_corte: bool = False) -> dict:
+    """Ver folha_pagamento.registrar. Retorna {'recibo_ids', 'movimentacoes',
+    'job_id', 'total'}."""
+    cliente = get_cliente()
+    if not cliente:
+        return folha_pagamento.registrar(empresa_id, usuario_id, tipo, inicio, fim,
+                                         lancamentos, data_pagamento,
+                                         por_pagina, marcas_corte)
+    resultado = cliente.chamar("folha", "gravar", empresa_id, usuario_id, tipo,
+                               inicio, fim, lancamentos, data_pagamento)
+    resultado["job_id"] = fila_pdf.enfileirar(resultado.pop("recibos"),
+                                              por_pagina, marcas_corte)
+    return resultado
+
+
+def instantaneo():
+    """Leituras em uma única foto do banco (ver leitura.instantaneo). No
+    modo remoto, cada chamada lê o banco do servidor no seu momento."""
+    return nullcontext() if get_cliente() else leitura.instantaneo()
+
+
+def foto_bloqueia_escritas() -> bool:
+    """Ver leitura.foto_bloqueia_escritas; no modo remoto não há foto local."""
+    return False if get_cliente() else leitura.foto_bloqueia_escritas()
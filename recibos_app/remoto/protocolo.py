@@ -0,0 +1,121 @@
+"""Protocolo RPC entre o servidor de repositórios e as estações.
+
+Cada quadro é um JSON compacto (UTF-8) precedido pelo tamanho em 4 bytes
+big-endian. Uma requisição leva um lote de chamadas e recebe um lote de
+resultados na mesma ordem, em uma única ida e volta:
+
+    {"chamadas": [{"repo": "sessao", "metodo": "get_by_id", "args": [1], "kwargs": {}}]}
+    {"resultados": [{"ok": {...}}, {"erro": {"tipo": "ValueError", "mensagem": "..."}}]}
+
+Antes de tudo, a estação prova que conhece a senha compartilhada
+(config "servidor_segredo") sem enviá-la: o servidor manda um desafio
+aleatório, a estação devolve o HMAC-SHA256 dele com a senha e o servidor
+responde se aceitou; se não, fecha a conexão.
+
+    {"desafio": "9f2c..."}  ->  {"resposta": "<hmac>"}  ->  {"autenticado": true}
+"""
+
+import dataclasses
+import hashlib
+import hmac
+import json
+import secrets
+import sqlite3
+import struct
+from datetime import date
+
+from domain.exceptions import BancoOcupado, ConflitoDeVersao
+
+PORTA_PADRAO = 8765
+VERSAO_PROTOCOLO = 2
+TAMANHO_MAXIMO = 64 * 1024 * 1024
+
+_CABECALHO = struct.Struct(">I")
+
+
+class ErroRemoto(RuntimeError):
+    """Erro no servidor sem equivalente local."""
+
+
+# Exceções que atravessam a rede e são recriadas do lado do cliente, para
+# que as telas continuem tratando PermissionError/ValueError como antes.
+_EXCECOES = {
+    cls.__name__: cls
+    for cls in (PermissionError, ValueError, KeyError, ConflitoDeVersao, BancoOcupado)
+}
+
+
+def _json_padrao(obj):
+    if isinstance(obj, sqlite3.Row):
+        return dict(obj)
+    if isinstance(obj, (set, tuple)):
+        return list(obj)
+    if dataclasses.is_dataclass(obj) and not isinstance(obj, type):
+        return dataclasses.asdict(obj)
+    if isinstance(obj, date):
+        return obj.isoformat()
+    raise TypeError(f"Tipo não serializável: {type(obj).__name__}")
+
+
+def codificar(obj) -> bytes:
+    corpo = json.dumps(obj, separators=(",", ":"), ensure_ascii=False,
+                       default=_json_padrao).encode("utf-8")
+    return _CABECALHO.pack(len(corpo)) + corpo
+
+
+def decodificar(corpo: bytes):
+    return json.loads(corpo.decode("utf-8"))
+
+
+def _ler_exato(sock, n: int) -> bytes:
+    partes = []
+    while n:
+        parte = sock.recv(min(n, 1 << 20))
+        if not parte:
+            raise ConnectionError("Conexão encerrada pelo outro lado.")
+        partes.append(parte)
+        n -= len(parte)
+    return b"".join(partes)
+
+
+def enviar_quadro(sock, obj) -> None:
+    sock.sendall(codificar(obj))
+
+
+def receber_quadro(sock):
+    """Lê um quadro; retorna None se a conexão foi fechada entre quadros."""
+    cabecalho = sock.recv(_CABECALHO.size, 0)
+    if not cabecalho:
+        return None
+    if len(cabecalho) < _CABECALHO.size:
+        cabecalho += _ler_exato(sock, _CABECALHO.size - len(cabecalho))
+    (tamanho,) = _CABECALHO.unpack(cabecalho)
+    if tamanho > TAMANHO_MAXIMO:
+        raise ConnectionError(f"Quadro grande demais ({tamanho} bytes).")
+    return decodificar(_ler_exato(sock, tamanho))
+
+
+def erro_para_dict(exc: BaseException) -> dict:
+    return {"tipo": type(exc).__name__, "mensagem": str(exc)}
+
+
+def erro_de_dict(erro: dict) -> Exception:
+    cls = _EXCECOES.get(erro.get("tipo"))
+    if cls is None:
+        return ErroRemoto(f"{erro.get('tipo')}: {erro.get('mensagem')}")
+    return cls(erro.get("mensagem", ""))
+
+
+def gerar_desafio() -> str:
+    return secrets.token_hex(16)
+
+
+def assinar_desafio(segredo: str, desafio: str) -> str:
+    return hmac.new(segredo.encode("utf-8"), desafio.encode("utf-8"),
+                    hashlib.sha256).hexdigest()
+
+
+def desafio_confere(segredo: str, desafio: str, resposta) -> bool:
+    if not segredo or not isinstance(resposta, str):
+        return False
+    return hmac.compare_digest(assinar_desafio(segredo, desafio), resposta)
@@ -0,0 +1,123 @@
+"""Implementações remotas das ABCs de repositório (via ClienteRPC)."""
+
+from typing import Iterable, List, Optional
+
+from domain.repositories.fechamento_repository import FechamentoRepository
+from domain.repositories.gaveta_repository import GavetaRepository
+from domain.repositories.movimentacao_repository import (
+    TAMANHO_PAGINA,
+    MovimentacaoRepository,
+)
+from domain.repositories.sessao_repository import SessaoRepository
+from domain.repositories.usuario_repository import UsuarioRepository
+from remoto.cliente import ClienteRPC
+
+
+class _RepoRemoto:
+    nome = ""
+
+    def __init__(self, cliente: ClienteRPC):
+        self.cliente = cliente
+
+    def _chamar(self, metodo: str, *args, **kwargs):
+        return self.cliente.chamar(self.nome, metodo, *args, **kwargs)
+
+
+class RemoteSessaoRepo(_RepoRemoto, SessaoRepository):
+    nome = "sessao"
+
+    def create(self, gaveta_id, responsavel_id, admin_id, saldo_inicial):
+        return self._chamar("create", gaveta_id, responsavel_id, admin_id, saldo_inicial)
+
+    def close(self, sessao_id, admin_id, valor_contado, justificativa, versao=None):
+        return self._chamar("close", sessao_id, admin_id, valor_contado,
+                            justificativa, versao)
+
+    def get_open_by_gaveta(self, gaveta_id):
+        return self._chamar("get_open_by_gaveta", gaveta_id)
+
+    def get_open_by_user(self, usuario_id):
+        return self._chamar("get_open_by_user", usuario_id)
+
+    def get_by_id(self, sessao_id):
+        return self._chamar("get_by_id", sessao_id)
+
+    def list_all(self):
+        return self._chamar("list_all")
+
+    def list_by_gaveta(self, gaveta_id):
+        return self._chamar("list_by_gaveta", gaveta_id)
+
+
+class RemoteMovimentacaoRepo(_RepoRemoto, MovimentacaoRepository):
+    nome = "movimentacao"
+
+    def create(self, sessao_id, usuario_id, tipo, valor, descricao, recibo_id=None):
+        return self._chamar("create", sessao_id, usuario_id, tipo, valor,
+                            descricao, recibo_id)
+
+    def list_by_sessao(self, sessao_id):
+        return self._chamar("list_by_sessao", sessao_id)
+
+    def list_by_sessao_nao_cancelados(self, sessao_id):
+        return self._chamar("list_by_sessao_nao_cancelados", sessao_id)
+
+    def get_totals_by_sessao(self, sessao_id):
+        return self._chamar("get_totals_by_sessao", sessao_id)
+
+    def get_totals_by_sessoes(self, sessao_ids: Iterable[int]) -> dict:
+        """Totais de várias sessões em uma única ida ao servidor."""
+        with self.cliente.lote() as lote:
+            futuros = {sid: lote.chamar(self.nome, "get_totals_by_sessao", sid)
+                       for sid in sessao_ids}
+        return {sid: f.valor for sid, f in futuros.items()}
+
+    def get_totals_by_tipo(self, sessao_id):
+        return self._chamar("get_totals_by_tipo", sessao_id)
+
+    def count_by_sessao(self, sessao_id, nao_cancelados=False):
+        return self._chamar("count_by_sessao", sessao_id, nao_cancelados)
+
+    def list_page_by_sessao(self, sessao_id, apos_id=None, limite=TAMANHO_PAGINA,
+                            nao_cancelados=False):
+        return self._chamar("list_page_by_sessao", sessao_id, apos_id, limite,
+                            nao_cancelados)
+
+
+class RemoteFechamentoRepo(_RepoRemoto, FechamentoRepository):
+    nome = "fechamento"
+
+    def get_resumo(self, sessao_id):
+        return self._chamar("get_resumo", sessao_id)
+
+    def fechar(self, sessao_id, admin_id, valor_contado, justificativa, versao,
+               totais_conferidos):
+        return self._chamar("fechar", sessao_id, admin_id, valor_contado,
+                            justificativa, versao, totais_conferidos)
+
+
+class RemoteGavetaRepo(_RepoRemoto, GavetaRepository):
+    nome = "gaveta"
+
+    def get_all(self) -> List[dict]:
+        return self._chamar("get_all")
+
+    def get_by_id(self, gaveta_id) -> Optional[dict]:
+        return self._chamar("get_by_id", gaveta_id)
+
+
+class RemoteUsuarioRepo(_RepoRemoto, UsuarioRepository):
+    """Sem login e sem cadastro: o servidor não expõe hash nem sal de senha."""
+    nome = "usuario"
+
+    def get_by_username(self, username):
+        raise PermissionError("Login pelo servidor de dados não é permitido.")
+
+    def get_by_id(self, user_id):
+        return self._chamar("get_by_id", user_id)
+
+    def create(self, username, password_hash, salt, is_admin):
+        raise PermissionError("Cadastro de usuários pelo servidor de dados não é permitido.")
+
+    def list_all(self, ativos_apenas=True):
+        return self._chamar("list_all", ativos_apenas)
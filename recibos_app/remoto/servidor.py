@@ -0,0 +1,246 @@
+"""Servidor de repositórios: um único processo dono do app.db.
+
+As estações falam com ele pelo protocolo de remoto/protocolo.py em vez de
+abrir o banco pela rede. Uso:
+
+    RECIBOS_SEGREDO=... python -m remoto.servidor [--host 0.0.0.0] [--porta 8765]
+
+Por padrão só atende o próprio computador; para as estações, passe --host
+com o endereço da rede local. A senha compartilhada vem da variável
+RECIBOS_SEGREDO ou de "servidor_segredo" no config.json do servidor, e cada
+estação precisa da mesma senha no seu config.json.
+"""
+
+import argparse
+import logging
+import os
+import socket
+import socketserver
+import threading
+
+from remoto.protocolo import (
+    PORTA_PADRAO,
+    VERSAO_PROTOCOLO,
+    desafio_confere,
+    enviar_quadro,
+    erro_para_dict,
+    gerar_desafio,
+    receber_quadro,
+)
+
+logger = logging.getLogger(__name__)
+
+# Segundos que uma estação tem para responder ao desafio
+TEMPO_AUTENTICACAO = 10.0
+
+# Nunca saem do servidor, nem dentro de resultados permitidos
+_CAMPOS_SIGILOSOS = frozenset({"password_hash", "salt"})
+
+
+def _metodos_publicos(repo, extras, negados=()) -> frozenset:
+    """Métodos declarados nas ABCs do repositório, mais os extras permitidos,
+    menos os negados."""
+    nomes = set(extras)
+    for cls in type(repo).__mro__:
+        nomes.update(getattr(cls, "__abstractmethods__", ()))
+    # __abstractmethods__ da classe concreta é vazio; o das ABCs não
+    return frozenset(n for n in nomes if not n.startswith("_") and n not in negados)
+
+
+def _sem_sigilo(valor):
+    if isinstance(valor, list):
+        return [_sem_sigilo(v) for v in valor]
+    if isinstance(valor, dict):
+        return {k: v for k, v in valor.items() if k not in _CAMPOS_SIGILOSOS}
+    return valor
+
+
+class Despachante:
+    """Executa lotes de chamadas sobre os repositórios registrados.
+
+    Só métodos das ABCs de domínio (ou listados em `extras`), e fora de
+    `negados`, podem ser chamados. Os lotes são executados um de cada vez: o servidor é o único
+    escritor do banco, então não há disputa de bloqueio entre estações.
+    """
+
+    def __init__(self, repos: dict, extras: dict | None = None,
+                 negados: dict | None = None):
+        extras = extras or {}
+        negados = negados or {}
+        self.repos = repos
+        self._metodos = {
+            nome: _metodos_publicos(repo, extras.get(nome, ()), negados.get(nome, ()))
+            for nome, repo in repos.items()
+        }
+        self._lock = threading.Lock()
+
+    def _executar_uma(self, chamada: dict) -> dict:
+        nome_repo = chamada.get("repo")
+        metodo = chamada.get("metodo")
+        if metodo not in self._metodos.get(nome_repo, ()):
+            return {"erro": {"tipo": "ErroRemoto",
+                             "mensagem": f"Método não permitido: {nome_repo}.{metodo}"}}
+        try:
+            func = getattr(self.repos[nome_repo], metodo)
+            resultado = func(*chamada.get("args", ()), **chamada.get("kwargs", {}))
+            return {"ok": _sem_sigilo(resultado)}
+        except Exception as e:
+            if not isinstance(e, (PermissionError, ValueError)):
+                logger.exception("Erro em %s.%s", nome_repo, metodo)
+            return {"erro": erro_para_dict(e)}
+
+    def executar(self, chamadas: list) -> list:
+        with self._lock:
+            return [self._executar_uma(c) for c in chamadas]
+
+    def responder(self, requisicao: dict) -> dict:
+        if "chamadas" in requisicao:
+            return {"resultados": self.executar(requisicao["chamadas"])}
+        return {"versao": VERSAO_PROTOCOLO}
+
+
+def criar_despachante_sqlite() -> Despachante:
+    """Despachante sobre os repositórios SQLite locais deste computador."""
+    from data.repositories import (
+        sqlite_colaborador_repo,
+        sqlite_empresa_repo,
+        sqlite_fornecedor_repo,
+        sqlite_prestador_repo,
+        sqlite_recibo_repo,
+    )
+    from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
+    from data.repositories.sqlite_usuario_repo import SqliteUsuarioRepo
+    import emissao
+    import folha_pagamento
+    from fechamento_gaveta import SqliteFechamentoRepo, SqliteSessaoVersionada
+    from movimentacoes_sessao import SqliteMovimentacaoPaginada
+    from pdf import cache_pdf
+
+    return Despachante(
+        {
+            "sessao": SqliteSessaoVersionada(),
+            "movimentacao": SqliteMovimentacaoPaginada(),
+            "gaveta": SqliteGavetaRepo(),
+            "usuario": SqliteUsuarioRepo(),
+            "fechamento": SqliteFechamentoRepo(),
+            "recibo": sqlite_recibo_repo,
+            "empresa": sqlite_empresa_repo,
+            "colaborador": sqlite_colaborador_repo,
+            "prestador": sqlite_prestador_repo,
+            "fornecedor": sqlite_fornecedor_repo,
+            "emissao": emissao,
+            "folha": folha_pagamento,
+            "pdf": cache_pdf,
+        },
+        extras={
+            "sessao": ("get_open_by_user",),
+            "movimentacao": ("list_by_sessao_nao_cancelados", "get_totals_by_tipo"),
+            "recibo": ("list_recibos", "list_recibos_filtrados",
+                       "cancel_recibo", "delete_recibo"),
+            "emissao": ("emitir_recibo",),
+            "folha": ("calcular", "gravar"),
+            "pdf": ("dados_dos_recibos",),
+            "empresa": ("list_empresas",),
+            "colaborador": ("list_colaboradores",),
+            "prestador": ("list_prestadores",),
+            "fornecedor": ("list_fornecedores",),
+        },
+        # Login e cadastro de usuários só no banco local do servidor: pela
+        # rede sairiam o hash e o sal das senhas
+        negados={"usuario": ("create", "get_by_username")},
+    )
+
+
+class _ConexaoHandler(socketserver.BaseRequestHandler):
+    """Atende uma estação; a conexão fica aberta entre as requisições."""
+
+    def _autenticar(self, sock) -> bool:
+        desafio = gerar_desafio()
+        sock.settimeout(TEMPO_AUTENTICACAO)
+        try:
+            enviar_quadro(sock, {"desafio": desafio})
+            resposta = receber_quadro(sock)
+            ok = isinstance(resposta, dict) and desafio_confere(
+                self.server.segredo, desafio, resposta.get("resposta")
+            )
+            enviar_quadro(sock, {"autenticado": ok})
+        finally:
+            sock.settimeout(None)
+        if not ok:
+            logger.warning("Estação %s recusada: senha do servidor incorreta",
+                           self.client_address[0])
+        return ok
+
+    def handle(self):
+        sock = self.request
+        sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        despachante = self.server.despachante
+        try:
+            if not self._autenticar(sock):
+                return
+        except (ConnectionError, OSError, ValueError):
+            return
+        while True:
+            try:
+                requisicao = receber_quadro(sock)
+                if requisicao is None:
+                    return
+                enviar_quadro(sock, despachante.responder(requisicao))
+            except (ConnectionError, OSError):
+                return
+
+
+class ServidorRepositorios(socketserver.ThreadingTCPServer):
+    allow_reuse_address = True
+    daemon_threads = True
+
+    def __init__(self, despachante: Despachante, segredo: str,
+                 host: str = "127.0.0.1", porta: int = PORTA_PADRAO):
+        if not segredo:
+            raise ValueError("O servidor de dados precisa de uma senha compartilhada.")
+        self.despachante = despachante
+        self.segredo = segredo
+        super().__init__((host, porta), _ConexaoHandler)
+
+    @property
+    def porta(self) -> int:
+        return self.server_address[1]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Servidor de dados do Gerador de Recibos")
+    parser.add_argument("--host", default="127.0.0.1",
+                        help="endereço a escutar (0.0.0.0 para toda a rede)")
+    parser.add_argument("--porta", type=int, default=PORTA_PADRAO)
+    args = parser.parse_args(argv)
+
+    from app_paths import load_config
+    segredo = os.environ.get("RECIBOS_SEGREDO") or load_config().get("servidor_segredo")
+    if not segredo:
+        parser.error("defina a senha compartilhada em RECIBOS_SEGREDO "
+                     'ou em "servidor_segredo" no config.json')
+
+    logging.basicConfig(level=logging.INFO,
+                        format="%(asctime)s %(levelname)s %(name)s: %(message)s")
+    from data.database import init_db
+    from database import configurar_diario
+    import movimentacoes_sessao
+    import resumo_diario
+    from models.recibo import garantir_dados_pdf
+    init_db()
+    configurar_diario()
+    resumo_diario.garantir_tabela()
+    movimentacoes_sessao.garantir_indice()
+    garantir_dados_pdf()
+
+    with ServidorRepositorios(criar_despachante_sqlite(), segredo,
+                              args.host, args.porta) as srv:
+        logger.info("Servidor de dados em %s:%d", args.host, srv.porta)
+        try:
+            srv.serve_forever()
+        except KeyboardInterrupt:
+            pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,391 @@
+"""Resumo diário materializado (tabela daily_summary).
+
+Uma linha por (data, empresa, usuário, tipo, status, gaveta) com a
+quantidade e a soma em centavos. Os totais dos relatórios e os gráficos
+leem essa tabela: o resumo de um ano são algumas centenas de linhas, e não
+centenas de milhares de recibos.
+
+O resumo é mantido por triggers no próprio banco (vale para qualquer
+estação e para o servidor remoto):
+
+- recibos: inserção, mudança de status/valor/data (cancelamento) e exclusão;
+- movimentacoes: saídas sem recibo entram como tipo SAIDA_AVULSA, na data
+  de criação; a gaveta de um recibo é a da primeira movimentação ligada a
+  ele, então ligar, desligar ou excluir a movimentação move o recibo de
+  gaveta no resumo.
+
+Chaves ausentes ficam como 0 (ids) ou '' (textos), para a chave única
+funcionar. O arquivamento pausa os triggers (daily_summary_pausa) enquanto
+move os dados: o resumo continua cobrindo o que foi para os arquivos
+anuais. reconstruir() refaz tudo a partir do app.db e dos arquivos.
+"""
+
+import json
+import logging
+from typing import Dict, List, Optional, Sequence
+
+from database import get_connection
+from escrita import com_retry, transacao_escrita
+
+logger = logging.getLogger(__name__)
+
+AVULSA = "SAIDA_AVULSA"
+
+# Agrupamentos aceitos por totais() -> expressão sobre daily_summary
+AGRUPAMENTOS = {
+    "dia": "data",
+    "mes": "substr(data, 1, 7)",
+    "ano": "substr(data, 1, 4)",
+    "empresa": "empresa_id",
+    "usuario": "usuario_id",
+    "tipo": "tipo",
+    "status": "status",
+    "gaveta": "gaveta_id",
+}
+
+_CHAVE = ("data", "empresa_id", "usuario_id", "tipo", "status", "gaveta_id")
+
+_tabela_ok = False
+
+
+# --- SQL dos triggers ---
+
+def _somar(sinal: str, data: str, empresa: str, usuario: str, tipo: str,
+           status: str, gaveta: str, valor: str, origem: str = "WHERE 1") -> str:
+    """Comando que soma (sinal '+') ou subtrai ('-') uma contribuição.
+
+    O SELECT precisa de WHERE para o SQLite aceitar o ON CONFLICT.
+    """
+    return f"""
+        INSERT INTO daily_summary ({', '.join(_CHAVE)}, quantidade, total_centavos)
+        SELECT COALESCE({data}, ''), COALESCE({empresa}, 0), COALESCE({usuario}, 0),
+               COALESCE({tipo}, ''), COALESCE({status}, ''), COALESCE({gaveta}, 0),
+               {sinal}1, {sinal}CAST(round(COALESCE({valor}, 0) * 100) AS INTEGER)
+        {origem}
+        ON CONFLICT ({', '.join(_CHAVE)}) DO UPDATE SET
+          quantidade = quantidade + excluded.quantidade,
+          total_centavos = total_centavos + excluded.total_centavos;
+    """
+
+
+def _gaveta_sessao(sessao: str) -> str:
+    return f"(SELECT gaveta_id FROM gaveta_sessoes WHERE id = {sessao})"
+
+
+def _gaveta_recibo(recibo: str, sem: Optional[str] = None, com: Optional[str] = None) -> str:
+    """Gaveta da primeira movimentação ligada ao recibo.
+
+    `sem` ignora a movimentação com esse id e `com` acrescenta uma linha
+    (OLD) que já não está na tabela: assim o trigger calcula a gaveta de
+    antes da mudança.
+    """
+    filtro = f"m.recibo_id = {recibo}" + (f" AND m.id <> {sem}" if sem else "")
+    consulta = (
+        f"SELECT m.id, s.gaveta_id FROM movimentacoes m "
+        f"LEFT JOIN gaveta_sessoes s ON s.id = m.sessao_id WHERE {filtro}"
+    )
+    if com:
+        consulta += (
+            f" UNION ALL SELECT {com}.id, {_gaveta_sessao(com + '.sessao_id')} "
+            f"WHERE {com}.recibo_id = {recibo}"
+        )
+    return f"(SELECT gaveta_id FROM ({consulta}) ORDER BY id LIMIT 1)"
+
+
+def _recibo(sinal: str, r: str, gaveta: str, origem: str = "WHERE 1") -> str:
+    return _somar(sinal, f"{r}.data_pagamento", f"{r}.empresa_id", f"{r}.usuario_id",
+                  f"{r}.tipo", f"{r}.status", gaveta, f"{r}.valor", origem)
+
+
+def _avulsa(sinal: str, m: str) -> str:
+    return _somar(sinal, f"substr({m}.created_at, 1, 10)", "0", f"{m}.usuario_id",
+                  f"'{AVULSA}'", "'PAGO'", _gaveta_sessao(f"{m}.sessao_id"), f"{m}.valor",
+                  f"WHERE {m}.tipo = 'SAIDA' AND {m}.recibo_id IS NULL")
+
+
+def _mover_recibo(recibo: str, antes: str, depois: str, condicao: str = "1") -> str:
+    """Tira o recibo da gaveta `antes` e o põe na `depois` (recibo existente)."""
+    origem = f"FROM recibos r WHERE r.id = {recibo} AND {condicao}"
+    return (_recibo("-", "r", antes, origem) + _recibo("+", "r", depois, origem))
+
+
+_ATIVO = "NOT EXISTS (SELECT 1 FROM daily_summary_pausa)"
+
+
+def _triggers(com_gavetas: bool) -> Dict[str, str]:
+    gaveta_new = _gaveta_recibo("NEW.id") if com_gavetas else "0"
+    gaveta_old = _gaveta_recibo("OLD.id") if com_gavetas else "0"
+    corpos = {
+        "daily_summary_recibo_ins": (
+            "AFTER INSERT ON recibos",
+            _recibo("+", "NEW", gaveta_new),
+        ),
+        "daily_summary_recibo_upd": (
+            "AFTER UPDATE OF data_pagamento, empresa_id, usuario_id, tipo, status, valor "
+            "ON recibos",
+            _recibo("-", "OLD", gaveta_old) + _recibo("+", "NEW", gaveta_new),
+        ),
+        "daily_summary_recibo_del": (
+            "AFTER DELETE ON recibos",
+            _recibo("-", "OLD", gaveta_old),
+        ),
+    }
+    if com_gavetas:
+        corpos.update({
+            "daily_summary_mov_ins": (
+                "AFTER INSERT ON movimentacoes",
+                _avulsa("+", "NEW")
+                + _mover_recibo("NEW.recibo_id", _gaveta_recibo("NEW.recibo_id", sem="NEW.id"),
+                                _gaveta_recibo("NEW.recibo_id")),
+            ),
+            "daily_summary_mov_upd": (
+                "AFTER UPDATE OF sessao_id, usuario_id, tipo, valor, recibo_id, created_at "
+                "ON movimentacoes",
+                _avulsa("-", "OLD") + _avulsa("+", "NEW")
+                + _mover_recibo(
+                    "OLD.recibo_id",
+                    _gaveta_recibo("OLD.recibo_id", sem="NEW.id", com="OLD"),
+                    _gaveta_recibo("OLD.recibo_id"),
+                )
+                # Recibo novo da movimentação (se mudou): OLD não contava para ele
+                + _mover_recibo(
+                    "NEW.recibo_id",
+                    _gaveta_recibo("NEW.recibo_id", sem="NEW.id"),
+                    _gaveta_recibo("NEW.recibo_id"),
+                    condicao="NEW.recibo_id IS NOT OLD.recibo_id",
+                ),
+            ),
+            "daily_summary_mov_del": (
+                "AFTER DELETE ON movimentacoes",
+                _avulsa("-", "OLD")
+                + _mover_recibo("OLD.recibo_id", _gaveta_recibo("OLD.recibo_id", com="OLD"),
+                                _gaveta_recibo("OLD.recibo_id")),
+            ),
+        })
+    return {
+        nome: f"CREATE TRIGGER {nome} {evento} WHEN {_ATIVO} BEGIN {corpo} END"
+        for nome, (evento, corpo) in corpos.items()
+    }
+
+
+# --- Tabela ---
+
+def _existe(conn, tabela: str, schema: str = "main") -> bool:
+    return conn.execute(
+        f"SELECT 1 FROM {schema}.sqlite_master WHERE type = 'table' AND name = ?", (tabela,)
+    ).fetchone() is not None
+
+
+def _com_gavetas(conn) -> bool:
+    return _existe(conn, "movimentacoes") and _existe(conn, "gaveta_sessoes")
+
+
+def garantir_tabela(conn=None) -> None:
+    """Cria a tabela e os triggers que faltarem ou mudaram (ex.: as tabelas
+    de gaveta passaram a existir); nesse caso reconstrói o resumo, já que o
+    que foi gravado sem o trigger certo não estaria nele."""
+    global _tabela_ok
+    if _tabela_ok:
+        return
+    proprio = conn is None
+    conn = conn or get_connection()
+    try:
+        existentes = dict(
+            conn.execute("SELECT name, sql FROM sqlite_master WHERE type = 'trigger'")
+        )
+        faltando = {
+            nome: sql for nome, sql in _triggers(_com_gavetas(conn)).items()
+            if existentes.get(nome) != sql
+        }
+        criar = bool(faltando) or not _existe(conn, "daily_summary")
+        if criar:
+            _criar(conn, faltando)
+        _tabela_ok = True
+    finally:
+        if proprio:
+            conn.close()
+    if criar:
+        reconstruir()
+
+
+@com_retry("daily_summary_criar")
+def _criar(conn, triggers: Dict[str, str]) -> None:
+    with transacao_escrita(conn):
+        conn.execute(
+            f"""
+            CREATE TABLE IF NOT EXISTS daily_summary (
+              data TEXT NOT NULL,
+              empresa_id INTEGER NOT NULL,
+              usuario_id INTEGER NOT NULL,
+              tipo TEXT NOT NULL,
+              status TEXT NOT NULL,
+              gaveta_id INTEGER NOT NULL,
+              quantidade INTEGER NOT NULL DEFAULT 0,
+              total_centavos INTEGER NOT NULL DEFAULT 0,
+              UNIQUE ({', '.join(_CHAVE)})
+            );
+            """
+        )
+        conn.execute("CREATE TABLE IF NOT EXISTS daily_summary_pausa (motivo TEXT)")
+        # Linhas zeradas (tudo cancelado/excluído) somem do resumo
+        conn.execute(
+            """
+            CREATE TRIGGER IF NOT EXISTS daily_summary_zerada
+            AFTER UPDATE OF quantidade ON daily_summary WHEN NEW.quantidade = 0
+            BEGIN DELETE FROM daily_summary WHERE rowid = NEW.rowid; END
+            """
+        )
+        if _com_gavetas(conn):
+            conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_movimentacoes_recibo "
+                "ON movimentacoes(recibo_id)"
+            )
+        for nome, sql in triggers.items():
+            conn.execute(f"DROP TRIGGER IF EXISTS {nome}")
+            conn.execute(sql)
+    logger.info("Resumo diário criado (%d trigger(s))", len(triggers))
+
+
+def pausar(conn) -> None:
+    """Desliga os triggers na transação corrente de `conn` (outras conexões
+    não enxergam a pausa). Desfazer com retomar() antes do commit."""
+    conn.execute("INSERT INTO daily_summary_pausa (motivo) VALUES ('arquivamento')")
+
+
+def retomar(conn) -> None:
+    conn.execute("DELETE FROM daily_summary_pausa")
+
+
+# --- Reconstrução ---
+
+def _fontes(conn, schema: str) -> tuple:
+    """(recibos, movimentações com gaveta) de um banco, para UNION ALL."""
+    recibos = (
+        f"SELECT id, data_pagamento AS data, empresa_id, usuario_id, tipo, status, valor "
+        f"FROM {schema}.recibos"
+    )
+    movs = None
+    if _existe(conn, "movimentacoes", schema) and _existe(conn, "gaveta_sessoes", schema):
+        movs = (
+            f"SELECT m.id, m.recibo_id, m.usuario_id, m.tipo, m.valor, m.created_at, "
+            f"s.gaveta_id FROM {schema}.movimentacoes m "
+            f"LEFT JOIN {schema}.gaveta_sessoes s ON s.id = m.sessao_id"
+        )
+    return recibos, movs
+
+
+def _reconstruir(conn, aliases: Sequence[str]) -> int:
+    fontes = [_fontes(conn, s) for s in ["main", *aliases] if _existe(conn, "recibos", s)]
+    recibos = " UNION ALL ".join(r for r, _ in fontes)
+    movs = " UNION ALL ".join(m for _, m in fontes if m) or (
+        "SELECT NULL AS id, NULL AS recibo_id, NULL AS usuario_id, NULL AS tipo, "
+        "NULL AS valor, NULL AS created_at, NULL AS gaveta_id WHERE 0"
+    )
+    conn.execute("DELETE FROM daily_summary")
+    conn.execute(
+        f"""
+        WITH r AS ({recibos}), m AS ({movs}),
+        primeira AS (
+          SELECT recibo_id, gaveta_id, MIN(id) FROM m
+          WHERE recibo_id IS NOT NULL GROUP BY recibo_id
+        ),
+        contribuicoes AS (
+          SELECT r.data, r.empresa_id, r.usuario_id, r.tipo, r.status,
+                 p.gaveta_id, r.valor
+          FROM r LEFT JOIN primeira p ON p.recibo_id = r.id
+          UNION ALL
+          SELECT substr(created_at, 1, 10), 0, usuario_id, '{AVULSA}', 'PAGO',
+                 gaveta_id, valor
+          FROM m WHERE tipo = 'SAIDA' AND recibo_id IS NULL
+        )
+        INSERT INTO daily_summary ({', '.join(_CHAVE)}, quantidade, total_centavos)
+        SELECT COALESCE(data, ''), COALESCE(empresa_id, 0), COALESCE(usuario_id, 0),
+               COALESCE(tipo, ''), COALESCE(status, ''), COALESCE(gaveta_id, 0),
+               COUNT(*), SUM(CAST(round(COALESCE(valor, 0) * 100) AS INTEGER))
+        FROM contribuicoes
+        GROUP BY 1, 2, 3, 4, 5, 6
+        """
+    )
+    return conn.execute("SELECT COUNT(*) FROM daily_summary").fetchone()[0]
+
+
+def reconstruir() -> int:
+    """Refaz o resumo a partir do app.db e dos arquivos anuais.
+
+    Retorna a quantidade de linhas do resumo.
+    """
+    # arquivamento importa este módulo (pausar/retomar)
+    from arquivamento import anexar_arquivos
+
+    garantir_tabela()
+    conn = get_connection()
+    try:
+        aliases = anexar_arquivos(conn)  # ATTACH não pode ficar dentro da transação
+
+        @com_retry("daily_summary_reconstruir")
+        def _executar():
+            with transacao_escrita(conn):
+                return _reconstruir(conn, aliases)
+
+        linhas = _executar()
+    finally:
+        conn.close()
+    logger.info("Resumo diário reconstruído: %d linha(s)", linhas)
+    return linhas
+
+
+# --- Consultas ---
+
+_FILTROS = (
+    ("empresa_ids", "empresa_id IN (SELECT value FROM json_each(?))"),
+    ("usuario_ids", "usuario_id IN (SELECT value FROM json_each(?))"),
+    ("tipos", "tipo IN (SELECT value FROM json_each(?))"),
+    ("status_list", "status IN (SELECT value FROM json_each(?))"),
+    ("gaveta_ids", "gaveta_id IN (SELECT value FROM json_each(?))"),
+    ("data_inicio", "data >= ?"),
+    ("data_fim", "data <= ?"),
+)
+
+
+def totais(agrupar: Sequence[str] = ("tipo",), empresa_ids=None, usuario_ids=None,
+           tipos=None, status_list=None, data_inicio=None, data_fim=None,
+           gaveta_ids=None) -> List[dict]:
+    """Quantidade e total (em reais) agrupados por `agrupar` (chaves de
+    AGRUPAMENTOS), com os mesmos filtros de list_recibos_filtrados."""
+    colunas = [f"{AGRUPAMENTOS[a]} AS {a}" for a in agrupar]
+    somas = ["SUM(quantidade) AS quantidade", "SUM(total_centavos) AS total_centavos"]
+    valores = {
+        "empresa_ids": empresa_ids, "usuario_ids": usuario_ids, "tipos": tipos,
+        "status_list": status_list, "gaveta_ids": gaveta_ids,
+        "data_inicio": data_inicio, "data_fim": data_fim,
+    }
+    where, params = [], []
+    for nome, sql in _FILTROS:
+        if valores[nome]:
+            where.append(sql)
+            params.append(
+                valores[nome] if nome.startswith("data_") else json.dumps(list(valores[nome]))
+            )
+    where_sql = ("WHERE " + " AND ".join(where)) if where else ""
+    grupos = ", ".join(str(i) for i in range(1, len(colunas) + 1))
+    garantir_tabela()
+    conn = get_connection()
+    try:
+        rows = conn.execute(
+            f"""
+            SELECT {', '.join(colunas + somas)}
+            FROM daily_summary
+            {where_sql}
+            {f'GROUP BY {grupos} ORDER BY {grupos}' if grupos else ''}
+            """,
+            params,
+        ).fetchall()
+    finally:
+        conn.close()
+    resultado = []
+    for r in rows:
+        linha = dict(r)
+        linha["quantidade"] = linha["quantidade"] or 0
+        linha["total"] = (linha.pop("total_centavos") or 0) / 100
+        resultado.append(linha)
+    return resultado
@@ -22,6 +22,8 @@ from data.repositories.sqlite_colaborador_repo import (
     delete_colaborador,
 )
 from ui.validators import only_digits, is_valid_cpf, format_cpf
+from ui.calendario_trabalho import JornadaWidget
+import calendario
 
 
 class CadastroColaboradorWidget(QWidget):
@@ -59,6 +61,9 @@ class CadastroColaboradorWidget(QWidget):
         right.addRow(QLabel("Valor Diária"), self.diaria_input)
         right.addRow(QLabel("Valor Dobra"), self.dobra_input)
 
+        self.jornada_input = JornadaWidget(calendario.get_jornada_padrao())
+        left.addRow(QLabel("Dias de trabalho"), self.jornada_input)
+
         form_layout.addLayout(left, 2)
         form_layout.addLayout(right, 2)
         layout.addWidget(form_group)
@@ -76,9 +81,9 @@ class CadastroColaboradorWidget(QWidget):
 
         table_group = QGroupBox("Colaboradores Cadastrados")
         table_layout = QVBoxLayout(table_group)
-        self.table = QTableWidget(0, 5)
+        self.table = QTableWidget(0, 6)
         self.table.setHorizontalHeaderLabels(
-            ["Nome", "CPF", "Passagem", "Diária", "Dobra"]
+            ["Nome", "CPF", "Passagem", "Diária", "Dobra", "Dias de trabalho"]
         )
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.table.setAlternatingRowColors(True)
@@ -93,6 +98,7 @@ class CadastroColaboradorWidget(QWidget):
 
     def _load_data(self):
         self.table.setRowCount(0)
+        padrao = calendario.get_jornada_padrao()
         for row in list_colaboradores(ativos_apenas=False):
             row_idx = self.table.rowCount()
             self.table.insertRow(row_idx)
@@ -107,7 +113,12 @@ class CadastroColaboradorWidget(QWidget):
             self.table.setItem(
                 row_idx, 4, QTableWidgetItem(f"{row['valor_dobra'] or 0:.2f}")
             )
+            jornada = calendario.jornada_de(row, padrao)
+            self.table.setItem(
+                row_idx, 5, QTableWidgetItem(calendario.descrever_jornada(jornada))
+            )
             self.table.item(row_idx, 0).setData(Qt.UserRole, row["id"])
+            self.table.item(row_idx, 5).setData(Qt.UserRole, jornada)
 
     def _on_select(self):
         items = self.table.selectedItems()
@@ -120,6 +131,7 @@ class CadastroColaboradorWidget(QWidget):
         self.passagem_input.setValue(float(self.table.item(row, 2).text()))
         self.diaria_input.setValue(float(self.table.item(row, 3).text()))
         self.dobra_input.setValue(float(self.table.item(row, 4).text()))
+        self.jornada_input.set_jornada(self.table.item(row, 5).data(Qt.UserRole))
 
     def _handle_add(self):
         nome = self.nome_input.text().strip()
@@ -130,13 +142,15 @@ class CadastroColaboradorWidget(QWidget):
         if not is_valid_cpf(cpf):
             QMessageBox.warning(self, "Validação", "CPF inválido.")
             return
-        create_colaborador(
+        colaborador_id = create_colaborador(
             nome,
             only_digits(cpf),
             self.passagem_input.value(),
             self.diaria_input.value(),
             self.dobra_input.value(),
         )
+        if colaborador_id:
+            calendario.definir_jornada(colaborador_id, self._jornada_escolhida())
         self._clear_form()
         self._load_data()
 
@@ -160,9 +174,15 @@ class CadastroColaboradorWidget(QWidget):
             self.diaria_input.value(),
             self.dobra_input.value(),
         )
+        calendario.definir_jornada(self.selected_id, self._jornada_escolhida())
         self._clear_form()
         self._load_data()
 
+    def _jornada_escolhida(self):
+        # Igual à padrão fica NULL e acompanha mudanças futuras da padrão
+        jornada = self.jornada_input.jornada()
+        return None if jornada == calendario.get_jornada_padrao() else jornada
+
     def _handle_delete(self):
         if not self.selected_id:
             QMessageBox.information(self, "Seleção", "Selecione um colaborador.")
@@ -187,4 +207,5 @@ class CadastroColaboradorWidget(QWidget):
         self.passagem_input.setValue(0)
         self.diaria_input.setValue(0)
         self.dobra_input.setValue(0)
+        self.jornada_input.set_jornada(calendario.get_jornada_padrao())
         self.table.clearSelection()
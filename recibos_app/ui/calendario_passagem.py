@@ -11,13 +11,24 @@ from PySide6.QtWidgets import (
     QGroupBox,
 )
 
+import calendario
+
+
+def datas_trabalhadas(inicio, fim, jornada=None):
+    """QDates trabalhados entre inicio e fim (QDate), pela jornada."""
+    return {
+        QDate(d.year, d.month, d.day)
+        for d in calendario.dias_trabalhados(inicio.toPython(), fim.toPython(), jornada)
+    }
+
 
 class CalendarioPassagemDialog(QDialog):
-    def __init__(self, inicio, fim, selected_dates):
+    def __init__(self, inicio, fim, selected_dates, jornada=None):
         super().__init__()
         self.setWindowTitle("Selecionar Dias Trabalhados")
         self.setMinimumSize(520, 420)
         self.selected_dates = set(selected_dates)
+        self.jornada = jornada
         self._build_ui(inicio, fim)
         self._refresh_calendar_selection()
 
@@ -61,16 +72,7 @@ class CalendarioPassagemDialog(QDialog):
         self.fim.dateChanged.connect(self._apply_period)
 
     def _apply_period(self):
-        self.selected_dates = set()
-        inicio = self.inicio.date()
-        fim = self.fim.date()
-        if fim < inicio:
-            self._refresh_calendar_selection()
-            return
-        d = inicio
-        while d <= fim:
-            self.selected_dates.add(d)
-            d = d.addDays(1)
+        self.selected_dates = datas_trabalhadas(self.inicio.date(), self.fim.date(), self.jornada)
         self._refresh_calendar_selection()
 
     def _clear(self):
@@ -91,6 +93,16 @@ class CalendarioPassagemDialog(QDialog):
         fmt.setForeground(QColor("#000000"))
         for d in self.selected_dates:
             self.cal.setDateTextFormat(d, fmt)
+        # Feriados em vermelho, com o nome na dica (também quando marcados)
+        inicio, fim = self.inicio.date(), self.fim.date()
+        if fim < inicio:
+            return
+        for dia, nome in calendario.feriados_no_periodo(inicio.toPython(), fim.toPython()).items():
+            qdia = QDate(dia.year, dia.month, dia.day)
+            feriado = QTextCharFormat(fmt if qdia in self.selected_dates else QTextCharFormat())
+            feriado.setForeground(QColor("#c62828"))
+            feriado.setToolTip(nome)
+            self.cal.setDateTextFormat(qdia, feriado)
 
     def closeEvent(self, event):
         event.accept()
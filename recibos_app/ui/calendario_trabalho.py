@@ -0,0 +1,109 @@
+from datetime import date
+
+from PySide6.QtCore import Signal
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QCheckBox,
+    QPlainTextEdit,
+    QPushButton,
+    QGroupBox,
+    QSpinBox,
+    QListWidget,
+    QWidget,
+    QMessageBox,
+)
+
+import calendario
+
+
+class JornadaWidget(QWidget):
+    """Uma caixa por dia da semana; o valor é a máscara de calendario."""
+
+    alterada = Signal()
+
+    def __init__(self, jornada=calendario.SEG_A_SEX, parent=None):
+        super().__init__(parent)
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(0, 0, 0, 0)
+        self._caixas = []
+        for nome in calendario.DIAS_SEMANA:
+            caixa = QCheckBox(nome)
+            caixa.toggled.connect(self.alterada)
+            layout.addWidget(caixa)
+            self._caixas.append(caixa)
+        layout.addStretch(1)
+        self.set_jornada(jornada)
+
+    def jornada(self) -> int:
+        return sum(1 << i for i, caixa in enumerate(self._caixas) if caixa.isChecked())
+
+    def set_jornada(self, jornada: int):
+        for i, caixa in enumerate(self._caixas):
+            caixa.setChecked(bool(jornada >> i & 1))
+
+
+class FeriadosDialog(QDialog):
+    """Jornada padrão e feriados locais (somente admin)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Feriados e Jornada")
+        self.resize(560, 520)
+        layout = QVBoxLayout(self)
+
+        jornada_group = QGroupBox("Jornada padrão (colaboradores sem jornada própria)")
+        jornada_layout = QVBoxLayout(jornada_group)
+        self.jornada = JornadaWidget(calendario.get_jornada_padrao())
+        jornada_layout.addWidget(self.jornada)
+        layout.addWidget(jornada_group)
+
+        locais_group = QGroupBox("Feriados locais")
+        locais_layout = QVBoxLayout(locais_group)
+        locais_layout.addWidget(QLabel(
+            "Um por linha: \"20/01 São Sebastião\" (todo ano), "
+            "\"09/07/2026 Ponto facultativo\" (só naquela data) ou "
+            + ", ".join(sorted(calendario.MOVEIS)) + "."
+        ))
+        self.locais = QPlainTextEdit("\n".join(calendario.get_feriados_locais()))
+        locais_layout.addWidget(self.locais)
+        layout.addWidget(locais_group)
+
+        lista_group = QGroupBox("Feriados do ano")
+        lista_layout = QVBoxLayout(lista_group)
+        self.ano = QSpinBox()
+        self.ano.setRange(1900, 2999)
+        self.ano.setValue(date.today().year)
+        self.lista = QListWidget()
+        lista_layout.addWidget(self.ano)
+        lista_layout.addWidget(self.lista)
+        layout.addWidget(lista_group)
+
+        btns = QHBoxLayout()
+        btns.addStretch(1)
+        self.btn_cancel = QPushButton("Cancelar")
+        self.btn_ok = QPushButton("Salvar")
+        btns.addWidget(self.btn_cancel)
+        btns.addWidget(self.btn_ok)
+        layout.addLayout(btns)
+
+        self.ano.valueChanged.connect(self._listar)
+        self.btn_cancel.clicked.connect(self.reject)
+        self.btn_ok.clicked.connect(self._salvar)
+        self._listar()
+
+    def _listar(self):
+        self.lista.clear()
+        for dia, nome in sorted(calendario.feriados(self.ano.value()).items()):
+            self.lista.addItem(f"{dia:%d/%m} ({calendario.DIAS_SEMANA[dia.weekday()]})  {nome}")
+
+    def _salvar(self):
+        try:
+            calendario.set_feriados_locais(self.locais.toPlainText().splitlines())
+        except ValueError as e:
+            QMessageBox.warning(self, "Feriados locais", str(e))
+            return
+        calendario.set_jornada_padrao(self.jornada.jornada())
+        self.accept()
@@ -0,0 +1,150 @@
+import os
+from datetime import datetime
+
+from PySide6.QtCore import Qt
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QCheckBox,
+    QSpinBox,
+    QPushButton,
+    QTableView,
+    QHeaderView,
+    QTextEdit,
+    QFileDialog,
+    QMessageBox,
+    QGroupBox,
+)
+
+import diagnostico
+from ui.table_model import ColumnarTableModel, Coluna
+
+_NUMERICO = Qt.AlignRight | Qt.AlignVCenter
+
+
+def _ms(v):
+    return f"{v:.1f}"
+
+
+class DiagnosticoDialog(QDialog):
+    """Painel de diagnóstico de desempenho (somente admin)."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Diagnóstico de Desempenho")
+        self.resize(900, 620)
+        layout = QVBoxLayout(self)
+
+        opcoes = QHBoxLayout()
+        self.chk_ativo = QCheckBox("Coleta ativa")
+        self.chk_ativo.setChecked(diagnostico.ativo())
+        opcoes.addWidget(self.chk_ativo)
+        opcoes.addSpacing(16)
+        opcoes.addWidget(QLabel("Registrar SQL acima de (ms):"))
+        self.spin_sql_lento = QSpinBox()
+        self.spin_sql_lento.setRange(1, 60000)
+        self.spin_sql_lento.setValue(int(diagnostico.estado.sql_lento_ms))
+        opcoes.addWidget(self.spin_sql_lento)
+        opcoes.addStretch(1)
+        self.lbl_desde = QLabel("")
+        opcoes.addWidget(self.lbl_desde)
+        layout.addLayout(opcoes)
+
+        metricas_group = QGroupBox("Latência por operação")
+        metricas_layout = QVBoxLayout(metricas_group)
+        self.model = ColumnarTableModel([
+            Coluna("Operação"),
+            Coluna("Chamadas", alinhamento=_NUMERICO),
+            Coluna("Total (ms)", formatar=_ms, alinhamento=_NUMERICO),
+            Coluna("Média (ms)", formatar=_ms, alinhamento=_NUMERICO),
+            Coluna("p50 (ms)", formatar=_ms, alinhamento=_NUMERICO),
+            Coluna("p95 (ms)", formatar=_ms, alinhamento=_NUMERICO),
+            Coluna("Máx (ms)", formatar=_ms, alinhamento=_NUMERICO),
+        ], self)
+        self.table = QTableView()
+        self.table.setModel(self.model)
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+        self.table.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+        self.table.setSortingEnabled(True)
+        self.table.setAlternatingRowColors(True)
+        metricas_layout.addWidget(self.table)
+        layout.addWidget(metricas_group, 3)
+
+        sql_group = QGroupBox("SQL lento (com EXPLAIN QUERY PLAN)")
+        sql_layout = QVBoxLayout(sql_group)
+        self.txt_sql = QTextEdit()
+        self.txt_sql.setReadOnly(True)
+        sql_layout.addWidget(self.txt_sql)
+        layout.addWidget(sql_group, 2)
+
+        btns = QHBoxLayout()
+        self.btn_atualizar = QPushButton("Atualizar")
+        self.btn_zerar = QPushButton("Zerar")
+        self.btn_exportar = QPushButton("Exportar JSON")
+        self.btn_fechar = QPushButton("Fechar")
+        btns.addWidget(self.btn_atualizar)
+        btns.addWidget(self.btn_zerar)
+        btns.addWidget(self.btn_exportar)
+        btns.addStretch(1)
+        btns.addWidget(self.btn_fechar)
+        layout.addLayout(btns)
+
+        self.chk_ativo.toggled.connect(self._toggle_ativo)
+        self.spin_sql_lento.editingFinished.connect(
+            lambda: diagnostico.set_sql_lento_ms(self.spin_sql_lento.value())
+        )
+        self.btn_atualizar.clicked.connect(self._load_data)
+        self.btn_zerar.clicked.connect(self._zerar)
+        self.btn_exportar.clicked.connect(self._exportar)
+        self.btn_fechar.clicked.connect(self.accept)
+        self._load_data()
+
+    def _toggle_ativo(self, ligado):
+        diagnostico.ativar(ligado)
+        if ligado:
+            QMessageBox.information(
+                self,
+                "Diagnóstico",
+                "Coleta ativada. A medição de SQL vale para as novas conexões "
+                "ao banco a partir de agora.",
+            )
+
+    def _load_data(self):
+        snap = diagnostico.coletor.snapshot()
+        self.lbl_desde.setText(f"Coletando desde {snap['desde'].replace('T', ' ')}")
+        metricas = list(snap["metricas"].items())
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.model.set_rows(metricas, [
+            lambda m: m[0],
+            lambda m: m[1]["chamadas"],
+            lambda m: m[1]["total_ms"],
+            lambda m: m[1]["media_ms"],
+            lambda m: m[1]["p50_ms"],
+            lambda m: m[1]["p95_ms"],
+            lambda m: m[1]["max_ms"],
+        ])
+        partes = []
+        for item in reversed(snap["sql_lentos"]):
+            plano = "\n".join(f"    {p}" for p in item["plano"]) or "    (sem plano)"
+            partes.append(
+                f"[{item['quando'].replace('T', ' ')}] {item['ms']:.1f} ms\n"
+                f"{item['sql'].strip()}\n{plano}"
+            )
+        self.txt_sql.setPlainText("\n\n".join(partes))
+
+    def _zerar(self):
+        diagnostico.coletor.zerar()
+        self._load_data()
+
+    def _exportar(self):
+        nome = f"diagnostico_{datetime.now().strftime('%Y%m%d_%H%M%S')}.json"
+        caminho, _ = QFileDialog.getSaveFileName(
+            self, "Exportar diagnóstico", os.path.join(os.path.expanduser("~"), nome),
+            "JSON (*.json)",
+        )
+        if not caminho:
+            return
+        diagnostico.exportar_json(caminho)
+        QMessageBox.information(self, "Diagnóstico", f"Estatísticas exportadas para:\n{caminho}")
@@ -0,0 +1,155 @@
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable
+
+from PySide6.QtCore import QObject, QTimer, Signal
+from PySide6.QtWidgets import QFrame, QHBoxLayout, QLabel, QPushButton, QWidget
+
+import fila_pdf
+from ui.impressao import abrir_pdf, imprimir
+
+NOTIFICACAO_MS = 12000
+
+
+class NotificacaoPdf(QFrame):
+    """Aviso não modal no canto da janela, com botões para abrir e imprimir o PDF."""
+
+    def __init__(self, janela: QWidget, texto: str, caminho_pdf: str | None = None,
+                 erro: bool = False):
+        super().__init__(janela)
+        self.setObjectName("notificacaoPdf")
+        cor = "#cc4444" if erro else "#1a8a3e"
+        self.setStyleSheet(
+            f"#notificacaoPdf {{ background: {cor}; border-radius: 6px; }}"
+            "#notificacaoPdf QLabel { color: white; font-weight: bold; }"
+            "#notificacaoPdf QPushButton { background: white; color: #333; padding: 4px 10px; }"
+        )
+        layout = QHBoxLayout(self)
+        layout.setContentsMargins(12, 8, 8, 8)
+        layout.addWidget(QLabel(texto))
+        if caminho_pdf:
+            btn_abrir = QPushButton("Abrir")
+            btn_abrir.clicked.connect(lambda: self._abrir(caminho_pdf))
+            layout.addWidget(btn_abrir)
+            btn_imprimir = QPushButton("Imprimir")
+            btn_imprimir.clicked.connect(lambda: self._imprimir(caminho_pdf))
+            layout.addWidget(btn_imprimir)
+        btn_fechar = QPushButton("✕")
+        btn_fechar.setFixedWidth(28)
+        btn_fechar.clicked.connect(self.close)
+        layout.addWidget(btn_fechar)
+        self.adjustSize()
+        QTimer.singleShot(NOTIFICACAO_MS, self.close)
+
+    def _abrir(self, caminho_pdf):
+        abrir_pdf(caminho_pdf, self.parentWidget())
+        self.close()
+
+    def _imprimir(self, caminho_pdf):
+        self.close()
+        imprimir([caminho_pdf], self.parentWidget())
+
+    def mostrar(self, deslocamento: int = 0):
+        janela = self.parentWidget()
+        x = janela.width() - self.width() - 16
+        y = janela.height() - self.height() - 16 - deslocamento
+        self.move(max(x, 0), max(y, 0))
+        self.show()
+        self.raise_()
+
+
+class FilaPdfQt(QObject):
+    """Executa os jobs de fila_pdf em uma thread e avisa na janela principal."""
+
+    concluido = Signal(int, str)
+    falhou = Signal(int, str)
+    relatorio_pronto = Signal(str, str)
+    relatorio_falhou = Signal(str, str)
+
+    def __init__(self):
+        super().__init__()
+        # Um worker só: mantém a ordem dos jobs e não disputa o banco
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="pdf")
+        self._janela = None
+        self._notificacoes = []
+        self.concluido.connect(self._on_concluido)
+        self.falhou.connect(self._on_falhou)
+        self.relatorio_pronto.connect(self._on_relatorio_pronto)
+        self.relatorio_falhou.connect(self._on_relatorio_falhou)
+
+    def set_janela(self, janela: QWidget):
+        self._janela = janela
+
+    def enviar(self, recibos: list, por_pagina: int = fila_pdf.POR_PAGINA_PADRAO,
+               marcas_corte: bool = False) -> int:
+        job_id = fila_pdf.enfileirar(recibos, por_pagina, marcas_corte)
+        self.agendar(job_id)
+        return job_id
+
+    def agendar(self, job_id: int):
+        """Renderiza um job já gravado (ex.: na mesma transação dos recibos)."""
+        self._agendar(fila_pdf.get_job(job_id))
+
+    def retomar_pendentes(self) -> int:
+        """Agenda os jobs disponíveis; cada um só é renderizado se esta
+        estação conseguir reivindicá-lo (ver fila_pdf.reivindicar)."""
+        pendentes = fila_pdf.listar_pendentes()
+        for job in pendentes:
+            self._agendar(job)
+        return len(pendentes)
+
+    def _agendar(self, job: dict):
+        self._executor.submit(self._executar, job)
+
+    def _executar(self, job: dict):
+        try:
+            caminho = fila_pdf.renderizar(job)
+        except Exception as e:
+            self.falhou.emit(job["id"], str(e))
+        else:
+            if caminho is not None:
+                self.concluido.emit(job["id"], caminho)
+
+    def enviar_relatorio(self, gerar: Callable[[], str], descricao: str = "Relatório"):
+        """Gera um relatório na thread de PDFs; gerar() retorna o caminho do arquivo."""
+        self._executor.submit(self._executar_relatorio, gerar, descricao)
+
+    def _executar_relatorio(self, gerar, descricao):
+        try:
+            caminho = gerar()
+        except Exception as e:
+            self.relatorio_falhou.emit(descricao, str(e))
+        else:
+            self.relatorio_pronto.emit(descricao, caminho)
+
+    def _notificar(self, texto, caminho=None, erro=False):
+        if self._janela is None:
+            return
+        self._notificacoes = [n for n in self._notificacoes if n.isVisible()]
+        n = NotificacaoPdf(self._janela, texto, caminho, erro)
+        n.mostrar(sum(x.height() + 8 for x in self._notificacoes))
+        self._notificacoes.append(n)
+
+    def _on_concluido(self, job_id, caminho):
+        self._notificar("PDF do recibo pronto.", caminho)
+
+    def _on_falhou(self, job_id, mensagem):
+        self._notificar(f"Falha ao gerar PDF: {mensagem[:80]}", erro=True)
+
+    def _on_relatorio_pronto(self, descricao, caminho):
+        self._notificar(f"{descricao} pronto.", caminho)
+
+    def _on_relatorio_falhou(self, descricao, mensagem):
+        self._notificar(f"Falha ao gerar {descricao.lower()}: {mensagem[:80]}", erro=True)
+
+    def encerrar(self):
+        self._executor.shutdown(wait=True)
+
+
+_fila = None
+
+
+def get_fila() -> FilaPdfQt:
+    global _fila
+    if _fila is None:
+        _fila = FilaPdfQt()
+    return _fila
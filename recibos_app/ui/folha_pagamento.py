@@ -0,0 +1,214 @@
+from PySide6.QtCore import QDate, Qt
+from PySide6.QtWidgets import (
+    QDialog,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QComboBox,
+    QDateEdit,
+    QPushButton,
+    QTableWidget,
+    QTableWidgetItem,
+    QHeaderView,
+    QMessageBox,
+    QGroupBox,
+    QFormLayout,
+)
+
+import folha_pagamento
+from domain.exceptions import ConcorrenciaError
+from remoto import fabrica
+from ui.fila_pdf import get_fila
+from ui.validators import format_cpf
+
+_NUMERICO = Qt.AlignRight | Qt.AlignVCenter
+_COL_NOME, _COL_CPF, _COL_DIAS, _COL_VALOR, _COL_TOTAL = range(5)
+
+
+def _fixo(texto, numerico=False):
+    item = QTableWidgetItem(texto)
+    item.setFlags(item.flags() & ~Qt.ItemIsEditable)
+    if numerico:
+        item.setTextAlignment(_NUMERICO)
+    return item
+
+
+def _moeda(valor):
+    return f"{valor:,.2f}".replace(",", "X").replace(".", ",").replace("X", ".")
+
+
+class FolhaPagamentoDialog(QDialog):
+    """Folha de passagens/diárias de todos os colaboradores ativos: calcula,
+    mostra para conferência e grava tudo de uma vez."""
+
+    def __init__(self, empresas, current_user, por_pagina, marcas_corte, parent=None):
+        super().__init__(parent)
+        self.setWindowTitle("Folha de Passagens / Diárias")
+        self.resize(820, 600)
+        self.empresas = list(empresas)
+        self.current_user = current_user
+        self.por_pagina = por_pagina
+        self.marcas_corte = marcas_corte
+        self.lancamentos = []
+        self._build_ui()
+
+    def _build_ui(self):
+        layout = QVBoxLayout(self)
+
+        form_group = QGroupBox("Folha")
+        form = QHBoxLayout(form_group)
+        left = QFormLayout()
+        right = QFormLayout()
+        self.empresa = QComboBox()
+        for e in self.empresas:
+            self.empresa.addItem(e["razao_social"])
+        self.tipo = QComboBox()
+        for tipo, (_, rotulo) in folha_pagamento.TIPOS.items():
+            self.tipo.addItem(rotulo, tipo)
+        hoje = QDate.currentDate()
+        inicio_mes = QDate(hoje.year(), hoje.month(), 1)
+        self.inicio = QDateEdit(inicio_mes)
+        self.fim = QDateEdit(inicio_mes.addMonths(1).addDays(-1))
+        for d in (self.inicio, self.fim):
+            d.setCalendarPopup(True)
+        left.addRow(QLabel("Empresa"), self.empresa)
+        left.addRow(QLabel("Tipo"), self.tipo)
+        right.addRow(QLabel("Data inicial"), self.inicio)
+        right.addRow(QLabel("Data final"), self.fim)
+        form.addLayout(left, 2)
+        form.addLayout(right, 1)
+        layout.addWidget(form_group)
+
+        self.btn_calcular = QPushButton("Calcular")
+        layout.addWidget(self.btn_calcular)
+
+        self.table = QTableWidget(0, 5)
+        self.table.setHorizontalHeaderLabels(
+            ["Colaborador", "CPF", "Dias", "Valor/dia", "Total"]
+        )
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setAlternatingRowColors(True)
+        layout.addWidget(self.table)
+
+        rodape = QHBoxLayout()
+        self.lbl_total = QLabel("")
+        self.lbl_total.setStyleSheet("font-weight: bold; font-size: 11pt;")
+        rodape.addWidget(self.lbl_total)
+        rodape.addStretch(1)
+        self.btn_cancel = QPushButton("Fechar")
+        self.btn_ok = QPushButton("Gerar Recibos")
+        self.btn_ok.setEnabled(False)
+        rodape.addWidget(self.btn_cancel)
+        rodape.addWidget(self.btn_ok)
+        layout.addLayout(rodape)
+
+        self.btn_calcular.clicked.connect(self._calcular)
+        self.btn_cancel.clicked.connect(self.reject)
+        self.btn_ok.clicked.connect(self._confirmar)
+        self.table.itemChanged.connect(self._on_item_changed)
+        # Mudar os parâmetros invalida a conferência feita
+        for sinal in (self.empresa.currentIndexChanged, self.tipo.currentIndexChanged,
+                      self.inicio.dateChanged, self.fim.dateChanged):
+            sinal.connect(self._limpar)
+
+    def _limpar(self):
+        self.lancamentos = []
+        self.table.setRowCount(0)
+        self.lbl_total.setText("")
+        self.btn_ok.setEnabled(False)
+
+    def _calcular(self):
+        inicio, fim = self.inicio.date(), self.fim.date()
+        if fim < inicio:
+            QMessageBox.warning(self, "Validação", "Período inválido.")
+            return
+        self.lancamentos = fabrica.calcular_folha(
+            self.tipo.currentData(), inicio.toPython(), fim.toPython()
+        )
+        self.table.blockSignals(True)
+        self.table.setRowCount(len(self.lancamentos))
+        for row, lanc in enumerate(self.lancamentos):
+            nome = QTableWidgetItem(lanc.nome)
+            nome.setFlags(Qt.ItemIsEnabled | Qt.ItemIsUserCheckable)
+            nome.setCheckState(Qt.Checked if lanc.incluir else Qt.Unchecked)
+            self.table.setItem(row, _COL_NOME, nome)
+            self.table.setItem(row, _COL_CPF, _fixo(format_cpf(lanc.cpf)))
+            dias = QTableWidgetItem(str(lanc.dias))
+            dias.setTextAlignment(_NUMERICO)
+            self.table.setItem(row, _COL_DIAS, dias)
+            self.table.setItem(row, _COL_VALOR, _fixo(_moeda(lanc.valor_unitario), True))
+            self.table.setItem(row, _COL_TOTAL, _fixo(_moeda(lanc.total), True))
+        self.table.blockSignals(False)
+        self._atualizar_total()
+
+    def _on_item_changed(self, item):
+        lanc = self.lancamentos[item.row()]
+        if item.column() == _COL_NOME:
+            lanc.incluir = item.checkState() == Qt.Checked
+        elif item.column() == _COL_DIAS:
+            try:
+                lanc.dias = max(0, int(item.text()))
+            except ValueError:
+                pass
+            self.table.blockSignals(True)
+            item.setText(str(lanc.dias))
+            self.table.item(item.row(), _COL_TOTAL).setText(_moeda(lanc.total))
+            self.table.blockSignals(False)
+        self._atualizar_total()
+
+    def _incluidos(self):
+        return [lanc for lanc in self.lancamentos if lanc.incluir and lanc.total > 0]
+
+    def _atualizar_total(self):
+        incluidos = self._incluidos()
+        total = sum(lanc.total for lanc in incluidos)
+        self.lbl_total.setText(
+            f"{len(incluidos)} de {len(self.lancamentos)} colaborador(es) — "
+            f"Total R$ {_moeda(total)}"
+        )
+        self.btn_ok.setEnabled(bool(incluidos))
+
+    def _confirmar(self):
+        incluidos = self._incluidos()
+        idx = self.empresa.currentIndex()
+        if idx < 0 or not incluidos:
+            QMessageBox.warning(self, "Validação", "Selecione a empresa e ao menos um colaborador.")
+            return
+        total = sum(lanc.total for lanc in incluidos)
+        if QMessageBox.question(
+            self,
+            "Confirmar folha",
+            f"Gerar {len(incluidos)} recibo(s) de {self.tipo.currentText()} "
+            f"totalizando R$ {_moeda(total)}?",
+        ) != QMessageBox.Yes:
+            return
+        try:
+            resultado = fabrica.registrar_folha(
+                self.empresas[idx]["id"],
+                self.current_user["id"],
+                self.tipo.currentData(),
+                self.inicio.date().toPython(),
+                self.fim.date().toPython(),
+                incluidos,
+                por_pagina=self.por_pagina,
+                marcas_corte=self.marcas_corte,
+            )
+        except ConcorrenciaError as e:
+            QMessageBox.warning(self, "Banco ocupado", str(e))
+            return
+        except (PermissionError, ValueError) as e:
+            QMessageBox.warning(self, "Erro", str(e))
+            return
+        get_fila().agendar(resultado["job_id"])
+        gaveta = (
+            f"\n{resultado['movimentacoes']} saída(s) registradas na gaveta."
+            if resultado["movimentacoes"] else "\nNenhuma gaveta aberta: sem saídas registradas."
+        )
+        QMessageBox.information(
+            self,
+            "Folha gerada",
+            f"{len(resultado['recibo_ids'])} recibo(s) gravados, "
+            f"total R$ {_moeda(resultado['total'])}.{gaveta}\n"
+            "O PDF do lote será gerado em segundo plano.",
+        )
+        self.accept()
@@ -1,6 +1,4 @@
-import os
-import re
-from datetime import datetime
+from functools import wraps
 
 from PySide6.QtCore import QDate, Qt
 from PySide6.QtWidgets import (
@@ -27,21 +25,31 @@ from data.repositories.sqlite_empresa_repo import list_empresas
 from data.repositories.sqlite_colaborador_repo import list_colaboradores
 from data.repositories.sqlite_prestador_repo import list_prestadores
 from data.repositories.sqlite_fornecedor_repo import list_fornecedores
-from data.repositories.sqlite_recibo_repo import create_recibo
-from data.repositories.sqlite_sessao_repo import SqliteSessaoRepo
-from data.repositories.sqlite_movimentacao_repo import SqliteMovimentacaoRepo
-from pdf.gerador_pdf import gerar_pdf_recibo, gerar_pdf_multiplos_recibos
+from domain.exceptions import ConcorrenciaError
+from remoto import fabrica
 from ui.validators import format_cpf, format_cnpj
-from app_paths import get_data_dir, get_pdf_dir
-from ui.calendario_passagem import CalendarioPassagemDialog
-
-MAX_RECIBOS_POR_PAGINA = 3
-
-
-def _safe_filename(texto):
-    texto = texto.strip().lower()
-    texto = re.sub(r"[^a-z0-9_-]+", "_", texto)
-    return texto.strip("_") or "recibo"
+import calendario
+from app_paths import get_data_dir, load_config, save_config
+from ui.calendario_passagem import CalendarioPassagemDialog, datas_trabalhadas
+from ui.fila_pdf import get_fila
+from ui.folha_pagamento import FolhaPagamentoDialog
+from ui.lista_pesquisavel import ListaPesquisavel, tornar_pesquisavel
+from pdf.cache_pdf import serializar
+from pdf.gerador_pdf import POR_PAGINA_PADRAO, RECIBOS_POR_PAGINA
+
+
+def _tratar_concorrencia(metodo):
+    """Mostra um aviso em vez de deixar falhas de concorrência (ou recusas da
+    gaveta, na emissão) irem ao excepthook."""
+    @wraps(metodo)
+    def wrapper(self, *_args):
+        try:
+            return metodo(self)
+        except ConcorrenciaError as e:
+            QMessageBox.warning(self, "Banco ocupado", str(e))
+        except (PermissionError, ValueError) as e:
+            QMessageBox.warning(self, "Erro", str(e))
+    return wrapper
 
 
 def _format_date(date_obj, fmt="dd/MM/yyyy"):
@@ -98,9 +106,24 @@ class GerarReciboWidget(QWidget):
         self.fornecedores = []
         self.pass_selected_dates = set()
         self.pending_recibos = []  # accumulated receipts for multi-receipt PDF
+        # Um modelo por conjunto de dados, compartilhado por todos os combos dele
+        self.lista_empresas = ListaPesquisavel(self)
+        self.lista_colaboradores = ListaPesquisavel(self)
+        self.lista_prestadores = ListaPesquisavel(self)
+        self.lista_fornecedores = ListaPesquisavel(self)
         self._build_ui()
+        self._ligar_listas()
         self._load_data()
 
+    def _ligar_listas(self):
+        for combo in (self.pass_empresa, self.diaria_empresa, self.pres_empresa,
+                      self.fer_empresa, self.forn_empresa, self.out_empresa):
+            combo.setModel(self.lista_empresas)
+        for combo in (self.pass_colaborador, self.diaria_colaborador, self.fer_colaborador):
+            tornar_pesquisavel(combo, self.lista_colaboradores)
+        tornar_pesquisavel(self.pres_prestador, self.lista_prestadores)
+        tornar_pesquisavel(self.forn_fornecedor, self.lista_fornecedores)
+
     def _build_ui(self):
         layout = QVBoxLayout(self)
         layout.setContentsMargins(16, 16, 16, 16)
@@ -122,8 +145,26 @@ class GerarReciboWidget(QWidget):
         )
         self.btn_cancelar_pendentes.clicked.connect(self._cancelar_pendentes)
         self.btn_cancelar_pendentes.setVisible(False)
+        cfg = load_config()
+        self.cmb_por_pagina = QComboBox()
+        for n in RECIBOS_POR_PAGINA:
+            self.cmb_por_pagina.addItem(f"{n} por página", n)
+        idx = self.cmb_por_pagina.findData(cfg.get("recibos_por_pagina", POR_PAGINA_PADRAO))
+        self.cmb_por_pagina.setCurrentIndex(
+            idx if idx >= 0 else self.cmb_por_pagina.findData(POR_PAGINA_PADRAO)
+        )
+        self.chk_marcas_corte = QCheckBox("Marcas de corte")
+        self.chk_marcas_corte.setChecked(bool(cfg.get("marcas_de_corte", False)))
+        self.cmb_por_pagina.currentIndexChanged.connect(self._salvar_layout)
+        self.chk_marcas_corte.toggled.connect(self._salvar_layout)
+        self.btn_folha = QPushButton("📋 Folha do Período")
+        self.btn_folha.setToolTip("Passagens ou diárias de todos os colaboradores ativos de uma vez")
+        self.btn_folha.clicked.connect(self._abrir_folha)
         pending_bar.addWidget(self.lbl_pending)
         pending_bar.addStretch()
+        pending_bar.addWidget(self.btn_folha)
+        pending_bar.addWidget(self.cmb_por_pagina)
+        pending_bar.addWidget(self.chk_marcas_corte)
         pending_bar.addWidget(self.btn_finalizar)
         pending_bar.addWidget(self.btn_cancelar_pendentes)
         layout.addLayout(pending_bar)
@@ -214,7 +255,8 @@ class GerarReciboWidget(QWidget):
 
         self.pass_inicio.dateChanged.connect(self._apply_passagem_period)
         self.pass_fim.dateChanged.connect(self._apply_passagem_period)
-        self.pass_colaborador.currentIndexChanged.connect(self._calc_passagem)
+        # A jornada muda com o colaborador: remarca o período
+        self.pass_colaborador.currentIndexChanged.connect(self._apply_passagem_period)
         self.pass_btn_aplicar.clicked.connect(self._apply_passagem_period)
         self.pass_btn_limpar.clicked.connect(self._clear_passagem_selection)
         self.pass_btn_abrir.clicked.connect(self._open_passagem_calendar)
@@ -242,8 +284,11 @@ class GerarReciboWidget(QWidget):
         left.addRow(QLabel("Colaborador"), self.diaria_colaborador)
         left.addRow(QLabel("Tipo"), self.diaria_tipo)
 
+        self.diaria_so_trabalhados = QCheckBox("Descontar folgas e feriados")
+        self.diaria_so_trabalhados.setChecked(True)
         right.addRow(QLabel("Data inicial"), self.diaria_inicio)
         right.addRow(QLabel("Data final"), self.diaria_fim)
+        right.addRow(self.diaria_so_trabalhados)
 
         form.addLayout(left, 2)
         form.addLayout(right, 1)
@@ -274,6 +319,7 @@ class GerarReciboWidget(QWidget):
         self.diaria_fim.dateChanged.connect(self._calc_diaria)
         self.diaria_tipo.currentIndexChanged.connect(self._calc_diaria)
         self.diaria_colaborador.currentIndexChanged.connect(self._calc_diaria)
+        self.diaria_so_trabalhados.toggled.connect(self._calc_diaria)
 
     def _build_tab_prestador(self):
         layout = QVBoxLayout(self.tab_prestador)
@@ -436,26 +482,23 @@ class GerarReciboWidget(QWidget):
 
     def _load_data(self):
         self.empresas = list_empresas(ativas_apenas=False)
-        self.colaboradores = list_colaboradores(ativos_apenas=False)
-        self.prestadores = list_prestadores(ativos_apenas=False)
-        self.fornecedores = list_fornecedores(ativos_apenas=False)
-
-        def fill_combo(combo, items, label_fn):
-            combo.clear()
-            for item in items:
-                combo.addItem(label_fn(item), item["id"])
-
-        fill_combo(self.pass_empresa, self.empresas, lambda r: r["razao_social"])
-        fill_combo(self.pass_colaborador, self.colaboradores, lambda r: r["nome"])
-        fill_combo(self.diaria_empresa, self.empresas, lambda r: r["razao_social"])
-        fill_combo(self.diaria_colaborador, self.colaboradores, lambda r: r["nome"])
-        fill_combo(self.pres_empresa, self.empresas, lambda r: r["razao_social"])
-        fill_combo(self.pres_prestador, self.prestadores, lambda r: r["nome"])
-        fill_combo(self.fer_empresa, self.empresas, lambda r: r["razao_social"])
-        fill_combo(self.fer_colaborador, self.colaboradores, lambda r: r["nome"])
-        fill_combo(self.forn_empresa, self.empresas, lambda r: r["razao_social"])
-        fill_combo(self.forn_fornecedor, self.fornecedores, lambda r: r["nome"])
-        fill_combo(self.out_empresa, self.empresas, lambda r: r["razao_social"])
+        # Só os ativos: os inativos não recebem recibos novos
+        self.colaboradores = list_colaboradores(ativos_apenas=True)
+        self.prestadores = list_prestadores(ativos_apenas=True)
+        self.fornecedores = list_fornecedores(ativos_apenas=True)
+
+        self.lista_empresas.carregar(self.empresas, lambda r: r["razao_social"])
+        self.lista_colaboradores.carregar(self.colaboradores, lambda r: r["nome"])
+        self.lista_prestadores.carregar(self.prestadores, lambda r: r["nome"])
+        self.lista_fornecedores.carregar(self.fornecedores, lambda r: r["nome"])
+        for combo in (
+            self.pass_empresa, self.pass_colaborador, self.diaria_empresa,
+            self.diaria_colaborador, self.pres_empresa, self.pres_prestador,
+            self.fer_empresa, self.fer_colaborador, self.forn_empresa,
+            self.forn_fornecedor, self.out_empresa,
+        ):
+            if combo.currentIndex() < 0 and combo.count():
+                combo.setCurrentIndex(0)
 
         self._calc_passagem()
         self._calc_diaria()
@@ -475,7 +518,7 @@ class GerarReciboWidget(QWidget):
         if not colab:
             self.diaria_total.setText("0.00")
             return
-        dias = self._calc_dias(self.diaria_inicio.date(), self.diaria_fim.date())
+        dias = self._calc_dias(self.diaria_inicio.date(), self.diaria_fim.date(), colab)
         if self.diaria_tipo.currentText() == "Diária":
             valor = colab["valor_diaria"] or 0
         else:
@@ -483,17 +526,25 @@ class GerarReciboWidget(QWidget):
         total = dias * valor
         self.diaria_total.setText(f"{total:.2f}")
 
-    def _calc_dias(self, inicio, fim):
+    def _calc_dias(self, inicio, fim, colab=None):
         if fim < inicio:
             return 0
+        if colab and self.diaria_so_trabalhados.isChecked():
+            return calendario.contar_dias(
+                inicio.toPython(), fim.toPython(), calendario.jornada_de(colab)
+            )
         return inicio.daysTo(fim) + 1
 
+    def _jornada(self, colab):
+        return calendario.jornada_de(colab) if colab else None
+
     def _get_selected(self, combo, items):
         idx = combo.currentIndex()
         if idx < 0 or idx >= len(items):
             return None
         return items[idx]
 
+    @_tratar_concorrencia
     def _handle_passagem(self):
         empresa = self._get_selected(self.pass_empresa, self.empresas)
         colab = self._get_selected(self.pass_colaborador, self.colaboradores)
@@ -527,25 +578,9 @@ class GerarReciboWidget(QWidget):
         if not self._confirm_preview(preview):
             return
 
-        # Register in DB and gaveta immediately
-        mov_id = self._registrar_saida_gaveta(valor, desc)
-        create_recibo(
-            empresa["id"],
-            self.current_user["id"],
-            "PASSAGEM",
-            colab["nome"],
-            formatar_documento(colab["cpf"]),
-            desc,
-            valor,
-            inicio.toString("yyyy-MM-dd"),
-            fim.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            "",  # PDF path filled later
-            movimentacao_id=mov_id,
-        )
-
-        # Accumulate receipt data for multi-receipt PDF
-        self._adicionar_recibo_pendente({
+        # PDF data: saved with the receipt (for reprints) and batched into
+        # the multi-receipt PDF
+        dados = {
             "empresa_razao": empresa["razao_social"],
             "empresa_cnpj": formatar_cnpj(empresa["cnpj"]),
             "nome": colab["nome"],
@@ -558,19 +593,29 @@ class GerarReciboWidget(QWidget):
             "template": "PASSAGEM",
             "tipo_arquivo": "passagem",
             "pessoa_nome": colab["nome"],
-        })
+        }
+        # Register in DB and gaveta immediately, in one transaction
+        recibo_id = fabrica.emitir_recibo(
+            self.current_user["id"],
+            empresa["id"],
+            "PASSAGEM",
+            colab["nome"],
+            formatar_documento(colab["cpf"]),
+            desc,
+            valor,
+            inicio.toString("yyyy-MM-dd"),
+            fim.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            "",  # PDF path filled later
+            dados_pdf=serializar(dados),
+        )["recibo_id"]
+        self._adicionar_recibo_pendente({**dados, "recibo_id": recibo_id})
 
     def _apply_passagem_period(self):
-        self.pass_selected_dates = set()
-        inicio = self.pass_inicio.date()
-        fim = self.pass_fim.date()
-        if fim < inicio:
-            self._calc_passagem()
-            return
-        d = inicio
-        while d <= fim:
-            self.pass_selected_dates.add(d)
-            d = d.addDays(1)
+        colab = self._get_selected(self.pass_colaborador, self.colaboradores)
+        self.pass_selected_dates = datas_trabalhadas(
+            self.pass_inicio.date(), self.pass_fim.date(), self._jornada(colab)
+        )
         self._refresh_calendar_selection()
         self._calc_passagem()
 
@@ -593,13 +638,9 @@ class GerarReciboWidget(QWidget):
     def _open_passagem_calendar(self):
         inicio = self.pass_inicio.date()
         fim = self.pass_fim.date()
-        selected = set(self.pass_selected_dates)
-        if not selected:
-            d = inicio
-            while d <= fim:
-                selected.add(d)
-                d = d.addDays(1)
-        dialog = CalendarioPassagemDialog(inicio, fim, selected)
+        jornada = self._jornada(self._get_selected(self.pass_colaborador, self.colaboradores))
+        selected = set(self.pass_selected_dates) or datas_trabalhadas(inicio, fim, jornada)
+        dialog = CalendarioPassagemDialog(inicio, fim, selected, jornada)
         if dialog.exec() == QDialog.Accepted:
             self.pass_selected_dates = set(dialog.get_selected_dates())
             inicio, fim = dialog.get_period()
@@ -623,6 +664,7 @@ class GerarReciboWidget(QWidget):
             cursor.setPosition(min(len(texto), max_len))
             widget.setTextCursor(cursor)
 
+    @_tratar_concorrencia
     def _handle_diaria(self):
         empresa = self._get_selected(self.diaria_empresa, self.empresas)
         colab = self._get_selected(self.diaria_colaborador, self.colaboradores)
@@ -634,9 +676,9 @@ class GerarReciboWidget(QWidget):
             return
         inicio = self.diaria_inicio.date()
         fim = self.diaria_fim.date()
-        dias = self._calc_dias(inicio, fim)
+        dias = self._calc_dias(inicio, fim, colab)
         if dias <= 0:
-            QMessageBox.warning(self, "Validação", "Período inválido.")
+            QMessageBox.warning(self, "Validação", "Período inválido ou sem dias trabalhados.")
             return
         tipo = self.diaria_tipo.currentText()
         valor = float(self.diaria_total.text())
@@ -665,23 +707,7 @@ class GerarReciboWidget(QWidget):
         if not self._confirm_preview(preview):
             return
 
-        mov_id = self._registrar_saida_gaveta(valor, desc)
-        create_recibo(
-            empresa["id"],
-            self.current_user["id"],
-            "DIARIA" if tipo == "Diária" else "DOBRA",
-            colab["nome"],
-            colab["cpf"],
-            desc,
-            valor,
-            inicio.toString("yyyy-MM-dd"),
-            fim.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            "",
-            movimentacao_id=mov_id,
-        )
-
-        self._adicionar_recibo_pendente({
+        dados = {
             "empresa_razao": empresa["razao_social"],
             "empresa_cnpj": formatar_cnpj(empresa["cnpj"]),
             "nome": colab["nome"],
@@ -694,8 +720,24 @@ class GerarReciboWidget(QWidget):
             "template": "COMPACTO",
             "tipo_arquivo": "diaria" if tipo == "Diária" else "dobra",
             "pessoa_nome": colab["nome"],
-        })
+        }
+        recibo_id = fabrica.emitir_recibo(
+            self.current_user["id"],
+            empresa["id"],
+            "DIARIA" if tipo == "Diária" else "DOBRA",
+            colab["nome"],
+            colab["cpf"],
+            desc,
+            valor,
+            inicio.toString("yyyy-MM-dd"),
+            fim.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            "",
+            dados_pdf=serializar(dados),
+        )["recibo_id"]
+        self._adicionar_recibo_pendente({**dados, "recibo_id": recibo_id})
 
+    @_tratar_concorrencia
     def _handle_prestador(self):
         empresa = self._get_selected(self.pres_empresa, self.empresas)
         prestador = self._get_selected(self.pres_prestador, self.prestadores)
@@ -727,23 +769,7 @@ class GerarReciboWidget(QWidget):
         if not self._confirm_preview(preview):
             return
 
-        mov_id = self._registrar_saida_gaveta(valor, desc)
-        create_recibo(
-            empresa["id"],
-            self.current_user["id"],
-            "PRESTACAO",
-            prestador["nome"],
-            prestador["cpf_cnpj"],
-            desc,
-            valor,
-            data_pag.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            "",
-            movimentacao_id=mov_id,
-        )
-
-        self._adicionar_recibo_pendente({
+        dados = {
             "empresa_razao": empresa["razao_social"],
             "empresa_cnpj": formatar_cnpj(empresa["cnpj"]),
             "nome": prestador["nome"],
@@ -756,13 +782,29 @@ class GerarReciboWidget(QWidget):
             "template": "COMPACTO",
             "tipo_arquivo": "prestacao",
             "pessoa_nome": prestador["nome"],
-        })
+        }
+        recibo_id = fabrica.emitir_recibo(
+            self.current_user["id"],
+            empresa["id"],
+            "PRESTACAO",
+            prestador["nome"],
+            prestador["cpf_cnpj"],
+            desc,
+            valor,
+            data_pag.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            "",
+            dados_pdf=serializar(dados),
+        )["recibo_id"]
+        self._adicionar_recibo_pendente({**dados, "recibo_id": recibo_id})
 
     def _calc_feriado(self):
         colab = self._get_selected(self.fer_colaborador, self.colaboradores)
         if colab and colab.get("valor_diaria"):
             self.fer_valor.setValue(colab["valor_diaria"])
 
+    @_tratar_concorrencia
     def _handle_feriado(self):
         empresa = self._get_selected(self.fer_empresa, self.empresas)
         colab = self._get_selected(self.fer_colaborador, self.colaboradores)
@@ -792,23 +834,7 @@ class GerarReciboWidget(QWidget):
         if not self._confirm_preview(preview):
             return
 
-        mov_id = self._registrar_saida_gaveta(valor, desc)
-        create_recibo(
-            empresa["id"],
-            self.current_user["id"],
-            "FERIADO",
-            colab["nome"],
-            colab["cpf"],
-            desc,
-            valor,
-            data.toString("yyyy-MM-dd"),
-            data.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            "",
-            movimentacao_id=mov_id,
-        )
-
-        self._adicionar_recibo_pendente({
+        dados = {
             "empresa_razao": empresa["razao_social"],
             "empresa_cnpj": formatar_cnpj(empresa["cnpj"]),
             "nome": colab["nome"],
@@ -821,8 +847,24 @@ class GerarReciboWidget(QWidget):
             "template": "COMPACTO",
             "tipo_arquivo": "feriado",
             "pessoa_nome": colab["nome"],
-        })
+        }
+        recibo_id = fabrica.emitir_recibo(
+            self.current_user["id"],
+            empresa["id"],
+            "FERIADO",
+            colab["nome"],
+            colab["cpf"],
+            desc,
+            valor,
+            data.toString("yyyy-MM-dd"),
+            data.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            "",
+            dados_pdf=serializar(dados),
+        )["recibo_id"]
+        self._adicionar_recibo_pendente({**dados, "recibo_id": recibo_id})
 
+    @_tratar_concorrencia
     def _handle_fornecedor(self):
         empresa = self._get_selected(self.forn_empresa, self.empresas)
         fornecedor = self._get_selected(self.forn_fornecedor, self.fornecedores)
@@ -854,23 +896,7 @@ class GerarReciboWidget(QWidget):
         if not self._confirm_preview(preview):
             return
 
-        mov_id = self._registrar_saida_gaveta(valor, desc)
-        create_recibo(
-            empresa["id"],
-            self.current_user["id"],
-            "FORNECEDOR",
-            fornecedor["nome"],
-            fornecedor["cpf_cnpj"],
-            desc,
-            valor,
-            data_pag.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            "",
-            movimentacao_id=mov_id,
-        )
-
-        self._adicionar_recibo_pendente({
+        dados = {
             "empresa_razao": empresa["razao_social"],
             "empresa_cnpj": formatar_cnpj(empresa["cnpj"]),
             "nome": fornecedor["nome"],
@@ -883,8 +909,24 @@ class GerarReciboWidget(QWidget):
             "template": "COMPACTO",
             "tipo_arquivo": "fornecedor",
             "pessoa_nome": fornecedor["nome"],
-        })
+        }
+        recibo_id = fabrica.emitir_recibo(
+            self.current_user["id"],
+            empresa["id"],
+            "FORNECEDOR",
+            fornecedor["nome"],
+            fornecedor["cpf_cnpj"],
+            desc,
+            valor,
+            data_pag.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            "",
+            dados_pdf=serializar(dados),
+        )["recibo_id"]
+        self._adicionar_recibo_pendente({**dados, "recibo_id": recibo_id})
 
+    @_tratar_concorrencia
     def _handle_outros(self):
         empresa = self._get_selected(self.out_empresa, self.empresas)
         if not empresa:
@@ -922,23 +964,7 @@ class GerarReciboWidget(QWidget):
         if not self._confirm_preview(preview):
             return
 
-        mov_id = self._registrar_saida_gaveta(valor, desc)
-        create_recibo(
-            empresa["id"],
-            self.current_user["id"],
-            "OUTROS",
-            nome,
-            documento,
-            desc,
-            valor,
-            inicio.toString("yyyy-MM-dd"),
-            fim.toString("yyyy-MM-dd"),
-            data_pag.toString("yyyy-MM-dd"),
-            "",
-            movimentacao_id=mov_id,
-        )
-
-        self._adicionar_recibo_pendente({
+        dados = {
             "empresa_razao": empresa["razao_social"],
             "empresa_cnpj": formatar_cnpj(empresa["cnpj"]),
             "nome": nome,
@@ -951,7 +977,22 @@ class GerarReciboWidget(QWidget):
             "template": "COMPACTO",
             "tipo_arquivo": "outros",
             "pessoa_nome": nome,
-        })
+        }
+        recibo_id = fabrica.emitir_recibo(
+            self.current_user["id"],
+            empresa["id"],
+            "OUTROS",
+            nome,
+            documento,
+            desc,
+            valor,
+            inicio.toString("yyyy-MM-dd"),
+            fim.toString("yyyy-MM-dd"),
+            data_pag.toString("yyyy-MM-dd"),
+            "",
+            dados_pdf=serializar(dados),
+        )["recibo_id"]
+        self._adicionar_recibo_pendente({**dados, "recibo_id": recibo_id})
 
     def _montar_preview(
         self,
@@ -992,26 +1033,20 @@ class GerarReciboWidget(QWidget):
     # --- Multi-receipt accumulation ---
 
     def _adicionar_recibo_pendente(self, recibo_data):
-        """Adds a receipt to the pending list and asks if user wants to add another."""
+        """Adds a receipt to the pending list and asks if user wants to add another.
+
+        Não há limite: o lote inteiro vira um único PDF, distribuído em
+        quantas páginas forem necessárias.
+        """
         self.pending_recibos.append(recibo_data)
         count = len(self.pending_recibos)
 
-        if count >= MAX_RECIBOS_POR_PAGINA:
-            # Max reached, auto-finalize
-            QMessageBox.information(
-                self, "Máximo Atingido",
-                f"Você atingiu o máximo de {MAX_RECIBOS_POR_PAGINA} recibos por página.\n"
-                "O PDF será gerado agora."
-            )
-            self._finalizar_pendentes()
-            return
-
         self._atualizar_barra_pendentes()
 
         resp = QMessageBox.question(
             self, "Adicionar Outro Recibo?",
-            f"Recibo adicionado ({count}/{MAX_RECIBOS_POR_PAGINA}).\n\n"
-            f"Deseja adicionar outro recibo \u00e0 mesma p\u00e1gina?",
+            f"Recibo adicionado ({count} no lote).\n\n"
+            f"Deseja adicionar outro recibo ao mesmo PDF?",
             QMessageBox.Yes | QMessageBox.No,
             QMessageBox.No,
         )
@@ -1022,9 +1057,10 @@ class GerarReciboWidget(QWidget):
     def _atualizar_barra_pendentes(self):
         count = len(self.pending_recibos)
         if count > 0:
+            por_pagina = self.cmb_por_pagina.currentData()
+            paginas = -(-count // por_pagina)
             self.lbl_pending.setText(
-                f"✉ {count} recibo(s) pendente(s) — "
-                f"máx. {MAX_RECIBOS_POR_PAGINA} por página"
+                f"✉ {count} recibo(s) pendente(s) — {paginas} página(s)"
             )
             self.btn_finalizar.setVisible(True)
             self.btn_cancelar_pendentes.setVisible(True)
@@ -1034,45 +1070,38 @@ class GerarReciboWidget(QWidget):
             self.btn_cancelar_pendentes.setVisible(False)
 
     def _finalizar_pendentes(self):
-        """Generate PDF with all pending receipts and reset."""
+        """Envia os recibos pendentes para a fila de PDF e limpa a lista.
+
+        Os registros já estão no banco; a renderização acontece em segundo
+        plano e um aviso com o botão "Abrir" aparece quando terminar.
+        """
         if not self.pending_recibos:
             return
 
-        base_dir = get_pdf_dir("Recibos", datetime.now().strftime("%Y-%m"))
-        agora = datetime.now().strftime("%Y%m%d_%H%M%S")
-        primeiro = self.pending_recibos[0]
-        arquivo = f"{primeiro['tipo_arquivo']}_{_safe_filename(primeiro['pessoa_nome'])}_{agora}.pdf"
-        caminho_pdf = os.path.join(base_dir, arquivo)
-
-        if len(self.pending_recibos) == 1:
-            # Single receipt — use original layout for best appearance
-            rec = self.pending_recibos[0]
-            gerar_pdf_recibo(
-                caminho_pdf,
-                rec["empresa_razao"],
-                rec["empresa_cnpj"],
-                rec["nome"],
-                rec["documento"],
-                rec["valor"],
-                rec["descricao"],
-                rec["data_inicio"],
-                rec["data_fim"],
-                rec["data_pagamento"],
-                template=rec["template"],
-            )
-        else:
-            gerar_pdf_multiplos_recibos(caminho_pdf, self.pending_recibos)
-
-        self._abrir_pdf(caminho_pdf)
+        get_fila().enviar(
+            self.pending_recibos,
+            self.cmb_por_pagina.currentData(),
+            self.chk_marcas_corte.isChecked(),
+        )
 
-        n = len(self.pending_recibos)
         self.pending_recibos = []
         self._atualizar_barra_pendentes()
 
-        QMessageBox.information(
-            self, "OK",
-            f"{n} recibo(s) gerado(s) com sucesso em uma página."
-        )
+    def _abrir_folha(self):
+        FolhaPagamentoDialog(
+            self.empresas,
+            self.current_user,
+            self.cmb_por_pagina.currentData(),
+            self.chk_marcas_corte.isChecked(),
+            self,
+        ).exec()
+
+    def _salvar_layout(self):
+        cfg = load_config()
+        cfg["recibos_por_pagina"] = self.cmb_por_pagina.currentData()
+        cfg["marcas_de_corte"] = self.chk_marcas_corte.isChecked()
+        save_config(cfg)
+        self._atualizar_barra_pendentes()
 
     def _cancelar_pendentes(self):
         """Discard all pending receipts (DB records already created)."""
@@ -1089,59 +1118,3 @@ class GerarReciboWidget(QWidget):
             self.pending_recibos = []
             self._atualizar_barra_pendentes()
 
-    def _gerar_pdf(
-        self,
-        empresa,
-        nome,
-        documento,
-        valor,
-        descricao,
-        data_inicio,
-        data_fim,
-        data_pagamento,
-        tipo,
-        pessoa_nome,
-        template="PADRAO",
-    ):
-        base_dir = get_pdf_dir("Recibos", datetime.now().strftime("%Y-%m"))
-        agora = datetime.now().strftime("%Y%m%d_%H%M%S")
-        arquivo = f"{tipo}_{_safe_filename(pessoa_nome)}_{agora}.pdf"
-        caminho_pdf = os.path.join(base_dir, arquivo)
-
-        gerar_pdf_recibo(
-            caminho_pdf,
-            empresa["razao_social"],
-            formatar_cnpj(empresa["cnpj"]),
-            nome,
-            documento,
-            valor,
-            descricao,
-            data_inicio,
-            data_fim,
-            data_pagamento,
-            template=template,
-        )
-        return caminho_pdf
-
-    def _registrar_saida_gaveta(self, valor, descricao):
-        """Registra saída automática na gaveta aberta do usuário atual.
-        Retorna o ID da movimentação ou None se nenhuma gaveta estiver aberta."""
-        sessao_repo = SqliteSessaoRepo()
-        mov_repo = SqliteMovimentacaoRepo()
-        sessao = sessao_repo.get_open_by_user(self.current_user["id"])
-        if not sessao:
-            return None
-        mov_id = mov_repo.create(
-            sessao_id=sessao["id"],
-            usuario_id=self.current_user["id"],
-            tipo="SAIDA",
-            valor=valor,
-            descricao=f"Recibo: {descricao[:80]}",
-        )
-        return mov_id
-
-    def _abrir_pdf(self, caminho_pdf):
-        try:
-            os.startfile(caminho_pdf)
-        except Exception:
-            pass
@@ -0,0 +1,56 @@
+from typing import Dict, Sequence
+
+from PySide6.QtCharts import (
+    QBarCategoryAxis,
+    QBarSet,
+    QChart,
+    QChartView,
+    QStackedBarSeries,
+    QValueAxis,
+)
+from PySide6.QtCore import Qt
+from PySide6.QtGui import QPainter
+
+
+class GraficoBarras(QChartView):
+    """Barras empilhadas: uma barra por categoria, uma cor por série."""
+
+    def __init__(self, titulo: str = "", parent=None):
+        super().__init__(parent)
+        self.setRenderHint(QPainter.Antialiasing)
+        self.setMinimumHeight(220)
+        self._titulo = titulo
+        self.set_dados([], {})
+
+    def set_dados(self, categorias: Sequence[str], series: Dict[str, Sequence[float]]):
+        """`series` mapeia o rótulo da série para um valor por categoria."""
+        chart = QChart()
+        chart.setTitle(self._titulo)
+        chart.setAnimationOptions(QChart.NoAnimation)
+        chart.legend().setAlignment(Qt.AlignBottom)
+        chart.legend().setVisible(len(series) > 1)
+        barras = QStackedBarSeries()
+        for rotulo, valores in series.items():
+            conjunto = QBarSet(rotulo)
+            conjunto.append([float(v) for v in valores])
+            barras.append(conjunto)
+        chart.addSeries(barras)
+
+        eixo_x = QBarCategoryAxis()
+        eixo_x.append(list(categorias))
+        eixo_y = QValueAxis()
+        eixo_y.setLabelFormat("%.0f")
+        # Negativos empilham para baixo: o eixo vai da menor à maior pilha
+        pilhas = list(zip(*series.values()))
+        maximo = max((sum(v for v in p if v > 0) for p in pilhas), default=0)
+        minimo = min((sum(v for v in p if v < 0) for p in pilhas), default=0)
+        eixo_y.setRange(minimo * 1.05, maximo * 1.05 or (0 if minimo else 1))
+        chart.addAxis(eixo_x, Qt.AlignBottom)
+        chart.addAxis(eixo_y, Qt.AlignLeft)
+        barras.attachAxis(eixo_x)
+        barras.attachAxis(eixo_y)
+
+        antigo = self.chart()
+        self.setChart(chart)
+        if antigo is not None:
+            antigo.deleteLater()
@@ -1,5 +1,3 @@
-import os
-
 from PySide6.QtCore import Qt
 from PySide6.QtWidgets import (
     QWidget,
@@ -13,7 +11,12 @@ from PySide6.QtWidgets import (
     QGroupBox,
 )
 
-from data.repositories.sqlite_recibo_repo import list_recibos, cancel_recibo, delete_recibo
+import armazem_pdf
+from domain.exceptions import ConcorrenciaError
+from remoto import fabrica
+from app_paths import load_config
+from pdf.gerador_pdf import POR_PAGINA_PADRAO
+from ui.impressao import abrir_pdf, imprimir
 from ui.validators import format_cpf, format_cnpj
 
 
@@ -48,10 +51,12 @@ class HistoricoWidget(QWidget):
         actions_layout = QHBoxLayout(actions_group)
         btns = actions_layout
         self.btn_refresh = QPushButton("Marcar todos")
+        self.btn_visualizar = QPushButton("Visualizar")
         self.btn_reprint = QPushButton("Reimprimir")
         self.btn_cancel = QPushButton("Cancelar Recibo")
         self.btn_delete = QPushButton("Excluir Recibo")
         btns.addWidget(self.btn_refresh)
+        btns.addWidget(self.btn_visualizar)
         btns.addWidget(self.btn_reprint)
         btns.addWidget(self.btn_cancel)
         btns.addWidget(self.btn_delete)
@@ -77,6 +82,7 @@ class HistoricoWidget(QWidget):
         layout.addWidget(table_group)
 
         self.btn_refresh.clicked.connect(self._select_all)
+        self.btn_visualizar.clicked.connect(self._handle_visualizar)
         self.btn_reprint.clicked.connect(self._handle_reprint)
         self.btn_cancel.clicked.connect(self._handle_cancel)
         self.btn_delete.clicked.connect(self._handle_delete)
@@ -84,7 +90,7 @@ class HistoricoWidget(QWidget):
     def _load_data(self):
         self.table.setRowCount(0)
         usuario_id = None if self.current_user["is_admin"] else self.current_user["id"]
-        for row in list_recibos(usuario_id=usuario_id):
+        for row in fabrica.list_recibos(usuario_id=usuario_id):
             row_idx = self.table.rowCount()
             self.table.insertRow(row_idx)
             chk = QTableWidgetItem("")
@@ -102,7 +108,6 @@ class HistoricoWidget(QWidget):
             )
             self.table.setItem(row_idx, 6, QTableWidgetItem(row["status"] or ""))
             self.table.item(row_idx, 0).setData(Qt.UserRole, row["id"])
-            self.table.item(row_idx, 0).setData(Qt.UserRole + 1, row["caminho_pdf"])
 
     def _selected_row(self):
         checked = self._checked_rows()
@@ -122,16 +127,43 @@ class HistoricoWidget(QWidget):
                 rows.append(r)
         return rows
 
+    def _ids_para_pdf(self):
+        rows = self._checked_rows()
+        if not rows:
+            row = self._selected_row()
+            if row is None:
+                QMessageBox.information(self, "Seleção", "Selecione um recibo.")
+                return None
+            rows = [row]
+        return [self.table.item(r, 0).data(Qt.UserRole) for r in rows]
+
+    def _pdf_dos_selecionados(self):
+        """Regera o PDF a partir dos dados gravados (via cache), então não
+        depende do arquivo da emissão original ainda existir."""
+        ids = self._ids_para_pdf()
+        if not ids:
+            return None
+        cfg = load_config()
+        try:
+            return fabrica.pdf_dos_recibos(
+                ids,
+                cfg.get("recibos_por_pagina", POR_PAGINA_PADRAO),
+                bool(cfg.get("marcas_de_corte", False)),
+            )
+        except Exception as e:
+            QMessageBox.critical(self, "Erro", f"Falha ao gerar o PDF:\n{e}")
+            return None
+
+    def _handle_visualizar(self):
+        caminho = self._pdf_dos_selecionados()
+        if caminho:
+            abrir_pdf(caminho, self)
+
     def _handle_reprint(self):
-        row = self._selected_row()
-        if row is None:
-            QMessageBox.information(self, "Seleção", "Selecione um recibo.")
-            return
-        caminho = self.table.item(row, 0).data(Qt.UserRole + 1)
-        if not caminho or not os.path.exists(caminho):
-            QMessageBox.warning(self, "Arquivo", "PDF não encontrado.")
-            return
-        os.startfile(caminho)
+        """Todos os recibos marcados saem em um único trabalho de impressão."""
+        caminho = self._pdf_dos_selecionados()
+        if caminho:
+            imprimir([caminho], self, "Reimpressão de recibos")
 
     def _handle_cancel(self):
         rows = self._checked_rows()
@@ -141,9 +173,10 @@ class HistoricoWidget(QWidget):
                 QMessageBox.information(self, "Seleção", "Selecione um recibo.")
                 return
             rows = [row]
-        for row in rows:
-            recibo_id = self.table.item(row, 0).data(Qt.UserRole)
-            cancel_recibo(recibo_id)
+        try:
+            fabrica.cancel_recibos([self.table.item(row, 0).data(Qt.UserRole) for row in rows])
+        except ConcorrenciaError as e:
+            QMessageBox.warning(self, "Banco ocupado", str(e))
         self._load_data()
 
     def _handle_delete(self):
@@ -163,9 +196,16 @@ class HistoricoWidget(QWidget):
             != QMessageBox.Yes
         ):
             return
-        for row in rows:
-            recibo_id = self.table.item(row, 0).data(Qt.UserRole)
-            delete_recibo(recibo_id)
+        ids = [self.table.item(row, 0).data(Qt.UserRole) for row in rows]
+        try:
+            fabrica.delete_recibos(ids)
+        except ConcorrenciaError as e:
+            QMessageBox.warning(self, "Banco ocupado", str(e))
+        else:
+            # O catálogo de PDFs é o do banco local; no modo servidor estes
+            # ids são os do servidor
+            if not fabrica.get_cliente():
+                armazem_pdf.desvincular(armazem_pdf.RECIBO, ids)
         self._load_data()
 
     def _select_all(self):
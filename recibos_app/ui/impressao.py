@@ -0,0 +1,150 @@
+"""Impressão direta de PDFs pelo Qt, sem abrir um visualizador externo.
+
+Os PDFs (recibos, relatórios) são rasterizados com QPdfDocument direto no
+QPrinter; vários arquivos saem como um único trabalho de impressão. Depois
+do diálogo da impressora, a rasterização roda fora da thread da interface
+(ui.tarefa_fundo), com o progresso por página.
+
+Para testes e máquinas sem impressora, definir a variável de ambiente
+GERADOR_RECIBOS_IMPRIMIR_EM com uma pasta faz toda impressão virar um PDF
+nessa pasta, sem diálogo.
+"""
+
+import os
+from datetime import datetime
+from typing import Callable, Iterable, List, Optional
+
+from PySide6.QtCore import QRectF, QSize, QUrl
+from PySide6.QtGui import QDesktopServices, QPainter
+from PySide6.QtPdf import QPdfDocument
+from PySide6.QtPrintSupport import QPrintDialog, QPrinter
+from PySide6.QtWidgets import QDialog, QMessageBox, QWidget
+
+from ui import tarefa_fundo
+
+VARIAVEL_ARQUIVO = "GERADOR_RECIBOS_IMPRIMIR_EM"
+# Acima disso o arquivo de spool só cresce, sem ganho visível no papel
+DPI_MAXIMO = 300
+
+
+def abrir_pdf(caminho: str, parent: Optional[QWidget] = None) -> bool:
+    """Abre o arquivo (ou pasta) no aplicativo padrão do sistema."""
+    if QDesktopServices.openUrl(QUrl.fromLocalFile(caminho)):
+        return True
+    if parent is not None:
+        QMessageBox.information(parent, "PDF", f"Arquivo salvo em:\n{caminho}")
+    return False
+
+
+def pasta_impressao_em_arquivo() -> Optional[str]:
+    return os.environ.get(VARIAVEL_ARQUIVO) or None
+
+
+def impressora_em_arquivo(caminho_saida: str) -> QPrinter:
+    printer = QPrinter(QPrinter.HighResolution)
+    printer.setOutputFormat(QPrinter.PdfFormat)
+    printer.setOutputFileName(caminho_saida)
+    return printer
+
+
+class LoteImpressao:
+    """Acumula PDFs e os envia à impressora como um único trabalho."""
+
+    def __init__(self, caminhos: Iterable[str] = ()):
+        self.caminhos: List[str] = list(caminhos)
+
+    def adicionar(self, caminho: str) -> None:
+        self.caminhos.append(caminho)
+
+    def __len__(self):
+        return len(self.caminhos)
+
+    def imprimir(self, printer: QPrinter, titulo: str = "Recibos",
+                 progresso: Optional[Callable[[int, int, str], None]] = None) -> int:
+        """Rasteriza todas as páginas no printer. Retorna o total de páginas.
+
+        Pode rodar fora da thread da interface; progresso(feitas, total,
+        texto) é chamada a cada página.
+        """
+        printer.setDocName(titulo)
+        documentos = []
+        try:
+            for caminho in self.caminhos:
+                doc = QPdfDocument()
+                documentos.append(doc)
+                if doc.load(caminho) != QPdfDocument.Error.None_:
+                    raise RuntimeError(f"Não foi possível ler o PDF:\n{caminho}")
+            total = sum(doc.pageCount() for doc in documentos)
+            painter = QPainter()
+            if not painter.begin(printer):
+                raise RuntimeError("Não foi possível iniciar a impressão.")
+            paginas = 0
+            dpi = min(printer.resolution(), DPI_MAXIMO)
+            try:
+                for doc in documentos:
+                    for i in range(doc.pageCount()):
+                        if paginas and not printer.newPage():
+                            raise RuntimeError("A impressora recusou uma nova página.")
+                        self._desenhar_pagina(painter, printer, doc, i, dpi)
+                        paginas += 1
+                        if progresso is not None:
+                            progresso(paginas, total, f"Página {paginas} de {total}")
+            finally:
+                painter.end()
+        finally:
+            for doc in documentos:
+                doc.close()
+        return paginas
+
+    @staticmethod
+    def _desenhar_pagina(painter, printer, doc, indice, dpi):
+        tamanho_pt = doc.pagePointSize(indice)
+        imagem = doc.render(
+            indice,
+            QSize(round(tamanho_pt.width() * dpi / 72), round(tamanho_pt.height() * dpi / 72)),
+        )
+        area = QRectF(printer.pageLayout().paintRectPixels(printer.resolution()))
+        area.moveTo(0, 0)
+        # Ajusta à área imprimível mantendo a proporção, centralizado
+        escala = min(area.width() / imagem.width(), area.height() / imagem.height())
+        largura, altura = imagem.width() * escala, imagem.height() * escala
+        destino = QRectF(
+            (area.width() - largura) / 2, (area.height() - altura) / 2, largura, altura
+        )
+        painter.drawImage(destino, imagem)
+
+
+def imprimir(caminhos: Iterable[str], parent: Optional[QWidget] = None,
+             titulo: str = "Recibos") -> Optional[str]:
+    """Mostra o diálogo de impressão e imprime os PDFs em um único trabalho.
+
+    A impressão segue em segundo plano depois do diálogo; o retorno é o nome
+    da impressora escolhida. No modo de impressão em arquivo, grava direto
+    (e na hora) na pasta configurada e retorna o caminho gerado. Retorna
+    None se o usuário cancelar.
+    """
+    lote = LoteImpressao(caminhos)
+    if not lote:
+        return None
+    pasta = pasta_impressao_em_arquivo()
+    if pasta:
+        os.makedirs(pasta, exist_ok=True)
+        saida = os.path.join(
+            pasta, f"impressao_{datetime.now().strftime('%Y%m%d_%H%M%S_%f')}.pdf"
+        )
+        lote.imprimir(impressora_em_arquivo(saida), titulo)
+        return saida
+
+    printer = QPrinter(QPrinter.HighResolution)
+    dialogo = QPrintDialog(printer, parent)
+    dialogo.setWindowTitle(f"Imprimir — {titulo}")
+    if dialogo.exec() != QDialog.Accepted:
+        return None
+    tarefa_fundo.executar(
+        parent,
+        f"Imprimindo — {titulo}",
+        lambda progresso: lote.imprimir(printer, titulo, progresso),
+        lambda _paginas: None,
+        lambda mensagem: QMessageBox.warning(parent, "Impressão", mensagem),
+    )
+    return printer.printerName() or printer.outputFileName()
@@ -0,0 +1,280 @@
+"""Listas pesquisáveis para combos com centenas ou milhares de nomes.
+
+ListaPesquisavel é o modelo compartilhado: carregado uma vez por conjunto
+de dados (colaboradores, fornecedores...) e usado por todos os combos que
+mostram esse conjunto. Cada combo ganha um QCompleter com o próprio modelo
+de resultados, filtrado a cada tecla pelo IndiceBusca:
+
+- chave normalizada (sem acento, sem diferença de maiúsculas) calculada
+  uma vez por nome;
+- índice de prefixos de palavras (lista ordenada + bisect): "jo sil"
+  encontra "João da Silva";
+- índice de trigramas para tolerar erros de digitação ("slvia" ainda
+  encontra "Sílvia") quando os prefixos não bastam.
+"""
+
+import re
+import unicodedata
+from array import array
+from bisect import bisect_left
+from collections import Counter
+from typing import Callable, Dict, Iterable, List, Sequence
+
+from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
+from PySide6.QtWidgets import QComboBox, QCompleter
+
+LIMITE_RESULTADOS = 100
+# Com menos resultados exatos que isso, a busca completa com nomes parecidos
+MINIMO_SEM_APROXIMAR = 10
+# Fração mínima dos trigramas da palavra digitada que uma palavra precisa ter
+LIMIAR_TRIGRAMAS = 0.3
+_SEPARADORES = re.compile(r"[^0-9a-z]+")
+
+
+def normalizar(texto: str) -> str:
+    """Minúsculas, sem acentos e com espaços simples."""
+    decomposto = unicodedata.normalize("NFKD", texto or "")
+    sem_acento = "".join(ch for ch in decomposto if not unicodedata.combining(ch))
+    return " ".join(_SEPARADORES.split(sem_acento.casefold())).strip()
+
+
+def _trigramas(palavra: str, final: bool = True) -> set:
+    # Bordas marcadas com espaço: o começo da palavra pesa mais. Na última
+    # palavra da busca (ainda sendo digitada) o fim fica em aberto.
+    s = f" {palavra} " if final else f" {palavra}"
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+class IndiceBusca:
+    """Índice de prefixos e trigramas sobre uma lista fixa de textos.
+
+    Os trigramas são das palavras distintas (o vocabulário), não dos nomes
+    inteiros: a lista é bem menor que a de nomes, e um erro em uma palavra
+    não impede que as outras palavras continuem filtrando normalmente.
+    """
+
+    def __init__(self, textos: Sequence[str]):
+        self.chaves = [normalizar(t) for t in textos]
+        por_palavra = {}
+        for i, chave in enumerate(self.chaves):
+            for palavra in set(chave.split()):
+                por_palavra.setdefault(palavra, array("l")).append(i)
+        self._palavras = sorted(por_palavra)
+        self._ids_palavra = [por_palavra[p] for p in self._palavras]
+        posicao = {p: k for k, p in enumerate(self._palavras)}
+        self._palavras_do_nome = [
+            tuple(posicao[p] for p in set(chave.split())) for chave in self.chaves
+        ]
+        self._trigramas = {}
+        for k, palavra in enumerate(self._palavras):
+            for tg in _trigramas(palavra):
+                self._trigramas.setdefault(tg, array("l")).append(k)
+        # Nomes inteiros ordenados: "começa com a consulta" também vira bisect
+        ordem = sorted(range(len(self.chaves)), key=self.chaves.__getitem__)
+        self._chaves_ordenadas = [self.chaves[i] for i in ordem]
+        self._ordem_chaves = array("l", ordem)
+
+    def __len__(self):
+        return len(self.chaves)
+
+    @staticmethod
+    def _faixa(ordenadas, prefixo: str) -> range:
+        inicio = bisect_left(ordenadas, prefixo)
+        return range(inicio, bisect_left(ordenadas, prefixo + "\uffff", inicio))
+
+    def _ids(self, palavras: Iterable[int]) -> set:
+        ids = set()
+        for k in palavras:
+            ids.update(self._ids_palavra[k])
+        return ids
+
+    def _parecidas(self, palavra: str, final: bool) -> Dict[int, float]:
+        """Palavras do vocabulário parecidas com `palavra` -> semelhança (0 a 1)."""
+        alvo = _trigramas(palavra, final)
+        contagem = Counter()
+        for tg in alvo:
+            lista = self._trigramas.get(tg)
+            if lista is not None:
+                contagem.update(lista)
+        minimo = len(alvo) * LIMIAR_TRIGRAMAS
+        return {k: n / len(alvo) for k, n in contagem.items() if n >= minimo}
+
+    def buscar(self, consulta: str, limite: int = LIMITE_RESULTADOS) -> List[int]:
+        """Posições que casam com a consulta, as melhores primeiro.
+
+        Primeiro vêm os nomes em que cada palavra digitada é início de uma
+        palavra do nome (os que começam pela consulta inteira à frente).
+        Com poucos resultados assim, entram os nomes em que cada palavra
+        digitada é início ou parecida com alguma palavra do nome, ordenados
+        pela semelhança.
+        """
+        q = normalizar(consulta)
+        if not q:
+            return list(range(min(len(self.chaves), limite)))
+        palavras = q.split()
+        prefixos = [self._faixa(self._palavras, p) for p in palavras]
+
+        encontrados = None
+        for faixa in sorted(prefixos, key=len):
+            ids = self._ids(faixa)
+            encontrados = ids if encontrados is None else encontrados & ids
+            if not encontrados:
+                break
+        faixa_nome = self._faixa(self._chaves_ordenadas, q)
+        comeca = encontrados & set(self._ordem_chaves[faixa_nome.start:faixa_nome.stop])
+        resultado = sorted(comeca)
+        if len(resultado) < limite:
+            resultado.extend(sorted(encontrados - comeca)[:limite - len(resultado)])
+        if len(resultado) >= MINIMO_SEM_APROXIMAR or len(q) < 3:
+            return resultado[:limite]
+
+        # Semelhança de cada palavra do vocabulário com cada palavra digitada
+        # (prefixo exato vale 1); o nome precisa ter alguma para cada uma
+        semelhancas = []
+        candidatos = None
+        for n, (palavra, faixa) in enumerate(zip(palavras, prefixos)):
+            sem = self._parecidas(palavra, final=n < len(palavras) - 1) if len(palavra) >= 3 else {}
+            sem.update(dict.fromkeys(faixa, 1.0))
+            if not sem:
+                return resultado
+            semelhancas.append(sem)
+            ids = self._ids(sem)
+            candidatos = ids if candidatos is None else candidatos & ids
+            if not candidatos:
+                return resultado
+        candidatos -= encontrados
+        falta = limite - len(resultado)
+
+        if len(semelhancas) == 1:
+            # Uma palavra só: a ordem é a das palavras mais parecidas, sem
+            # pontuar nome a nome (palavras comuns trazem milhares de nomes)
+            for k in sorted(semelhancas[0], key=lambda k: -semelhancas[0][k]):
+                novos = sorted(candidatos.intersection(self._ids_palavra[k]))
+                resultado.extend(novos[:falta])
+                candidatos.difference_update(novos)
+                falta = limite - len(resultado)
+                if falta <= 0:
+                    break
+            return resultado
+
+        def _pontos(i):
+            do_nome = self._palavras_do_nome[i]
+            return sum(max(sem.get(k, 0.0) for k in do_nome) for sem in semelhancas)
+
+        parecidos = sorted((-_pontos(i), i) for i in candidatos)
+        resultado.extend(i for _, i in parecidos[:falta])
+        return resultado
+
+
+class ListaPesquisavel(QAbstractListModel):
+    """Modelo de lista compartilhado entre combos, com índice de busca."""
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self._rotulos: List[str] = []
+        self._ids: tuple = ()
+        self.indice = IndiceBusca([])
+
+    def carregar(self, rows: Iterable, rotulo_fn: Callable,
+                 id_fn: Callable = lambda r: r["id"]):
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        self.beginResetModel()
+        self._rotulos = [rotulo_fn(r) or "" for r in rows]
+        self._ids = tuple(map(id_fn, rows))
+        self.indice = IndiceBusca(self._rotulos)
+        self.endResetModel()
+
+    def rotulo(self, linha: int) -> str:
+        return self._rotulos[linha]
+
+    def buscar(self, texto: str, limite: int = LIMITE_RESULTADOS) -> List[int]:
+        return self.indice.buscar(texto, limite)
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._rotulos)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        if role in (Qt.DisplayRole, Qt.EditRole):
+            return self._rotulos[index.row()]
+        if role == Qt.UserRole:
+            return self._ids[index.row()]
+        return None
+
+
+class _Resultados(QAbstractListModel):
+    """Resultados da busca de um combo: posições na lista compartilhada."""
+
+    def __init__(self, lista: ListaPesquisavel, parent=None):
+        super().__init__(parent)
+        self.lista = lista
+        self._linhas = array("l")
+        lista.modelReset.connect(self.limpar)
+
+    def filtrar(self, texto: str) -> int:
+        self.beginResetModel()
+        self._linhas = array("l", self.lista.buscar(texto))
+        self.endResetModel()
+        return len(self._linhas)
+
+    def limpar(self):
+        self.beginResetModel()
+        self._linhas = array("l")
+        self.endResetModel()
+
+    def linha_origem(self, linha: int) -> int:
+        return self._linhas[linha]
+
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self._linhas)
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid() or role not in (Qt.DisplayRole, Qt.EditRole):
+            return None
+        return self.lista.rotulo(self._linhas[index.row()])
+
+
+def tornar_pesquisavel(combo: QComboBox, lista: ListaPesquisavel) -> QCompleter:
+    """Liga o combo à lista compartilhada e o torna editável com busca.
+
+    O índice do combo continua sendo a posição na lista, então quem lê
+    combo.currentIndex() não muda.
+    """
+    combo.setModel(lista)
+    combo.setEditable(True)
+    combo.setInsertPolicy(QComboBox.NoInsert)
+    resultados = _Resultados(lista, combo)
+    completer = QCompleter(resultados, combo)
+    completer.setCompletionMode(QCompleter.UnfilteredPopupCompletion)
+    completer.setMaxVisibleItems(12)
+    combo.setCompleter(completer)
+    editor = combo.lineEdit()
+
+    def _ao_digitar(texto):
+        if resultados.filtrar(texto):
+            completer.complete()
+        else:
+            completer.popup().hide()
+
+    def _escolher(index):
+        if index.isValid():
+            combo.setCurrentIndex(resultados.linha_origem(index.row()))
+
+    def _confirmar():
+        # Texto digitado sem escolher no popup: fica o melhor resultado,
+        # ou volta o nome selecionado se nada casar
+        atual = combo.currentIndex()
+        texto = editor.text()
+        if atual >= 0 and texto == lista.rotulo(atual):
+            return
+        achados = lista.buscar(texto, 1) if texto.strip() else []
+        if achados:
+            combo.setCurrentIndex(achados[0])
+        if combo.currentIndex() >= 0:
+            editor.setText(lista.rotulo(combo.currentIndex()))
+
+    editor.textEdited.connect(_ao_digitar)
+    completer.activated[QModelIndex].connect(_escolher)
+    editor.editingFinished.connect(_confirmar)
+    return completer
@@ -1,7 +1,6 @@
-import os
-
-from PySide6.QtWidgets import QMainWindow, QTabWidget, QToolBar, QPushButton, QFileDialog, QMessageBox, QWidget, QVBoxLayout
+from PySide6.QtWidgets import QMainWindow, QTabWidget, QToolBar, QPushButton, QFileDialog, QMessageBox, QWidget, QVBoxLayout, QInputDialog, QLineEdit
 from PySide6.QtGui import QFont, QPalette, QColor
+from PySide6.QtCore import QDate, Qt
 from PySide6.QtWidgets import QApplication
 
 from ui.cadastro_empresa import CadastroEmpresaWidget
@@ -12,8 +11,19 @@ from ui.gerar_recibo import GerarReciboWidget
 from ui.historico import HistoricoWidget
 from ui.relatorios import RelatoriosWidget
 from ui.cadastro_usuario import CadastroUsuarioWidget
+from ui.painel import PainelWidget
 from app_paths import set_data_dir, get_data_dir, get_pdf_dir
 from backup import BackupManager
+from arquivamento import ArquivoManager
+import armazem_pdf
+import fechamento_mes
+import resumo_diario
+from remoto import fabrica
+from ui.diagnostico import DiagnosticoDialog
+from ui.calendario_trabalho import FeriadosDialog
+from ui.fila_pdf import get_fila
+from ui.impressao import abrir_pdf
+from ui import tarefa_fundo
 from presentation.gavetas_panel import GavetasPanelWidget
 from presentation.auditoria_widget import AuditoriaWidget
 
@@ -63,10 +73,22 @@ class MainWindow(QMainWindow):
         if self.current_user["is_admin"]:
             self.tabs.addTab(self.tab_usuarios, "Usuários")
             self.tabs.addTab(self.tab_auditoria, "Auditoria")
+            # Visão geral primeiro; o timer dele só roda com a aba visível.
+            # O painel lê o app.db direto, então só existe no modo local
+            if not fabrica.get_cliente():
+                self.tab_painel = PainelWidget(self.current_user)
+                self.tabs.insertTab(0, self.tab_painel, "Painel")
+                self.tabs.setCurrentIndex(0)
 
         self.tabs.currentChanged.connect(self._on_tab_changed)
         self._build_menu()
 
+        # Avisos da fila de PDFs aparecem nesta janela; jobs interrompidos
+        # na última execução são retomados
+        fila = get_fila()
+        fila.set_janela(self)
+        fila.retomar_pendentes()
+
     def _build_toolbar(self):
         toolbar = QToolBar("Ações")
         toolbar.setMovable(False)
@@ -101,6 +123,27 @@ class MainWindow(QMainWindow):
             act_do_backup = admin_menu.addAction("💾 Fazer Backup Agora")
             act_do_backup.triggered.connect(self._do_backup_now)
 
+            act_arquivar = admin_menu.addAction("🗄️ Arquivar Dados Antigos")
+            act_arquivar.triggered.connect(self._arquivar_dados)
+
+            act_mes = admin_menu.addAction("📅 Fechamento do Mês")
+            act_mes.triggered.connect(self._fechamento_mes)
+
+            act_feriados = admin_menu.addAction("📆 Feriados e Jornada")
+            act_feriados.triggered.connect(self._configure_feriados)
+
+            act_resumo = admin_menu.addAction("📊 Reconstruir Resumo Diário")
+            act_resumo.triggered.connect(self._reconstruir_resumo)
+
+            act_pdfs = admin_menu.addAction("🧹 Manutenção de PDFs")
+            act_pdfs.triggered.connect(self._manutencao_pdfs)
+
+            act_servidor = admin_menu.addAction("🖧 Configurar Servidor de Dados")
+            act_servidor.triggered.connect(self._configure_servidor)
+
+            act_diag = admin_menu.addAction("🩺 Diagnóstico de Desempenho")
+            act_diag.triggered.connect(self._open_diagnostico)
+
             admin_menu.addSeparator()
 
             act_open_data = admin_menu.addAction("📂 Abrir Pasta de Dados")
@@ -152,18 +195,159 @@ class MainWindow(QMainWindow):
         else:
             QMessageBox.warning(self, "Backup", resultado["mensagem"])
 
+    def _somente_local(self, titulo):
+        """Ações que abrem o app.db desta estação: com servidor de dados
+        configurado, rodam no computador do servidor."""
+        if not fabrica.get_cliente():
+            return True
+        QMessageBox.information(
+            self,
+            titulo,
+            "Esta estação usa um servidor de dados.\n"
+            "Execute esta ação no computador do servidor.",
+        )
+        return False
+
+    def _arquivar_dados(self):
+        if not self._somente_local("Arquivar Dados Antigos"):
+            return
+        dias, ok = QInputDialog.getInt(
+            self,
+            "Arquivar Dados Antigos",
+            "Arquivar sessões fechadas e recibos com mais de quantos dias?",
+            ArquivoManager.get_idade_dias(),
+            30,
+            3650,
+        )
+        if not ok:
+            return
+        ArquivoManager.set_idade_dias(dias)
+        resultado = ArquivoManager.arquivar(dias)
+        if resultado["sucesso"]:
+            QMessageBox.information(self, "Arquivamento", resultado["mensagem"])
+        else:
+            QMessageBox.warning(self, "Arquivamento", resultado["mensagem"])
+
+    def _fechamento_mes(self):
+        # fechamento_mes lê a foto do app.db local (leitura.instantaneo)
+        if not self._somente_local("Fechamento do Mês"):
+            return
+        mes, ok = QInputDialog.getText(
+            self,
+            "Fechamento do Mês",
+            "Gerar os relatórios de todas as empresas e gavetas do mês (AAAA-MM):",
+            text=QDate.currentDate().addMonths(-1).toString("yyyy-MM"),
+        )
+        if not ok or not mes.strip():
+            return
+        mes = mes.strip()
+        tarefa_fundo.executar(
+            self,
+            "Fechamento do Mês",
+            lambda progresso: fechamento_mes.fechar_mes(mes, progresso=progresso),
+            self._fechamento_mes_concluido,
+            lambda mensagem: QMessageBox.warning(
+                self, "Fechamento do Mês", f"Falha no fechamento:\n{mensagem}"
+            ),
+        )
+
+    def _fechamento_mes_concluido(self, resultado):
+        if (
+            QMessageBox.question(
+                self,
+                "Fechamento do Mês",
+                f"{len(resultado.relatorios)} relatório(s) gerado(s) em "
+                f"{resultado.segundos:.1f}s.\n{resultado.pasta}\n\nAbrir o índice?",
+            )
+            == QMessageBox.Yes
+        ):
+            abrir_pdf(resultado.indice, self)
+
+    def _reconstruir_resumo(self):
+        if not self._somente_local("Resumo Diário"):
+            return
+        QApplication.setOverrideCursor(Qt.WaitCursor)
+        try:
+            linhas = resumo_diario.reconstruir()
+        except Exception as e:
+            QApplication.restoreOverrideCursor()
+            QMessageBox.warning(self, "Resumo Diário", f"Falha ao reconstruir:\n{e}")
+            return
+        QApplication.restoreOverrideCursor()
+        QMessageBox.information(
+            self, "Resumo Diário", f"Resumo reconstruído: {linhas} linha(s)."
+        )
+
+    def _manutencao_pdfs(self):
+        if not self._somente_local("Manutenção de PDFs"):
+            return
+        if (
+            QMessageBox.question(
+                self,
+                "Manutenção de PDFs",
+                "Remover PDFs que não estão mais vinculados a nenhum recibo, sessão "
+                "ou relatório e compactar os meses encerrados?",
+            )
+            != QMessageBox.Yes
+        ):
+            return
+        try:
+            resultado = armazem_pdf.manutencao()
+        except Exception as e:
+            QMessageBox.warning(self, "Manutenção de PDFs", f"Falha na manutenção:\n{e}")
+            return
+        QMessageBox.information(
+            self,
+            "Manutenção de PDFs",
+            f"PDFs removidos: {resultado['blobs'] + resultado['orfaos']} "
+            f"({resultado['bytes'] / (1024 * 1024):.1f} MB)\n"
+            f"PDFs compactados: {resultado['empacotados']}",
+        )
+
+    def _configure_servidor(self):
+        endereco, ok = QInputDialog.getText(
+            self,
+            "Servidor de Dados",
+            "Endereço do servidor (host ou host:porta).\n"
+            "Deixe em branco para usar o banco local.",
+            text=fabrica.get_servidor() or "",
+        )
+        if not ok:
+            return
+        endereco = endereco.strip()
+        segredo = None
+        if endereco:
+            segredo, ok = QInputDialog.getText(
+                self,
+                "Servidor de Dados",
+                "Senha compartilhada do servidor.\n"
+                "Deixe em branco para manter a atual.",
+                QLineEdit.Password,
+            )
+            if not ok:
+                return
+            segredo = segredo or None
+        fabrica.set_servidor(endereco or None, segredo)
+        QMessageBox.information(
+            self,
+            "Servidor de Dados",
+            "Configuração salva. Reinicie o aplicativo para aplicar.",
+        )
+
+    def _configure_feriados(self):
+        FeriadosDialog(self).exec()
+
+    def _open_diagnostico(self):
+        DiagnosticoDialog(self).exec()
+
     def _open_data_dir(self):
         path = get_data_dir()
-        try:
-            os.startfile(path)
-        except Exception:
+        if not abrir_pdf(path):
             QMessageBox.information(self, "Dados", f"Pasta: {path}")
 
     def _open_pdf_dir(self):
         path = get_pdf_dir()
-        try:
-            os.startfile(path)
-        except Exception:
+        if not abrir_pdf(path):
             QMessageBox.information(self, "PDFs", f"Pasta: {path}")
 
     def _apply_theme(self):
@@ -204,7 +388,7 @@ class MainWindow(QMainWindow):
                 }
                 QPushButton:hover { background: #c90808; }
                 QPushButton:disabled { background: #f3a0a0; }
-                QTableWidget {
+                QTableWidget, QTableView {
                     background: #ffffff;
                     border: 1px solid #dcdfe6;
                     gridline-color: #eef1f7;
@@ -275,7 +459,7 @@ class MainWindow(QMainWindow):
                 }
                 QPushButton:hover { background: #c90808; }
                 QPushButton:disabled { background: #6b3b3b; }
-                QTableWidget {
+                QTableWidget, QTableView {
                     background: #151821;
                     border: 1px solid #2a2f3a;
                     gridline-color: #2a2f3a;
@@ -284,7 +468,7 @@ class MainWindow(QMainWindow):
                     color: #e6e9ef;
                     alternate-background-color: #1b1f29;
                 }
-                QTableWidget::item:selected { background: #243048; color: #e6e9ef; }
+                QTableWidget::item:selected, QTableView::item:selected { background: #243048; color: #e6e9ef; }
                 QHeaderView::section {
                     background: #1a1d24;
                     padding: 6px 8px;
@@ -0,0 +1,208 @@
+from PySide6.QtCore import QTimer, Qt
+from PySide6.QtGui import QColor
+from PySide6.QtWidgets import (
+    QWidget,
+    QVBoxLayout,
+    QHBoxLayout,
+    QLabel,
+    QPushButton,
+    QTableView,
+    QHeaderView,
+    QGroupBox,
+    QSplitter,
+)
+
+from fechamento_mes import ROTULOS_TIPO
+from painel import DIAS_TENDENCIA, FontePainel
+from pdf.gerador_pdf import formatar_moeda
+from ui.grafico_barras import GraficoBarras
+from ui.table_model import ColumnarTableModel, Coluna
+
+# A verificação sem mudanças é um PRAGMA data_version: pode ser frequente
+INTERVALO_MS = 5000
+
+_NUMERICO = Qt.AlignRight | Qt.AlignVCenter
+
+
+def _moeda(v):
+    return "" if v is None else f"R$ {formatar_moeda(v)}"
+
+
+def _cor_diferenca(v):
+    if v is None or abs(v) < 0.005:
+        return None
+    return QColor("#c62828") if v < 0 else QColor("#1565c0")
+
+
+def _tabela(colunas, parent):
+    model = ColumnarTableModel(colunas, parent)
+    view = QTableView()
+    view.setModel(model)
+    view.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeToContents)
+    view.horizontalHeader().setSectionResizeMode(0, QHeaderView.Stretch)
+    view.setSortingEnabled(True)
+    view.setAlternatingRowColors(True)
+    view.verticalHeader().setVisible(False)
+    return model, view
+
+
+def _colunas_hoje_mes(titulo, rotulo=None):
+    return [
+        Coluna(titulo, formatar=rotulo),
+        Coluna("Qtd. hoje", alinhamento=_NUMERICO),
+        Coluna("Hoje", formatar=_moeda, alinhamento=_NUMERICO),
+        Coluna("Qtd. mês", alinhamento=_NUMERICO),
+        Coluna("Mês", formatar=_moeda, alinhamento=_NUMERICO),
+    ]
+
+
+def _hoje_e_mes(hoje, mes):
+    """Linhas (chave, hoje, mês) a partir dos dois dicionários de totais."""
+    return [
+        (chave, hoje.get(chave, (0, 0.0)), mes.get(chave, (0, 0.0)))
+        for chave in sorted(set(hoje) | set(mes))
+    ]
+
+
+class PainelWidget(QWidget):
+    """Visão geral para o admin: gavetas, saídas do dia/mês e divergências.
+
+    O timer só roda com a aba visível, e cada tique só consulta o banco se
+    outra estação gravou algo (ver painel.FontePainel).
+    """
+
+    def __init__(self, current_user):
+        super().__init__()
+        self.current_user = current_user
+        self.fonte = FontePainel()
+        self.timer = QTimer(self)
+        self.timer.setInterval(INTERVALO_MS)
+        self.timer.timeout.connect(self._atualizar)
+        self._build_ui()
+
+    def _build_ui(self):
+        layout = QVBoxLayout(self)
+        layout.setContentsMargins(16, 16, 16, 16)
+        layout.setSpacing(12)
+
+        topo = QHBoxLayout()
+        self.lbl_hoje = QLabel("")
+        self.lbl_mes = QLabel("")
+        for lbl in (self.lbl_hoje, self.lbl_mes):
+            lbl.setStyleSheet("font-size: 13pt; font-weight: bold;")
+            topo.addWidget(lbl)
+            topo.addSpacing(24)
+        topo.addStretch(1)
+        self.lbl_lido = QLabel("")
+        self.btn_atualizar = QPushButton("Atualizar")
+        topo.addWidget(self.lbl_lido)
+        topo.addWidget(self.btn_atualizar)
+        layout.addLayout(topo)
+
+        gavetas_group = QGroupBox("Gavetas")
+        gavetas_layout = QVBoxLayout(gavetas_group)
+        self.gavetas_model, self.gavetas_table = _tabela([
+            Coluna("Gaveta"),
+            Coluna("Responsável"),
+            Coluna("Aberta em"),
+            Coluna("Saldo inicial", formatar=_moeda, alinhamento=_NUMERICO),
+            Coluna("Entradas", formatar=_moeda, alinhamento=_NUMERICO),
+            Coluna("Saídas", formatar=_moeda, alinhamento=_NUMERICO),
+            Coluna("Saldo atual", formatar=_moeda, alinhamento=_NUMERICO),
+        ], self)
+        gavetas_layout.addWidget(self.gavetas_table)
+        layout.addWidget(gavetas_group, 2)
+
+        saidas = QSplitter(Qt.Horizontal)
+        tipo_group = QGroupBox("Saídas por tipo")
+        tipo_layout = QVBoxLayout(tipo_group)
+        self.tipo_model, self.tipo_table = _tabela(
+            _colunas_hoje_mes("Tipo", lambda t: ROTULOS_TIPO.get(t or "", t or "")), self
+        )
+        tipo_layout.addWidget(self.tipo_table)
+        empresa_group = QGroupBox("Saídas por empresa")
+        empresa_layout = QVBoxLayout(empresa_group)
+        self.empresa_model, self.empresa_table = _tabela(_colunas_hoje_mes("Empresa"), self)
+        empresa_layout.addWidget(self.empresa_table)
+        saidas.addWidget(tipo_group)
+        saidas.addWidget(empresa_group)
+        layout.addWidget(saidas, 2)
+
+        div_group = QGroupBox(f"Divergências nos fechamentos (últimos {DIAS_TENDENCIA} dias)")
+        div_layout = QHBoxLayout(div_group)
+        self.grafico = GraficoBarras("Soma das diferenças por dia (R$)")
+        self.div_model, self.div_table = _tabela([
+            Coluna("Gaveta"),
+            Coluna("Fechamentos", alinhamento=_NUMERICO),
+            Coluna("Com diferença", alinhamento=_NUMERICO),
+            Coluna("Soma", formatar=_moeda, cor=_cor_diferenca, alinhamento=_NUMERICO),
+            Coluna("Maior", formatar=_moeda, cor=_cor_diferenca, alinhamento=_NUMERICO),
+        ], self)
+        div_layout.addWidget(self.grafico, 3)
+        div_layout.addWidget(self.div_table, 2)
+        layout.addWidget(div_group, 3)
+
+        self.btn_atualizar.clicked.connect(lambda: self._atualizar(forcar=True))
+
+    # --- Atualização ---
+
+    def showEvent(self, event):
+        super().showEvent(event)
+        self._atualizar()
+        self.timer.start()
+
+    def hideEvent(self, event):
+        self.timer.stop()
+        super().hideEvent(event)
+
+    def _atualizar(self, forcar=False):
+        painel = self.fonte.atualizar(forcar)
+        if painel is None:
+            return
+        self._render(painel)
+
+    def _render(self, painel):
+        self.lbl_lido.setText(f"Atualizado às {painel.lido_em}")
+        for lbl, titulo, totais in (
+            (self.lbl_hoje, "Saídas hoje", painel.hoje_por_tipo),
+            (self.lbl_mes, "Saídas no mês", painel.mes_por_tipo),
+        ):
+            qtd = sum(q for q, _ in totais.values())
+            total = sum(t for _, t in totais.values())
+            lbl.setText(f"{titulo}: {_moeda(total)} ({qtd})")
+
+        self.gavetas_model.set_rows(painel.gavetas, [
+            lambda g: g.gaveta_nome,
+            lambda g: g.responsavel_nome if g.sessao_id else "— fechada —",
+            lambda g: g.aberta_em,
+            lambda g: g.saldo_inicial if g.sessao_id else None,
+            lambda g: g.total_entradas if g.sessao_id else None,
+            lambda g: g.total_saidas if g.sessao_id else None,
+            lambda g: g.saldo_atual if g.sessao_id else None,
+        ])
+        extratores = [
+            lambda r: r[0],
+            lambda r: r[1][0],
+            lambda r: r[1][1],
+            lambda r: r[2][0],
+            lambda r: r[2][1],
+        ]
+        self.tipo_model.set_rows(
+            _hoje_e_mes(painel.hoje_por_tipo, painel.mes_por_tipo), extratores
+        )
+        self.empresa_model.set_rows(
+            _hoje_e_mes(painel.hoje_por_empresa, painel.mes_por_empresa), extratores
+        )
+
+        dias = painel.divergencias_por_dia
+        self.grafico.set_dados(
+            [f"{d.chave[8:10]}/{d.chave[5:7]}" for d in dias],
+            {"Diferença": [d.soma for d in dias]},
+        )
+        self.div_model.set_rows(painel.divergencias_por_gaveta, [
+            lambda d: d.chave,
+            lambda d: d.fechamentos,
+            lambda d: d.com_diferenca,
+            lambda d: d.soma,
+            lambda d: d.maior,
+        ])
@@ -1,5 +1,3 @@
-from datetime import datetime
-
 from PySide6.QtCore import QDate, Qt
 from PySide6.QtWidgets import (
     QWidget,
@@ -11,18 +9,24 @@ from PySide6.QtWidgets import (
     QListWidget,
     QListWidgetItem,
     QAbstractItemView,
-    QTableWidget,
-    QTableWidgetItem,
+    QTableView,
     QGroupBox,
     QMessageBox,
     QHeaderView,
+    QSplitter,
+    QStackedWidget,
 )
 
+from arquivamento import list_recibos_com_arquivo
 from data.repositories.sqlite_empresa_repo import list_empresas
 from data.repositories.sqlite_usuario_repo import list_usuarios
-from data.repositories.sqlite_recibo_repo import list_recibos_filtrados
-from data.repositories.sqlite_gaveta_repo import SqliteGavetaRepo
+import resumo_diario
+from remoto import fabrica
 from pdf.gerador_pdf import formatar_moeda
+from pdf.relatorio_recibos_pdf import gerar_pdf_relatorio_recibos
+from ui.grafico_barras import GraficoBarras
+from ui.impressao import abrir_pdf
+from ui.table_model import ColumnarTableModel, Coluna
 
 
 _TIPO_LABELS = {
@@ -36,6 +40,18 @@ _TIPO_LABELS = {
     "SAIDA_AVULSA": "Saída Avulsa (Gaveta)",
 }
 
+_EXTRATORES = [
+    lambda r: r["created_at"] or "",
+    lambda r: r["razao_social"] or "",
+    lambda r: r["username"] or "",
+    lambda r: r["tipo"] or "",
+    lambda r: r["pessoa_nome"] or "",
+    lambda r: r["pessoa_documento"] or "",
+    lambda r: r["valor"] or 0,
+    lambda r: r["descricao"] or "",
+    lambda r: r.get("gaveta_nome", "") or "",
+]
+
 
 class RelatoriosWidget(QWidget):
     def __init__(self, current_user):
@@ -120,36 +136,70 @@ class RelatoriosWidget(QWidget):
 
         btns = QHBoxLayout()
         self.btn_buscar = QPushButton("Buscar")
+        self.btn_totais = QPushButton("Somente Totais")
+        self.btn_totais.setToolTip("Totais por período e tipo, lidos do resumo diário")
         self.btn_pdf = QPushButton("Exportar PDF")
         btns.addWidget(self.btn_buscar)
+        btns.addWidget(self.btn_totais)
         btns.addWidget(self.btn_pdf)
         layout.addLayout(btns)
 
         table_group = QGroupBox("Resultados")
         table_layout = QVBoxLayout(table_group)
-        self.table = QTableWidget(0, 9)
-        self.table.setHorizontalHeaderLabels(
+        self.table_model = ColumnarTableModel(
             [
-                "Data",
-                "Empresa",
-                "Usuário",
-                "Tipo",
-                "Pessoa",
-                "Documento",
-                "Valor",
-                "Descrição",
-                "Gaveta",
-            ]
+                Coluna("Data"),
+                Coluna("Empresa"),
+                Coluna("Usuário"),
+                Coluna("Tipo", formatar=lambda t: _TIPO_LABELS.get(t or "", t or "")),
+                Coluna("Pessoa"),
+                Coluna("Documento"),
+                Coluna("Valor", formatar=lambda v: formatar_moeda(v or 0)),
+                Coluna("Descrição"),
+                Coluna("Gaveta"),
+            ],
+            self,
         )
+        self.table = QTableView()
+        self.table.setModel(self.table_model)
         self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table.setSortingEnabled(True)
         self.table.setAlternatingRowColors(True)
-        table_layout.addWidget(self.table)
+        self.table.setSelectionBehavior(QAbstractItemView.SelectRows)
+
+        # Totais: tabela agregada + gráfico, ambos do resumo diário
+        self.totais_model = ColumnarTableModel(
+            [
+                Coluna("Período"),
+                Coluna("Tipo", formatar=lambda t: _TIPO_LABELS.get(t or "", t or "")),
+                Coluna("Quantidade"),
+                Coluna("Valor", formatar=lambda v: formatar_moeda(v or 0)),
+            ],
+            self,
+        )
+        self.totais_table = QTableView()
+        self.totais_table.setModel(self.totais_model)
+        self.totais_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.totais_table.setSortingEnabled(True)
+        self.totais_table.setAlternatingRowColors(True)
+        self.grafico = GraficoBarras()
+        totais_split = QSplitter(Qt.Horizontal)
+        totais_split.addWidget(self.totais_table)
+        totais_split.addWidget(self.grafico)
+        totais_split.setStretchFactor(1, 2)
+
+        self.resultados = QStackedWidget()
+        self.resultados.addWidget(self.table)
+        self.resultados.addWidget(totais_split)
+        table_layout.addWidget(self.resultados)
         layout.addWidget(table_group)
 
         self.total_label = QLabel("Total: R$ 0,00")
         layout.addWidget(self.total_label)
 
         self.btn_buscar.clicked.connect(self._buscar)
+        self.btn_totais.clicked.connect(self._totais)
         self.btn_pdf.clicked.connect(self._exportar_pdf)
 
     def _load_data(self):
@@ -173,7 +223,7 @@ class RelatoriosWidget(QWidget):
                 self.lista_usuarios.addItem(item)
 
         # Load gavetas
-        gaveta_repo = SqliteGavetaRepo()
+        gaveta_repo = fabrica.gaveta_repo()
         gavetas = gaveta_repo.get_all()
         self.lista_gavetas.clear()
         for g in gavetas:
@@ -207,52 +257,79 @@ class RelatoriosWidget(QWidget):
                 status_list.append(item.text())
         return status_list
 
-    def _buscar(self):
-        empresa_ids = self._get_checked_ids(self.lista_empresas)
-        tipos = self._get_checked_tipos()
-        status_list = self._get_checked_status()
-        gaveta_ids = self._get_checked_ids(self.lista_gavetas)
+    def _filtros(self):
         if self.lista_usuarios is not None:
             usuario_ids = self._get_checked_ids(self.lista_usuarios)
         else:
             usuario_ids = [self.current_user["id"]]
+        return {
+            "empresa_ids": self._get_checked_ids(self.lista_empresas) or None,
+            "usuario_ids": usuario_ids or None,
+            "tipos": self._get_checked_tipos() or None,
+            "status_list": self._get_checked_status() or None,
+            "data_inicio": self.data_inicio.date().toString("yyyy-MM-dd"),
+            "data_fim": self.data_fim.date().toString("yyyy-MM-dd"),
+            "gaveta_ids": self._get_checked_ids(self.lista_gavetas) or None,
+        }
 
-        data_inicio = self.data_inicio.date().toString("yyyy-MM-dd")
-        data_fim = self.data_fim.date().toString("yyyy-MM-dd")
-
-        rows = list_recibos_filtrados(
-            empresa_ids=empresa_ids or None,
-            usuario_ids=usuario_ids or None,
-            tipos=tipos or None,
-            status_list=status_list or None,
-            data_inicio=data_inicio,
-            data_fim=data_fim,
-            gaveta_ids=gaveta_ids or None,
-        )
+    def _buscar(self):
+        # Principal e arquivos lidos na mesma foto do banco
+        with fabrica.instantaneo():
+            rows = list_recibos_com_arquivo(fabrica.list_recibos_filtrados, **self._filtros())
+        self.resultados.setCurrentIndex(0)
+        self.btn_pdf.setEnabled(True)
         self._render_table(rows)
 
+    def _totais(self):
+        """Totais sem listar recibos: lê o resumo diário (que já inclui os
+        dados arquivados), por dia em períodos de até um mês, senão por mês."""
+        filtros = self._filtros()
+        dias = self.data_inicio.date().daysTo(self.data_fim.date())
+        periodo = "dia" if dias <= 31 else "mes"
+        with fabrica.instantaneo():
+            rows = resumo_diario.totais([periodo, "tipo"], **filtros)
+
+        formato = (lambda p: f"{p[8:10]}/{p[5:7]}") if periodo == "dia" else (
+            lambda p: f"{p[5:7]}/{p[:4]}")
+        self.totais_model.set_rows(rows, [
+            lambda r: formato(r[periodo]),
+            lambda r: r["tipo"],
+            lambda r: r["quantidade"],
+            lambda r: r["total"],
+        ])
+        categorias = sorted({r[periodo] for r in rows})
+        posicao = {c: i for i, c in enumerate(categorias)}
+        series = {}
+        for r in rows:
+            rotulo = _TIPO_LABELS.get(r["tipo"], r["tipo"])
+            valores = series.setdefault(rotulo, [0.0] * len(categorias))
+            valores[posicao[r[periodo]]] += r["total"]
+        self.grafico.set_dados([formato(c) for c in categorias], series)
+        self.resultados.setCurrentIndex(1)
+        self.btn_pdf.setEnabled(False)
+
+        total = sum(r["total"] for r in rows)
+        quantidade = sum(r["quantidade"] for r in rows)
+        por_tipo = {}
+        for r in rows:
+            rotulo = _TIPO_LABELS.get(r["tipo"], r["tipo"])
+            por_tipo[rotulo] = por_tipo.get(rotulo, 0) + r["total"]
+        resumo_tipos = "  |  ".join(
+            f"{tipo}: R$ {formatar_moeda(v)}" for tipo, v in sorted(por_tipo.items())
+        )
+        self.total_label.setText(
+            f"Total: R$ {formatar_moeda(total)}  |  {quantidade} registro(s)\n"
+            f"{resumo_tipos}"
+        )
+
     def _render_table(self, rows):
-        self.table.setRowCount(0)
+        self.table.horizontalHeader().setSortIndicator(-1, Qt.AscendingOrder)
+        self.table_model.set_rows(rows, _EXTRATORES)
         total = 0.0
         totais_por_tipo = {}
         for row in rows:
-            row_idx = self.table.rowCount()
-            self.table.insertRow(row_idx)
-            self.table.setItem(row_idx, 0, QTableWidgetItem(row["created_at"] or ""))
-            self.table.setItem(row_idx, 1, QTableWidgetItem(row["razao_social"] or ""))
-            self.table.setItem(row_idx, 2, QTableWidgetItem(row["username"] or ""))
             tipo_key = row["tipo"] or ""
             tipo_display = _TIPO_LABELS.get(tipo_key, tipo_key)
-            self.table.setItem(row_idx, 3, QTableWidgetItem(tipo_display))
-            self.table.setItem(row_idx, 4, QTableWidgetItem(row["pessoa_nome"] or ""))
-            self.table.setItem(
-                row_idx, 5, QTableWidgetItem(row["pessoa_documento"] or "")
-            )
-            self.table.setItem(
-                row_idx, 6, QTableWidgetItem(formatar_moeda(row["valor"]))
-            )
-            self.table.setItem(row_idx, 7, QTableWidgetItem(row["descricao"] or ""))
-            self.table.setItem(row_idx, 8, QTableWidgetItem(row.get("gaveta_nome", "") or ""))
             valor = row["valor"] or 0
             total += valor
             totais_por_tipo[tipo_display] = totais_por_tipo.get(tipo_display, 0) + valor
@@ -261,7 +338,7 @@ class RelatoriosWidget(QWidget):
             f"{tipo}: R$ {formatar_moeda(v)}" for tipo, v in sorted(totais_por_tipo.items())
         )
         self.total_label.setText(
-            f"Total: R$ {formatar_moeda(total)}  |  {self.table.rowCount()} registro(s)\n"
+            f"Total: R$ {formatar_moeda(total)}  |  {len(rows)} registro(s)\n"
             f"{resumo_tipos}"
         )
         self._last_rows = rows
@@ -270,167 +347,22 @@ class RelatoriosWidget(QWidget):
         if not hasattr(self, "_last_rows"):
             QMessageBox.information(self, "Relatórios", "Faça uma busca primeiro.")
             return
-        from reportlab.lib.pagesizes import A4, landscape
-        from reportlab.pdfgen import canvas
-        from reportlab.lib.units import mm
-        import os
-        from app_paths import get_pdf_dir
-
-        base_dir = get_pdf_dir("Relatorios")
-        nome = datetime.now().strftime("relatorio_%Y%m%d_%H%M%S.pdf")
-        caminho = os.path.join(base_dir, nome)
+        import armazem_pdf
 
         # Check if any row has a gaveta_nome to decide whether to show that column
         has_gaveta = any(r.get("gaveta_nome") for r in self._last_rows)
-
-        c = canvas.Canvas(caminho, pagesize=landscape(A4))
-        largura, altura = landscape(A4)
-        margem_x = 15 * mm
-        margem_topo = 20 * mm
-        y = altura - margem_topo
-
-        def header():
-            nonlocal y
-            c.setFont("Helvetica-Bold", 12)
-            c.drawString(margem_x, y, "RELATÓRIO DE RECIBOS E SAÍDAS")
-            y -= 5 * mm
-            c.setFont("Helvetica", 8)
-            periodo = (
-                f"Período: {self.data_inicio.date().toString('dd/MM/yyyy')} "
-                f"a {self.data_fim.date().toString('dd/MM/yyyy')}  —  "
-                f"Gerado em: {datetime.now().strftime('%d/%m/%Y %H:%M')}"
-            )
-            c.drawString(margem_x, y, periodo)
-            y -= 6 * mm
-
-            c.setFont("Helvetica-Bold", 8)
-            if has_gaveta:
-                colunas = [
-                    ("Data/Hora", 32),
-                    ("Empresa", 28),
-                    ("Usuário", 26),
-                    ("Tipo", 30),
-                    ("Pessoa", 54),
-                    ("Valor", 22),
-                    ("Gaveta", 20),
-                    ("Descrição", 50),
-                ]
-            else:
-                colunas = [
-                    ("Data/Hora", 34),
-                    ("Empresa", 30),
-                    ("Usuário", 36),
-                    ("Tipo", 28),
-                    ("Pessoa", 60),
-                    ("Valor", 22),
-                    ("Descrição", 52),
-                ]
-            x = margem_x
-            for titulo, largura_col in colunas:
-                c.drawString(x, y, titulo)
-                x += largura_col * mm
-            y -= 4 * mm
-            c.line(margem_x, y, largura - margem_x, y)
-            y -= 4 * mm
-            return colunas
-
-        colunas = header()
-        c.setFont("Helvetica", 8)
-        for row in self._last_rows:
-            if y < 20 * mm:
-                c.showPage()
-                y = altura - margem_topo
-                colunas = header()
-                c.setFont("Helvetica", 8)
-
-            x = margem_x
-            tipo_key = row["tipo"] or ""
-            tipo_display = _TIPO_LABELS.get(tipo_key, tipo_key)
-            razao = row["razao_social"] or ""
-
-            if has_gaveta:
-                valores = [
-                    row["created_at"] or "",
-                    razao[:6] if razao else "",
-                    row["username"] or "",
-                    tipo_display,
-                    row["pessoa_nome"] or "",
-                    f"R$ {formatar_moeda(row['valor'])}",
-                    row.get("gaveta_nome", "") or "",
-                    row["descricao"] or "",
-                ]
-            else:
-                valores = [
-                    row["created_at"] or "",
-                    razao[:3],
-                    row["username"] or "",
-                    tipo_display,
-                    row["pessoa_nome"] or "",
-                    f"R$ {formatar_moeda(row['valor'])}",
-                    row["descricao"] or "",
-                ]
-
-            for (titulo, largura_col), val in zip(colunas, valores):
-                max_width = (largura_col - 1) * mm
-                texto = _truncate_to_width(val, max_width, c, "Helvetica", 8)
-                c.drawString(x, y, texto)
-                x += largura_col * mm
-            y -= 5 * mm
-
-        total = sum([r["valor"] or 0 for r in self._last_rows])
-        totais_por_tipo = {}
-        for r in self._last_rows:
-            tk = r["tipo"] or ""
-            td = _TIPO_LABELS.get(tk, tk)
-            totais_por_tipo[td] = totais_por_tipo.get(td, 0) + (r["valor"] or 0)
-
-        # Need space for total + type summary lines
-        linhas_resumo = len(totais_por_tipo) + 3  # total line + separator + types
-        espaco_necessario = linhas_resumo * 5 * mm + 10 * mm
-        if y < espaco_necessario:
-            c.showPage()
-            y = altura - margem_topo
-        y -= 3 * mm
-        c.setStrokeColorRGB(0, 0, 0)
-        c.line(margem_x, y, largura - margem_x, y)
-        y -= 6 * mm
-        c.setFont("Helvetica-Bold", 10)
-        c.drawString(
-            margem_x, y,
-            f"Total: R$ {formatar_moeda(total)}  —  {len(self._last_rows)} registro(s)"
+        inicio = self.data_inicio.date().toString("dd/MM/yyyy")
+        fim = self.data_fim.date().toString("dd/MM/yyyy")
+
+        caminho = armazem_pdf.gerar(
+            gerar_pdf_relatorio_recibos,
+            armazem_pdf.RELATORIO,
+            [f"{inicio}-{fim}"],
+            rows=self._last_rows,
+            periodo_inicio=inicio,
+            periodo_fim=fim,
+            rotulos_tipo=_TIPO_LABELS,
+            mostrar_gaveta=has_gaveta,
         )
-        y -= 8 * mm
-
-        # Summary by type
-        c.setFont("Helvetica-Bold", 9)
-        c.drawString(margem_x, y, "Resumo por Tipo:")
-        y -= 5 * mm
-        c.setFont("Helvetica", 9)
-        for tipo_nome in sorted(totais_por_tipo.keys()):
-            valor_tipo = totais_por_tipo[tipo_nome]
-            c.drawString(
-                margem_x + 5 * mm, y,
-                f"{tipo_nome}: R$ {formatar_moeda(valor_tipo)}"
-            )
-            y -= 5 * mm
-
-        c.save()
-        try:
-            os.startfile(caminho)
-        except Exception:
-            pass
+        abrir_pdf(caminho)
         QMessageBox.information(self, "Relatórios", f"PDF gerado em: {caminho}")
-
-
-def _truncate_to_width(texto, max_width, canvas_obj, font_name, font_size):
-    canvas_obj.setFont(font_name, font_size)
-    if canvas_obj.stringWidth(texto, font_name, font_size) <= max_width:
-        return texto
-    ellipsis = "..."
-    max_width = max_width - canvas_obj.stringWidth(ellipsis, font_name, font_size)
-    resultado = ""
-    for ch in texto:
-        if canvas_obj.stringWidth(resultado + ch, font_name, font_size) > max_width:
-            break
-        resultado += ch
-    return resultado + ellipsis
@@ -0,0 +1,209 @@
+"""Modelo de tabela colunar para grandes volumes de linhas.
+
+Os valores ficam em uma tupla por coluna (sem QTableWidgetItem por célula)
+e a formatação para exibição acontece sob demanda em data(), apenas para
+as células visíveis. A ordenação reordena um vetor de índices.
+
+LazyTableModel é a variante para fontes paginadas: as linhas chegam em
+páginas (fetchMore) conforme a rolagem se aproxima do fim da tabela.
+"""
+
+from array import array
+from typing import Callable, List, Optional, Sequence
+
+from PySide6.QtCore import QAbstractTableModel, QModelIndex, Qt
+
+
+class Coluna:
+    """Definição de coluna: título, formatador de exibição e cor opcional."""
+
+    __slots__ = ("titulo", "formatar", "cor", "alinhamento")
+
+    def __init__(self, titulo: str, formatar: Optional[Callable] = None,
+                 cor: Optional[Callable] = None, alinhamento=None):
+        self.titulo = titulo
+        self.formatar = formatar
+        self.cor = cor
+        self.alinhamento = alinhamento
+
+
+def _chave_ordenacao(valor):
+    # None sempre vai para o início, sem comparar tipos diferentes
+    return (valor is not None, valor)
+
+
+class ColumnarTableModel(QAbstractTableModel):
+    def __init__(self, colunas: Sequence[Coluna], parent=None):
+        super().__init__(parent)
+        self._colunas = list(colunas)
+        self._dados: list[tuple] = [() for _ in self._colunas]
+        self._ids: tuple = ()
+        self._ordem = array("l")
+
+    # --- Carga ---
+
+    def set_rows(self, rows, extratores: Sequence[Callable], id_fn: Optional[Callable] = None):
+        """Carrega `rows` extraindo cada coluna com a função correspondente."""
+        rows = rows if isinstance(rows, (list, tuple)) else list(rows)
+        self.beginResetModel()
+        self._dados = [tuple(map(fn, rows)) for fn in extratores]
+        self._ids = tuple(map(id_fn, rows)) if id_fn else ()
+        self._ordem = array("l", range(len(rows)))
+        self.endResetModel()
+
+    def clear(self):
+        self.beginResetModel()
+        self._dados = [() for _ in self._colunas]
+        self._ids = ()
+        self._ordem = array("l")
+        self.endResetModel()
+
+    def row_id(self, row: int):
+        if not self._ids or row < 0 or row >= len(self._ordem):
+            return None
+        return self._ids[self._ordem[row]]
+
+    def valor(self, row: int, column: int):
+        return self._dados[column][self._ordem[row]]
+
+    # --- QAbstractTableModel ---
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._ordem)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._colunas)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._colunas[section].titulo
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = self._colunas[index.column()]
+        if role == Qt.DisplayRole:
+            valor = self._dados[index.column()][self._ordem[index.row()]]
+            if col.formatar:
+                return col.formatar(valor)
+            return "" if valor is None else str(valor)
+        if role == Qt.ForegroundRole and col.cor:
+            return col.cor(self._dados[index.column()][self._ordem[index.row()]])
+        if role == Qt.TextAlignmentRole and col.alinhamento is not None:
+            return col.alinhamento
+        if role == Qt.UserRole:
+            return self.row_id(index.row())
+        return None
+
+    def sort(self, column, order=Qt.AscendingOrder):
+        self.layoutAboutToBeChanged.emit()
+        # Seleção e índice corrente seguem a linha de dados, não a posição
+        persistentes = self.persistentIndexList()
+        origens = [self._ordem[idx.row()] for idx in persistentes]
+        n = len(self._ordem)
+        if column < 0 or column >= len(self._dados):
+            self._ordem = array("l", range(n))
+        else:
+            valores = self._dados[column]
+            indices = sorted(
+                range(n),
+                key=lambda i: _chave_ordenacao(valores[i]),
+                reverse=(order == Qt.DescendingOrder),
+            )
+            self._ordem = array("l", indices)
+        if persistentes:
+            posicao = {origem: row for row, origem in enumerate(self._ordem)}
+            self.changePersistentIndexList(
+                persistentes,
+                [self.index(posicao[origem], idx.column())
+                 for idx, origem in zip(persistentes, origens)],
+            )
+        self.layoutChanged.emit()
+
+
+class LazyTableModel(QAbstractTableModel):
+    """Linhas buscadas por página sob demanda, na ordem da fonte (sem ordenação).
+
+    `buscar(ultima)` recebe a última linha já carregada (None no início) e
+    devolve a próxima página; uma página vazia encerra a fonte. `total`,
+    se conhecido, evita uma busca extra ao fim.
+    """
+
+    def __init__(self, colunas: Sequence[Coluna], extratores: Sequence[Callable],
+                 parent=None):
+        super().__init__(parent)
+        self._colunas = list(colunas)
+        self._extratores = list(extratores)
+        self._linhas: List[tuple] = []
+        self._buscar: Optional[Callable] = None
+        self._ultima = None
+        self._total: Optional[int] = None
+        self._fim = True
+
+    def set_fonte(self, buscar: Callable, total: Optional[int] = None):
+        self.beginResetModel()
+        self._linhas = []
+        self._buscar = buscar
+        self._ultima = None
+        self._total = total
+        self._fim = total == 0
+        self.endResetModel()
+
+    def carregadas(self) -> int:
+        return len(self._linhas)
+
+    # --- QAbstractTableModel ---
+
+    def canFetchMore(self, parent=QModelIndex()):
+        if parent.isValid() or self._fim:
+            return False
+        return self._total is None or len(self._linhas) < self._total
+
+    def fetchMore(self, parent=QModelIndex()):
+        if not self.canFetchMore(parent):
+            return
+        pagina = self._buscar(self._ultima)
+        if not pagina:
+            self._fim = True
+            return
+        inicio = len(self._linhas)
+        self.beginInsertRows(QModelIndex(), inicio, inicio + len(pagina) - 1)
+        extratores = self._extratores
+        self._linhas.extend(tuple(fn(row) for fn in extratores) for row in pagina)
+        self.endInsertRows()
+        self._ultima = pagina[-1]
+
+    def rowCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._linhas)
+
+    def columnCount(self, parent=QModelIndex()):
+        if parent.isValid():
+            return 0
+        return len(self._colunas)
+
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self._colunas[section].titulo
+        return None
+
+    def data(self, index, role=Qt.DisplayRole):
+        if not index.isValid():
+            return None
+        col = self._colunas[index.column()]
+        if role == Qt.DisplayRole:
+            valor = self._linhas[index.row()][index.column()]
+            if col.formatar:
+                return col.formatar(valor)
+            return "" if valor is None else str(valor)
+        if role == Qt.ForegroundRole and col.cor:
+            return col.cor(self._linhas[index.row()][index.column()])
+        if role == Qt.TextAlignmentRole and col.alinhamento is not None:
+            return col.alinhamento
+        return None
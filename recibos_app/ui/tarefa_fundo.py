@@ -0,0 +1,86 @@
+"""Tarefas demoradas fora da thread da interface, com uma janela de progresso.
+
+A função roda em uma thread própria e recebe progresso(feitos, total, texto),
+que pode ser chamada de lá; o resultado (ou o erro) volta para a thread da
+interface por sinais, como em ui.fila_pdf. A função não pode tocar em widgets.
+"""
+
+import logging
+import threading
+from typing import Callable, Optional
+
+from PySide6.QtCore import QObject, Qt, Signal
+from PySide6.QtWidgets import QProgressDialog, QWidget
+
+logger = logging.getLogger(__name__)
+
+# Tarefas em andamento: mantém os objetos vivos até o fim da thread
+_ativas = set()
+
+
+class TarefaFundo(QObject):
+    progresso = Signal(int, int, str)
+    concluida = Signal(object)
+    falhou = Signal(str)
+
+    def __init__(self, parent: QWidget, titulo: str, funcao: Callable,
+                 ao_concluir: Callable, ao_falhar: Optional[Callable] = None):
+        super().__init__()
+        self._funcao = funcao
+        self._ao_concluir = ao_concluir
+        self._ao_falhar = ao_falhar
+        self._dialogo = QProgressDialog(titulo, None, 0, 0, parent)
+        self._dialogo.setWindowTitle(titulo)
+        self._dialogo.setWindowModality(Qt.WindowModal)
+        self._dialogo.setCancelButton(None)
+        self._dialogo.setMinimumDuration(0)
+        self._dialogo.setAutoClose(False)
+        self._dialogo.setAutoReset(False)
+        self.progresso.connect(self._on_progresso)
+        self.concluida.connect(self._on_concluida)
+        self.falhou.connect(self._on_falhou)
+
+    def iniciar(self) -> None:
+        _ativas.add(self)
+        self._dialogo.show()
+        threading.Thread(target=self._rodar, name="tarefa-fundo", daemon=True).start()
+
+    def _rodar(self):
+        try:
+            resultado = self._funcao(
+                lambda feitos, total, texto="": self.progresso.emit(feitos, total, texto)
+            )
+        except Exception as e:
+            logger.exception("Falha na tarefa em segundo plano")
+            self.falhou.emit(str(e))
+        else:
+            self.concluida.emit(resultado)
+
+    def _encerrar(self):
+        self._dialogo.close()
+        self._dialogo.deleteLater()
+        _ativas.discard(self)
+
+    def _on_progresso(self, feitos, total, texto):
+        self._dialogo.setMaximum(total)
+        self._dialogo.setValue(feitos)
+        if texto:
+            self._dialogo.setLabelText(texto)
+
+    def _on_concluida(self, resultado):
+        self._encerrar()
+        self._ao_concluir(resultado)
+
+    def _on_falhou(self, mensagem):
+        self._encerrar()
+        if self._ao_falhar is not None:
+            self._ao_falhar(mensagem)
+
+
+def executar(parent: QWidget, titulo: str, funcao: Callable, ao_concluir: Callable,
+             ao_falhar: Optional[Callable] = None) -> TarefaFundo:
+    """Roda funcao(progresso) em segundo plano; ao_concluir(resultado) e
+    ao_falhar(mensagem) são chamadas na thread da interface."""
+    tarefa = TarefaFundo(parent, titulo, funcao, ao_concluir, ao_falhar)
+    tarefa.iniciar()
+    return tarefa